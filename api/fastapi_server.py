@@ -3,17 +3,35 @@ FastAPI server for backtesting - optimized for VM deployment
 More cost-effective than Cloud Run for frequent usage
 """
 import os
+import sys
+import json
+import time
+import asyncio
 import logging
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from pydantic import BaseModel, Field, field_validator
 import torch
-from google.cloud import storage
 import uvicorn
 
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.serving.model_registry import ModelRegistry
+from src.serving.executor import BacktestExecutor, ExecutorSaturatedError
+from src.serving.backtest_service import run_backtest_job, run_backtest_batch_job, make_request_key
+from src.serving.result_cache import BacktestResultCache
+from src.serving.job_store import JobStore
+from src.serving.job_manager import BacktestJobManager
+from src.serving.predictor import MicroBatchPredictor, ACTION_NAMES
+from src.serving.model_sync import ModelSync, GCSBackend, LocalDirectoryBackend
+from src.llm_agents.strategy_store import StrategyStore
+from src.telemetry.metrics import REGISTRY as METRICS
+from src.telemetry.instruments import HTTP_REQUEST_SECONDS
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,10 +43,54 @@ app = FastAPI(
     version="1.0.0"
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Latenza per route (template del path, non il path concreto) e status"""
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get('route')
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start_time,
+            method=request.method,
+            route=route.path if route is not None else 'unmatched',
+            status=status
+        )
+
+
 # Global state
 models_loaded = False
-ensemble_controller = None
+model_registry = None
+backtest_executor = None
+job_manager = None
+result_cache = None
+predictor = None
+strategy_store = None
+startup_timings = {}
 GCS_BUCKET = os.getenv("GCS_BUCKET", "rewts-trading-data")
+MODELS_DIR = os.getenv("MODELS_DIR", "/tmp/models")
+MODEL_CACHE_MB = float(os.getenv("MODEL_CACHE_MB", "2048"))
+MODEL_SYNC_BACKEND = os.getenv("MODEL_SYNC_BACKEND", "gcs")      # gcs | local | none
+MODEL_SYNC_SOURCE = os.getenv("MODEL_SYNC_SOURCE", "")           # root del backend local
+MODEL_SYNC_WORKERS = int(os.getenv("MODEL_SYNC_WORKERS", "8"))
+DATA_DIR = os.getenv("DATA_DIR", "data/processed")
+STRATEGIES_DIR = os.getenv("STRATEGIES_DIR", "data/llm_strategies")
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", str(os.cpu_count() or 1)))
+BACKTEST_QUEUE_SIZE = int(os.getenv("BACKTEST_QUEUE_SIZE", "16"))
+BACKTEST_EXECUTOR = os.getenv("BACKTEST_EXECUTOR", "process")
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "results/api/backtest_jobs.db")
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "256"))
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "results/api/result_cache")
+RESULT_CACHE_MEMORY_ENTRIES = int(os.getenv("RESULT_CACHE_MEMORY_ENTRIES", "256"))
+RESULT_CACHE_DISK_ENTRIES = int(os.getenv("RESULT_CACHE_DISK_ENTRIES", "4096"))
+BATCH_MAX_SPECS = int(os.getenv("BATCH_MAX_SPECS", "256"))
+BATCH_GROUP_SIZE = int(os.getenv("BATCH_GROUP_SIZE", "16"))
+PREDICT_MAX_BATCH = int(os.getenv("PREDICT_MAX_BATCH", "512"))
+PREDICT_MAX_WAIT_MS = float(os.getenv("PREDICT_MAX_WAIT_MS", "2"))
 
 
 # Pydantic models
@@ -39,6 +101,12 @@ class BacktestRequest(BaseModel):
     initial_balance: float = Field(10000, description="Initial balance in USD")
     transaction_cost: float = Field(0.001, description="Transaction cost (0.1% = 0.001)")
 
+    @field_validator("ticker")
+    @classmethod
+    def normalize_ticker(cls, value: str) -> str:
+        # Stessa chiave di cache e stesso modello per "aapl" e "AAPL"
+        return value.strip().upper()
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -65,6 +133,68 @@ class BacktestResponse(BaseModel):
     execution_time_seconds: float
 
 
+class BacktestJobResponse(BaseModel):
+    job_id: str
+    status: str
+    deduplicated: bool
+    status_url: str
+
+
+class BacktestJobStatus(BaseModel):
+    job_id: str
+    status: str
+    progress: float
+    queue_position: Optional[int] = None
+    params: Dict[str, Any]
+    result: Optional[BacktestResponse] = None
+    error: Optional[str] = None
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+
+class BacktestBatchRequest(BaseModel):
+    specs: List[BacktestRequest] = Field(..., description="Backtest specs (any mix of tickers and date ranges)")
+
+
+class PredictRequest(BaseModel):
+    ticker: str = Field(..., description="Stock ticker symbol (e.g., AAPL)")
+    observation: Optional[List[float]] = Field(None, description="Single observation vector")
+    observations: Optional[List[List[float]]] = Field(None, description="Batch of observation vectors")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "ticker": "AAPL",
+                "observation": [0.01, 0.5, 0.2, 0.0, 0.1, 0.3, 0.6, 0.5, 0.02, 1.0, 0.0]
+            }
+        }
+
+
+class PredictResponse(BaseModel):
+    ticker: str
+    actions: List[int]
+    action_names: List[str]
+    q_values: List[List[float]]
+    num_chunks: int
+    batch_size: int
+    latency_ms: float
+
+
+class StrategyResponse(BaseModel):
+    ticker: str
+    date: str
+    period_start: str
+    period_index: int
+    direction: int
+    recommendation: str
+    confidence: float
+    strength: float
+    tau: float
+    explanation: str
+    timestamp: str
+
+
 class HealthResponse(BaseModel):
     status: str
     models_loaded: bool
@@ -75,102 +205,119 @@ class HealthResponse(BaseModel):
 @app.on_event("startup")
 async def startup_event():
     """Load models on startup"""
-    global models_loaded, ensemble_controller
+    global models_loaded, model_registry, backtest_executor, job_manager, result_cache, predictor, strategy_store
 
     logger.info("🚀 Starting FastAPI server...")
-    logger.info(f"GCS Bucket: {GCS_BUCKET}")
+    logger.info(f"Model sync: {MODEL_SYNC_BACKEND} ({GCS_BUCKET if MODEL_SYNC_BACKEND == 'gcs' else MODEL_SYNC_SOURCE})")
     logger.info(f"GPU Available: {torch.cuda.is_available()}")
 
+    startup_start = time.perf_counter()
+    startup_timings.clear()
+
     try:
-        # Download models from GCS
-        logger.info("📦 Downloading models from GCS...")
-        download_models_from_gcs()
+        # Sync incrementale dei modelli (solo file nuovi o modificati)
+        phase_start = time.perf_counter()
+        logger.info("📦 Syncing models...")
+        sync_report = sync_models()
+        startup_timings['model_sync'] = time.perf_counter() - phase_start
+        if sync_report is not None:
+            startup_timings.update({f"model_sync_{phase}": seconds
+                                    for phase, seconds in sync_report['timings'].items() if phase != 'total'})
+
+        # Registry: ensemble caricati al primo utilizzo, LRU entro MODEL_CACHE_MB
+        phase_start = time.perf_counter()
+        logger.info("🔧 Initializing model registry...")
+        model_registry = ModelRegistry(models_dir=MODELS_DIR, max_memory_mb=MODEL_CACHE_MB)
+        startup_timings['registry'] = time.perf_counter() - phase_start
+
+        # Backtest CPU-bound in un pool limitato, fuori dall'event loop
+        phase_start = time.perf_counter()
+        backtest_executor = BacktestExecutor(
+            models_dir=MODELS_DIR,
+            data_dir=DATA_DIR,
+            strategies_dir=STRATEGIES_DIR,
+            max_workers=BACKTEST_WORKERS,
+            max_queue=BACKTEST_QUEUE_SIZE,
+            executor_type=BACKTEST_EXECUTOR,
+            worker_memory_mb=MODEL_CACHE_MB / BACKTEST_WORKERS
+        )
+        startup_timings['executor'] = time.perf_counter() - phase_start
+
+        # Risultati memoizzati per (richiesta, versione del modello); l'indice
+        # delle voci su disco viene costruito una volta, fuori dall'event loop
+        phase_start = time.perf_counter()
+        result_cache = await asyncio.to_thread(
+            BacktestResultCache,
+            RESULT_CACHE_DIR,
+            max_memory_entries=RESULT_CACHE_MEMORY_ENTRIES,
+            max_disk_entries=RESULT_CACHE_DISK_ENTRIES
+        )
+
+        # Job asincroni: coda locale + risultati persistiti in SQLite
+        job_manager = BacktestJobManager(
+            backtest_executor, JobStore(JOB_DB_PATH), model_registry,
+            max_pending=JOB_QUEUE_SIZE, result_cache=result_cache
+        )
+        await job_manager.start()
+        startup_timings['job_queue'] = time.perf_counter() - phase_start
+
+        # /predict: richieste concorrenti coalescate in micro-batch
+        predictor = MicroBatchPredictor(
+            model_registry, max_batch_size=PREDICT_MAX_BATCH, max_wait_ms=PREDICT_MAX_WAIT_MS
+        )
 
-        # Load ensemble controller
-        logger.info("🔧 Loading ensemble controller...")
-        ensemble_controller = load_ensemble_controller()
+        # /strategies: strategie LLM precalcolate, lookup per data senza chiamate all'LLM
+        strategy_store = StrategyStore(STRATEGIES_DIR, DATA_DIR)
 
         models_loaded = True
-        logger.info("✅ Models loaded successfully!")
+        startup_timings['total'] = time.perf_counter() - startup_start
+        logger.info(f"✅ Models available: {model_registry.available_tickers()}")
+        logger.info("⏱️ Cold start: " + ", ".join(f"{phase} {seconds:.3f}s"
+                                                  for phase, seconds in startup_timings.items()))
 
     except Exception as e:
         logger.error(f"❌ Failed to load models: {e}")
         models_loaded = False
 
 
-def download_models_from_gcs():
-    """Download trained models from Google Cloud Storage"""
-    client = storage.Client()
-    bucket = client.bucket(GCS_BUCKET)
-
-    # Create local models directory
-    os.makedirs("/tmp/models", exist_ok=True)
-
-    # List all model files
-    blobs = bucket.list_blobs(prefix="models/")
-
-    for blob in blobs:
-        if blob.name.endswith('.pt'):
-            local_path = f"/tmp/{blob.name}"
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-
-            logger.info(f"Downloading {blob.name}...")
-            blob.download_to_filename(local_path)
-
-    logger.info("✅ All models downloaded")
-
-
-def load_ensemble_controller():
-    """Load the ensemble controller with all chunk models"""
-    # TODO: Implement actual ensemble loading
-    # This is a placeholder - replace with your actual implementation
-
-    from src.hybrid_model.ensemble_controller import EnsembleController
+def sync_models():
+    """
+    Sincronizza MODELS_DIR dal backend configurato (MODEL_SYNC_BACKEND)
 
-    controller = EnsembleController(
-        num_chunks=10,  # Adjust based on your config
-        model_dir="/tmp/models"
+    Returns:
+        Report di ModelSync.sync, o None se il sync è disabilitato
+    """
+    if MODEL_SYNC_BACKEND == 'none':
+        logger.info("Model sync disabled, using local models only")
+        return None
+    if MODEL_SYNC_BACKEND == 'local':
+        backend = LocalDirectoryBackend(MODEL_SYNC_SOURCE)
+    elif MODEL_SYNC_BACKEND == 'gcs':
+        backend = GCSBackend(GCS_BUCKET)
+    else:
+        raise ValueError(f"Unknown model sync backend: {MODEL_SYNC_BACKEND}")
+
+    report = ModelSync(backend, MODELS_DIR, prefix="models/", max_workers=MODEL_SYNC_WORKERS).sync()
+
+    logger.info(
+        f"✅ Models synced: {report['downloaded']} downloaded ({report['bytes_downloaded'] / 1e6:.1f} MB), "
+        f"{report['skipped']} up to date, {len(report['failed'])} failed"
     )
+    if report['failed']:
+        raise IOError(f"Failed to sync models: {report['failed']}")
 
-    return controller
-
-
-def run_backtest(
-    ticker: str,
-    start_date: str,
-    end_date: str,
-    initial_balance: float,
-    transaction_cost: float
-) -> Dict[str, Any]:
-    """
-    Execute backtest with ensemble model
+    return report
 
-    TODO: Replace with actual backtesting implementation
-    """
-    import time
-    import numpy as np
-
-    start_time = time.time()
-
-    # Placeholder implementation
-    # Replace with actual backtesting logic using ensemble_controller
-
-    # Simulate some computation
-    time.sleep(1)
-
-    # Mock results (replace with real results)
-    results = {
-        'sharpe_ratio': np.random.uniform(0.5, 2.0),
-        'max_drawdown': np.random.uniform(0.1, 0.4),
-        'cumulative_return': np.random.uniform(-0.2, 0.8),
-        'total_trades': np.random.randint(50, 200),
-        'win_rate': np.random.uniform(0.4, 0.7),
-        'profit_factor': np.random.uniform(0.8, 2.5),
-        'final_balance': initial_balance * (1 + np.random.uniform(-0.2, 0.8)),
-        'execution_time_seconds': time.time() - start_time
-    }
 
-    return results
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop backtest workers"""
+    if job_manager is not None:
+        await job_manager.stop()
+    if backtest_executor is not None:
+        backtest_executor.shutdown(wait=False)
+    if predictor is not None:
+        predictor.shutdown()
 
 
 @app.get("/", response_model=Dict[str, str])
@@ -195,12 +342,30 @@ async def health_check():
     )
 
 
+def make_backtest_response(params: Dict[str, Any], results: Dict[str, Any]) -> BacktestResponse:
+    """Risposta API da parametri della richiesta e metriche di run_backtest_job"""
+    return BacktestResponse(
+        ticker=params['ticker'],
+        start_date=params['start_date'],
+        end_date=params['end_date'],
+        sharpe_ratio=round(results['sharpe_ratio'], 3),
+        max_drawdown=round(results['max_drawdown'], 3),
+        cumulative_return=round(results['cumulative_return'], 3),
+        total_trades=results['total_trades'],
+        win_rate=round(results['win_rate'], 3),
+        profit_factor=round(results['profit_factor'], 3),
+        final_balance=round(results['final_balance'], 2),
+        execution_time_seconds=round(results['execution_time_seconds'], 2)
+    )
+
+
 @app.post("/backtest", response_model=BacktestResponse)
-async def backtest(request: BacktestRequest):
+async def backtest(request: BacktestRequest, response: Response):
     """
     Run backtest for a given ticker and date range
 
-    Returns detailed performance metrics
+    Returns detailed performance metrics. Repeated requests against the same
+    model version are served from the result cache (X-Cache: HIT).
     """
     if not models_loaded:
         raise HTTPException(
@@ -211,61 +376,350 @@ async def backtest(request: BacktestRequest):
     logger.info(f"📊 Running backtest for {request.ticker} ({request.start_date} to {request.end_date})")
 
     try:
-        # Run backtest
-        results = run_backtest(
-            ticker=request.ticker,
-            start_date=request.start_date,
-            end_date=request.end_date,
-            initial_balance=request.initial_balance,
-            transaction_cost=request.transaction_cost
-        )
+        params = request.model_dump()
+
+        # Il primo digest di un modello .pkl legge e hasha tutto il file: fuori dall'event loop
+        model_digest = await asyncio.to_thread(model_registry.model_digest, request.ticker)
+        if model_digest is None:
+            raise FileNotFoundError(f"Model not found for {request.ticker}")
+        cache_key = make_request_key(params, model_digest)
+
+        results = await result_cache.get_async(cache_key)
+        if results is not None:
+            response.headers["X-Cache"] = "HIT"
+            logger.info(f"⚡ Backtest served from cache ({cache_key[:12]})")
+            return make_backtest_response(params, results)
+
+        # Run backtest nel pool (429 se la coda è piena)
+        results = await backtest_executor.run(run_backtest_job, params)
+        await result_cache.put_async(cache_key, results, ticker=request.ticker, model_digest=model_digest)
+        response.headers["X-Cache"] = "MISS"
 
         # Prepare response
-        response = BacktestResponse(
-            ticker=request.ticker,
-            start_date=request.start_date,
-            end_date=request.end_date,
-            sharpe_ratio=round(results['sharpe_ratio'], 3),
-            max_drawdown=round(results['max_drawdown'], 3),
-            cumulative_return=round(results['cumulative_return'], 3),
-            total_trades=results['total_trades'],
-            win_rate=round(results['win_rate'], 3),
-            profit_factor=round(results['profit_factor'], 3),
-            final_balance=round(results['final_balance'], 2),
-            execution_time_seconds=round(results['execution_time_seconds'], 2)
-        )
+        backtest_response = make_backtest_response(params, results)
 
-        logger.info(f"✅ Backtest completed - Sharpe: {response.sharpe_ratio}, Return: {response.cumulative_return}")
+        logger.info(f"✅ Backtest completed - Sharpe: {backtest_response.sharpe_ratio}, Return: {backtest_response.cumulative_return}")
 
-        return response
+        return backtest_response
 
+    except ExecutorSaturatedError as e:
+        logger.warning(f"⚠️ Backtest rejected: {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"❌ Backtest failed: {e}")
         raise HTTPException(status_code=500, detail=f"Backtest failed: {str(e)}")
 
 
+@app.post("/backtests", response_model=BacktestJobResponse, status_code=202)
+async def submit_backtest_job(request: BacktestRequest):
+    """
+    Submit a backtest job and return immediately
+
+    Poll GET /backtests/{job_id} for status, progress and result. Identical
+    requests against the same model version return the existing job.
+    """
+    if not models_loaded:
+        raise HTTPException(
+            status_code=503,
+            detail="Models not loaded yet. Please wait and retry."
+        )
+
+    try:
+        job, deduplicated = await job_manager.submit(request.model_dump())
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    logger.info(f"📥 Backtest job {job['job_id']} for {request.ticker} ({job['status']}, deduplicated={deduplicated})")
+
+    return BacktestJobResponse(
+        job_id=job['job_id'],
+        status=job['status'],
+        deduplicated=deduplicated,
+        status_url=f"/backtests/{job['job_id']}"
+    )
+
+
+@app.get("/backtests/{job_id}", response_model=BacktestJobStatus)
+async def get_backtest_job(job_id: str):
+    """Get status, progress and (when completed) result of a backtest job"""
+    if not models_loaded:
+        raise HTTPException(
+            status_code=503,
+            detail="Models not loaded yet. Please wait and retry."
+        )
+
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+
+    result = job['result']
+    return BacktestJobStatus(
+        job_id=job['job_id'],
+        status=job['status'],
+        progress=round(job['progress'], 4),
+        queue_position=job['queue_position'],
+        params=job['params'],
+        result=make_backtest_response(job['params'], result) if result is not None else None,
+        error=job['error'],
+        created_at=job['created_at'],
+        started_at=job['started_at'],
+        finished_at=job['finished_at']
+    )
+
+
+def _ndjson(record: Dict[str, Any]) -> str:
+    return json.dumps(record) + "\n"
+
+
+async def _run_batch_group(ticker: str, specs: List[Any]):
+    """Esegue un sotto-batch dello stesso ticker nel pool, attendendo se la coda è piena"""
+    try:
+        return await backtest_executor.run_when_available(run_backtest_batch_job, ticker, specs)
+    except Exception as e:
+        return [{'index': index, 'status': 'error', 'error': str(e)} for index, _ in specs]
+
+
+@app.post("/backtest/batch")
+async def backtest_batch(request: BacktestBatchRequest):
+    """
+    Run many backtests in one request, streaming results as NDJSON
+
+    Specs are grouped by ticker: each group loads model and market data once and
+    shares the market-feature forward pass across overlapping date ranges. One
+    line {"type": "result", "index", "status", ...} is emitted per spec as its
+    group completes (cached results first), followed by a final
+    {"type": "summary"} line.
+    """
+    if not models_loaded:
+        raise HTTPException(
+            status_code=503,
+            detail="Models not loaded yet. Please wait and retry."
+        )
+
+    if len(request.specs) > BATCH_MAX_SPECS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many specs ({len(request.specs)} > {BATCH_MAX_SPECS})"
+        )
+
+    logger.info(f"📊 Running batch of {len(request.specs)} backtests")
+
+    async def stream_results():
+        start_time = time.time()
+        num_cached = 0
+        num_errors = 0
+
+        # Cache hit e ticker sconosciuti subito, il resto raggruppato per ticker
+        groups = {}
+        cache_keys = {}
+        for index, spec in enumerate(request.specs):
+            params = spec.model_dump()
+
+            model_digest = await asyncio.to_thread(model_registry.model_digest, params['ticker'])
+            if model_digest is None:
+                num_errors += 1
+                yield _ndjson({'type': 'result', 'index': index, 'status': 'error',
+                               'error': f"Model not found for {params['ticker']}"})
+                continue
+
+            cache_key = make_request_key(params, model_digest)
+            results = await result_cache.get_async(cache_key)
+            if results is not None:
+                num_cached += 1
+                yield _ndjson({'type': 'result', 'index': index, 'status': 'ok', 'cached': True,
+                               'result': make_backtest_response(params, results).model_dump()})
+                continue
+
+            cache_keys[index] = (cache_key, params, model_digest)
+            groups.setdefault(params['ticker'], []).append((index, params))
+
+        # Sotto-batch limitati: distribuiscono i ticker grandi fra i worker
+        tasks = []
+        for ticker, specs in groups.items():
+            for i in range(0, len(specs), BATCH_GROUP_SIZE):
+                tasks.append(asyncio.create_task(_run_batch_group(ticker, specs[i:i + BATCH_GROUP_SIZE])))
+
+        try:
+            for next_group in asyncio.as_completed(tasks):
+                for output in await next_group:
+                    index = output['index']
+                    cache_key, params, model_digest = cache_keys[index]
+
+                    if output['status'] != 'ok':
+                        num_errors += 1
+                        yield _ndjson({'type': 'result', 'index': index, 'status': 'error',
+                                       'error': output['error']})
+                        continue
+
+                    await result_cache.put_async(cache_key, output['result'], ticker=params['ticker'],
+                                     model_digest=model_digest)
+                    yield _ndjson({'type': 'result', 'index': index, 'status': 'ok', 'cached': False,
+                                   'result': make_backtest_response(params, output['result']).model_dump()})
+        finally:
+            # Client disconnesso: i sotto-batch non ancora avviati non servono più
+            for task in tasks:
+                task.cancel()
+
+        elapsed = time.time() - start_time
+        logger.info(f"✅ Batch completed - {len(request.specs)} specs, {num_cached} cached, "
+                    f"{num_errors} errors in {elapsed:.2f}s")
+
+        yield _ndjson({'type': 'summary', 'num_specs': len(request.specs), 'cached': num_cached,
+                       'errors': num_errors, 'execution_time_seconds': round(elapsed, 2)})
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@app.post("/predict", response_model=PredictResponse)
+async def predict(request: PredictRequest):
+    """
+    Ensemble action for one or many live observations
+
+    Returns the argmax action and the ensemble-weighted Q-values per
+    observation. Concurrent calls for the same ticker are coalesced into
+    micro-batches and evaluated with a single stacked forward pass.
+    """
+    if not models_loaded:
+        raise HTTPException(
+            status_code=503,
+            detail="Models not loaded yet. Please wait and retry."
+        )
+
+    if (request.observation is None) == (request.observations is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of 'observation' or 'observations'")
+    observations = [request.observation] if request.observation is not None else request.observations
+
+    start_time = time.perf_counter()
+    try:
+        result = await predictor.predict(request.ticker, observations)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"❌ Prediction failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+    return PredictResponse(
+        ticker=request.ticker,
+        actions=result['actions'],
+        action_names=[ACTION_NAMES[a] for a in result['actions']],
+        q_values=result['q_values'],
+        num_chunks=result['num_chunks'],
+        batch_size=result['batch_size'],
+        latency_ms=round((time.perf_counter() - start_time) * 1000.0, 3)
+    )
+
+
+@app.get("/strategies/{ticker}", response_model=StrategyResponse)
+async def get_strategy(ticker: str, date: Optional[str] = None):
+    """
+    Precomputed LLM strategy active on a date (default: today)
+
+    Served from the strategy store: O(1) lookup by date, no LLM call.
+    """
+    if strategy_store is None:
+        raise HTTPException(status_code=503, detail="Strategy store not initialized yet. Please wait and retry.")
+
+    ticker = ticker.upper()
+    day = date or datetime.now().strftime('%Y-%m-%d')
+    try:
+        strategy = await asyncio.to_thread(strategy_store.lookup, ticker, day)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if strategy is None:
+        raise HTTPException(status_code=404, detail=f"No strategy for {ticker} on {day}")
+
+    return StrategyResponse(
+        ticker=ticker,
+        date=day,
+        period_start=strategy['period_start'],
+        period_index=strategy['period_index'],
+        direction=strategy['direction'],
+        recommendation='LONG' if strategy['direction'] == 1 else 'SHORT',
+        confidence=strategy['confidence'],
+        strength=strategy['strength'],
+        tau=strategy['tau'],
+        explanation=strategy['explanation'],
+        timestamp=str(strategy['timestamp'])
+    )
+
+
 @app.get("/models/info")
 async def models_info():
     """Get information about loaded models"""
     if not models_loaded:
         return {"status": "not_loaded", "models": []}
 
-    # TODO: Return actual model information
     return {
         "status": "loaded",
-        "num_chunks": 10,
-        "model_dir": "/tmp/models",
-        "ensemble_type": "ReWTSE"
+        "model_dir": MODELS_DIR,
+        "ensemble_type": "ReWTSE",
+        "available_tickers": model_registry.available_tickers(),
+        "resident_models": model_registry.resident_info(),
+        "registry": model_registry.get_stats(),
+        "executor": backtest_executor.get_stats(),
+        "jobs": job_manager.get_stats(),
+        "result_cache": result_cache.get_stats(),
+        "startup_timings": startup_timings,
+        "predictor": predictor.get_stats(),
+        "strategy_store": strategy_store.get_stats()
     }
 
 
+def collect_component_metrics():
+    """Gauge dalle get_stats() dei componenti del server (valutate a ogni scrape)"""
+    if not models_loaded:
+        return []
+
+    components = {
+        'model_registry': model_registry.get_stats(),
+        'backtest_executor': backtest_executor.get_stats(),
+        'backtest_jobs': job_manager.get_stats(),
+        'result_cache': result_cache.get_stats(),
+        'predictor': predictor.get_stats()
+    }
+
+    families = []
+    for component, stats in components.items():
+        for key, value in stats.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            families.append((f"rewts_{component}_{key}", 'gauge', f"{component} {key}", [({}, value)]))
+        if component == 'backtest_jobs':
+            families.append((f"rewts_{component}_by_status", 'gauge', "Backtest jobs by status",
+                             [({'status': status}, count) for status, count in stats['jobs'].items()]))
+
+    families.append(('rewts_models_loaded', 'gauge', 'Models loaded and API ready', [({}, 1)]))
+    families.extend(
+        (f"rewts_startup_{phase}_seconds", 'gauge', f"Cold start {phase} time", [({}, seconds)])
+        for phase, seconds in startup_timings.items()
+    )
+    return families
+
+
+METRICS.register_collector(collect_component_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics (text exposition format)"""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/tickers")
 async def available_tickers():
     """Get list of available tickers"""
-    # TODO: Return actual list from config or data
+    tickers = model_registry.available_tickers() if model_registry is not None else []
     return {
-        "tickers": ["AAPL", "AMZN", "GOOGL", "META", "MSFT", "TSLA"],
-        "count": 6
+        "tickers": tickers,
+        "count": len(tickers)
     }
 
 
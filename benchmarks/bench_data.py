@@ -0,0 +1,90 @@
+"""
+Benchmark Data
+Throughput di StrategyCache (get/set) e del calcolo degli indicatori tecnici
+"""
+
+import tempfile
+from dataclasses import asdict
+
+import numpy as np
+
+from harness import benchmark
+from src.utils.strategy_cache import StrategyCache
+from src.utils.synthetic_data import (
+    make_synthetic_market_data,
+    make_synthetic_strategies,
+    add_technical_indicators
+)
+
+MODEL_NAME = 'deepseek-chat'
+TEMPERATURE = 0.7
+
+
+def make_cache_inputs(num_entries, seed=0):
+    """Argomenti di StrategyCache.get/set per num_entries chiavi distinte"""
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.arange(num_entries) * 0.01
+    volumes = rng.integers(5_000, 50_000, num_entries) * 1000
+    return [
+        (
+            'AAPL',
+            {'Close': float(close), 'Volume': int(volume)},
+            {},
+            {'rsi': float(rng.uniform(20, 80)), 'macd': float(rng.normal(0, 1))},
+            {},
+            {'sentiment': 'neutral', 'confidence': 0.5},
+            MODEL_NAME,
+            TEMPERATURE
+        )
+        for close, volume in zip(closes, volumes)
+    ]
+
+
+def make_strategy_cache(num_entries):
+    """StrategyCache in una directory temporanea con num_entries strategie"""
+    tmp_dir = tempfile.TemporaryDirectory(prefix='bench_strategy_cache_')
+    cache = StrategyCache(cache_dir=tmp_dir.name)
+    inputs = make_cache_inputs(num_entries)
+    for args, strategy in zip(inputs, make_synthetic_strategies(num_entries)):
+        cache.cache_data[cache._generate_key(*args)] = asdict(strategy)
+    cache._save_cache()
+    # Il TemporaryDirectory vive quanto la cache
+    cache._bench_tmp_dir = tmp_dir
+    return cache, inputs
+
+
+@benchmark('strategy_cache.get', unit='lookups', params={'entries': [100, 10000]},
+           quick_params={'entries': [1000]})
+def strategy_cache_get(entries):
+    """Lookup (hit) di 100 chiavi: generazione chiave md5 più dict lookup"""
+    cache, inputs = make_strategy_cache(entries)
+    batch = inputs[:100]
+
+    def run():
+        for args in batch:
+            cache.get(*args)
+
+    return run, len(batch)
+
+
+@benchmark('strategy_cache.set', unit='writes', params={'entries': [100, 1000]},
+           quick_params={'entries': [100]})
+def strategy_cache_set(entries):
+    """Sovrascrittura di 10 chiavi esistenti (ogni set riscrive il file JSON)"""
+    cache, inputs = make_strategy_cache(entries)
+    strategy = make_synthetic_strategies(1)[0]
+    batch = inputs[:10]
+
+    def run():
+        for args in batch:
+            cache.set(*args, strategy)
+
+    return run, len(batch)
+
+
+@benchmark('indicators.add_technical_indicators', unit='rows', params={'days': [1000, 10000]},
+           quick_params={'days': [2500]})
+def technical_indicators(days):
+    """HV, SMA (20/50/200) e slope, RSI, MACD e ATR su un DataFrame OHLCV"""
+    ohlcv = make_synthetic_market_data(days)[['Open', 'High', 'Low', 'Close', 'Volume']]
+    return (lambda: add_technical_indicators(ohlcv.copy())), days
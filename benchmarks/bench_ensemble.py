@@ -0,0 +1,39 @@
+"""
+Benchmark Ensemble
+Latenza di optimize_weights (numero di modelli x lookback) e predict_ensemble (numero di chunk)
+"""
+
+import numpy as np
+
+from harness import benchmark
+from src.utils.synthetic_data import make_synthetic_ensemble
+
+STATE_DIM = 11
+REWTS_CONFIG = {'hidden_dims': [256, 256, 128], 'forecast_horizon': 1}
+
+
+@benchmark('ensemble.optimize_weights', unit='solves',
+           params={'models': [1, 5, 10, 20], 'lookback': [50, 200, 500]},
+           quick_params={'models': [5], 'lookback': [200]})
+def optimize_weights(models, lookback):
+    """Forecast matrix M_h (lookback x models forward) più il QP cvxopt"""
+    ensemble = make_synthetic_ensemble(models, REWTS_CONFIG)
+    rng = np.random.default_rng(0)
+    lookback_data = rng.normal(size=(lookback + ensemble.forecast_horizon, STATE_DIM)).astype(np.float32)
+    lookback_returns = rng.normal(0, 0.01, lookback)
+    return (lambda: ensemble.optimize_weights(lookback_data, lookback_returns)), 1
+
+
+@benchmark('ensemble.predict_ensemble', unit='predictions',
+           params={'chunks': [1, 5, 10, 20]}, quick_params={'chunks': [5]})
+def predict_ensemble(chunks):
+    """Una predizione per stato su 64 stati, pesi uniformi"""
+    ensemble = make_synthetic_ensemble(chunks, REWTS_CONFIG)
+    ensemble.current_weights = np.ones(chunks) / chunks
+    states = np.random.default_rng(0).normal(size=(64, STATE_DIM)).astype(np.float32)
+
+    def run():
+        for state in states:
+            ensemble.predict_ensemble(state)
+
+    return run, len(states)
@@ -0,0 +1,115 @@
+"""
+Benchmark RL
+Throughput di TradingEnv.step, ReplayBuffer.sample, DDQNAgent (train_step, select_action)
+e del training loop di train_chunk_model (loop classico vs copie dell'env in batch)
+"""
+
+import numpy as np
+
+from harness import benchmark
+from src.rl_agents.trading_env import TradingEnv
+from src.rl_agents.ddqn_agent import DDQNAgent, ReplayBuffer
+from src.hybrid_model.ensemble_controller import ReWTSEnsembleController
+from src.utils.synthetic_data import make_synthetic_market_data, make_synthetic_strategies
+
+ENV_CONFIG = {'initial_balance': 10000, 'transaction_cost': 0.0015, 'max_position': 0.95}
+STATE_DIM = 11
+ACTION_DIM = 3
+
+
+def make_env(num_days, seed=0):
+    market_df = make_synthetic_market_data(num_days, seed=seed)
+    strategies = make_synthetic_strategies(num_days // 20 + 1, seed=seed)
+    return TradingEnv(market_df, strategies, ENV_CONFIG)
+
+
+def fill_replay_buffer(buffer, num_transitions, seed=0):
+    rng = np.random.default_rng(seed)
+    states = rng.normal(size=(num_transitions + 1, STATE_DIM)).astype(np.float32)
+    actions = rng.integers(0, ACTION_DIM, num_transitions)
+    rewards = rng.normal(0, 0.01, num_transitions)
+    for i in range(num_transitions):
+        buffer.push(states[i], int(actions[i]), float(rewards[i]), states[i + 1], False)
+    return buffer
+
+
+@benchmark('env.step', unit='steps', params={'days': [250, 1000, 2500]}, quick_params={'days': [500]})
+def env_episode(days):
+    """Un episodio completo (reset + step fino a done) con azioni random fisse"""
+    env = make_env(days)
+    actions = np.random.default_rng(0).integers(0, ACTION_DIM, days).tolist()
+
+    def run():
+        env.reset()
+        done = False
+        i = 0
+        while not done:
+            _, _, done, _ = env.step(actions[i])
+            i += 1
+
+    return run, days - 1
+
+
+@benchmark('replay.sample', unit='batches', params={'batch_size': [64, 128, 256]},
+           quick_params={'batch_size': [128]})
+def replay_sample(batch_size):
+    """sample() su un buffer con 50k transizioni"""
+    buffer = fill_replay_buffer(ReplayBuffer(50000), 50000)
+    return (lambda: buffer.sample(batch_size)), 1
+
+
+@benchmark('ddqn.train_step', unit='updates', params={'batch_size': [64, 128, 256]},
+           quick_params={'batch_size': [128]})
+def ddqn_train_step(batch_size):
+    """Update DDQN completo (sample, forward policy/target, backward, Adam)"""
+    agent = DDQNAgent(STATE_DIM, ACTION_DIM, {'batch_size': batch_size, 'buffer_size': 10000})
+    fill_replay_buffer(agent.replay_buffer, 10000)
+    return agent.train_step, 1
+
+
+@benchmark('ddqn.select_action', unit='actions', params={})
+def ddqn_select_action():
+    """Azione greedy su 256 stati (una forward per chiamata, come nel training loop)"""
+    agent = DDQNAgent(STATE_DIM, ACTION_DIM, {'buffer_size': 1})
+    states = np.random.default_rng(0).normal(size=(256, STATE_DIM)).astype(np.float32)
+
+    def run():
+        for state in states:
+            agent.select_action(state, explore=False)
+
+    return run, len(states)
+
+
+@benchmark('ddqn.select_actions', unit='actions', params={'batch': [8, 32, 256]}, quick_params={'batch': [32]})
+def ddqn_select_actions(batch):
+    """Azioni greedy su 256 stati in batch da `batch` (una forward per batch, come con num_envs copie)"""
+    agent = DDQNAgent(STATE_DIM, ACTION_DIM, {'buffer_size': 1})
+    states = np.random.default_rng(0).normal(size=(256, STATE_DIM)).astype(np.float32)
+
+    def run():
+        for i in range(0, len(states), batch):
+            agent.select_actions(states[i:i + batch], explore=False)
+
+    return run, len(states)
+
+
+@benchmark('train.chunk', unit='steps',
+           params={'num_envs': [1, 4, 8], 'updates_per_step': [1.0, 0.5, 0.25]},
+           quick_params={'num_envs': [1, 8], 'updates_per_step': [1.0, 0.25]})
+def train_chunk(num_envs, updates_per_step):
+    """
+    Step dell'env al secondo di ReWTSEnsembleController.train_agent (azione, env.step, push, train_step)
+
+    num_envs=1, updates_per_step=1 è il loop classico di train_chunk_model; ogni
+    chiamata misurata esegue num_envs episodi da 100 giorni su un buffer già pieno.
+    """
+    days = 100
+    ensemble = ReWTSEnsembleController({'batch_size': 128, 'buffer_size': 50000})
+    env = make_env(days)
+    agent = DDQNAgent(STATE_DIM, ACTION_DIM, ensemble.config)
+    fill_replay_buffer(agent.replay_buffer, 10000)
+
+    def run():
+        ensemble.train_agent(agent, env, num_envs, num_envs=num_envs, updates_per_step=updates_per_step)
+
+    return run, num_envs * (days - 1)
@@ -0,0 +1,58 @@
+"""
+Compare benchmarks
+Confronta due file di risultati di run_benchmarks.py (throughput head / base)
+
+Usage:
+    python benchmarks/compare_benchmarks.py results/benchmarks/abc1234.json results/benchmarks/def5678.json
+"""
+
+import os
+import sys
+import json
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from harness import compare_results, format_comparison
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two benchmark result files')
+    parser.add_argument('base', help='Baseline results JSON')
+    parser.add_argument('head', help='Results JSON to compare')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative change reported as regression/improvement (default: 0.10)')
+    args = parser.parse_args()
+
+    base = load_results(args.base)
+    head = load_results(args.head)
+
+    for label, data in (('base', base), ('head', head)):
+        meta = data['metadata']
+        print(f"{label}: {meta.get('commit_short')}{' (dirty)' if meta.get('dirty') else ''} "
+              f"{meta.get('timestamp')} - torch {meta.get('torch')}, {meta.get('torch_threads')} threads, "
+              f"{meta.get('processor')}")
+    if base['metadata'].get('platform') != head['metadata'].get('platform'):
+        print("⚠️  Results come from different platforms, ratios are not comparable")
+
+    rows = compare_results(base, head, threshold=args.threshold)
+    print(f"\n{format_comparison(rows, base['metadata'].get('commit_short') or 'base', head['metadata'].get('commit_short') or 'head')}")
+
+    missing = sorted(set(base['results']) ^ set(head['results']))
+    if missing:
+        print(f"\n{len(missing)} benchmarks present in only one file: {', '.join(missing)}")
+
+    regressions = [r for r in rows if r['status'] == 'regression']
+    improvements = [r for r in rows if r['status'] == 'improvement']
+    print(f"\n{len(regressions)} regressions, {len(improvements)} improvements (threshold {args.threshold:.0%})")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
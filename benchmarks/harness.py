@@ -0,0 +1,224 @@
+"""
+Benchmark harness
+Registro dei benchmark, timing ripetuto e metadati della run (commit, versioni, thread)
+
+Ogni benchmark è una factory registrata con @benchmark: riceve i parametri
+della combinazione corrente, prepara i dati (fuori dal timing) e ritorna
+(fn, ops) dove fn() è la chiamata misurata e ops il numero di operazioni che
+esegue (step, sample, update, ...). Il throughput riportato è ops / mediana.
+"""
+
+import os
+import sys
+import time
+import platform
+import itertools
+import statistics
+import subprocess
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCHMARKS = []
+
+
+def benchmark(name, unit, params=None, quick_params=None):
+    """
+    Registra una factory di benchmark
+
+    Args:
+        name: Nome del benchmark (es. 'env.step')
+        unit: Unità delle operazioni (es. 'steps', 'samples')
+        params: Dict nome -> lista di valori (prodotto cartesiano)
+        quick_params: Griglia ridotta per --quick (default: params)
+    """
+    def decorator(factory):
+        BENCHMARKS.append({
+            'name': name,
+            'unit': unit,
+            'params': params or {},
+            'quick_params': quick_params if quick_params is not None else (params or {}),
+            'factory': factory
+        })
+        return factory
+
+    return decorator
+
+
+def _param_grid(params):
+    names = list(params)
+    for values in itertools.product(*(params[n] for n in names)):
+        yield dict(zip(names, values))
+
+
+def result_key(name, params):
+    """Chiave stabile nel JSON: nome[param=valore,...]"""
+    if not params:
+        return name
+    return f"{name}[{','.join(f'{k}={v}' for k, v in params.items())}]"
+
+
+def time_callable(fn, repeat=5, min_time=0.2, warmup=1):
+    """
+    Misura fn con repeat campioni, ognuno di almeno min_time secondi
+
+    Args:
+        fn: Callable senza argomenti
+        repeat: Numero di campioni
+        min_time: Durata minima di un campione (fn ripetuta number volte)
+        warmup: Chiamate scartate prima della calibrazione
+
+    Returns:
+        (secondi per chiamata di ogni campione, number)
+    """
+    for _ in range(warmup):
+        fn()
+
+    # Calibrazione: raddoppia number finché un campione supera min_time / 4
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 4 or number >= 1 << 20:
+            break
+        number *= 2
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+
+    return samples, number
+
+
+def run_benchmarks(selected=None, quick=False, repeat=5, min_time=0.2, seed=0, log=print):
+    """
+    Esegue i benchmark registrati
+
+    Args:
+        selected: Prefissi dei nomi da eseguire (None = tutti)
+        quick: Usa quick_params (griglia ridotta)
+        repeat: Campioni per combinazione
+        min_time: Durata minima di un campione in secondi
+        seed: Seed globale, reimpostato prima di ogni factory
+        log: Funzione di output (None = silenzioso)
+
+    Returns:
+        Dict chiave -> risultato (name, params, unit, ops, seconds_*, ops_per_sec)
+        seconds_* sono per chiamata di fn, seconds_per_op è la latenza per operazione
+    """
+    from src.utils.seeding import set_global_seed
+
+    results = {}
+    for bench in BENCHMARKS:
+        if selected and not any(bench['name'].startswith(s) for s in selected):
+            continue
+
+        grid = bench['quick_params'] if quick else bench['params']
+        for params in _param_grid(grid):
+            key = result_key(bench['name'], params)
+            set_global_seed(seed)
+            fn, ops = bench['factory'](**params)
+            samples, number = time_callable(fn, repeat=repeat, min_time=min_time)
+
+            median = statistics.median(samples)
+            results[key] = {
+                'name': bench['name'],
+                'params': params,
+                'unit': bench['unit'],
+                'ops': ops,
+                'number': number,
+                'repeat': repeat,
+                'seconds_median': median,
+                'seconds_min': min(samples),
+                'seconds_stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+                'seconds_per_op': median / ops,
+                'ops_per_sec': ops / median
+            }
+            if log:
+                log(f"{key:<58} {median * 1e3:>12.3f} ms {ops / median:>14,.0f} {bench['unit']}/s")
+
+    return results
+
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=PROJECT_ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def collect_metadata():
+    """Commit, versioni delle librerie e macchina della run"""
+    import numpy as np
+    import pandas as pd
+    import torch
+
+    return {
+        'commit': _git('rev-parse', 'HEAD') or None,
+        'commit_short': _git('rev-parse', '--short', 'HEAD') or None,
+        'dirty': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'torch': torch.__version__,
+        'torch_threads': torch.get_num_threads(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def compare_results(base, head, threshold=0.10):
+    """
+    Confronta due file di risultati (dict caricati dal JSON) per chiave
+
+    Args:
+        base: Risultati di riferimento
+        head: Risultati da confrontare
+        threshold: Variazione relativa oltre la quale un benchmark è regressione/miglioramento
+
+    Returns:
+        Lista di dict con key, base_ops_per_sec, head_ops_per_sec, ratio, status
+        (ratio = head / base sul throughput; status: regression, improvement, unchanged)
+    """
+    rows = []
+    for key, head_result in head['results'].items():
+        base_result = base['results'].get(key)
+        if base_result is None:
+            continue
+        ratio = head_result['ops_per_sec'] / base_result['ops_per_sec']
+        if ratio < 1 - threshold:
+            status = 'regression'
+        elif ratio > 1 + threshold:
+            status = 'improvement'
+        else:
+            status = 'unchanged'
+        rows.append({
+            'key': key,
+            'base_ops_per_sec': base_result['ops_per_sec'],
+            'head_ops_per_sec': head_result['ops_per_sec'],
+            'ratio': ratio,
+            'status': status
+        })
+    return rows
+
+
+def format_comparison(rows, base_label='base', head_label='head'):
+    """Tabella testuale di compare_results()"""
+    marks = {'regression': '❌', 'improvement': '✓', 'unchanged': ''}
+    lines = [f"{'Benchmark':<58} {base_label[:14]:>14} {head_label[:14]:>14} {'Ratio':>8}"]
+    lines.append('-' * len(lines[0]))
+    for row in rows:
+        lines.append(
+            f"{row['key']:<58} {row['base_ops_per_sec']:>14,.0f} {row['head_ops_per_sec']:>14,.0f} "
+            f"{row['ratio']:>7.2f}x {marks[row['status']]}"
+        )
+    return '\n'.join(lines)
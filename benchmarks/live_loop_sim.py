@@ -0,0 +1,198 @@
+"""
+Live loop simulato
+Throughput (giorni simulati/minuto) e latenze del loop live contro il broker simulator locale
+
+Esegue AlpacaPaperTradingBackend (un ticker) o AsyncAlpacaTradingBackend
+(più ticker) contro BrokerSimulatorServer con orologio deterministico: ogni
+tick del loop è un giorno di trading. Con --check-determinism ripete la run e
+verifica che equity finale e ordini coincidano (solo backend sync: con async
+gli ordini concorrenti leggono il buying power in ordine di arrivo).
+
+Usage:
+    python benchmarks/live_loop_sim.py --days 1000
+    python benchmarks/live_loop_sim.py --backend async --tickers AAPL MSFT NVDA --state-cache
+    python benchmarks/live_loop_sim.py --data-dir data/processed --tickers AAPL --latency fixed:0.02
+    python benchmarks/live_loop_sim.py --history jsonl --days 2000
+    python benchmarks/live_loop_sim.py --check-determinism --output results/benchmarks/live_loop.json
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCHMARKS_DIR)
+sys.path.append(PROJECT_ROOT)
+
+from src.trading.alpaca_paper_trader import AlpacaPaperTradingBackend
+from src.trading.async_backend import AsyncAlpacaTradingBackend
+from src.trading.broker_simulator import SimulatedBroker, BrokerSimulatorServer
+from src.hybrid_model.ensemble_io import load_ensemble
+from src.utils.data_utils import load_market_data
+from src.utils.synthetic_data import make_synthetic_market_data
+
+WARMUP_BARS = 200
+
+
+class RandomPolicy:
+    """Azioni casuali riproducibili (stessa interfaccia dell'ensemble) per generare ordini"""
+
+    def __init__(self, seed=0):
+        self.rng = np.random.default_rng(seed)
+
+    def predict_batch(self, states):
+        actions = self.rng.integers(0, 3, size=len(states))
+        q_values = np.eye(3)[actions]
+        return actions, q_values
+
+    def predict_ensemble(self, state, weights=None):
+        actions, q_values = self.predict_batch(np.asarray(state)[np.newaxis, :])
+        return int(actions[0]), q_values[0]
+
+
+def run_once(args, bars, policy):
+    """
+    Una run del loop live contro un broker simulato nuovo
+
+    Returns:
+        Dict con seconds, days_per_min, stats del broker, del server e del backend
+    """
+    broker = SimulatedBroker(
+        bars,
+        initial_cash=args.initial_cash,
+        start_index=WARMUP_BARS,
+        slippage_bps=args.slippage_bps,
+        slippage_std_bps=args.slippage_std_bps,
+        seed=args.seed
+    )
+    server = BrokerSimulatorServer(broker, latency=args.latency).start()
+    trader_kwargs = {
+        'base_url': server.base_url,
+        'data_url': server.base_url,
+        'state_cache': args.state_cache,
+        'reconcile_interval': args.reconcile_interval,
+        'history_path': None
+    }
+    history_dir = None
+    if args.history:
+        # Storico in una directory temporanea: misura il costo del writer nel loop
+        history_dir = tempfile.mkdtemp(prefix='live_loop_sim_')
+        trader_kwargs['history_path'] = os.path.join(history_dir, f'history.{args.history}')
+
+    output = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            if args.backend == 'sync':
+                backend = AlpacaPaperTradingBackend('sim', 'sim', **trader_kwargs)
+                backend.run_live_trading(policy, args.tickers[0], check_interval=0, max_iterations=args.days)
+                backend_stats = {'http': backend.trader.get_stats()}
+                if backend.history is not None:
+                    backend_stats['history'] = backend.history.get_stats()
+            else:
+                backend = AsyncAlpacaTradingBackend('sim', 'sim', bars_mode=args.bars_mode, **trader_kwargs)
+                backend.run_live_trading_multi(policy, args.tickers, check_interval=0, max_iterations=args.days)
+                backend_stats = backend.get_stats()
+        backend.close()
+    finally:
+        server.stop()
+        if history_dir is not None:
+            shutil.rmtree(history_dir, ignore_errors=True)
+    seconds = time.perf_counter() - start
+
+    server_stats = server.get_stats()
+    return {
+        'seconds': seconds,
+        'days': server_stats['broker']['bars_advanced'] + 1,
+        'days_per_min': 60 * (server_stats['broker']['bars_advanced'] + 1) / seconds,
+        'requests_per_day': server_stats['requests'] / args.days,
+        'broker': server_stats['broker'],
+        'by_endpoint': server_stats['by_endpoint'],
+        'backend': backend_stats
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Live trading loop against the local broker simulator')
+    parser.add_argument('--backend', choices=['sync', 'async'], default='sync', help='Live backend (default: sync)')
+    parser.add_argument('--tickers', nargs='+', default=['AAPL'], help='Tickers (sync uses the first one)')
+    parser.add_argument('--days', type=int, default=500, help='Simulated trading days (one per tick)')
+    parser.add_argument('--data-dir', default=None, help='Replay data/processed CSVs (default: synthetic data)')
+    parser.add_argument('--model', default=None, help='Ensemble path (default: random reproducible actions)')
+    parser.add_argument('--bars-mode', choices=['multi', 'concurrent'], default='multi', help='Async bars mode')
+    parser.add_argument('--state-cache', action='store_true', help='Use the reconciled portfolio state cache')
+    parser.add_argument('--reconcile-interval', type=float, default=60.0, help='State cache reconcile interval (s)')
+    parser.add_argument('--history', choices=['jsonl', 'db'], default=None,
+                        help='Write the trade history (JSONL or SQLite) to a temp dir during the run')
+    parser.add_argument('--latency', default='fixed:0', help='Simulated broker latency (see mock_deepseek_server.py)')
+    parser.add_argument('--slippage-bps', type=float, default=5.0, help='Fixed slippage (bps)')
+    parser.add_argument('--slippage-std-bps', type=float, default=2.0, help='Random slippage std (bps)')
+    parser.add_argument('--initial-cash', type=float, default=100000.0, help='Initial cash')
+    parser.add_argument('--check-determinism', action='store_true', help='Run twice and compare equity and orders')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--output', help='Save results as JSON')
+    args = parser.parse_args()
+
+    tickers = args.tickers if args.backend == 'async' else args.tickers[:1]
+    if args.data_dir:
+        bars = {ticker: load_market_data(ticker, args.data_dir) for ticker in tickers}
+    else:
+        bars = {ticker: make_synthetic_market_data(WARMUP_BARS + args.days + 1, seed=args.seed + i)
+                for i, ticker in enumerate(tickers)}
+
+    def make_policy():
+        return load_ensemble(args.model) if args.model else RandomPolicy(args.seed)
+
+    print(f"{'='*80}")
+    print(f"Live loop simulato: backend {args.backend}, {', '.join(tickers)}, {args.days} giorni, "
+          f"latenza {args.latency}, state cache {'on' if args.state_cache else 'off'}")
+    print(f"{'='*80}")
+
+    runs = [run_once(args, bars, make_policy())]
+    if args.check_determinism:
+        runs.append(run_once(args, bars, make_policy()))
+
+    for i, result in enumerate(runs, 1):
+        broker = result['broker']
+        print(f"Run {i}: {result['seconds']:.2f}s, {result['days_per_min']:,.0f} giorni/min, "
+              f"{result['requests_per_day']:.1f} richieste/giorno, {broker['orders']} ordini, "
+              f"equity ${broker['equity']:,.2f} ({broker['return_pct']:+.2f}%), slippage ${broker['slippage_cost']:,.2f}")
+
+    backend = runs[0]['backend']
+    if 'p50_ms' in backend and backend['p50_ms']:
+        print("Tick (ms): " + ' | '.join(
+            f"{phase} p50 {backend['p50_ms'][phase]:.1f} p95 {backend['p95_ms'][phase]:.1f}"
+            for phase in backend['p50_ms']))
+
+    if 'history' in backend:
+        print(f"Storico ({args.history}): {backend['history']['events_written']} eventi, "
+              f"{backend['history']['flushes']} scritture, {backend['history']['avg_flush_ms']:.2f}ms medi")
+    print("Endpoint: " + ', '.join(f"{k} {v}" for k, v in sorted(runs[0]['by_endpoint'].items())))
+
+    if args.check_determinism:
+        a, b = runs[0]['broker'], runs[1]['broker']
+        same = a['orders'] == b['orders'] and abs(a['equity'] - b['equity']) < 1e-6 and a['positions'] == b['positions']
+        print(f"{'✓' if same else '✗'} Determinismo: {'run identiche' if same else 'run diverse'}"
+              f"{' (atteso con ordini concorrenti)' if not same and args.backend == 'async' else ''}")
+    print(f"{'='*80}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({'config': vars(args), 'runs': runs}, f, indent=2, default=str)
+        print(f"✓ Results saved to {args.output}")
+
+    if args.check_determinism and not same and args.backend == 'sync':
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
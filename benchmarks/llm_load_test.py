@@ -0,0 +1,139 @@
+"""
+LLM load test
+Throughput end-to-end (strategie/s) di precompute_llm_strategies contro il mock server DeepSeek
+
+Per ogni combinazione di worker e rate limit lato client esegue
+precompute_llm_strategies su dati sintetici, con cache e output in una
+directory temporanea (nessuna cache hit fra le run, nessun file in data/).
+
+Usage:
+    python benchmarks/llm_load_test.py --workers 1 4 8 16 --rps 4 8 16
+    python benchmarks/llm_load_test.py --latency fixed:0.3 --error-429-rate 0.05 --malformed-rate 0.02
+    python benchmarks/llm_load_test.py --server-rps 10 --with-news --output results/benchmarks/llm_load.json
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCHMARKS_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.join(PROJECT_ROOT, 'scripts'))
+
+from src.llm_agents.mock_deepseek_server import MockDeepSeekServer
+from src.utils.synthetic_data import make_synthetic_market_data, make_synthetic_news
+from training.train_rewts_llm_rl import precompute_llm_strategies
+
+
+def run_once(server, market_df, news_df, workers, rps, with_news, client_max_retries):
+    """
+    Una run di precompute_llm_strategies
+
+    Returns:
+        Dict con seconds, strategies, strategies_per_sec, fallbacks e statistiche del server
+    """
+    with tempfile.TemporaryDirectory(prefix='llm_load_test_') as tmp_dir:
+        config = {
+            'llm': {
+                'llm_model': 'deepseek-chat',
+                'temperature': 0.0,
+                'deepseek_api_key': 'mock',
+                'base_url': server.base_url,
+                'client_max_retries': client_max_retries
+            },
+            'parallel_workers': workers,
+            'max_requests_per_second': rps,
+            'skip_news_processing': not with_news,
+            'strategy_frequency': 20,
+            'strategy_cache_dir': os.path.join(tmp_dir, 'cache'),
+            'strategies_dir': os.path.join(tmp_dir, 'strategies')
+        }
+
+        server.reset_stats()
+        output = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            strategies = precompute_llm_strategies('SYNTH', market_df, news_df, config)
+        seconds = time.perf_counter() - start
+
+    fallbacks = sum(1 for s in strategies if s.explanation.startswith('Fallback strategy'))
+    return {
+        'workers': workers,
+        'client_rps': rps,
+        'seconds': seconds,
+        'strategies': len(strategies),
+        'strategies_per_sec': len(strategies) / seconds,
+        'fallbacks': fallbacks,
+        'server': server.get_stats()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline load test of precompute_llm_strategies against the mock DeepSeek server')
+    parser.add_argument('--days', type=int, default=2000, help='Synthetic trading days (20 per strategy, default: 2000)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8, 16], help='parallel_workers values')
+    parser.add_argument('--rps', type=float, nargs='+', default=[8.0], help='Client max_requests_per_second values')
+    parser.add_argument('--latency', default='lognormal:0.8,0.4', help='Mock latency distribution (see mock_deepseek_server.py)')
+    parser.add_argument('--error-429-rate', type=float, default=0.0, help='Probability of a random 429')
+    parser.add_argument('--error-500-rate', type=float, default=0.0, help='Probability of a 500')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='Probability of a truncated JSON answer')
+    parser.add_argument('--server-rps', type=float, default=None, help='Server-side rate limit (requests/s)')
+    parser.add_argument('--client-max-retries', type=int, default=2, help='OpenAI client retries (default: 2)')
+    parser.add_argument('--with-news', action='store_true', help='Synthetic news: one AnalystAgent call per strategy')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--output', help='Save results as JSON')
+    args = parser.parse_args()
+
+    market_df = make_synthetic_market_data(args.days, seed=args.seed)
+    news_df = make_synthetic_news(market_df.index, seed=args.seed) if args.with_news else pd.DataFrame()
+
+    server = MockDeepSeekServer(
+        latency=args.latency,
+        error_429_rate=args.error_429_rate,
+        error_500_rate=args.error_500_rate,
+        malformed_rate=args.malformed_rate,
+        max_requests_per_second=args.server_rps,
+        seed=args.seed
+    ).start()
+
+    print(f"{'='*100}")
+    print(f"LLM load test: {args.days // 20} strategies, latency {args.latency}, "
+          f"429 {args.error_429_rate:.0%}, 500 {args.error_500_rate:.0%}, malformed {args.malformed_rate:.0%}, "
+          f"server limit {args.server_rps or 'none'} req/s{', with news' if args.with_news else ''}")
+    print(f"{'='*100}")
+    print(f"{'Workers':>8} {'Client rps':>11} {'Time (s)':>10} {'Strat/s':>9} {'Fallbacks':>10} "
+          f"{'Requests':>9} {'429':>6} {'500':>6} {'Malformed':>10} {'Max conc':>9}")
+    print("-" * 100)
+
+    results = []
+    try:
+        for rps in args.rps:
+            for workers in args.workers:
+                result = run_once(server, market_df, news_df, workers, rps, args.with_news, args.client_max_retries)
+                results.append(result)
+                stats = result['server']
+                print(f"{workers:>8} {rps:>11.1f} {result['seconds']:>10.2f} {result['strategies_per_sec']:>9.2f} "
+                      f"{result['fallbacks']:>10} {stats['requests']:>9} {stats['rate_limited']:>6} "
+                      f"{stats['server_errors']:>6} {stats['malformed']:>10} {stats['max_concurrent']:>9}")
+    finally:
+        server.stop()
+
+    print(f"{'='*100}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+        print(f"✓ Results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
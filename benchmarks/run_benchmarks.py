@@ -0,0 +1,98 @@
+"""
+Run benchmarks
+Esegue la suite su dati sintetici e salva i risultati in JSON (uno per commit)
+
+Usage:
+    python benchmarks/run_benchmarks.py                      # suite completa
+    python benchmarks/run_benchmarks.py --quick              # griglia ridotta (~1 min)
+    python benchmarks/run_benchmarks.py --only env. ddqn.    # solo alcuni benchmark
+    python benchmarks/run_benchmarks.py --compare results/benchmarks/<base>.json
+"""
+
+import os
+import sys
+import json
+import argparse
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCHMARKS_DIR))
+sys.path.append(BENCHMARKS_DIR)
+
+import torch
+
+from harness import BENCHMARKS, PROJECT_ROOT, run_benchmarks, collect_metadata, compare_results, format_comparison
+
+# La registrazione avviene all'import dei moduli
+import bench_rl  # noqa: F401
+import bench_ensemble  # noqa: F401
+import bench_data  # noqa: F401
+
+DEFAULT_OUTPUT_DIR = os.path.join(PROJECT_ROOT, 'results', 'benchmarks')
+
+
+def default_output_path(metadata, quick):
+    name = metadata['commit_short'] or 'nocommit'
+    if metadata['dirty']:
+        name += '-dirty'
+    if quick:
+        name += '-quick'
+    return os.path.join(DEFAULT_OUTPUT_DIR, f"{name}.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the ReWTS hot-path benchmark suite')
+    parser.add_argument('--quick', action='store_true', help='Reduced parameter grid')
+    parser.add_argument('--only', nargs='+', metavar='PREFIX', help='Run only benchmarks whose name starts with PREFIX')
+    parser.add_argument('--list', action='store_true', help='List benchmarks and exit')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed samples per benchmark (default: 5)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Minimum seconds per sample (default: 0.2)')
+    parser.add_argument('--threads', type=int, default=1,
+                        help='torch.set_num_threads for stable numbers (default: 1, 0 = torch default)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--output', help='Results JSON (default: results/benchmarks/<commit>.json)')
+    parser.add_argument('--compare', metavar='BASE_JSON', help='Compare against a previous results file')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative change reported as regression/improvement (default: 0.10)')
+    args = parser.parse_args()
+
+    if args.list:
+        for bench in BENCHMARKS:
+            print(f"{bench['name']:<40} {bench['unit']:<12} {bench['params']}")
+        return
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+
+    metadata = collect_metadata()
+    metadata.update({'quick': args.quick, 'repeat': args.repeat, 'min_time': args.min_time, 'seed': args.seed})
+
+    print(f"{'='*100}")
+    print(f"Benchmarks @ {metadata['commit_short']}{' (dirty)' if metadata['dirty'] else ''} "
+          f"- torch {metadata['torch']}, {metadata['torch_threads']} threads")
+    print(f"{'='*100}")
+    print(f"{'Benchmark':<58} {'Median/call':>15} {'Throughput':>18}")
+    print("-" * 100)
+
+    results = run_benchmarks(selected=args.only, quick=args.quick, repeat=args.repeat,
+                             min_time=args.min_time, seed=args.seed)
+
+    output_path = args.output or default_output_path(metadata, args.quick)
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump({'metadata': metadata, 'results': results}, f, indent=2)
+    print(f"{'='*100}")
+    print(f"✓ {len(results)} results saved to {output_path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+        rows = compare_results(base, {'results': results}, threshold=args.threshold)
+        print(f"\n{format_comparison(rows, base['metadata'].get('commit_short') or 'base', metadata['commit_short'] or 'head')}")
+        regressions = [r for r in rows if r['status'] == 'regression']
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressions over {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,8 @@
 Example client for ReWTSE Backtesting API (FastAPI VM)
 """
 import requests
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List
+import json
 import time
 
 
@@ -79,6 +80,60 @@ class BacktestingClient:
             print(f"❌ Backtest failed: {e}")
             raise
 
+    def submit_backtest(
+        self,
+        ticker: str,
+        start_date: str,
+        end_date: str,
+        initial_balance: float = 10000,
+        transaction_cost: float = 0.001
+    ) -> Dict[str, Any]:
+        """
+        Submit a backtest job (returns immediately)
+
+        Returns:
+            Job info: job_id, status, deduplicated, status_url
+        """
+        payload = {
+            "ticker": ticker,
+            "start_date": start_date,
+            "end_date": end_date,
+            "initial_balance": initial_balance,
+            "transaction_cost": transaction_cost
+        }
+
+        response = requests.post(f"{self.base_url}/backtests", json=payload, timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    def get_backtest_job(self, job_id: str) -> Dict[str, Any]:
+        """Get job status, progress and result"""
+        response = requests.get(f"{self.base_url}/backtests/{job_id}", timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    def wait_for_backtest(self, job_id: str, poll_interval: float = 2.0, timeout: float = 600) -> Dict[str, Any]:
+        """
+        Poll a backtest job until it completes
+
+        Returns:
+            Backtest results dictionary (same fields as run_backtest)
+        """
+        deadline = time.time() + timeout
+
+        while time.time() < deadline:
+            job = self.get_backtest_job(job_id)
+
+            if job['status'] == 'completed':
+                return job['result']
+            if job['status'] == 'failed':
+                raise RuntimeError(f"Backtest job {job_id} failed: {job['error']}")
+
+            print(f"  ⏳ {job['status']} ({job['progress']:.0%})")
+            time.sleep(poll_interval)
+
+        raise TimeoutError(f"Backtest job {job_id} not completed after {timeout}s")
+
     def run_batch_backtests(
         self,
         tickers: list,
@@ -127,6 +182,44 @@ class BacktestingClient:
 
         return results
 
+    def stream_batch_backtests(self, specs: List[Dict[str, Any]], timeout: float = 600) -> Iterator[Dict[str, Any]]:
+        """
+        Run many backtests in one request (POST /backtest/batch)
+
+        Args:
+            specs: List of backtest requests (ticker, start_date, end_date, ...)
+            timeout: Request timeout in seconds
+
+        Yields:
+            One NDJSON record per spec as it completes ({"type": "result", "index", ...}),
+            then a final {"type": "summary"} record
+        """
+        with requests.post(
+            f"{self.base_url}/backtest/batch",
+            json={"specs": specs},
+            stream=True,
+            timeout=timeout
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def predict(self, ticker: str, observations: List[List[float]]) -> Dict[str, Any]:
+        """
+        Ensemble actions for live observations (POST /predict)
+
+        Returns:
+            Dictionary with actions, action_names, q_values and latency_ms
+        """
+        response = requests.post(
+            f"{self.base_url}/predict",
+            json={"ticker": ticker, "observations": observations},
+            timeout=10
+        )
+        response.raise_for_status()
+        return response.json()
+
     def print_summary(self, results: Dict[str, Dict[str, Any]]):
         """Print summary of batch backtest results"""
         print("\n" + "="*60)
@@ -221,6 +314,62 @@ def example_batch_backtests():
     client.print_summary(results)
 
 
+def example_async_jobs():
+    """Example: Async backtest jobs (no long-lived HTTP connections)"""
+    print("\n=== Example 5: Async Backtest Jobs ===\n")
+
+    client = BacktestingClient(vm_ip="35.123.45.67")
+
+    tickers = ["AAPL", "AMZN", "GOOGL", "META", "MSFT", "TSLA"]
+
+    # Submit all jobs first: the server runs them in parallel
+    jobs = {
+        ticker: client.submit_backtest(ticker, "2020-01-01", "2020-12-31")
+        for ticker in tickers
+    }
+    for ticker, job in jobs.items():
+        print(f"  {ticker}: job {job['job_id']} ({'cached' if job['deduplicated'] else job['status']})")
+
+    # Poll for results
+    results = {}
+    for ticker, job in jobs.items():
+        try:
+            results[ticker] = client.wait_for_backtest(job['job_id'])
+        except Exception as e:
+            results[ticker] = {"error": str(e)}
+
+    client.print_summary(results)
+
+
+def example_streaming_batch():
+    """Example: Many date ranges in one streaming request"""
+    print("\n=== Example 6: Streaming Batch ===\n")
+
+    client = BacktestingClient(vm_ip="35.123.45.67")
+
+    # Overlapping ranges of the same ticker share model, data and Q-value forward pass
+    specs = [
+        {"ticker": ticker, "start_date": f"{year}-01-01", "end_date": "2020-12-31"}
+        for ticker in ["AAPL", "MSFT"]
+        for year in range(2015, 2020)
+    ]
+
+    for record in client.stream_batch_backtests(specs):
+        if record['type'] == 'summary':
+            print(f"\n✅ {record['num_specs']} specs ({record['cached']} cached, "
+                  f"{record['errors']} errors) in {record['execution_time_seconds']:.2f}s")
+            continue
+
+        spec = specs[record['index']]
+        label = f"{spec['ticker']} from {spec['start_date']}"
+        if record['status'] == 'ok':
+            result = record['result']
+            print(f"  {label}: Sharpe {result['sharpe_ratio']:.3f}, "
+                  f"Return {result['cumulative_return']:.1%}{' (cached)' if record['cached'] else ''}")
+        else:
+            print(f"  {label}: ❌ {record['error']}")
+
+
 def example_period_comparison():
     """Example: Compare different time periods"""
     print("\n=== Example 3: Period Comparison ===\n")
@@ -317,3 +466,5 @@ if __name__ == "__main__":
     # example_batch_backtests()
     # example_period_comparison()
     # example_strategy_comparison()
+    # example_async_jobs()
+    # example_streaming_batch()
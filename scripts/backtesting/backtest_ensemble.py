@@ -4,7 +4,6 @@ Backtesting script per ReWTSE-LLM-RL ensemble
 
 import pandas as pd
 import numpy as np
-import pickle
 from tqdm import tqdm
 import sys
 import os
@@ -14,6 +13,9 @@ import argparse
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.rl_agents.trading_env import TradingEnv
+from src.serving.model_registry import ModelRegistry
+from src.llm_agents.strategy_store import StrategyStore
+from src.telemetry.tracing import enable_tracing, finish_tracing
 from backtesting.backtest_utils import (
     calculate_comprehensive_metrics,
     plot_backtest_results,
@@ -127,9 +129,14 @@ def main():
     parser.add_argument('--transaction-cost', type=float, default=0.001, help='Transaction cost (default: 0.001)')
     parser.add_argument('--chunk-length', type=int, default=500, help='ReWTS chunk length (default: 500)')
     parser.add_argument('--lookback-length', type=int, default=100, help='Lookback window (default: 100)')
+    parser.add_argument('--trace', type=str, default=None, metavar='TRACE_JSON',
+                        help='Enable hot-path tracing: print span summary and save a Chrome trace')
 
     args = parser.parse_args()
 
+    if args.trace:
+        enable_tracing()
+
     config = {
         'tickers': [args.ticker.upper()],
         'rewts': {
@@ -146,20 +153,19 @@ def main():
     }
 
     all_metrics = {}
+    registry = ModelRegistry(models_dir='models')
 
     for ticker in config['tickers']:
         # Load ensemble
         try:
-            with open(f"models/{ticker}_rewts_ensemble.pkl", 'rb') as f:
-                ensemble = pickle.load(f)
+            ensemble = registry.get(ticker)
         except FileNotFoundError:
             print(f"Error: Model file not found for {ticker}")
             continue
 
         # Load data e strategies
         market_df = pd.read_csv(f"data/processed/{ticker}_full_data.csv", index_col=0, parse_dates=True)
-        with open(f"data/llm_strategies/{ticker}_strategies.pkl", 'rb') as f:
-            strategies = pickle.load(f)
+        strategies = StrategyStore().load(ticker)
 
         # Backtest
         metrics = backtest_ensemble(ticker, ensemble, market_df, strategies, config)
@@ -185,5 +191,8 @@ def main():
 
         save_backtest_report(results, 'results/metrics/summary_metrics.csv')
 
+    if args.trace:
+        finish_tracing(args.trace)
+
 if __name__ == '__main__':
     main()
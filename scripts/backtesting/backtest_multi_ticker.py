@@ -5,7 +5,6 @@ Evaluates trained ReWTSE-LLM-RL ensemble on multiple tickers
 
 import sys
 import os
-import pickle
 import numpy as np
 from pathlib import Path
 
@@ -18,6 +17,11 @@ sys.path.append(str(scripts_dir))
 
 from src.rl_agents.trading_env import TradingEnv
 from src.utils.data_utils import load_market_data, load_news_data
+from src.llm_agents.strategy_store import StrategyStore
+from src.backtest_engine.fast_backtest import run_ensemble_backtest
+from src.hybrid_model.ensemble_io import load_ensemble
+from src.serving.model_registry import ModelRegistry
+from src.telemetry.tracing import enable_tracing, finish_tracing, traced
 from backtesting.backtest_utils import (
     calculate_comprehensive_metrics,
     calculate_extended_metrics,
@@ -27,7 +31,8 @@ from backtesting.backtest_utils import (
 )
 
 
-def evaluate_ticker(ticker, model_path, config):
+@traced()
+def evaluate_ticker(ticker, model_path, config, use_fast_engine=True, registry=None):
     """
     Evaluate a trained ensemble on a specific ticker
 
@@ -35,6 +40,8 @@ def evaluate_ticker(ticker, model_path, config):
         ticker: Stock symbol
         model_path: Path to saved ensemble model
         config: Trading configuration
+        use_fast_engine: Use the vectorized fixed-weight engine instead of the TradingEnv step loop
+        registry: Optional ModelRegistry (lazy, memory-bounded model loading)
 
     Returns:
         Dictionary with evaluation results
@@ -46,18 +53,15 @@ def evaluate_ticker(ticker, model_path, config):
 
     # Load model
     try:
-        with open(model_path, 'rb') as f:
-            ensemble = pickle.load(f)
+        ensemble = registry.get(ticker) if registry is not None else load_ensemble(model_path)
         print(f"✓ Model loaded from {model_path}")
     except Exception as e:
         print(f"✗ Failed to load model: {e}")
         return None
 
     # Load strategies
-    strategies_path = f"data/llm_strategies/{ticker}_strategies.pkl"
     try:
-        with open(strategies_path, 'rb') as f:
-            strategies = pickle.load(f)
+        strategies = StrategyStore().load(ticker)
         print(f"✓ Loaded {len(strategies)} strategies")
     except Exception as e:
         print(f"✗ Failed to load strategies: {e}")
@@ -71,33 +75,40 @@ def evaluate_ticker(ticker, model_path, config):
         print(f"✗ Failed to load market data: {e}")
         return None
 
-    # Create evaluation environment
-    eval_env = TradingEnv(market_df, strategies, config)
-
     # Initialize weights (uniform)
     if len(ensemble.chunk_models) > 0:
         ensemble.current_weights = np.ones(len(ensemble.chunk_models)) / len(ensemble.chunk_models)
 
     # Run evaluation
-    state = eval_env.reset()
-    done = False
-    total_reward = 0
-    actions_taken = []
-
-    while not done:
-        # Get ensemble action
-        action, _ = ensemble.predict_ensemble(state)
-        actions_taken.append(action)
-
-        # Execute action
-        state, reward, done, _ = eval_env.step(action)
-        total_reward += reward
+    if use_fast_engine:
+        # Pesi fissi: Q-values batch + accounting identico a TradingEnv.step
+        result = run_ensemble_backtest(ensemble, market_df, strategies, config)
+        actions_taken = result['actions']
+        portfolio_history = result['portfolio_history']
+    else:
+        eval_env = TradingEnv(market_df, strategies, config)
+
+        state = eval_env.reset()
+        done = False
+        total_reward = 0
+        actions_taken = []
+
+        while not done:
+            # Get ensemble action
+            action, _ = ensemble.predict_ensemble(state)
+            actions_taken.append(action)
+
+            # Execute action
+            state, reward, done, _ = eval_env.step(action)
+            total_reward += reward
+
+        portfolio_history = eval_env.portfolio_history
 
     # Calculate metrics usando utility condivisa
     initial_balance = config.get('initial_balance', 10000)
-    final_value = eval_env.portfolio_value
+    final_value = portfolio_history[-1] if portfolio_history else initial_balance
 
-    metrics = calculate_comprehensive_metrics(eval_env.portfolio_history, initial_balance)
+    metrics = calculate_comprehensive_metrics(portfolio_history, initial_balance)
 
     # Calculate extended metrics from market data
     extended_metrics = calculate_extended_metrics(market_df)
@@ -149,7 +160,7 @@ def evaluate_ticker(ticker, model_path, config):
         'metrics': metrics,
         'extended_metrics': extended_metrics,
         'action_distribution': action_distribution,
-        'portfolio_history': eval_env.portfolio_history,
+        'portfolio_history': portfolio_history,
         'num_chunks': len(ensemble.chunk_models)
     }
 
@@ -158,6 +169,15 @@ def evaluate_ticker(ticker, model_path, config):
 
 def main():
     """Main backtest execution"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Multi-ticker backtest of the ReWTSE ensembles')
+    parser.add_argument('--trace', type=str, default=None, metavar='TRACE_JSON',
+                        help='Enable hot-path tracing: print span summary and save a Chrome trace')
+    args = parser.parse_args()
+
+    if args.trace:
+        enable_tracing()
 
     # Configuration
     tickers = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'META', 'TSLA']
@@ -176,21 +196,31 @@ def main():
     print(f"Config: {config}")
     print(f"{'='*80}")
 
+    # Modelli caricati on-demand, al massimo ~1GB residente
+    registry = ModelRegistry(models_dir='models', max_memory_mb=1024)
+
     # Evaluate each ticker
     results = []
     for ticker in tickers:
-        model_path = f"models/{ticker}_rewts_ensemble.pkl"
+        model_path = registry.model_path(ticker)
 
         if not os.path.exists(model_path):
             print(f"\n⚠ Model not found for {ticker}: {model_path}")
             print(f"  Skipping {ticker}...")
             continue
 
-        result = evaluate_ticker(ticker, model_path, config)
+        result = evaluate_ticker(ticker, model_path, config, registry=registry)
 
         if result is not None:
             results.append(result)
 
+    stats = registry.get_stats()
+    print(f"\nModel registry: {stats['loads']} loads, {stats['evictions']} evictions, "
+          f"avg load {stats['load_latency_ms_avg']:.1f} ms, resident {stats['resident_mb']:.1f} MB")
+
+    if args.trace:
+        finish_tracing(args.trace)
+
     if len(results) == 0:
         print("\n✗ No results to report. Train models first!")
         return
@@ -0,0 +1,88 @@
+"""
+Benchmark: fast backtest engine vs loop TradingEnv + predict_ensemble
+Usa dati ed ensemble sintetici, nessun modello addestrato richiesto
+"""
+
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.rl_agents.trading_env import TradingEnv
+from src.backtest_engine.fast_backtest import run_ensemble_backtest
+from src.utils.synthetic_data import make_synthetic_market_data, make_synthetic_strategies, make_synthetic_ensemble
+
+
+def run_step_loop(ensemble, market_df, strategies, env_config):
+    """Loop attuale di evaluate_ticker (uniform weights)"""
+    env = TradingEnv(market_df, strategies, env_config)
+    ensemble.current_weights = np.ones(len(ensemble.chunk_models)) / len(ensemble.chunk_models)
+
+    state = env.reset()
+    done = False
+    actions = []
+
+    while not done:
+        action, _ = ensemble.predict_ensemble(state)
+        actions.append(int(action))
+        state, reward, done, _ = env.step(action)
+
+    return env.portfolio_history, actions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark fast backtest engine vs TradingEnv step loop')
+    parser.add_argument('--days', type=int, default=1000, help='Synthetic trading days (default: 1000)')
+    parser.add_argument('--chunks', type=int, nargs='+', default=[1, 5, 10], help='Chunk model counts to test')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed repetitions per engine (default: 3)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    market_df = make_synthetic_market_data(args.days, seed=args.seed)
+    strategies = make_synthetic_strategies(args.days // 20 + 1, seed=args.seed)
+    env_config = {'initial_balance': 10000, 'transaction_cost': 0.0015, 'max_position': 0.95}
+    rewts_config = {'hidden_dims': [256, 256, 128]}
+
+    print(f"{'='*70}")
+    print(f"Fast backtest benchmark: {args.days} days, {args.repeats} repeats")
+    print(f"{'='*70}")
+    print(f"{'Chunks':<8} {'Step loop (s)':<15} {'Fast (s)':<12} {'Speedup':<10} {'Max |Δ| ($)':<12} {'Actions'}")
+    print("-" * 70)
+
+    for num_chunks in args.chunks:
+        ensemble = make_synthetic_ensemble(num_chunks, rewts_config, seed=args.seed)
+
+        loop_times = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            reference_history, reference_actions = run_step_loop(ensemble, market_df, strategies, env_config)
+            loop_times.append(time.perf_counter() - start)
+
+        fast_times = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            result = run_ensemble_backtest(ensemble, market_df, strategies, env_config)
+            fast_times.append(time.perf_counter() - start)
+
+        max_diff = np.max(np.abs(np.array(result['portfolio_history']) - np.array(reference_history)))
+        actions_match = result['actions'] == reference_actions
+
+        loop_time = min(loop_times)
+        fast_time = min(fast_times)
+        print(f"{num_chunks:<8} {loop_time:<15.3f} {fast_time:<12.4f} {loop_time / fast_time:<10.1f} "
+              f"{max_diff:<12.6f} {'match' if actions_match else 'MISMATCH'}")
+
+        if max_diff >= 0.005 or not actions_match:
+            print(f"❌ Fast engine diverges from TradingEnv with {num_chunks} chunks")
+            sys.exit(1)
+
+    print(f"{'='*70}")
+    print("✓ Fast engine matches TradingEnv to the cent")
+
+
+if __name__ == '__main__':
+    main()
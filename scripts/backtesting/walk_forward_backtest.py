@@ -0,0 +1,151 @@
+"""
+Walk-forward backtest per ReWTSE-LLM-RL
+Train fino a T, test T -> T+Δ, avanza; i chunk model sono addestrati una volta e riusati fra i fold
+"""
+
+import sys
+import os
+import argparse
+import yaml
+import pandas as pd
+
+# Add project root and scripts dir to path
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(SCRIPTS_DIR))
+sys.path.append(SCRIPTS_DIR)
+
+from src.utils.data_utils import load_market_data
+from src.llm_agents.strategy_store import StrategyStore
+from src.backtest_engine.walk_forward import make_walk_forward_folds, run_walk_forward
+from backtesting.backtest_utils import calculate_comprehensive_metrics
+
+
+def save_walk_forward_results(ticker, results, initial_balance, output_dir='results/walk_forward'):
+    """
+    Salva metriche per fold, equity per fold e equity out-of-sample concatenata
+
+    Returns:
+        DataFrame con le metriche per fold
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    fold_rows = []
+    equity_rows = []
+
+    for fold in results['folds']:
+        metrics = calculate_comprehensive_metrics(fold['portfolio_values'], initial_balance)
+        fold_rows.append({
+            'fold_id': fold['fold_id'],
+            'start_date': fold['start_date'],
+            'end_date': fold['end_date'],
+            'num_chunks': fold['num_chunks'],
+            'num_trades': fold['num_trades'],
+            'total_return': metrics['total_return'],
+            'sharpe_ratio': metrics['sharpe_ratio'],
+            'max_drawdown': metrics['max_drawdown'],
+            'win_rate': metrics['win_rate'],
+            'final_value': metrics['final_value']
+        })
+        for date, value in zip(fold['dates'], fold['portfolio_values']):
+            equity_rows.append({'fold_id': fold['fold_id'], 'date': date, 'portfolio_value': value})
+
+    folds_df = pd.DataFrame(fold_rows)
+    folds_df.to_csv(f"{output_dir}/{ticker}_folds.csv", index=False)
+    pd.DataFrame(equity_rows).to_csv(f"{output_dir}/{ticker}_fold_equity.csv", index=False)
+
+    stitched = results['stitched'].rename('portfolio_value')
+    stitched.index.name = 'date'
+    stitched.to_csv(f"{output_dir}/{ticker}_stitched_equity.csv")
+
+    return folds_df
+
+
+def plot_walk_forward(ticker, results, save_path):
+    """Equity out-of-sample concatenata con i confini dei fold"""
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(14, 6))
+    results['stitched'].plot(ax=ax, color='steelblue', linewidth=1.5, label='Stitched OOS equity')
+
+    for fold in results['folds']:
+        ax.axvline(fold['start_date'], color='gray', alpha=0.3, linestyle='--')
+
+    ax.set_title(f'{ticker} - Walk-Forward Out-of-Sample Equity')
+    ax.set_ylabel('Portfolio Value ($)')
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    plt.tight_layout()
+    plt.savefig(save_path, dpi=150)
+    plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Walk-forward backtest of the ReWTSE ensemble')
+    parser.add_argument('ticker', type=str, help='Stock ticker symbol (e.g., AAPL)')
+    parser.add_argument('--config', type=str, default='configs/hybrid/rewts_llm_rl.yaml', help='Config YAML')
+    parser.add_argument('--initial-train-days', type=int, default=800, help='Training rows before the first fold (default: 800)')
+    parser.add_argument('--test-days', type=int, default=60, help='Test rows per fold, Δ (default: 60)')
+    parser.add_argument('--step-days', type=int, default=None, help='Advance between folds (default: test-days)')
+    parser.add_argument('--weighting', choices=['uniform', 'rewts'], default='rewts', help='Ensemble weights per fold')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Parallel processes')
+    parser.add_argument('--chunk-store', type=str, default='models/chunk_store', help='Chunk model store directory')
+    parser.add_argument('--seed', type=int, default=0, help='Training seed')
+    parser.add_argument('--data-dir', type=str, default='data/processed', help='Processed market data directory')
+    parser.add_argument('--strategies-dir', type=str, default='data/llm_strategies', help='Precomputed LLM strategies')
+    parser.add_argument('--output-dir', type=str, default='results/walk_forward', help='Output directory')
+    parser.add_argument('--plot', action='store_true', help='Save stitched equity plot')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+
+    ticker = args.ticker.upper()
+    market_df = load_market_data(ticker, args.data_dir)
+    strategies = StrategyStore(args.strategies_dir, args.data_dir, config.get('strategy_frequency', 20)).load(ticker)
+
+    folds = make_walk_forward_folds(
+        len(market_df),
+        args.initial_train_days,
+        args.test_days,
+        args.step_days,
+        config.get('strategy_frequency', 20)
+    )
+
+    print(f"\n{'='*60}")
+    print(f"Walk-forward backtest: {ticker}")
+    print(f"{'='*60}")
+
+    results = run_walk_forward(
+        market_df, strategies, config, folds,
+        chunk_store_dir=args.chunk_store,
+        weighting=args.weighting,
+        seed=args.seed,
+        max_workers=args.workers
+    )
+
+    initial_balance = config['trading_env'].get('initial_balance', 10000)
+    folds_df = save_walk_forward_results(ticker, results, initial_balance, args.output_dir)
+
+    print(f"\n{'Fold':<6} {'Start':<12} {'End':<12} {'Chunks':<8} {'Return':<10} {'Sharpe':<8} {'Max DD':<8}")
+    print("-" * 66)
+    for _, row in folds_df.iterrows():
+        print(f"{row['fold_id']:<6} {str(row['start_date'])[:10]:<12} {str(row['end_date'])[:10]:<12} "
+              f"{row['num_chunks']:<8} {row['total_return']:<10.2%} {row['sharpe_ratio']:<8.2f} "
+              f"{abs(row['max_drawdown']):<8.2%}")
+
+    stitched_metrics = calculate_comprehensive_metrics(results['stitched'].values, initial_balance)
+    print("-" * 66)
+    print(f"Stitched OOS: Return {stitched_metrics['total_return']:.2%} | "
+          f"Sharpe {stitched_metrics['sharpe_ratio']:.2f} | "
+          f"Max DD {abs(stitched_metrics['max_drawdown']):.2%}")
+
+    if args.plot:
+        plot_path = f"{args.output_dir}/{ticker}_walk_forward.png"
+        plot_walk_forward(ticker, results, plot_path)
+        print(f"✓ Plot saved to {plot_path}")
+
+    print(f"✓ Results saved to {args.output_dir}/")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,46 +1,139 @@
 """
 Get live trading strategy from Strategist + Analyst agents
 Real-time interrogation of LLM agents for current market conditions
+
+La strategia del periodo corrente viene servita dallo StrategyStore
+(data/llm_strategies); gli agenti LLM vengono interrogati solo quando manca o
+è scaduta, e la nuova strategia viene aggiunta allo store. Prezzi,
+fondamentali e news passano dalla FetchCache (data/cache/fetch): dopo la prima
+invocazione della giornata di borsa non vengono riscaricati.
 """
 
 import sys
 import os
+import time
 from datetime import datetime, timedelta
 import yfinance as yf
 import pandas as pd
 import json
 import yaml
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.llm_agents.strategist_agent_deepseek import StrategistAgent
 from src.llm_agents.analyst_agent_deepseek import AnalystAgent
+from src.llm_agents.strategy_store import StrategyStore
+from src.utils.rate_limiter import RateLimiter
+from src.utils.fetch_cache import FetchCache
+
+# Giorni di calendario scaricati (~205 sedute): abbastanza per SMA_200 e la sua pendenza
+LIVE_HISTORY_DAYS = 300
+
+_fetch_cache = None
+
+
+def get_fetch_cache() -> FetchCache:
+    """FetchCache condivisa dalle fetch di questo modulo (creata al primo uso)"""
+    global _fetch_cache
+    if _fetch_cache is None:
+        _fetch_cache = FetchCache()
+    return _fetch_cache
+
+
+def set_fetch_cache(cache: FetchCache):
+    """Sostituisce la cache condivisa (es. TTL diversi o FetchCache(default_ttl=0) per disattivarla)"""
+    global _fetch_cache
+    _fetch_cache = cache
 
 
 def fetch_latest_market_data(ticker: str, days_back: int = 30) -> pd.DataFrame:
     """Fetch latest market data from Yahoo Finance"""
     print(f"📊 Fetching latest data for {ticker}...")
 
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days_back)
+    def download():
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days_back)
+        return yf.Ticker(ticker).history(start=start_date, end=end_date)
 
-    stock = yf.Ticker(ticker)
+    # Get price data (prezzi e fondamentali dalla cache se scaricati oggi)
+    df = get_fetch_cache().fetch('history', ticker, download, params={'days_back': days_back})
+    df = add_indicators(df, _fetch_info(ticker))
+
+    print(f"✅ Fetched {len(df)} days of data")
+    return df
+
+
+def fetch_batch_market_data(tickers: list, days_back: int = 30, max_workers: int = 4) -> dict:
+    """
+    Market data per più ticker: un solo yf.download per i prezzi, stock.info in parallelo
 
-    # Get price data
-    df = stock.history(start=start_date, end=end_date)
+    Solo i ticker senza prezzi in cache vengono scaricati; i prezzi del download
+    bulk sono salvati nella cache per ticker (condivisa con fetch_latest_market_data).
 
+    Returns:
+        Dict ticker -> DataFrame (stesso formato di fetch_latest_market_data); i ticker
+        senza dati mancano dal dict
+    """
+    cache = get_fetch_cache()
+    params = {'days_back': days_back}
+    cached = {ticker: cache.get('history', ticker, params) for ticker in tickers}
+    missing = [ticker for ticker in tickers if cached[ticker] is None]
+
+    if missing:
+        print(f"📊 Fetching latest data for {', '.join(missing)} (bulk)...")
+
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days_back)
+
+        start = time.perf_counter()
+        prices = yf.download(missing, start=start_date, end=end_date, group_by='ticker',
+                             auto_adjust=True, threads=True, progress=False)
+        elapsed = (time.perf_counter() - start) / len(missing)
+
+        for ticker in missing:
+            if isinstance(prices.columns, pd.MultiIndex):
+                if ticker not in prices.columns.get_level_values(0):
+                    continue
+                df = prices[ticker]
+            else:
+                df = prices
+            df = df.dropna(how='all').copy()
+            if not df.empty:
+                cached[ticker] = df
+                cache.put('history', ticker, df, params, fetch_seconds=elapsed)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        infos = dict(zip(tickers, pool.map(_fetch_info, tickers)))
+
+    market_data = {ticker: add_indicators(df, infos[ticker])
+                   for ticker, df in cached.items() if df is not None}
+
+    print(f"✅ Fetched data for {len(market_data)}/{len(tickers)} tickers")
+    return market_data
+
+
+def _fetch_info(ticker: str) -> dict:
+    """stock.info (lento: una richiesta per ticker, in cache per la giornata); {} se non disponibile"""
+    try:
+        return get_fetch_cache().fetch('info', ticker, lambda: yf.Ticker(ticker).info or {})
+    except Exception as e:
+        print(f"⚠️ {ticker}: fundamentals non disponibili ({e})")
+        return {}
+
+
+def add_indicators(df: pd.DataFrame, info: dict) -> pd.DataFrame:
+    """Indicatori tecnici e fondamentali usati dallo Strategist"""
     # Calculate technical indicators
     df['SMA_20'] = df['Close'].rolling(20).mean()
     df['SMA_50'] = df['Close'].rolling(50).mean()
+    df['SMA_200'] = df['Close'].rolling(200).mean()
     df['RSI'] = calculate_rsi(df['Close'])
 
     # Get fundamentals
-    info = stock.info
     df['PE_Ratio'] = info.get('trailingPE', None)
     df['Beta'] = info.get('beta', None)
-
-    print(f"✅ Fetched {len(df)} days of data")
     return df
 
 
@@ -59,8 +152,7 @@ def fetch_latest_news(ticker: str, days_back: int = 7) -> list:
     """Fetch latest news for ticker"""
     print(f"📰 Fetching latest news for {ticker}...")
 
-    stock = yf.Ticker(ticker)
-    news = stock.news
+    news = get_fetch_cache().fetch('news', ticker, lambda: yf.Ticker(ticker).news or [])
 
     # Format news for analyst
     news_list = []
@@ -76,123 +168,210 @@ def fetch_latest_news(ticker: str, days_back: int = 7) -> list:
     return news_list
 
 
-def prepare_strategist_input(df: pd.DataFrame) -> dict:
-    """Prepare market data for Strategist Agent"""
+def prepare_strategist_inputs(df: pd.DataFrame) -> tuple:
+    """
+    Input dello Strategist (stesso formato di precompute_llm_strategies) dai dati live
+
+    Returns:
+        Tuple (market_data, fundamentals, analytics, macro_data)
+    """
     latest = df.iloc[-1]
-    last_week = df.iloc[-5:] if len(df) >= 5 else df
 
-    return {
-        'beta': latest.get('Beta', 1.0),
-        'close': latest['Close'],
-        'volume': latest['Volume'],
-        'weekly_returns': last_week['Close'].pct_change().tolist(),
-        'hv_close': df['Close'].pct_change().std() * (252 ** 0.5),  # Annualized
-        'iv_close': latest.get('impliedVolatility', None),
-        'current_ratio': None,  # Would need fundamental API
-        'debt_to_equity': None,
-        'pe_ratio': latest.get('PE_Ratio'),
-        'gross_margin': None,
-        'operating_margin': None,
-        'roe': None,
-        'eps_yoy': None,
-        'net_income_yoy': None,
-        'sma_20': latest.get('SMA_20'),
-        'sma_50': latest.get('SMA_50'),
-        'rsi': latest.get('RSI'),
-        'macd': None,
-        'atr': None,
-        'spx_return': None,  # Would fetch SPX
-        'vix': None,  # Would fetch VIX
-        # Add more as needed
+    def value(column, default=0.0):
+        v = latest.get(column)
+        return float(v) if v is not None and pd.notna(v) else default
+
+    market_data = {
+        'timestamp': str(df.index[-1]),
+        'Close': value('Close'),
+        'Volume': value('Volume'),
+        'Weekly_Returns': df['Close'].pct_change().tail(20).fillna(0).tolist(),
+        'HV_Close': float(df['Close'].pct_change().std() * (252 ** 0.5)),  # Annualized
+        'IV_Close': 0.0,
+        'Beta': value('Beta', 1.0),
+        'Classification': 'Growth'
     }
 
+    fundamentals = {
+        'current_ratio': 1.5,  # Would need fundamental API
+        'debt_to_equity': 0.5,
+        'pe_ratio': value('PE_Ratio', 20.0),
+        'gross_margin': 0.4,
+        'operating_margin': 0.2,
+        'eps_yoy': 0.1,
+        'net_income_yoy': 0.1
+    }
 
-def get_live_strategy(ticker: str, verbose: bool = True):
-    """
-    Get live trading strategy for a ticker
+    analytics = {
+        'ma_20': value('SMA_20', value('Close')),
+        'ma_50': value('SMA_50', value('Close')),
+        'ma_200': value('SMA_200', value('Close')),
+        'ma_20_slope': float(df['SMA_20'].diff().iloc[-1]) if pd.notna(df['SMA_20'].diff().iloc[-1]) else 0.0,
+        'ma_50_slope': float(df['SMA_50'].diff().iloc[-1]) if pd.notna(df['SMA_50'].diff().iloc[-1]) else 0.0,
+        'rsi': value('RSI', 50.0),
+        'macd': 0.0,
+        'macd_signal': 0.0,
+        'atr': 0.0
+    }
 
-    Args:
-        ticker: Stock ticker (e.g., "AAPL")
-        verbose: Print detailed output
+    macro_data = {
+        'SPX_Close': 0.0,  # Would fetch SPX
+        'SPX_Slope': 0.0,
+        'VIX_Close': 0.0,  # Would fetch VIX
+        'VIX_Slope': 0.0,
+        'GDP_QoQ': 0.0,
+        'PMI': 50.0,
+        'PPI_YoY': 0.0,
+        'Treasury_YoY': 0.0
+    }
 
-    Returns:
-        dict with strategy, confidence, reasoning
-    """
+    return market_data, fundamentals, analytics, macro_data
 
-    if verbose:
-        print("\n" + "="*70)
-        print(f"🤖 Getting LIVE Strategy for {ticker}")
-        print("="*70 + "\n")
 
-    # Load config
+def _strategy_result(ticker: str, stored: dict, source: str) -> dict:
+    """Dict di get_live_strategy da una strategia dello store"""
+    return {
+        'ticker': ticker,
+        'timestamp': datetime.now().isoformat(),
+        'period_start': stored['period_start'],
+        'source': source,
+        'recommendation': 'LONG' if stored['direction'] == 1 else 'SHORT',
+        'confidence': stored['confidence'],
+        'strength': stored['strength'],
+        'reasoning': stored['explanation'],
+        'analyst_sentiment': stored.get('analyst_sentiment'),
+        'analyst_confidence': stored.get('analyst_confidence'),
+        'key_factors': stored.get('key_factors', []),
+        'current_price': stored.get('current_price'),
+        'rsi': stored.get('rsi'),
+        'pe_ratio': stored.get('pe_ratio')
+    }
+
+
+def load_live_config() -> dict:
     with open('configs/hybrid/rewts_llm_rl.yaml', 'r') as f:
-        config = yaml.safe_load(f)
+        return yaml.safe_load(f)
+
 
+def init_agents(config: dict, verbose: bool = True) -> tuple:
+    """Strategist e Analyst (condivisibili fra thread, come in precompute_llm_strategies)"""
     # Ensure API key is set
     if not os.getenv('DEEPSEEK_API_KEY'):
         raise ValueError("DEEPSEEK_API_KEY environment variable not set")
 
-    # Initialize agents
     if verbose:
         print("🔧 Initializing LLM Agents...")
 
-    strategist = StrategistAgent(config['llm'])
-    analyst = AnalystAgent(config['llm'])
+    return StrategistAgent(config['llm']), AnalystAgent(config['llm'])
+
+
+def generate_live_strategy(ticker: str, store: StrategyStore, verbose: bool = True, agents: tuple = None,
+                           market_df: pd.DataFrame = None, rate_limiter: RateLimiter = None) -> dict:
+    """
+    Genera la strategia del periodo corrente con Analyst + Strategist e la salva nello store
+
+    Args:
+        ticker: Stock ticker
+        store: StrategyStore in cui registrare la strategia
+        verbose: Print detailed output
+        agents: (strategist, analyst) già inizializzati (default: creati dalla config)
+        market_df: Market data già scaricati (default: fetch_latest_market_data)
+        rate_limiter: RateLimiter condiviso, atteso prima di ogni chiamata LLM
+
+    Returns:
+        Strategia salvata (come StrategyStore.lookup)
+    """
+    strategist, analyst = agents or init_agents(load_live_config(), verbose)
 
     # Fetch latest data
-    market_df = fetch_latest_market_data(ticker, days_back=60)
+    if market_df is None:
+        market_df = fetch_latest_market_data(ticker, days_back=LIVE_HISTORY_DAYS)
     news_list = fetch_latest_news(ticker, days_back=7)
 
-    # Prepare inputs
-    market_input = prepare_strategist_input(market_df)
-
     # Get Analyst insights (news analysis)
     if verbose:
         print("\n📰 Analyst Agent: Processing news...")
 
-    analyst_output = analyst.analyze_news(
-        ticker=ticker,
-        news_data=news_list,
-        verbose=verbose
-    )
+    if news_list and rate_limiter is not None:
+        rate_limiter.wait()
+    news_signals = analyst.process_news([
+        {'headline': item['title'], 'summary': '', 'source': item['publisher']}
+        for item in news_list
+    ])
 
     if verbose:
-        print(f"\n  Top Factors:")
-        for i, factor in enumerate(analyst_output['top_3_factors'], 1):
-            sentiment = analyst_output['sentiment'][i-1]
-            impact = analyst_output['impact_score'][i-1]
-            emoji = "🟢" if sentiment > 0 else "🔴" if sentiment < 0 else "⚪"
-            print(f"    {i}. {emoji} {factor} (Impact: {impact}/3)")
-
-        print(f"\n  Aggregate Sentiment: {analyst_output['aggregate_sentiment']:.2f}")
-        print(f"  Average Impact: {analyst_output['aggregate_impact']:.2f}/3")
+        print(f"  Sentiment: {news_signals['sentiment']} (confidence {news_signals['confidence']:.2f})")
+        for topic in news_signals.get('key_topics', [])[:3]:
+            print(f"    • {topic}")
 
-    # Get Strategist recommendation
+    # Get Strategist recommendation (reflection sull'ultima strategia dello store)
     if verbose:
         print("\n📊 Strategist Agent: Generating strategy...")
 
-    strategist_output = strategist.generate_strategy(
-        ticker=ticker,
-        market_data=market_input,
-        analyst_insights=analyst_output,
-        last_strategy=None,  # No previous strategy for live
-        verbose=verbose
+    market_data, fundamentals, analytics, macro_data = prepare_strategist_inputs(market_df)
+    last_strategy = store.get(ticker, datetime.now())
+    if rate_limiter is not None:
+        rate_limiter.wait()
+    strategy = strategist.generate_strategy(
+        market_data, fundamentals, analytics, macro_data, news_signals, last_strategy=last_strategy
     )
 
-    # Combine results
-    strategy = {
-        'ticker': ticker,
-        'timestamp': datetime.now().isoformat(),
-        'recommendation': 'LONG' if strategist_output['direction'] == 1 else 'SHORT',
-        'confidence': strategist_output['confidence'],
-        'reasoning': strategist_output['explanation'],
-        'analyst_sentiment': analyst_output['aggregate_sentiment'],
-        'analyst_impact': analyst_output['aggregate_impact'],
-        'key_factors': analyst_output['top_3_factors'],
-        'current_price': market_df.iloc[-1]['Close'],
-        'rsi': market_df.iloc[-1]['RSI'],
-        'pe_ratio': market_df.iloc[-1].get('PE_Ratio')
+    latest = market_df.iloc[-1]
+    extra = {
+        'analyst_sentiment': news_signals['sentiment'],
+        'analyst_confidence': float(news_signals['confidence']),
+        'key_factors': list(news_signals.get('key_topics', []))[:3],
+        'current_price': float(latest['Close']),
+        'rsi': float(latest['RSI']) if pd.notna(latest['RSI']) else None,
+        'pe_ratio': float(latest['PE_Ratio']) if pd.notna(latest.get('PE_Ratio')) else None
     }
+    today = datetime.now()
+    store.record(ticker, today, strategy, extra)
+    return store.lookup(ticker, today)
+
+
+def stored_strategy(ticker: str, store: StrategyStore, max_age_days: int = 31):
+    """Strategia del periodo corrente dallo store, None se manca o è più vecchia di max_age_days"""
+    today = datetime.now()
+    stored = store.lookup(ticker, today)
+    if stored is None or (today - pd.Timestamp(stored['period_start'])).days > max_age_days:
+        return None
+    return _strategy_result(ticker, stored, 'store')
+
+
+def get_live_strategy(ticker: str, verbose: bool = True, store: StrategyStore = None,
+                      refresh: bool = False, max_age_days: int = 31):
+    """
+    Get live trading strategy for a ticker
+
+    La strategia del periodo corrente viene letta dallo store (lookup per data,
+    nessuna chiamata all'LLM); Analyst e Strategist vengono interrogati solo se
+    manca o è più vecchia di max_age_days, e il risultato viene salvato nello store.
+
+    Args:
+        ticker: Stock ticker (e.g., "AAPL")
+        verbose: Print detailed output
+        store: StrategyStore (default: data/llm_strategies)
+        refresh: Rigenera con l'LLM anche se lo store ha una strategia valida
+        max_age_days: Giorni dall'inizio periodo oltre cui la strategia va rigenerata
+
+    Returns:
+        dict with strategy, confidence, reasoning
+    """
+
+    if verbose:
+        print("\n" + "="*70)
+        print(f"🤖 Getting LIVE Strategy for {ticker}")
+        print("="*70 + "\n")
+
+    store = store or StrategyStore()
+
+    strategy = None if refresh else stored_strategy(ticker, store, max_age_days)
+    if strategy is not None:
+        if verbose:
+            print(f"🗂️ Strategia dallo store (periodo dal {strategy['period_start']})")
+    else:
+        strategy = _strategy_result(ticker, generate_live_strategy(ticker, store, verbose), 'llm')
 
     if verbose:
         print("\n" + "="*70)
@@ -202,8 +381,11 @@ def get_live_strategy(ticker: str, verbose: bool = True):
         print(f"  Recommendation: {strategy['recommendation']} "
               f"({'🟢' if strategy['recommendation'] == 'LONG' else '🔴'})")
         print(f"  Confidence: {strategy['confidence']:.2f}/3.0")
-        print(f"  Current Price: ${strategy['current_price']:.2f}")
-        print(f"  RSI: {strategy['rsi']:.1f}")
+        print(f"  Period start: {strategy['period_start']} ({strategy['source']})")
+        if strategy['current_price'] is not None:
+            print(f"  Current Price: ${strategy['current_price']:.2f}")
+        if strategy['rsi'] is not None:
+            print(f"  RSI: {strategy['rsi']:.1f}")
         print(f"\n  Reasoning:")
         print(f"  {strategy['reasoning']}")
         print("\n" + "="*70 + "\n")
@@ -211,42 +393,91 @@ def get_live_strategy(ticker: str, verbose: bool = True):
     return strategy
 
 
-def get_batch_strategies(tickers: list, save_to_file: bool = True):
-    """Get strategies for multiple tickers"""
+def get_batch_strategies(tickers: list, save_to_file: bool = True, refresh: bool = False,
+                         max_workers: int = 4, max_age_days: int = 31):
+    """
+    Get strategies for multiple tickers
+
+    Le strategie ancora valide vengono lette dallo store; per le altre i prezzi
+    sono scaricati con un solo download bulk e le chiamate LLM girano in
+    parallelo (al massimo max_workers ticker alla volta) sotto un RateLimiter
+    condiviso. Ogni risultato viene stampato e salvato appena pronto.
+
+    Args:
+        tickers: Ticker da analizzare
+        save_to_file: Salva i risultati in live_strategies_{timestamp}.json (aggiornato a ogni ticker)
+        refresh: Rigenera con l'LLM anche le strategie valide nello store
+        max_workers: Ticker elaborati in parallelo
+        max_age_days: Giorni dall'inizio periodo oltre cui la strategia va rigenerata
+    """
 
     print("\n" + "="*70)
     print(f"🚀 Getting strategies for {len(tickers)} tickers")
     print("="*70 + "\n")
 
+    store = StrategyStore()
     strategies = {}
-
-    for i, ticker in enumerate(tickers, 1):
-        print(f"\n[{i}/{len(tickers)}] Processing {ticker}...")
-
-        try:
-            strategy = get_live_strategy(ticker, verbose=False)
-            strategies[ticker] = strategy
-
-            # Quick summary
+    filename = f"live_strategies_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json" if save_to_file else None
+    start_time = time.time()
+
+    def report(ticker, strategy):
+        strategies[ticker] = strategy
+        done = f"[{len(strategies)}/{len(tickers)}]"
+        if 'error' in strategy:
+            print(f"{done} {ticker}: ❌ Error: {strategy['error']}")
+        else:
             rec = strategy['recommendation']
-            conf = strategy['confidence']
             emoji = "🟢" if rec == "LONG" else "🔴"
-            print(f"  {emoji} {rec} (Confidence: {conf:.2f}/3.0)")
+            print(f"{done} {ticker}: {emoji} {rec} (Confidence: {strategy['confidence']:.2f}/3.0, "
+                  f"{strategy['source']}, {time.time() - start_time:.1f}s)")
+        if filename is not None:
+            _write_json(filename, {t: strategies[t] for t in tickers if t in strategies})
+
+    # 1. Strategie ancora valide: nessuna chiamata esterna
+    pending = []
+    for ticker in tickers:
+        strategy = None if refresh else stored_strategy(ticker, store, max_age_days)
+        if strategy is not None:
+            report(ticker, strategy)
+        else:
+            pending.append(ticker)
 
+    # 2. Le altre: download bulk dei prezzi, poi LLM in parallelo con rate limit condiviso
+    if pending:
+        try:
+            config = load_live_config()
+            agents = init_agents(config)
+            rate_limiter = RateLimiter(max_per_second=config.get('max_requests_per_second', 8.0))
+            market_data = fetch_batch_market_data(pending, days_back=LIVE_HISTORY_DAYS, max_workers=max_workers)
         except Exception as e:
-            print(f"  ❌ Error: {e}")
-            strategies[ticker] = {"error": str(e)}
-
-    # Save to file
-    if save_to_file:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"live_strategies_{timestamp}.json"
-
-        with open(filename, 'w') as f:
-            json.dump(strategies, f, indent=2, default=str)
-
+            for ticker in pending:
+                report(ticker, {"error": str(e)})
+            pending = []
+
+        def generate(ticker):
+            if ticker not in market_data:
+                raise ValueError(f"No market data for {ticker}")
+            stored = generate_live_strategy(ticker, store, verbose=False, agents=agents,
+                                            market_df=market_data[ticker], rate_limiter=rate_limiter)
+            return _strategy_result(ticker, stored, 'llm')
+
+        if pending:
+            print(f"\n🤖 Generating {len(pending)} strategies ({min(max_workers, len(pending))} in parallel)...")
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as pool:
+                futures = {pool.submit(generate, ticker): ticker for ticker in pending}
+                for future in as_completed(futures):
+                    try:
+                        report(futures[future], future.result())
+                    except Exception as e:
+                        report(futures[future], {"error": str(e)})
+
+    if filename is not None:
         print(f"\n✅ Strategies saved to {filename}")
 
+    cache_stats = get_fetch_cache().get_stats()
+    print(f"🗂️ Fetch cache: {cache_stats['memory_hits'] + cache_stats['disk_hits']} hits, "
+          f"{cache_stats['misses']} misses ({cache_stats['saved_fetch_seconds']:.1f}s saved)")
+
     # Summary
     print("\n" + "="*70)
     print("📊 STRATEGIES SUMMARY")
@@ -257,18 +488,20 @@ def get_batch_strategies(tickers: list, save_to_file: bool = True):
     print(f"\n{'Ticker':<10} {'Rec':<8} {'Conf':<8} {'Sentiment':<12} {'Price':<12}")
     print("-"*70)
 
-    for ticker, strategy in strategies.items():
+    for ticker in tickers:
+        strategy = strategies[ticker]
         if "error" in strategy:
             print(f"{ticker:<10} ERROR: {strategy['error'][:50]}")
         else:
             rec = strategy['recommendation']
             emoji = "🟢" if rec == "LONG" else "🔴"
+            price = f"${strategy['current_price']:.2f}" if strategy['current_price'] is not None else '-'
             print(
                 f"{ticker:<10} "
                 f"{emoji} {rec:<6} "
                 f"{strategy['confidence']:<8.2f} "
-                f"{strategy['analyst_sentiment']:<12.2f} "
-                f"${strategy['current_price']:<11.2f}"
+                f"{str(strategy['analyst_sentiment'] or '-'):<12} "
+                f"{price:<12}"
             )
 
     print("="*70 + "\n")
@@ -276,6 +509,14 @@ def get_batch_strategies(tickers: list, save_to_file: bool = True):
     return strategies
 
 
+def _write_json(path: str, data: dict):
+    """Scrittura atomica (file temporaneo + rename): il file è sempre leggibile"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
 if __name__ == "__main__":
     import argparse
 
@@ -283,29 +524,38 @@ if __name__ == "__main__":
     parser.add_argument('--ticker', type=str, help='Single ticker to analyze')
     parser.add_argument('--tickers', type=str, nargs='+', help='Multiple tickers')
     parser.add_argument('--all', action='store_true', help='All tickers from config')
+    parser.add_argument('--refresh', action='store_true', help='Regenerate with the LLM even if the store is fresh')
+    parser.add_argument('--workers', type=int, default=4, help='Tickers processed in parallel in batch mode')
+    parser.add_argument('--cache-ttl', type=float, default=None,
+                        help='Freshness of cached prices/fundamentals/news in seconds (default: current trading day)')
+    parser.add_argument('--no-cache', action='store_true', help='Always re-download market data and news')
 
     args = parser.parse_args()
 
-    # Load API key from environment
+    if args.no_cache:
+        set_fetch_cache(FetchCache(cache_dir=None, default_ttl=0))
+    elif args.cache_ttl is not None:
+        set_fetch_cache(FetchCache(default_ttl=args.cache_ttl))
+
+    # Load API key from environment (needed only when the store has no fresh strategy)
     if not os.getenv('DEEPSEEK_API_KEY'):
-        print("❌ DEEPSEEK_API_KEY not set!")
+        print("⚠️ DEEPSEEK_API_KEY not set: only strategies already in the store can be served")
         print("Set it with: export DEEPSEEK_API_KEY='your_key_here'")
-        sys.exit(1)
 
     if args.ticker:
         # Single ticker
-        strategy = get_live_strategy(args.ticker)
+        strategy = get_live_strategy(args.ticker, refresh=args.refresh)
 
     elif args.tickers:
         # Multiple tickers
-        strategies = get_batch_strategies(args.tickers)
+        strategies = get_batch_strategies(args.tickers, refresh=args.refresh, max_workers=args.workers)
 
     elif args.all:
         # All tickers from config
         with open('configs/hybrid/rewts_llm_rl.yaml', 'r') as f:
             config = yaml.safe_load(f)
         tickers = config.get('tickers', ['AAPL', 'AMZN', 'GOOGL', 'META', 'MSFT', 'TSLA'])
-        strategies = get_batch_strategies(tickers)
+        strategies = get_batch_strategies(tickers, refresh=args.refresh, max_workers=args.workers)
 
     else:
         # Default: AAPL
@@ -4,7 +4,6 @@ Script per eseguire Paper Trading Real-Time con Alpaca
 
 import sys
 import os
-import pickle
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -13,7 +12,10 @@ load_dotenv()
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.trading.alpaca_paper_trader import AlpacaPaperTrader, AlpacaPaperTradingBackend
+from src.trading.alpaca_paper_trader import AlpacaPaperTrader, AlpacaPaperTradingBackend, DEFAULT_HISTORY_PATH
+from src.trading.async_backend import AsyncAlpacaTradingBackend
+from src.hybrid_model.ensemble_io import load_ensemble, resolve_model_path
+from src.serving.remote_ensemble import RemoteEnsemble
 
 
 def test_alpaca_connection(api_key: str, secret_key: str):
@@ -56,7 +58,11 @@ def run_paper_trading(
     ticker: str = 'AAPL',
     model_path: str = None,
     check_interval: int = 300,  # 5 minuti
-    max_iterations: int = None
+    max_iterations: int = None,
+    predict_url: str = None,
+    reconcile_interval: float = None,
+    history_path: str = DEFAULT_HISTORY_PATH,
+    bars_ttl: float = 0.0
 ):
     """
     Esegui paper trading real-time
@@ -68,6 +74,10 @@ def run_paper_trading(
         model_path: Path al modello ensemble salvato
         check_interval: Secondi tra ogni check
         max_iterations: Numero massimo iterazioni (None = infinito)
+        predict_url: URL dell'API di backtesting: usa POST /predict invece di caricare il modello
+        reconcile_interval: Se impostato, state cache locale riconciliata col broker ogni N secondi
+        history_path: Storico durevole di decisioni, ordini e fill (.jsonl o .db; None = disattivato)
+        bars_ttl: Secondi per cui i bars scaricati vengono riusati fra i check (0 = a ogni check)
     """
     print(f"🚀 Avvio Paper Trading per {ticker}")
     print("=" * 60)
@@ -77,24 +87,33 @@ def run_paper_trading(
         print("\n❌ Impossibile connettersi ad Alpaca. Verifica le credenziali.")
         return
 
-    # 2. Carica modello ensemble
-    if model_path is None:
-        model_path = f"models/{ticker}_rewts_ensemble.pkl"
-
-    print(f"\n📦 Caricamento modello da: {model_path}")
-
-    try:
-        with open(model_path, 'rb') as f:
-            ensemble = pickle.load(f)
-        print("✅ Modello caricato con successo!")
-        print(f"   Chunk models: {len(ensemble.chunk_models)}")
-    except FileNotFoundError:
-        print(f"❌ Modello non trovato: {model_path}")
-        print("   Esegui prima: python scripts/train_rewts_llm_rl.py")
-        return
+    # 2. Carica modello ensemble (o usa quello servito dall'API)
+    if predict_url is not None:
+        ensemble = RemoteEnsemble(predict_url, ticker)
+        print(f"\n🌐 Predizioni da: {predict_url}/predict")
+    else:
+        if model_path is None:
+            model_path = resolve_model_path(ticker)
+
+        print(f"\n📦 Caricamento modello da: {model_path}")
+
+        try:
+            ensemble = load_ensemble(model_path)
+            print("✅ Modello caricato con successo!")
+            print(f"   Chunk models: {len(ensemble.chunk_models)}")
+        except FileNotFoundError:
+            print(f"❌ Modello non trovato: {model_path}")
+            print("   Esegui prima: python scripts/train_rewts_llm_rl.py")
+            return
 
     # 3. Inizializza backend
-    backend = AlpacaPaperTradingBackend(api_key, secret_key)
+    backend = AlpacaPaperTradingBackend(
+        api_key, secret_key,
+        state_cache=reconcile_interval is not None,
+        reconcile_interval=reconcile_interval or 60.0,
+        history_path=history_path,
+        bars_ttl=bars_ttl
+    )
 
     # 4. Avvia trading loop
     print(f"\n🔄 Avvio trading loop...")
@@ -110,6 +129,101 @@ def run_paper_trading(
     )
 
 
+def run_paper_trading_multi(
+    api_key: str,
+    secret_key: str,
+    tickers: list,
+    model_path: str = None,
+    check_interval: int = 300,
+    max_iterations: int = None,
+    predict_url: str = None,
+    bars_mode: str = 'multi',
+    tick_budget_ms: float = 2000.0,
+    reconcile_interval: float = None,
+    history_path: str = DEFAULT_HISTORY_PATH,
+    bars_ttl: float = 0.0,
+    stream: bool = False,
+    stream_url: str = None
+):
+    """
+    Paper trading su più ticker con il loop asincrono (bars, inferenza e ordini per tick in parallelo)
+
+    Args:
+        api_key: Alpaca API Key
+        secret_key: Alpaca Secret Key
+        tickers: Ticker da tradare
+        model_path: Path di un modello unico per tutti i ticker (default: models/{ticker}_rewts_inference/ per ticker)
+        check_interval: Secondi tra l'inizio di due tick
+        max_iterations: Numero massimo di tick (None = infinito)
+        predict_url: URL dell'API di backtesting: usa POST /predict invece di caricare i modelli
+        bars_mode: 'multi' (endpoint multi-symbol) o 'concurrent' (una richiesta per ticker)
+        tick_budget_ms: Budget di latenza del tick
+        reconcile_interval: Se impostato, state cache locale riconciliata col broker ogni N secondi
+        history_path: Storico durevole di decisioni, ordini e fill (.jsonl o .db; None = disattivato)
+        bars_ttl: Secondi per cui i bars scaricati vengono riusati fra i tick (0 = a ogni tick)
+        stream: Bars da websocket (minute bars): inferenza solo sui bars nuovi invece del polling
+        stream_url: URL websocket (default: feed IEX di Alpaca; es. scripts/utils/bar_replay_server.py)
+    """
+    print(f"🚀 Avvio Paper Trading async per {', '.join(tickers)}")
+    print("=" * 60)
+
+    if not test_alpaca_connection(api_key, secret_key):
+        print("\n❌ Impossibile connettersi ad Alpaca. Verifica le credenziali.")
+        return
+
+    # Un ensemble per ticker; lo stesso modello caricato una sola volta
+    ensembles = {}
+    loaded = {}
+    for ticker in tickers:
+        if predict_url is not None:
+            ensembles[ticker] = RemoteEnsemble(predict_url, ticker)
+            continue
+
+        path = model_path or resolve_model_path(ticker)
+        if path not in loaded:
+            print(f"\n📦 Caricamento modello da: {path}")
+            try:
+                loaded[path] = load_ensemble(path)
+            except FileNotFoundError:
+                print(f"❌ Modello non trovato: {path}")
+                print("   Esegui prima: python scripts/train_rewts_llm_rl.py")
+                return
+            print(f"✅ Chunk models: {len(loaded[path].chunk_models)}")
+        ensembles[ticker] = loaded[path]
+
+    if predict_url is not None:
+        print(f"\n🌐 Predizioni da: {predict_url}/predict")
+
+    backend = AsyncAlpacaTradingBackend(
+        api_key, secret_key,
+        max_workers=max(4, 2 * len(tickers)),
+        bars_mode=bars_mode,
+        timeframe='1Min' if stream else '1Day',
+        tick_budget_ms=tick_budget_ms,
+        state_cache=reconcile_interval is not None,
+        reconcile_interval=reconcile_interval or 60.0,
+        history_path=history_path,
+        bars_ttl=bars_ttl
+    )
+
+    print("\n⚠️ Premi Ctrl+C per interrompere\n")
+    if stream:
+        backend.run_live_streaming(
+            ensembles=ensembles,
+            symbols=tickers,
+            stream_url=stream_url,
+            max_ticks=max_iterations
+        )
+        return
+
+    backend.run_live_trading_multi(
+        ensembles=ensembles,
+        symbols=tickers,
+        check_interval=check_interval,
+        max_iterations=max_iterations
+    )
+
+
 def demo_manual_trading(api_key: str, secret_key: str):
     """Demo di trading manuale con Alpaca"""
     print("🎮 Demo: Trading Manuale con Alpaca")
@@ -178,12 +292,45 @@ def main():
     parser.add_argument('--ticker', type=str, default='AAPL',
                         help='Ticker da tradare (default: AAPL)')
 
+    parser.add_argument('--tickers', type=str, nargs='+', default=None,
+                        help='Più ticker con il loop asincrono (es. --tickers AAPL MSFT NVDA)')
+
+    parser.add_argument('--bars-mode', type=str, default='multi', choices=['multi', 'concurrent'],
+                        help='Con --tickers: endpoint bars multi-symbol o una richiesta per ticker in parallelo')
+
+    parser.add_argument('--tick-budget-ms', type=float, default=2000.0,
+                        help='Con --tickers: budget di latenza del tick in ms (default: 2000)')
+
     parser.add_argument('--model', type=str, default=None,
-                        help='Path al modello ensemble (default: models/{ticker}_rewts_ensemble.pkl)')
+                        help='Path al modello ensemble, bundle o .pkl (default: models/{ticker}_rewts_inference/ se presente)')
+
+    parser.add_argument('--predict-url', type=str, default=None,
+                        help="URL dell'API (es. http://VM_IP:8000): azioni da POST /predict invece del modello locale")
 
     parser.add_argument('--interval', type=int, default=300,
                         help='Intervallo check in secondi (default: 300 = 5 minuti)')
 
+    parser.add_argument('--stream', action='store_true',
+                        help='Con --tickers: bars da websocket invece del polling REST (richiede websockets)')
+
+    parser.add_argument('--stream-url', type=str, default=None,
+                        help='Con --stream: URL websocket (default: feed IEX di Alpaca)')
+
+    parser.add_argument('--reconcile-interval', type=float, default=None,
+                        help='Account e posizioni da una cache locale riconciliata col broker ogni N secondi '
+                             '(default: lettura dal broker a ogni segnale)')
+
+    parser.add_argument('--history', type=str, default=DEFAULT_HISTORY_PATH,
+                        help=f'Storico durevole di decisioni, ordini e fill: .jsonl o .db per SQLite '
+                             f'(default: {DEFAULT_HISTORY_PATH})')
+
+    parser.add_argument('--no-history', dest='history', action='store_const', const=None,
+                        help='Disattiva lo storico su disco')
+
+    parser.add_argument('--bars-ttl', type=float, default=0.0,
+                        help='Riusa i bars scaricati per N secondi invece di riscaricarli a ogni check '
+                             '(default: 0 = sempre dal broker)')
+
     parser.add_argument('--max-iter', type=int, default=None,
                         help='Numero massimo iterazioni (default: infinito)')
 
@@ -212,6 +359,24 @@ def main():
     if args.mode == 'test':
         test_alpaca_connection(api_key, secret_key)
 
+    elif args.mode == 'run' and args.tickers:
+        run_paper_trading_multi(
+            api_key=api_key,
+            secret_key=secret_key,
+            tickers=args.tickers,
+            model_path=args.model,
+            check_interval=args.interval,
+            max_iterations=args.max_iter,
+            predict_url=args.predict_url,
+            bars_mode=args.bars_mode,
+            tick_budget_ms=args.tick_budget_ms,
+            reconcile_interval=args.reconcile_interval,
+            history_path=args.history,
+            bars_ttl=args.bars_ttl,
+            stream=args.stream,
+            stream_url=args.stream_url
+        )
+
     elif args.mode == 'run':
         run_paper_trading(
             api_key=api_key,
@@ -219,7 +384,11 @@ def main():
             ticker=args.ticker,
             model_path=args.model,
             check_interval=args.interval,
-            max_iterations=args.max_iter
+            max_iterations=args.max_iter,
+            predict_url=args.predict_url,
+            reconcile_interval=args.reconcile_interval,
+            history_path=args.history,
+            bars_ttl=args.bars_ttl
         )
 
     elif args.mode == 'demo':
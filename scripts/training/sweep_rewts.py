@@ -0,0 +1,437 @@
+"""
+Parameter sweep per iperparametri ReWTSE (rewts + trading_env)
+
+Espande una grid o random search definita in YAML, esegue i trial su un process pool
+locale e salva i risultati in una tabella SQLite interrogabile. I chunk model sono
+salvati in un ChunkModelStore: trial con la stessa configurazione di chunk
+(stessa slice di dati, strategie, iperparametri DDQN e seed) li riusano.
+
+Usage:
+    python scripts/training/sweep_rewts.py --sweep-config configs/sweeps/rewts_sweep.yaml --workers 4
+
+Query:
+    sqlite3 results/sweeps/sweep_results.db \
+        "SELECT json_extract(params, '$.rewts.chunk_length') AS chunk, AVG(sharpe_ratio)
+         FROM trials WHERE status = 'ok' GROUP BY chunk"
+"""
+
+import sys
+import os
+import copy
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import argparse
+import itertools
+import contextlib
+import numpy as np
+import yaml
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Add project root and scripts dir to path
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(SCRIPTS_DIR)
+sys.path.append(PROJECT_ROOT)
+sys.path.append(SCRIPTS_DIR)
+
+from src.utils.data_utils import load_market_data
+from src.llm_agents.strategy_store import StrategyStore
+
+SWEEP_SECTIONS = ('rewts', 'trading_env')
+
+RESULT_COLUMNS = [
+    'total_return', 'sharpe_ratio', 'max_drawdown', 'volatility', 'win_rate',
+    'final_value', 'num_trades', 'num_chunks', 'chunks_reused', 'chunks_trained',
+    'train_seconds', 'eval_seconds'
+]
+
+
+# ========== Search space ==========
+
+def _flatten_parameters(parameters):
+    """{'rewts': {'chunk_length': [...]}} -> [('rewts', 'chunk_length', spec), ...]"""
+    flat = []
+    for section, params in parameters.items():
+        if section not in SWEEP_SECTIONS:
+            raise ValueError(f"Unsupported sweep section '{section}' (allowed: {', '.join(SWEEP_SECTIONS)})")
+        for name, spec in params.items():
+            flat.append((section, name, spec))
+    return flat
+
+
+def _nest(assignments):
+    """[('rewts', 'chunk_length', 300)] -> {'rewts': {'chunk_length': 300}}"""
+    overrides = {}
+    for section, name, value in assignments:
+        overrides.setdefault(section, {})[name] = value
+    return overrides
+
+
+def expand_grid(parameters):
+    """
+    Prodotto cartesiano dei valori di ogni parametro
+
+    Returns:
+        Lista di dict di override {section: {name: value}}
+    """
+    flat = _flatten_parameters(parameters)
+    for section, name, spec in flat:
+        if not isinstance(spec, list):
+            raise ValueError(f"Grid search requires a list of values for {section}.{name}")
+
+    combinations = itertools.product(*[spec for _, _, spec in flat])
+    return [
+        _nest([(section, name, value) for (section, name, _), value in zip(flat, combo)])
+        for combo in combinations
+    ]
+
+
+def _sample_value(spec, rng):
+    """Campiona un valore da una lista (scelta) o da {low, high, log, type}"""
+    if isinstance(spec, list):
+        return spec[rng.randrange(len(spec))]
+
+    low, high = spec['low'], spec['high']
+    if spec.get('log', False):
+        value = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+    else:
+        value = rng.uniform(low, high)
+
+    if spec.get('type') == 'int':
+        return int(round(value))
+    return value
+
+
+def expand_random(parameters, num_samples, seed=0):
+    """
+    Random search: num_samples configurazioni (senza duplicati)
+
+    Returns:
+        Lista di dict di override {section: {name: value}}
+    """
+    flat = _flatten_parameters(parameters)
+    rng = random.Random(seed)
+
+    samples = []
+    seen = set()
+    attempts = 0
+    while len(samples) < num_samples and attempts < num_samples * 20:
+        attempts += 1
+        overrides = _nest([(section, name, _sample_value(spec, rng)) for section, name, spec in flat])
+        signature = json.dumps(overrides, sort_keys=True)
+        if signature not in seen:
+            seen.add(signature)
+            samples.append(overrides)
+
+    return samples
+
+
+def apply_overrides(base_config, overrides):
+    """Copia della config base con gli override applicati"""
+    config = copy.deepcopy(base_config)
+    for section, params in overrides.items():
+        config.setdefault(section, {}).update(params)
+    return config
+
+
+def input_fingerprint(ticker, data_dir, strategies_dir):
+    """
+    (file, mtime, dimensione) dei dati di mercato e delle strategie di un ticker
+
+    Dati o strategie rigenerati cambiano l'id dei trial, che vengono rieseguiti.
+    """
+    store = StrategyStore(strategies_dir, data_dir)
+    paths = [os.path.join(data_dir, f"{ticker}_full_data.csv"), store.path(ticker), store.legacy_path(ticker)]
+
+    fingerprint = []
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            fingerprint.append([os.path.basename(path), stat.st_mtime_ns, stat.st_size])
+    return fingerprint
+
+
+def make_trial_id(ticker, seed, overrides, train_fraction, config=None, inputs=None):
+    """
+    Hash stabile che identifica un trial
+
+    Args:
+        ticker: Ticker del trial
+        seed: Seed del training
+        overrides: Override dello spazio di ricerca
+        train_fraction: Frazione di dati per il training
+        config: Config completa del trial (base + override): una modifica della
+                config base cambia l'id e invalida i risultati già salvati
+        inputs: input_fingerprint dei dati e delle strategie del ticker
+    """
+    key_str = json.dumps({
+        'ticker': ticker,
+        'seed': seed,
+        'overrides': overrides,
+        'train_fraction': train_fraction,
+        'config': config,
+        'inputs': inputs
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(key_str.encode()).hexdigest()[:16]
+
+
+# ========== Results table ==========
+
+class SweepResultsDB:
+    """Tabella SQLite con un record per trial"""
+
+    def __init__(self, db_path='results/sweeps/sweep_results.db'):
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        metric_columns = ',\n'.join(f"    {col} REAL" for col in RESULT_COLUMNS)
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS trials (
+                trial_id TEXT PRIMARY KEY,
+                sweep_name TEXT,
+                ticker TEXT,
+                seed INTEGER,
+                params TEXT,
+                status TEXT,
+                {metric_columns},
+                error TEXT,
+                created_at TEXT
+            )
+        """)
+        self.conn.commit()
+
+    def completed_trial_ids(self):
+        rows = self.conn.execute("SELECT trial_id FROM trials WHERE status = 'ok'").fetchall()
+        return {row[0] for row in rows}
+
+    def record(self, sweep_name, trial, result):
+        columns = ['trial_id', 'sweep_name', 'ticker', 'seed', 'params', 'status'] + RESULT_COLUMNS + ['error', 'created_at']
+        values = [
+            trial['trial_id'], sweep_name, trial['ticker'], trial['seed'],
+            json.dumps(trial['overrides'], sort_keys=True), result['status']
+        ] + [result.get(col) for col in RESULT_COLUMNS] + [result.get('error'), datetime.now().isoformat()]
+
+        placeholders = ', '.join('?' for _ in columns)
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO trials ({', '.join(columns)}) VALUES ({placeholders})",
+            values
+        )
+        self.conn.commit()
+
+    def export_csv(self, path):
+        import pandas as pd
+        df = pd.read_sql_query("SELECT * FROM trials ORDER BY sharpe_ratio DESC", self.conn)
+        df.to_csv(path, index=False)
+        return path
+
+    def close(self):
+        self.conn.close()
+
+
+# ========== Trial execution (worker process) ==========
+
+def _init_worker():
+    """Un thread torch per processo: il parallelismo è fra trial"""
+    import torch
+    torch.set_num_threads(1)
+
+
+def run_trial(trial):
+    """
+    Esegue un trial: training ensemble (con chunk store) + backtest sul test split
+
+    Args:
+        trial: Dict con trial_id, ticker, seed, overrides, config, train_fraction,
+               chunk_store_dir, data_dir, strategies_dir, log_dir
+
+    Returns:
+        Dict con status e metriche
+    """
+    from training.train_rewts_llm_rl import train_rewts_ensemble
+    from backtesting.backtest_utils import calculate_comprehensive_metrics
+    from src.hybrid_model.chunk_model_store import ChunkModelStore
+    from src.backtest_engine.fast_backtest import run_ensemble_backtest, fit_lookback_weights
+
+    os.makedirs(trial['log_dir'], exist_ok=True)
+    log_path = os.path.join(trial['log_dir'], f"{trial['trial_id']}.log")
+
+    try:
+        with open(log_path, 'w') as log_file, contextlib.redirect_stdout(log_file):
+            config = trial['config']
+            ticker = trial['ticker']
+            env_config = config['trading_env']
+            strategy_frequency = config['strategy_frequency']
+
+            market_df = load_market_data(ticker, trial['data_dir'])
+            strategies = StrategyStore(trial['strategies_dir'], trial['data_dir'], strategy_frequency).load(ticker)
+
+            train_size = int(trial['train_fraction'] * len(market_df))
+            train_df = market_df.iloc[:train_size]
+
+            # Training (chunk riusati dallo store quando possibile)
+            chunk_store = ChunkModelStore(trial['chunk_store_dir'])
+            start = time.time()
+            ensemble = train_rewts_ensemble(
+                ticker, train_df, strategies, config,
+                chunk_store=chunk_store, seed=trial['seed']
+            )
+            train_seconds = time.time() - start
+
+            # Pesi ReWTSE sul look-back che precede il test, poi backtest a pesi fissi
+            start = time.time()
+            lookback_start = max(0, train_size - config['rewts']['lookback_length'])
+            weights = fit_lookback_weights(
+                ensemble,
+                market_df.iloc[lookback_start:train_size],
+                strategies[lookback_start // strategy_frequency:],
+                env_config
+            )
+            result = run_ensemble_backtest(
+                ensemble,
+                market_df.iloc[train_size:],
+                strategies[train_size // strategy_frequency:],
+                env_config,
+                weights=weights if len(weights) > 0 else None
+            )
+            eval_seconds = time.time() - start
+
+        initial_balance = env_config.get('initial_balance', 10000)
+        metrics = calculate_comprehensive_metrics(result['portfolio_values'], initial_balance)
+        store_stats = chunk_store.get_stats()
+
+        return {
+            'status': 'ok',
+            'total_return': float(metrics['total_return']),
+            'sharpe_ratio': float(metrics['sharpe_ratio']),
+            'max_drawdown': float(metrics['max_drawdown']),
+            'volatility': float(metrics['volatility']),
+            'win_rate': float(metrics['win_rate']),
+            'final_value': float(metrics['final_value']),
+            'num_trades': result['num_trades'],
+            'num_chunks': len(ensemble.chunk_models),
+            'chunks_reused': store_stats['hits'],
+            'chunks_trained': store_stats['misses'],
+            'train_seconds': train_seconds,
+            'eval_seconds': eval_seconds
+        }
+
+    except Exception as e:
+        return {'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+
+
+# ========== Main ==========
+
+def build_trials(sweep, base_config, args):
+    """Espande lo spazio di ricerca nella lista di trial"""
+    search = args.search or sweep.get('search', 'grid')
+    parameters = sweep.get('parameters', {})
+
+    if search == 'grid':
+        combinations = expand_grid(parameters)
+    elif search == 'random':
+        num_samples = args.num_samples or sweep.get('num_samples', 20)
+        combinations = expand_random(parameters, num_samples, seed=sweep.get('search_seed', 0))
+    else:
+        raise ValueError(f"Unknown search type: {search}")
+
+    tickers = args.tickers or sweep.get('tickers') or base_config['tickers']
+    seeds = sweep.get('seeds', [0])
+    train_fraction = sweep.get('train_fraction', 0.7)
+
+    trials = []
+    for ticker in tickers:
+        inputs = input_fingerprint(ticker, args.data_dir, args.strategies_dir)
+        for seed in seeds:
+            for overrides in combinations:
+                config = apply_overrides(base_config, overrides)
+                trials.append({
+                    'trial_id': make_trial_id(ticker, seed, overrides, train_fraction, config, inputs),
+                    'ticker': ticker,
+                    'seed': seed,
+                    'overrides': overrides,
+                    'config': config,
+                    'train_fraction': train_fraction,
+                    'chunk_store_dir': args.chunk_store,
+                    'data_dir': args.data_dir,
+                    'strategies_dir': args.strategies_dir,
+                    'log_dir': os.path.join(os.path.dirname(args.results_db) or '.', 'logs')
+                })
+
+    return trials
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Grid/random sweep over ReWTSE hyperparameters')
+    parser.add_argument('--sweep-config', type=str, default='configs/sweeps/rewts_sweep.yaml', help='Sweep YAML')
+    parser.add_argument('--search', choices=['grid', 'random'], help='Override search type')
+    parser.add_argument('--num-samples', type=int, help='Random search samples')
+    parser.add_argument('--tickers', type=str, nargs='+', help='Override tickers')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Parallel trial processes')
+    parser.add_argument('--results-db', type=str, default='results/sweeps/sweep_results.db', help='SQLite results table')
+    parser.add_argument('--chunk-store', type=str, default='models/chunk_store', help='Chunk model store directory')
+    parser.add_argument('--data-dir', type=str, default='data/processed', help='Processed market data directory')
+    parser.add_argument('--strategies-dir', type=str, default='data/llm_strategies', help='Precomputed LLM strategies')
+    parser.add_argument('--force', action='store_true', help='Re-run trials already completed')
+    parser.add_argument('--export-csv', type=str, help='Export the results table to CSV at the end')
+    args = parser.parse_args()
+
+    with open(args.sweep_config, 'r') as f:
+        sweep = yaml.safe_load(f)
+    with open(sweep.get('base_config', 'configs/hybrid/rewts_llm_rl.yaml'), 'r') as f:
+        base_config = yaml.safe_load(f)
+
+    sweep_name = sweep.get('name', os.path.splitext(os.path.basename(args.sweep_config))[0])
+    trials = build_trials(sweep, base_config, args)
+
+    db = SweepResultsDB(args.results_db)
+    if not args.force:
+        completed = db.completed_trial_ids()
+        skipped = [t for t in trials if t['trial_id'] in completed]
+        trials = [t for t in trials if t['trial_id'] not in completed]
+        if skipped:
+            print(f"↺ Skipping {len(skipped)} trials already in {args.results_db}")
+
+    # Trial con la stessa configurazione di chunk vicini: massimizza il riuso dallo store
+    trials.sort(key=lambda t: (t['ticker'], t['seed'], json.dumps(t['overrides'].get('rewts', {}), sort_keys=True)))
+
+    print(f"{'='*60}")
+    print(f"Sweep: {sweep_name}")
+    print(f"  Trials: {len(trials)}")
+    print(f"  Workers: {args.workers}")
+    print(f"  Chunk store: {args.chunk_store}")
+    print(f"  Results: {args.results_db}")
+    print(f"{'='*60}")
+
+    start_time = time.time()
+    failed = 0
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as executor:
+        futures = {executor.submit(run_trial, trial): trial for trial in trials}
+
+        for completed_count, future in enumerate(as_completed(futures), 1):
+            trial = futures[future]
+            result = future.result()
+            db.record(sweep_name, trial, result)
+
+            if result['status'] == 'ok':
+                print(f"[{completed_count}/{len(trials)}] ✓ {trial['trial_id']} {trial['ticker']} "
+                      f"Sharpe: {result['sharpe_ratio']:.2f} Return: {result['total_return']:.2%} "
+                      f"(chunks reused {result['chunks_reused']}/{result['num_chunks']})")
+            else:
+                failed += 1
+                print(f"[{completed_count}/{len(trials)}] ❌ {trial['trial_id']} {trial['ticker']}: {result['error']}")
+
+    elapsed = time.time() - start_time
+    print(f"\n✓ Sweep complete in {elapsed:.1f}s ({failed} failed)")
+
+    if args.export_csv:
+        print(f"✓ Results exported to {db.export_csv(args.export_csv)}")
+
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
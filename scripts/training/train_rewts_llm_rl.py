@@ -15,11 +15,17 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.llm_agents.strategist_agent_deepseek import StrategistAgent, TradingStrategy
 from src.llm_agents.analyst_agent_deepseek import AnalystAgent
+from src.llm_agents.strategy_store import StrategyStore
 from src.rl_agents.trading_env import TradingEnv
 from src.hybrid_model.ensemble_controller import ReWTSEnsembleController
 from src.utils.data_utils import load_market_data, load_news_data, filter_news_by_period
 from src.utils.strategy_cache import StrategyCache
 from src.utils.rate_limiter import RateLimiter, RequestMonitor, retry_with_exponential_backoff
+from src.utils.seeding import set_global_seed
+from src.hybrid_model.chunk_model_store import get_or_train_chunk_model
+from src.hybrid_model.ensemble_io import export_inference_bundle, default_bundle_dir
+from src.telemetry.metrics import TextfileWriter
+from src.telemetry.tracing import enable_tracing, finish_tracing
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
@@ -37,7 +43,7 @@ def precompute_llm_strategies(ticker, market_df, news_df, config):
     print(f"{'='*60}")
 
     # Inizializza cache
-    cache = StrategyCache()
+    cache = StrategyCache(config.get('strategy_cache_dir', 'data/cache/strategies'))
     cache_stats = cache.get_stats()
     print(f"Cache initialized: {cache_stats['total_entries']} entries, {cache_stats['cache_file_size_kb']} KB")
 
@@ -147,15 +153,27 @@ def precompute_llm_strategies(ticker, market_df, news_df, config):
         # Process news (può essere cached anche questo)
         skip_news = config.get('skip_news_processing', False)
 
+        neutral_signals = {
+            'sentiment': 'neutral',
+            'confidence': 0.5,
+            'key_topics': []
+        }
+
         if skip_news or len(period_news) == 0 or analyst is None:
             # Skip news processing (risparmia API calls)
-            news_signals = {
-                'sentiment': 'neutral',
-                'confidence': 0.5,
-                'key_topics': []
-            }
+            news_signals = neutral_signals
         else:
-            news_signals = analyst.process_news(period_news.to_dict('records'))
+            try:
+                news_signals = retry_with_exponential_backoff(
+                    lambda: analyst.process_news(period_news.to_dict('records')),
+                    max_retries=3,
+                    initial_wait=2.0,
+                    max_wait=30.0
+                )
+            except Exception as e:
+                # Risposta malformata o API non disponibile: segnale neutro invece di interrompere il precompute
+                print(f"⚠️  News processing failed for task {task_id}, using neutral sentiment: {e}")
+                news_signals = neutral_signals
 
         # Controlla cache
         cached_strategy = cache.get(
@@ -292,15 +310,26 @@ def precompute_llm_strategies(ticker, market_df, news_df, config):
     print(f"  Average time per strategy: {elapsed_time/len(strategies):.1f}s")
     monitor.print_stats()
 
-    # Salva strategies
-    os.makedirs('data/llm_strategies', exist_ok=True)
-    with open(f"data/llm_strategies/{ticker}_strategies.pkl", 'wb') as f:
-        pickle.dump(strategies, f)
+    # Salva strategies nello store (indicizzate per data di inizio periodo)
+    store = StrategyStore(config.get('strategies_dir', 'data/llm_strategies'))
+    store.put(ticker, strategies, market_df.index, strategy_frequency)
+    print(f"  Saved to {store.path(ticker)}")
 
     return strategies
 
-def train_rewts_ensemble(ticker, market_df, strategies, config):
-    """Addestra ReWTSE ensemble di DDQN agents"""
+def train_rewts_ensemble(ticker, market_df, strategies, config, chunk_store=None, seed=None):
+    """
+    Addestra ReWTSE ensemble di DDQN agents
+
+    Args:
+        ticker: Ticker symbol
+        market_df: Dati di mercato di training
+        strategies: Strategie LLM allineate a market_df
+        config: Configurazione completa (rewts, trading_env, strategy_frequency)
+        chunk_store: ChunkModelStore opzionale; i chunk già addestrati con stessi
+                     dati, strategie, iperparametri e seed vengono riusati
+        seed: Seed opzionale (seed + chunk_id per ogni chunk)
+    """
 
     print(f"\n{'='*60}")
     print(f"Training ReWTSE Ensemble for {ticker}")
@@ -335,17 +364,37 @@ def train_rewts_ensemble(ticker, market_df, strategies, config):
             print(f"Warning: No strategies for chunk {chunk_id}, skipping")
             continue
 
-        # Crea environment per il chunk
-        env = TradingEnv(chunk_df, chunk_strategies, config['trading_env'])
+        chunk_seed = seed + chunk_id if seed is not None else None
 
-        # Addestra DDQN agent
-        agent = ensemble.train_chunk_model(
-            chunk_id=chunk_id,
-            env=env,
-            num_episodes=config['rewts']['episodes_per_chunk']
-        )
+        if chunk_store is not None:
+            agent, key, reused = get_or_train_chunk_model(
+                chunk_store, ensemble, chunk_id, chunk_df, chunk_strategies, config, seed=chunk_seed
+            )
+            if reused:
+                print(f"✓ Chunk {chunk_id} reused from store ({key[:12]})")
+        else:
+            if chunk_seed is not None:
+                set_global_seed(chunk_seed)
+
+            # Crea environment per il chunk
+            env = TradingEnv(chunk_df, chunk_strategies, config['trading_env'])
+
+            # Addestra DDQN agent
+            agent = ensemble.train_chunk_model(
+                chunk_id=chunk_id,
+                env=env,
+                num_episodes=config['rewts']['episodes_per_chunk']
+            )
 
         ensemble.chunk_models.append(agent)
+        ensemble.chunk_metadata.append({
+            'chunk_id': chunk_id,
+            'start_date': str(chunk_df.index[0]),
+            'end_date': str(chunk_df.index[-1]),
+            'num_rows': len(chunk_df),
+            'num_strategies': len(chunk_strategies),
+            'seed': chunk_seed
+        })
 
     print(f"\n✓ Ensemble training complete!")
     print(f"  Total chunk models: {len(ensemble.chunk_models)}")
@@ -373,6 +422,36 @@ def load_config(config_path='configs/hybrid/rewts_llm_rl.yaml'):
 
 def main():
     """Main training pipeline"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Training del sistema ReWTSE-LLM-RL')
+    parser.add_argument('--metrics-file', type=str, default=None,
+                        help='Scrive le metriche Prometheus su file (es. per il textfile collector di node_exporter)')
+    parser.add_argument('--metrics-interval', type=float, default=15.0,
+                        help='Secondi fra due scritture del file di metriche (default: 15)')
+    parser.add_argument('--trace', type=str, default=None, metavar='TRACE_JSON',
+                        help='Abilita il tracing degli hot path: summary a fine run e Chrome trace su file')
+    args = parser.parse_args()
+
+    if args.trace:
+        enable_tracing()
+
+    metrics_writer = None
+    if args.metrics_file:
+        metrics_writer = TextfileWriter(args.metrics_file, interval=args.metrics_interval).start()
+        print(f"Metrics textfile: {args.metrics_file} (every {args.metrics_interval:.0f}s)")
+
+    try:
+        run_training()
+    finally:
+        if args.trace:
+            finish_tracing(args.trace)
+        if metrics_writer is not None:
+            metrics_writer.stop()
+
+
+def run_training():
+    """Training di tutti i ticker della configurazione"""
 
     # Load configuration from YAML file
     print("Loading configuration from configs/hybrid/rewts_llm_rl.yaml...")
@@ -402,10 +481,15 @@ def main():
         # Train ReWTSE ensemble
         ensemble = train_rewts_ensemble(ticker, market_df, strategies, config)
 
-        # Salva ensemble
+        # Salva ensemble completo (checkpoint di training, usato dai notebook)
         with open(f"models/{ticker}_rewts_ensemble.pkl", 'wb') as f:
             pickle.dump(ensemble, f)
 
+        # Export inference-only per backtest e API (solo policy_net, memory-mapped)
+        bundle_dir = default_bundle_dir(ticker)
+        export_inference_bundle(ensemble, bundle_dir, metadata={'ticker': ticker})
+        print(f"✓ Inference bundle saved to {bundle_dir}")
+
         print(f"\n✓ {ticker} complete!")
 
     print(f"\n{'='*60}")
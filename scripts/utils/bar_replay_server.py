@@ -0,0 +1,57 @@
+"""
+Avvia un replay server websocket con i bars di data/processed (protocollo dello stream Alpaca)
+
+Usage:
+    python scripts/utils/bar_replay_server.py --tickers AAPL MSFT --interval 0.5 --port 8765
+
+    # In un altro terminale
+    python scripts/live/run_paper_trading.py --mode run --tickers AAPL MSFT --stream --stream-url ws://127.0.0.1:8765
+"""
+
+import os
+import sys
+import json
+import argparse
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.data_utils import load_market_data
+from src.trading.market_stream import BarReplayServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded bars over the Alpaca stream protocol')
+    parser.add_argument('--tickers', nargs='+', required=True, help='Tickers with data/processed/{ticker}_full_data.csv')
+    parser.add_argument('--data-dir', default='data/processed', help='Processed market data directory')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port (default: 8765)')
+    parser.add_argument('--interval', type=float, default=1.0, help='Seconds between replayed bars (0 = as fast as possible)')
+    parser.add_argument('--start-index', type=int, default=0, help='First replayed bar')
+    parser.add_argument('--trades-per-bar', type=int, default=0, help='Synthetic trades (at close) before each bar')
+    parser.add_argument('--no-rebase', action='store_true',
+                        help='Keep the recorded timestamps (default: minute bars starting now, newer than any REST seed)')
+    args = parser.parse_args()
+
+    bars = {ticker: load_market_data(ticker, args.data_dir) for ticker in args.tickers}
+    server = BarReplayServer(
+        bars,
+        host=args.host,
+        port=args.port,
+        interval=args.interval,
+        start_index=args.start_index,
+        trades_per_bar=args.trades_per_bar,
+        rebase_to_now=not args.no_rebase
+    )
+
+    print(f"✓ Bar replay server listening on {server.url} ({len(server.frames)} bars, every {args.interval}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\n{json.dumps(server.get_stats(), indent=2)}")
+
+
+if __name__ == '__main__':
+    main()
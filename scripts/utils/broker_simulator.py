@@ -0,0 +1,63 @@
+"""
+Avvia il broker simulator (REST API Alpaca) con lo storico di data/processed
+
+Usage:
+    python scripts/utils/broker_simulator.py --tickers AAPL MSFT --port 8770 --slippage-bps 5
+
+    # In un altro terminale: AlpacaPaperTrader(key, secret, base_url=URL, data_url=URL) con URL=http://127.0.0.1:8770
+    curl -X POST http://127.0.0.1:8770/sim/advance?bars=10
+    curl http://127.0.0.1:8770/sim/stats
+"""
+
+import os
+import sys
+import json
+import argparse
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.utils.data_utils import load_market_data
+from src.trading.broker_simulator import SimulatedBroker, BrokerSimulatorServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local simulator of the Alpaca REST API replaying recorded bars')
+    parser.add_argument('--tickers', nargs='+', required=True, help='Tickers with data/processed/{ticker}_full_data.csv')
+    parser.add_argument('--data-dir', default='data/processed', help='Processed market data directory')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8770, help='Port (default: 8770)')
+    parser.add_argument('--initial-cash', type=float, default=100000.0, help='Initial cash')
+    parser.add_argument('--start-index', type=int, default=200, help='First current bar (earlier bars are history)')
+    parser.add_argument('--slippage-bps', type=float, default=5.0, help='Fixed slippage (bps)')
+    parser.add_argument('--slippage-std-bps', type=float, default=0.0, help='Random slippage std (bps)')
+    parser.add_argument('--speedup', type=float, default=None,
+                        help='Simulated seconds per real second (default: one bar per live-loop tick)')
+    parser.add_argument('--latency', default='fixed:0', help='Response latency (see mock_deepseek_server.py)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    broker = SimulatedBroker(
+        {ticker: load_market_data(ticker, args.data_dir) for ticker in args.tickers},
+        initial_cash=args.initial_cash,
+        start_index=args.start_index,
+        slippage_bps=args.slippage_bps,
+        slippage_std_bps=args.slippage_std_bps,
+        speedup=args.speedup,
+        seed=args.seed
+    )
+    server = BrokerSimulatorServer(broker, host=args.host, port=args.port, latency=args.latency)
+
+    print(f"✓ Broker simulator listening on {server.base_url} ({len(broker.timeline)} bars, start {broker.now.date()})")
+    print(f"  Stats: curl {server.base_url}/sim/stats")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\n{json.dumps(server.get_stats(), indent=2, default=str)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Export inference-only dei modelli ensemble già addestrati
+Converte models/{ticker}_rewts_ensemble.pkl in models/{ticker}_rewts_inference/
+senza riaddestrare (utile per modelli addestrati prima del formato bundle)
+"""
+
+import sys
+import os
+import time
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from src.hybrid_model.ensemble_io import (
+    export_inference_bundle,
+    load_inference_bundle,
+    load_ensemble,
+    default_bundle_dir,
+    HAS_SAFETENSORS
+)
+
+
+def directory_size(path):
+    """Dimensione totale dei file in una directory (bytes)"""
+    return sum(f.stat().st_size for f in Path(path).iterdir() if f.is_file())
+
+
+def export_ticker(ticker, models_dir='models', weights_format=None):
+    """
+    Esporta il pickle di un ticker nel formato inference-only
+
+    Returns:
+        Dict con dimensioni e tempi di load (pickle vs bundle), o None se il pickle manca
+    """
+    pickle_path = os.path.join(models_dir, f"{ticker}_rewts_ensemble.pkl")
+    if not os.path.exists(pickle_path):
+        print(f"⚠ Model not found for {ticker}: {pickle_path}")
+        return None
+
+    start = time.perf_counter()
+    ensemble = load_ensemble(pickle_path)
+    pickle_load_s = time.perf_counter() - start
+
+    bundle_dir = default_bundle_dir(ticker, models_dir)
+    manifest = export_inference_bundle(ensemble, bundle_dir, metadata={'ticker': ticker}, weights_format=weights_format)
+
+    start = time.perf_counter()
+    load_inference_bundle(bundle_dir)
+    bundle_load_s = time.perf_counter() - start
+
+    stats = {
+        'ticker': ticker,
+        'num_chunks': manifest['num_chunks'],
+        'pickle_bytes': os.path.getsize(pickle_path),
+        'bundle_bytes': directory_size(bundle_dir),
+        'pickle_load_s': pickle_load_s,
+        'bundle_load_s': bundle_load_s
+    }
+
+    print(f"✓ {ticker}: {manifest['num_chunks']} chunks -> {bundle_dir} ({manifest['weights_format']})")
+    print(f"  Size: {stats['pickle_bytes'] / 1e6:.2f} MB -> {stats['bundle_bytes'] / 1e6:.2f} MB")
+    print(f"  Load: {stats['pickle_load_s'] * 1000:.1f} ms -> {stats['bundle_load_s'] * 1000:.1f} ms")
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export ensemble pickles to inference-only bundles')
+    parser.add_argument('--tickers', nargs='+', required=True, help='Tickers to export')
+    parser.add_argument('--models-dir', default='models', help='Directory dei modelli')
+    parser.add_argument('--format', choices=['safetensors', 'torch'], default=None,
+                        help='Formato dei pesi (default: safetensors se installato, altrimenti torch)')
+    args = parser.parse_args()
+
+    if args.format == 'safetensors' and not HAS_SAFETENSORS:
+        parser.error("safetensors is not installed: pip install safetensors")
+
+    for ticker in args.tickers:
+        export_ticker(ticker, args.models_dir, args.format)
+
+
+if __name__ == '__main__':
+    main()
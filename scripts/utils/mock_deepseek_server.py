@@ -0,0 +1,62 @@
+"""
+Avvia il mock server DeepSeek (OpenAI-compatibile) in foreground
+
+Usage:
+    python scripts/utils/mock_deepseek_server.py --port 8090 --latency lognormal:0.8,0.4 --error-429-rate 0.05
+
+    # In un altro terminale
+    export DEEPSEEK_BASE_URL=http://127.0.0.1:8090
+    export DEEPSEEK_API_KEY=mock
+    python scripts/training/train_rewts_llm_rl.py
+"""
+
+import os
+import sys
+import json
+import argparse
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.llm_agents.mock_deepseek_server import MockDeepSeekServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local OpenAI-compatible mock of the DeepSeek API')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8090, help='Port (default: 8090)')
+    parser.add_argument('--latency', default='lognormal:0.8,0.4',
+                        help='Latency distribution: fixed:S, uniform:MIN,MAX, normal:MEAN,STD, '
+                             'lognormal:MEDIAN,SIGMA, exponential:MEAN (default: lognormal:0.8,0.4)')
+    parser.add_argument('--error-429-rate', type=float, default=0.0, help='Probability of a random 429')
+    parser.add_argument('--error-500-rate', type=float, default=0.0, help='Probability of a 500')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='Probability of a truncated JSON answer')
+    parser.add_argument('--max-rps', type=float, default=None, help='Server-side rate limit (requests/s, 429 above)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    server = MockDeepSeekServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        error_429_rate=args.error_429_rate,
+        error_500_rate=args.error_500_rate,
+        malformed_rate=args.malformed_rate,
+        max_requests_per_second=args.max_rps,
+        seed=args.seed
+    )
+
+    print(f"✓ Mock DeepSeek server listening on {server.base_url}")
+    print(f"  export DEEPSEEK_BASE_URL={server.base_url}")
+    print(f"  Stats: curl {server.base_url}/stats")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\n{json.dumps(server.get_stats(), indent=2)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,7 +6,6 @@ This script generates only the strategies without retraining the models
 import sys
 import os
 from pathlib import Path
-import pickle
 import yaml
 import re
 from dotenv import load_dotenv
@@ -17,8 +16,10 @@ sys.path.append(str(project_root))
 
 from src.llm_agents.strategist_agent_deepseek import StrategistAgent, TradingStrategy
 from src.llm_agents.analyst_agent_deepseek import AnalystAgent
+from src.llm_agents.strategy_store import StrategyStore
 from src.utils.data_utils import load_market_data, load_news_data, filter_news_by_period
 from src.utils.strategy_cache import StrategyCache
+from src.telemetry.metrics import write_textfile
 from src.utils.rate_limiter import RateLimiter, RequestMonitor, retry_with_exponential_backoff
 
 import pandas as pd
@@ -45,17 +46,17 @@ def expand_env_vars(config):
         return config
 
 
-def generate_strategies_for_ticker(ticker, config):
+def generate_strategies_for_ticker(ticker, config, store=None):
     """Generate LLM strategies for a single ticker"""
+    store = store or StrategyStore()
 
     print(f"\n{'='*70}")
     print(f"Generating Strategies for {ticker}")
     print(f"{'='*70}")
 
-    # Check if strategies already exist
-    strategies_path = f"data/llm_strategies/{ticker}_strategies.pkl"
-    if os.path.exists(strategies_path):
-        print(f"⚠️  Strategies already exist: {strategies_path}")
+    # Check if strategies already exist (.npz or legacy .pkl)
+    if ticker in store.tickers():
+        print(f"⚠️  Strategies already exist for {ticker} in {store.store_dir}")
         response = input(f"Overwrite? (y/n): ").lower()
         if response != 'y':
             print(f"Skipping {ticker}")
@@ -238,11 +239,10 @@ def generate_strategies_for_ticker(ticker, config):
     print(f"  Cache hits: {cache_hits} ({100*cache_hits/len(strategies):.1f}%)")
     print(f"  API calls saved: {cache_hits}")
 
-    # Save strategies
-    os.makedirs('data/llm_strategies', exist_ok=True)
-    with open(strategies_path, 'wb') as f:
-        pickle.dump(strategies, f)
-    print(f"✓ Saved to {strategies_path}")
+    # Save strategies (same format as training)
+    os.makedirs(store.store_dir, exist_ok=True)
+    store.put(ticker, strategies, market_df.index, strategy_frequency)
+    print(f"✓ Saved to {store.path(ticker)}")
 
     return strategies
 
@@ -257,6 +257,7 @@ def main():
     parser.add_argument('--config', default='configs/hybrid/rewts_llm_rl.yaml', help='Path to config YAML')
     parser.add_argument('--use-deepseek', action='store_true', help='Use DeepSeek instead of Gemini')
     parser.add_argument('--env-file', help='Path to .env file (default: .env or .env.example)')
+    parser.add_argument('--metrics-file', help='Write Prometheus metrics (LLM calls, tokens, cache) after each ticker')
     args = parser.parse_args()
 
     # Load environment variables from .env file
@@ -344,7 +345,7 @@ def main():
     print("="*70)
 
     models_dir = Path("models")
-    strategies_dir = Path("data/llm_strategies")
+    store = StrategyStore()
 
     if not models_dir.exists():
         print("❌ No models directory found!")
@@ -354,11 +355,8 @@ def main():
     model_files = list(models_dir.glob("*_rewts_ensemble.pkl"))
     tickers_with_models = [f.stem.replace('_rewts_ensemble', '') for f in model_files]
 
-    tickers_missing_strategies = []
-    for ticker in tickers_with_models:
-        strategy_file = strategies_dir / f"{ticker}_strategies.pkl"
-        if not strategy_file.exists():
-            tickers_missing_strategies.append(ticker)
+    tickers_with_strategies = set(store.tickers())
+    tickers_missing_strategies = [t for t in tickers_with_models if t not in tickers_with_strategies]
 
     print(f"\nModels found: {len(tickers_with_models)}")
     print(f"Missing strategies: {len(tickers_missing_strategies)}")
@@ -385,12 +383,15 @@ def main():
     # Generate strategies
     for ticker in tickers_missing_strategies:
         try:
-            generate_strategies_for_ticker(ticker, config)
+            generate_strategies_for_ticker(ticker, config, store)
         except Exception as e:
             print(f"\n❌ Error generating {ticker}: {e}")
             import traceback
             traceback.print_exc()
             continue
+        finally:
+            if args.metrics_file:
+                write_textfile(args.metrics_file)
 
     print(f"\n{'='*70}")
     print("✓ REGENERATION COMPLETE")
@@ -15,7 +15,7 @@ setup(
         # Core dependencies
         "numpy>=1.21.0",
         "pandas>=1.3.0",
-        "torch>=2.0.0",
+        "torch>=2.1.0",
         "google-generativeai>=0.3.0",
         "yfinance>=0.2.0",
         "ta>=0.10.0",
@@ -0,0 +1,19 @@
+"""
+Backtest Engine Module
+Fast and walk-forward backtest engines for ReWTSE ensembles
+"""
+
+from .fast_backtest import (
+    compute_market_features,
+    compute_market_inputs,
+    slice_market_inputs,
+    run_fixed_weight_backtest,
+    run_ensemble_backtest,
+    fit_lookback_weights
+)
+from .walk_forward import make_walk_forward_folds, run_walk_forward, stitch_equity_curves
+
+__all__ = [
+    'compute_market_features', 'compute_market_inputs', 'slice_market_inputs', 'run_fixed_weight_backtest', 'run_ensemble_backtest', 'fit_lookback_weights',
+    'make_walk_forward_folds', 'run_walk_forward', 'stitch_equity_curves'
+]
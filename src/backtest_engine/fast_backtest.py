@@ -0,0 +1,315 @@
+"""
+Fast Backtest Engine
+Backtest vettorizzato per ensemble con pesi fissi (es. uniform weights in evaluate_ticker)
+
+Le feature di mercato dell'observation (prezzo, indicatori, segnale LLM τ) non dipendono
+dal portafoglio: il loro contributo al primo layer di ogni chunk model viene calcolato
+in un unico prodotto batch prima della simulazione. Nel loop sequenziale restano solo
+le due feature di portafoglio (valore normalizzato e posizione), i layer successivi
+e l'accounting cash/posizione, che replica TradingEnv.step operazione per operazione.
+"""
+
+import numpy as np
+
+from src.hybrid_model.stacked_policy import StackedPolicy
+from src.utils.strategy_signal import strategy_signal
+from src.telemetry.tracing import traced
+
+# Layout dell'observation di TradingEnv._get_observation
+NUM_MARKET_FEATURES = 9
+PORTFOLIO_VALUE_FEATURE = 9
+POSITION_FEATURE = 10
+
+# Righe per strategia quando le strategie sono una lista posizionale (step // 20, come TradingEnv)
+STRATEGY_PERIOD = 20
+
+ACTION_SHORT, ACTION_HOLD, ACTION_LONG = 0, 1, 2
+
+
+def _column(df, name, default):
+    """Colonna come float64, o costante se assente (come row.get(name, default))"""
+    if name in df.columns:
+        return df[name].to_numpy(dtype=np.float64)
+    return np.broadcast_to(np.asarray(default, dtype=np.float64), (len(df),)).copy()
+
+
+def compute_market_features(df, llm_strategies):
+    """
+    Feature di mercato per tutti gli step, identiche a TradingEnv._get_observation
+
+    Args:
+        df: DataFrame di mercato (stesse colonne usate da TradingEnv)
+        llm_strategies: StrategyTimeline (allineata per data) o lista di TradingStrategy
+            (una ogni STRATEGY_PERIOD step)
+
+    Returns:
+        Array float32 (len(df), NUM_MARKET_FEATURES)
+    """
+    close = _column(df, 'Close', 0.0)
+    volume = _column(df, 'Volume', 0.0)
+    hv = _column(df, 'HV_Close', 0.0)
+    sma_20 = _column(df, 'SMA_20', 0.0) if 'SMA_20' in df.columns else close
+    sma_50 = _column(df, 'SMA_50', 0.0) if 'SMA_50' in df.columns else close
+    sma_200 = _column(df, 'SMA_200', 0.0) if 'SMA_200' in df.columns else close
+    rsi = _column(df, 'RSI', 50.0)
+    macd = _column(df, 'MACD', 0.0)
+
+    # Segnale LLM τ = dir(πg) * str(πg), stessa regola di allineamento di TradingEnv
+    tau = strategy_signal(llm_strategies, df.index, STRATEGY_PERIOD)
+
+    # NB: i confronti con NaN sono False, come negli if/else di TradingEnv
+    with np.errstate(divide='ignore', invalid='ignore'):
+        valid_close = close > 0
+        features = np.stack([
+            np.where(valid_close, close / 100.0, 0.0),
+            np.where(volume > 0, volume / 1e6, 0.0),
+            np.where(hv > 0, hv * 100, 0.0),
+            np.where(valid_close, sma_20 / close, 1.0),
+            np.where(valid_close, sma_50 / close, 1.0),
+            np.where(valid_close, sma_200 / close, 1.0),
+            np.where(rsi > 0, rsi / 100.0, 0.5),
+            np.where(np.isfinite(macd), macd, 0.0),
+            tau
+        ], axis=1).astype(np.float32)
+
+    return np.nan_to_num(features, nan=0.0, posinf=1.0, neginf=-1.0)
+
+
+def _portfolio_feature(portfolio_value, initial_balance):
+    """Valore di portafoglio normalizzato, con la stessa sanitizzazione di TradingEnv"""
+    value = np.float32(portfolio_value / initial_balance)
+    if np.isnan(value):
+        return np.float32(0.0)
+    if np.isinf(value):
+        return np.float32(1.0) if value > 0 else np.float32(-1.0)
+    return value
+
+
+@traced()
+def compute_market_inputs(policy, df, llm_strategies):
+    """
+    Parte del backtest indipendente dal portafoglio: feature di mercato e loro
+    contributo al primo layer di ogni chunk model
+
+    Con uno StrategyTimeline (o una lista con inizio allineato a STRATEGY_PERIOD)
+    i valori di ogni riga non dipendono dall'inizio della slice: backtest su range
+    sovrapposti possono calcolarli una volta sull'unione e usarne slice_market_inputs.
+
+    Returns:
+        Dict con close (n,), market_features (n, 9) e first_layer_market (n, K, H1) o None
+    """
+    market_features = compute_market_features(df, llm_strategies)
+    first_layer_market = None
+
+    if policy is not None:
+        w1, b1 = policy.numpy_layers()[0]
+        # Forward batch: contributo delle feature di mercato al primo layer, (n, K, H1)
+        first_layer_market = np.einsum(
+            'kod,td->tko', w1[:, :, :NUM_MARKET_FEATURES], market_features
+        ) + b1[None, :, :]
+
+    return {
+        'close': _column(df, 'Close', 0.0),
+        'market_features': market_features,
+        'first_layer_market': first_layer_market
+    }
+
+
+def slice_market_inputs(market_inputs, start, end):
+    """Righe [start, end) di un output di compute_market_inputs (view, nessuna copia)"""
+    return {
+        name: (values[start:end] if values is not None else None)
+        for name, values in market_inputs.items()
+    }
+
+
+@traced()
+def run_fixed_weight_backtest(policy, weights, df, llm_strategies, config, record_observations=False,
+                              progress_callback=None, market_inputs=None):
+    """
+    Backtest con pesi dell'ensemble fissi, equivalente al loop TradingEnv + predict_ensemble
+
+    Args:
+        policy: StackedPolicy dei chunk model (None = nessun modello, sempre HOLD)
+        weights: Pesi fissi (K,) dell'ensemble
+        df: DataFrame di mercato del periodo di test
+        llm_strategies: Strategie LLM allineate a df
+        config: Configurazione trading_env (initial_balance, transaction_cost, max_position)
+        record_observations: Se True ritorna anche le observation visitate
+        progress_callback: Opzionale, chiamata come f(step, total) circa ogni 5% degli step
+        market_inputs: Output precalcolato di compute_market_inputs per df (opzionale)
+
+    Returns:
+        Dict con portfolio_history, portfolio_values, actions, num_trades, final_value
+    """
+    initial_balance = config.get('initial_balance', 10000)
+    transaction_cost = config.get('transaction_cost', 0.0015)
+    max_position = config.get('max_position', 0.95)
+
+    if market_inputs is None:
+        market_inputs = compute_market_inputs(policy, df, llm_strategies)
+
+    n = len(df)
+    close = market_inputs['close'].tolist()
+    market_features = market_inputs['market_features']
+    first_layer_market = market_inputs['first_layer_market']
+
+    if policy is not None:
+        layers = policy.numpy_layers()
+        w1 = layers[0][0]
+        hidden_layers = layers[1:]
+        w_portfolio = w1[:, :, PORTFOLIO_VALUE_FEATURE]
+        w_position = w1[:, :, POSITION_FEATURE]
+        mix = np.asarray(weights, dtype=np.float64)
+
+    balance = initial_balance
+    shares_held = 0
+    position = 0
+
+    portfolio_history = []
+    actions = []
+    observations = [] if record_observations else None
+    num_trades = 0
+    progress_every = max(1, (n - 1) // 20)
+
+    for t in range(n - 1):
+        current_price = close[t]
+
+        # Stato di portafoglio visto dall'observation allo step t
+        portfolio_feature = _portfolio_feature(balance + shares_held * current_price, initial_balance)
+
+        if record_observations:
+            observations.append(np.concatenate([
+                market_features[t], np.array([portfolio_feature, position], dtype=np.float32)
+            ]))
+
+        if policy is None:
+            action = ACTION_HOLD
+        else:
+            h = first_layer_market[t] + w_portfolio * portfolio_feature + w_position * np.float32(position)
+            for w, b in hidden_layers:
+                np.maximum(h, 0, out=h)
+                h = np.matmul(w, h[:, :, None])[:, :, 0] + b
+            weighted_q_values = mix @ h.astype(np.float64)
+            action = int(np.argmax(weighted_q_values))
+
+        actions.append(action)
+
+        # Accounting: stessa sequenza di operazioni di TradingEnv.step
+        if current_price <= 0:
+            pass
+        elif action == ACTION_SHORT:
+            if position == 1:
+                revenue = shares_held * current_price * (1 - transaction_cost)
+                balance += revenue
+                shares_held = 0
+                position = 0
+                num_trades += 1
+        elif action == ACTION_LONG:
+            if position == 0:
+                max_shares = balance / current_price
+                shares_to_buy = int(max_shares * max_position)
+                cost = shares_to_buy * current_price * (1 + transaction_cost)
+
+                if cost <= balance and shares_to_buy > 0:
+                    shares_held += shares_to_buy
+                    balance -= cost
+                    position = 1
+                    num_trades += 1
+
+        portfolio_history.append(balance + shares_held * close[t + 1])
+
+        if progress_callback is not None and ((t + 1) % progress_every == 0 or t == n - 2):
+            progress_callback(t + 1, n - 1)
+
+    result = {
+        'portfolio_history': portfolio_history,
+        'portfolio_values': np.array([initial_balance] + portfolio_history, dtype=np.float64),
+        'actions': actions,
+        'num_trades': num_trades,
+        'final_value': portfolio_history[-1] if portfolio_history else initial_balance
+    }
+
+    if record_observations:
+        result['observations'] = np.array(observations, dtype=np.float32).reshape(-1, NUM_MARKET_FEATURES + 2)
+
+    return result
+
+
+def ensemble_policy(ensemble):
+    """StackedPolicy dell'ensemble (riusa quella dei bundle inference-only), o None se vuoto"""
+    num_models = len(ensemble.chunk_models)
+    if num_models == 0:
+        return None
+
+    policy = getattr(ensemble, 'stacked_policy', None)
+    if policy is None or policy.num_models != num_models:
+        policy = StackedPolicy.from_agents(ensemble.chunk_models)
+    return policy
+
+
+def ensemble_weights(ensemble, weights=None):
+    """Pesi espliciti, altrimenti current_weights, altrimenti uniform"""
+    num_models = len(ensemble.chunk_models)
+    if weights is None:
+        weights = ensemble.current_weights
+    if weights is None and num_models > 0:
+        weights = np.ones(num_models) / num_models
+    return weights
+
+
+def run_ensemble_backtest(ensemble, df, llm_strategies, config, weights=None, record_observations=False,
+                          progress_callback=None):
+    """
+    Backtest veloce di un ReWTSEnsembleController con pesi fissi
+
+    Args:
+        ensemble: ReWTSEnsembleController (usa solo chunk_models[*].policy_net)
+        df: DataFrame di mercato
+        llm_strategies: Strategie LLM allineate a df
+        config: Configurazione trading_env
+        weights: Pesi fissi (default: ensemble.current_weights o uniform)
+        record_observations: Se True ritorna anche le observation visitate
+        progress_callback: Opzionale, vedi run_fixed_weight_backtest
+
+    Returns:
+        Dict come run_fixed_weight_backtest
+    """
+    policy = ensemble_policy(ensemble)
+    weights = ensemble_weights(ensemble, weights) if policy is not None else None
+
+    return run_fixed_weight_backtest(policy, weights, df, llm_strategies, config, record_observations, progress_callback)
+
+
+@traced()
+def fit_lookback_weights(ensemble, lookback_df, llm_strategies, config):
+    """
+    Pesi ReWTSE ottimizzati (QP) su una finestra di look-back
+
+    Le observation del look-back sono quelle visitate con pesi uniformi, i target
+    sono i rendimenti close-to-close, come in backtest_ensemble.
+
+    Args:
+        ensemble: ReWTSEnsembleController
+        lookback_df: Dati di mercato della finestra di look-back
+        llm_strategies: Strategie LLM allineate a lookback_df
+        config: Configurazione trading_env
+
+    Returns:
+        Array (K,) di pesi
+    """
+    num_models = len(ensemble.chunk_models)
+    if num_models == 0:
+        return np.array([])
+
+    uniform = np.ones(num_models) / num_models
+    if len(lookback_df) < 3:
+        return uniform
+
+    lookback = run_ensemble_backtest(ensemble, lookback_df, llm_strategies, config,
+                                     weights=uniform, record_observations=True)
+    close = _column(lookback_df, 'Close', 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lookback_returns = close[1:] / close[:-1] - 1
+
+    return ensemble.optimize_weights(lookback['observations'], lookback_returns.tolist())
@@ -0,0 +1,256 @@
+"""
+Walk-Forward Backtest Engine
+Train fino alla data T, test T -> T+Δ, avanza di step_size e ripeti
+
+I chunk model sono definiti sulla griglia globale [i*L, (i+1)*L): un chunk è eleggibile
+in ogni fold in cui è interamente in-sample (fine chunk <= T). Ogni chunk viene
+addestrato una sola volta (ChunkModelStore) e riusato da tutti i fold successivi.
+Training dei chunk e fold girano in parallelo su un process pool locale.
+"""
+
+import os
+import contextlib
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from src.hybrid_model.ensemble_controller import ReWTSEnsembleController
+from src.hybrid_model.chunk_model_store import ChunkModelStore, get_or_train_chunk_model
+from src.backtest_engine.fast_backtest import (
+    run_ensemble_backtest,
+    fit_lookback_weights,
+    NUM_MARKET_FEATURES
+)
+
+STATE_DIM = NUM_MARKET_FEATURES + 2
+ACTION_DIM = 3
+
+
+def make_walk_forward_folds(num_rows, initial_train_size, test_size, step_size=None, strategy_frequency=20):
+    """
+    Genera i fold walk-forward
+
+    I confini dei fold sono allineati a strategy_frequency, così le strategie LLM
+    del periodo di test restano allineate all'indicizzazione step // 20 di TradingEnv.
+
+    Args:
+        num_rows: Numero di righe di dati
+        initial_train_size: Righe di training del primo fold
+        test_size: Righe di test per fold (Δ)
+        step_size: Avanzamento fra fold (default: test_size, fold contigui)
+        strategy_frequency: Giorni per strategia LLM
+
+    Returns:
+        Lista di dict con fold_id, train_end, test_start, test_end (riga finale inclusa)
+    """
+    def align(idx):
+        return (idx // strategy_frequency) * strategy_frequency
+
+    step_size = step_size or test_size
+    folds = []
+    train_end = align(initial_train_size)
+
+    while train_end < num_rows - 1:
+        test_end = min(train_end + test_size, num_rows - 1)
+        folds.append({
+            'fold_id': len(folds),
+            'train_end': train_end,
+            'test_start': train_end,
+            'test_end': test_end
+        })
+        train_end = max(align(train_end + step_size), train_end + strategy_frequency)
+
+    return folds
+
+
+def plan_chunks(max_train_end, chunk_length):
+    """
+    Chunk della griglia globale completamente contenuti in [0, max_train_end)
+
+    Returns:
+        Lista di tuple (chunk_id, start_idx, end_idx)
+    """
+    return [
+        (chunk_id, chunk_id * chunk_length, (chunk_id + 1) * chunk_length)
+        for chunk_id in range(max_train_end // chunk_length)
+    ]
+
+
+def _init_worker():
+    """Un thread torch per processo: il parallelismo è fra chunk/fold"""
+    import torch
+    torch.set_num_threads(1)
+
+
+def _train_chunk_task(task):
+    """Worker: addestra (o riusa) un chunk model nello store"""
+    chunk_id, start_idx, end_idx = task['chunk']
+    config = task['config']
+    strategy_frequency = config.get('strategy_frequency', 20)
+
+    chunk_df = task['market_df'].iloc[start_idx:end_idx].copy()
+    chunk_strategies = task['strategies'][start_idx // strategy_frequency:end_idx // strategy_frequency]
+
+    if len(chunk_strategies) == 0:
+        return {'chunk_id': chunk_id, 'key': None, 'reused': False}
+
+    chunk_store = ChunkModelStore(task['chunk_store_dir'])
+    ensemble = ReWTSEnsembleController(config['rewts'])
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        _, key, reused = get_or_train_chunk_model(
+            chunk_store, ensemble, chunk_id, chunk_df, chunk_strategies, config, seed=task['seed']
+        )
+
+    return {'chunk_id': chunk_id, 'key': key, 'reused': reused}
+
+
+def _run_fold_task(task):
+    """Worker: backtest di un fold con i chunk eleggibili"""
+    fold = task['fold']
+    config = task['config']
+    env_config = config['trading_env']
+    strategy_frequency = config.get('strategy_frequency', 20)
+    market_df = task['market_df']
+    strategies = task['strategies']
+
+    chunk_store = ChunkModelStore(task['chunk_store_dir'])
+    ensemble = ReWTSEnsembleController(config['rewts'])
+    for key in task['chunk_keys']:
+        ensemble.chunk_models.append(chunk_store.load(key, STATE_DIM, ACTION_DIM, config['rewts']))
+
+    train_end = fold['train_end']
+
+    if task['weighting'] == 'rewts' and len(ensemble.chunk_models) > 0:
+        lookback_start = max(0, train_end - config['rewts']['lookback_length'])
+        weights = fit_lookback_weights(
+            ensemble,
+            market_df.iloc[lookback_start:train_end],
+            strategies[lookback_start // strategy_frequency:],
+            env_config
+        )
+    else:
+        weights = None
+
+    test_df = market_df.iloc[fold['test_start']:fold['test_end'] + 1]
+    test_strategies = strategies[fold['test_start'] // strategy_frequency:]
+
+    result = run_ensemble_backtest(ensemble, test_df, test_strategies, env_config, weights=weights)
+
+    num_models = len(ensemble.chunk_models)
+    if weights is None and num_models > 0:
+        weights = np.ones(num_models) / num_models
+
+    return {
+        **fold,
+        'start_date': test_df.index[0],
+        'end_date': test_df.index[-1],
+        'dates': list(test_df.index),
+        'portfolio_values': result['portfolio_values'],
+        'actions': result['actions'],
+        'num_trades': result['num_trades'],
+        'num_chunks': num_models,
+        'weights': np.asarray(weights if weights is not None else [])
+    }
+
+
+def stitch_equity_curves(fold_results, initial_balance=10000):
+    """
+    Curva out-of-sample unica concatenando i rendimenti dei fold
+
+    Ogni fold parte flat con initial_balance; i suoi rendimenti giornalieri vengono
+    applicati in sequenza al valore finale del fold precedente. Con fold sovrapposti
+    (step_size < test_size) ogni data usa il fold più recente.
+
+    Returns:
+        pd.Series del valore di portafoglio indicizzata per data
+    """
+    daily_returns = {}
+
+    for fold in sorted(fold_results, key=lambda f: f['fold_id']):
+        values = np.asarray(fold['portfolio_values'], dtype=np.float64)
+        if len(values) < 2:
+            continue
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = values[1:] / values[:-1] - 1
+        for date, ret in zip(fold['dates'][1:], returns):
+            daily_returns[date] = ret if np.isfinite(ret) else 0.0
+
+    if not daily_returns:
+        return pd.Series(dtype=np.float64)
+
+    returns = pd.Series(daily_returns).sort_index()
+    first_date = min(fold['dates'][0] for fold in fold_results if len(fold['dates']) > 0)
+
+    equity = initial_balance * (1 + returns).cumprod()
+    return pd.concat([pd.Series({first_date: float(initial_balance)}), equity])
+
+
+def run_walk_forward(market_df, strategies, config, folds, chunk_store_dir='models/chunk_store',
+                     weighting='uniform', seed=0, max_workers=None):
+    """
+    Esegue il walk-forward completo
+
+    Args:
+        market_df: Dati di mercato completi
+        strategies: Strategie LLM allineate a market_df
+        config: Configurazione completa (rewts, trading_env, strategy_frequency)
+        folds: Output di make_walk_forward_folds
+        chunk_store_dir: Directory del ChunkModelStore
+        weighting: 'uniform' oppure 'rewts' (QP sul look-back che precede ogni fold)
+        seed: Seed base del training (seed + chunk_id per chunk)
+        max_workers: Processi paralleli (default: os.cpu_count())
+
+    Returns:
+        Dict con folds (risultati per fold), stitched (pd.Series) e chunks (chunk_id -> info)
+    """
+    if weighting not in ('uniform', 'rewts'):
+        raise ValueError(f"Unknown weighting: {weighting}")
+    if not folds:
+        raise ValueError("No walk-forward folds to run")
+
+    chunk_length = config['rewts']['chunk_length']
+    chunks = plan_chunks(max(f['train_end'] for f in folds), chunk_length)
+
+    print(f"Walk-forward: {len(folds)} folds, {len(chunks)} chunk models (chunk_length={chunk_length})")
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+        # 1. Ogni chunk addestrato una sola volta
+        chunk_tasks = [{
+            'chunk': chunk,
+            'config': config,
+            'market_df': market_df,
+            'strategies': strategies,
+            'chunk_store_dir': chunk_store_dir,
+            'seed': seed + chunk[0] if seed is not None else None
+        } for chunk in chunks]
+
+        chunk_info = {}
+        for info in executor.map(_train_chunk_task, chunk_tasks):
+            chunk_info[info['chunk_id']] = info
+            status = 'skipped (no strategies)' if info['key'] is None else ('reused' if info['reused'] else 'trained')
+            print(f"  Chunk {info['chunk_id']}: {status}")
+
+        # 2. Fold in parallelo, ognuno con i chunk in-sample
+        fold_tasks = []
+        for fold in folds:
+            eligible = [chunk_id for chunk_id, _, end_idx in chunks if end_idx <= fold['train_end']]
+            fold_tasks.append({
+                'fold': fold,
+                'config': config,
+                'market_df': market_df,
+                'strategies': strategies,
+                'chunk_store_dir': chunk_store_dir,
+                'chunk_keys': [chunk_info[c]['key'] for c in eligible if chunk_info[c]['key'] is not None],
+                'weighting': weighting
+            })
+
+        fold_results = list(executor.map(_run_fold_task, fold_tasks))
+
+    initial_balance = config['trading_env'].get('initial_balance', 10000)
+
+    return {
+        'folds': fold_results,
+        'stitched': stitch_equity_curves(fold_results, initial_balance),
+        'chunks': chunk_info
+    }
@@ -4,5 +4,13 @@ ReWTSE Ensemble Controller integrating LLM and RL agents
 """
 
 from .ensemble_controller import ReWTSEnsembleController
+from .stacked_policy import StackedPolicy
+from .ensemble_io import export_inference_bundle, load_inference_bundle, load_ensemble
 
-__all__ = ['ReWTSEnsembleController']
+__all__ = [
+    'ReWTSEnsembleController',
+    'StackedPolicy',
+    'export_inference_bundle',
+    'load_inference_bundle',
+    'load_ensemble'
+]
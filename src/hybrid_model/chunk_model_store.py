@@ -0,0 +1,202 @@
+"""
+Chunk Model Store
+Cache su disco dei chunk model addestrati, indicizzata per contenuto:
+hash di (slice di dati, strategie LLM, iperparametri, seed)
+
+Trial di sweep o fold di walk-forward che condividono la stessa configurazione
+di chunk riusano il modello invece di riaddestrarlo.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from threading import Lock
+
+import pandas as pd
+
+from src.rl_agents.ddqn_agent import DDQNAgent
+from src.rl_agents.trading_env import TradingEnv
+from src.utils.seeding import set_global_seed
+
+# Chiavi di config['rewts'] che influenzano il training di un chunk
+# (chunk_length e lookback_length no: la slice di dati è già nella chiave,
+# il lookback serve solo per i pesi dell'ensemble)
+CHUNK_HYPERPARAM_KEYS = [
+    'gamma', 'epsilon_start', 'epsilon_min', 'epsilon_decay', 'learning_rate',
+    'batch_size', 'buffer_size', 'target_update_freq', 'hidden_dims', 'episodes_per_chunk',
+    'num_envs', 'updates_per_step'
+]
+
+# Chiavi di config['trading_env'] che influenzano reward e accounting
+ENV_HYPERPARAM_KEYS = ['initial_balance', 'transaction_cost', 'max_position']
+
+
+def hash_dataframe(df):
+    """Hash stabile del contenuto di un DataFrame (valori + indice)"""
+    row_hashes = pd.util.hash_pandas_object(df, index=True).values
+    digest = hashlib.sha256(row_hashes.tobytes())
+    digest.update(json.dumps(list(map(str, df.columns))).encode())
+    return digest.hexdigest()
+
+
+def hash_strategies(strategies):
+    """Hash delle strategie LLM (solo i campi che entrano nell'observation)"""
+    payload = [(int(s.direction), round(float(s.strength), 6)) for s in strategies]
+    return hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+
+
+def chunk_hyperparams(rewts_config, env_config, strategy_frequency=20):
+    """Estrae gli iperparametri rilevanti per il training di un chunk"""
+    return {
+        'rewts': {k: rewts_config[k] for k in CHUNK_HYPERPARAM_KEYS if k in rewts_config},
+        'trading_env': {k: env_config[k] for k in ENV_HYPERPARAM_KEYS if k in env_config},
+        'strategy_frequency': strategy_frequency
+    }
+
+
+class ChunkModelStore:
+    """Store content-addressed di chunk model DDQN"""
+
+    def __init__(self, store_dir: str = "models/chunk_store"):
+        """
+        Initialize chunk model store
+
+        Args:
+            store_dir: Directory dove salvare i chunk model
+        """
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def make_key(self, chunk_df, chunk_strategies, hyperparams, seed) -> str:
+        """
+        Genera la chiave di un chunk model
+
+        Args:
+            chunk_df: Slice di dati di mercato del chunk
+            chunk_strategies: Strategie LLM del chunk
+            hyperparams: Dict da chunk_hyperparams()
+            seed: Seed del training
+
+        Returns:
+            Hash SHA-256 come chiave
+        """
+        key_data = {
+            'data': hash_dataframe(chunk_df),
+            'strategies': hash_strategies(chunk_strategies),
+            'hyperparams': hyperparams,
+            'seed': seed
+        }
+        key_str = json.dumps(key_data, sort_keys=True, default=str)
+        return hashlib.sha256(key_str.encode()).hexdigest()
+
+    def model_path(self, key: str) -> Path:
+        return self.store_dir / f"{key}.pt"
+
+    def metadata_path(self, key: str) -> Path:
+        return self.store_dir / f"{key}.json"
+
+    def contains(self, key: str) -> bool:
+        return self.model_path(key).exists()
+
+    def load(self, key: str, state_dim: int, action_dim: int, config) -> DDQNAgent:
+        """
+        Carica un chunk model dallo store
+
+        Returns:
+            DDQNAgent, o None se la chiave non è presente
+        """
+        path = self.model_path(key)
+
+        if not path.exists():
+            with self.lock:
+                self.misses += 1
+            return None
+
+        agent = DDQNAgent(state_dim, action_dim, config)
+        agent.load(str(path))
+
+        with self.lock:
+            self.hits += 1
+        return agent
+
+    def temp_model_path(self) -> str:
+        """Path temporaneo nello store (stesso filesystem, per rename atomico)"""
+        fd, path = tempfile.mkstemp(dir=self.store_dir, suffix='.pt.tmp')
+        os.close(fd)
+        return path
+
+    def commit(self, key: str, temp_path: str, metadata=None):
+        """
+        Pubblica atomicamente un modello salvato in temp_path sotto la chiave
+
+        Se due processi addestrano la stessa chiave in parallelo, vince l'ultimo
+        rename: il contenuto è equivalente (stessi dati, iperparametri e seed).
+        """
+        if metadata is not None:
+            meta_tmp = f"{temp_path}.json"
+            with open(meta_tmp, 'w') as f:
+                json.dump(metadata, f, indent=2, default=str)
+            os.replace(meta_tmp, self.metadata_path(key))
+
+        os.replace(temp_path, self.model_path(key))
+
+    def get_stats(self):
+        """Ritorna statistiche sullo store"""
+        num_models = len(list(self.store_dir.glob('*.pt')))
+        return {
+            'total_models': num_models,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+def get_or_train_chunk_model(chunk_store, ensemble, chunk_id, chunk_df, chunk_strategies, config, seed=None):
+    """
+    Ritorna il chunk model dallo store, addestrandolo (e salvandolo) solo se assente
+
+    Args:
+        chunk_store: ChunkModelStore
+        ensemble: ReWTSEnsembleController usato per il training
+        chunk_id: ID del chunk
+        chunk_df: Dati di mercato del chunk
+        chunk_strategies: Strategie LLM del chunk
+        config: Configurazione completa (rewts, trading_env, strategy_frequency)
+        seed: Seed del training del chunk (None = non deterministico)
+
+    Returns:
+        Tuple (DDQNAgent, key, reused)
+    """
+    env = TradingEnv(chunk_df, chunk_strategies, config['trading_env'])
+
+    hyperparams = chunk_hyperparams(config['rewts'], config['trading_env'], config.get('strategy_frequency', 20))
+    key = chunk_store.make_key(chunk_df, chunk_strategies, hyperparams, seed)
+
+    agent = chunk_store.load(key, env.observation_space.shape[0], env.action_space.n, config['rewts'])
+    if agent is not None:
+        return agent, key, True
+
+    if seed is not None:
+        set_global_seed(seed)
+
+    temp_path = chunk_store.temp_model_path()
+    agent = ensemble.train_chunk_model(
+        chunk_id=chunk_id,
+        env=env,
+        num_episodes=config['rewts']['episodes_per_chunk'],
+        model_path=temp_path
+    )
+    chunk_store.commit(key, temp_path, metadata={
+        'chunk_id': chunk_id,
+        'start_date': chunk_df.index[0],
+        'end_date': chunk_df.index[-1],
+        'num_rows': len(chunk_df),
+        'hyperparams': hyperparams,
+        'seed': seed
+    })
+
+    return agent, key, False
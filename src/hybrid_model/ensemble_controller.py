@@ -3,6 +3,8 @@ ReWTSE Ensemble Controller
 Integra chunk-based DDQN models con ottimizzazione QP dei pesi
 """
 
+import copy
+import time
 import numpy as np
 from cvxopt import matrix, solvers
 import torch
@@ -14,6 +16,11 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from rl_agents.ddqn_agent import DDQNAgent
+from src.telemetry.instruments import (
+    TRAIN_ENV_STEPS, TRAIN_UPDATES, TRAIN_ENV_STEPS_PER_SECOND, TRAIN_UPDATES_PER_SECOND,
+    TRAIN_EPISODE_SECONDS, QP_SOLVE_SECONDS, OPTIMIZE_WEIGHTS_SECONDS
+)
+from src.telemetry.tracing import traced
 
 class ReWTSEnsembleController:
     """
@@ -36,13 +43,17 @@ class ReWTSEnsembleController:
         # Ensemble di DDQN agents (uno per chunk)
         self.chunk_models = []
 
+        # Metadati per chunk (date, righe) allineati a chunk_models
+        self.chunk_metadata = []
+
         # Pesi correnti
         self.current_weights = None
 
         # Storia performance
         self.performance_history = []
 
-    def train_chunk_model(self, chunk_id, env, num_episodes=100):
+    def train_chunk_model(self, chunk_id, env, num_episodes=100, model_path=None,
+                          num_envs=None, updates_per_step=None):
         """
         Addestra un DDQN agent su un chunk specifico
 
@@ -50,6 +61,9 @@ class ReWTSEnsembleController:
             chunk_id: ID del chunk
             env: TradingEnv per il chunk
             num_episodes: Numero di episodi di training (OPTIMIZED: 100, was 50)
+            model_path: Dove salvare il modello (default: models/chunk_{chunk_id}_ddqn.pt)
+            num_envs: Copie dell'env con episodi in parallelo (default: config['num_envs'] o 1)
+            updates_per_step: train_step per transizione raccolta (default: config['updates_per_step'] o 1.0)
 
         Returns:
             Trained DDQNAgent
@@ -65,7 +79,47 @@ class ReWTSEnsembleController:
 
         agent = DDQNAgent(state_dim, action_dim, self.config)
 
-        # Training loop
+        self.train_agent(agent, env, num_episodes, num_envs, updates_per_step)
+
+        # Salva modello
+        if model_path is None:
+            os.makedirs('models', exist_ok=True)
+            model_path = f"models/chunk_{chunk_id}_ddqn.pt"
+        agent.save(model_path)
+        print(f"✓ Chunk {chunk_id} model saved to {model_path}")
+
+        return agent
+
+    def train_agent(self, agent, env, num_episodes, num_envs=None, updates_per_step=None):
+        """
+        Training loop DDQN di un agent su un env
+
+        Con num_envs=1 e updates_per_step=1 è il loop classico: una forward con
+        batch 1 e un train_step per ogni step dell'env. Con num_envs > 1 gli episodi
+        girano su copie dell'env e a ogni passo una sola forward sceglie le azioni
+        di tutte le copie; ogni n transizioni raccolte seguono
+        updates_per_step * n train_step (il resto frazionario si accumula).
+
+        Args:
+            agent: DDQNAgent da addestrare
+            env: TradingEnv
+            num_episodes: Episodi totali (distribuiti sulle copie)
+            num_envs: Copie dell'env (default: config['num_envs'] o 1)
+            updates_per_step: Rapporto update/dati (default: config['updates_per_step'] o 1.0)
+
+        Returns:
+            Reward degli episodi, in ordine di completamento
+        """
+        if num_envs is None:
+            num_envs = self.config.get('num_envs', 1)
+        if updates_per_step is None:
+            updates_per_step = self.config.get('updates_per_step', 1.0)
+
+        if num_envs == 1 and updates_per_step == 1:
+            return self._train_sequential(agent, env, num_episodes)
+        return self._train_vectorized(agent, env, num_episodes, num_envs, updates_per_step)
+
+    def _train_sequential(self, agent, env, num_episodes):
         episode_rewards = []
 
         for episode in range(num_episodes):
@@ -73,18 +127,34 @@ class ReWTSEnsembleController:
             episode_reward = 0
             done = False
 
+            # Throughput di env.step e train_step (metriche di telemetria)
+            episode_start = time.perf_counter()
+            env_time = 0.0
+            train_time = 0.0
+            steps = 0
+            updates = 0
+
             while not done:
                 # Select action
                 action = agent.select_action(state, explore=True)
 
                 # Execute action
+                t0 = time.perf_counter()
                 next_state, reward, done, _ = env.step(action)
+                t1 = time.perf_counter()
 
                 # Store transition
                 agent.replay_buffer.push(state, action, reward, next_state, done)
 
                 # Train
+                t2 = time.perf_counter()
                 loss = agent.train_step()
+                train_time += time.perf_counter() - t2
+                env_time += t1 - t0
+                steps += 1
+                # train_step ritorna None senza aggiornare finché il buffer non ha batch_size transizioni
+                if loss is not None:
+                    updates += 1
 
                 # Update state
                 state = next_state
@@ -95,18 +165,94 @@ class ReWTSEnsembleController:
 
             episode_rewards.append(episode_reward)
 
+            TRAIN_EPISODE_SECONDS.observe(time.perf_counter() - episode_start)
+            TRAIN_ENV_STEPS.inc(steps)
+            TRAIN_UPDATES.inc(updates)
+            if env_time > 0:
+                TRAIN_ENV_STEPS_PER_SECOND.set(steps / env_time)
+            if train_time > 0 and updates > 0:
+                TRAIN_UPDATES_PER_SECOND.set(updates / train_time)
+
             if (episode + 1) % 10 == 0:
                 avg_reward = np.mean(episode_rewards[-10:])
                 print(f"Episode {episode+1}/{num_episodes}, Avg Reward: {avg_reward:.4f}, Epsilon: {agent.epsilon:.4f}")
 
-        # Salva modello
-        os.makedirs('models', exist_ok=True)
-        model_path = f"models/chunk_{chunk_id}_ddqn.pt"
-        agent.save(model_path)
-        print(f"✓ Chunk {chunk_id} model saved to {model_path}")
-
-        return agent
+        return episode_rewards
 
+    def _train_vectorized(self, agent, env, num_episodes, num_envs, updates_per_step):
+        """Episodi su num_envs copie dell'env: azioni scelte in batch, train_step secondo updates_per_step"""
+        envs = [env] + [copy.deepcopy(env) for _ in range(min(num_envs, num_episodes) - 1)]
+        states = [e.reset() for e in envs]
+        returns = [0.0] * len(envs)
+        episode_starts = [time.perf_counter()] * len(envs)
+        active = list(range(len(envs)))
+        started = len(envs)
+        episode_rewards = []
+        update_credit = 0.0
+
+        # Throughput fra due episodi completati (metriche di telemetria)
+        env_time = 0.0
+        train_time = 0.0
+        steps = 0
+        updates = 0
+
+        while active:
+            # Una forward per tutte le copie attive
+            actions = agent.select_actions(np.stack([states[i] for i in active]), explore=True)
+
+            t0 = time.perf_counter()
+            finished = []
+            for i, action in zip(active, actions):
+                action = int(action)
+                next_state, reward, done, _ = envs[i].step(action)
+                agent.replay_buffer.push(states[i], action, reward, next_state, done)
+                states[i] = next_state
+                returns[i] += reward
+                if done:
+                    finished.append(i)
+            env_time += time.perf_counter() - t0
+            steps += len(active)
+
+            # Update/dati: updates_per_step train_step per transizione raccolta
+            t2 = time.perf_counter()
+            update_credit += updates_per_step * len(active)
+            while update_credit >= 1:
+                if agent.train_step() is not None:
+                    updates += 1
+                update_credit -= 1
+            train_time += time.perf_counter() - t2
+
+            for i in finished:
+                agent.update_epsilon()
+                episode_rewards.append(returns[i])
+
+                now = time.perf_counter()
+                TRAIN_EPISODE_SECONDS.observe(now - episode_starts[i])
+                TRAIN_ENV_STEPS.inc(steps)
+                TRAIN_UPDATES.inc(updates)
+                if env_time > 0:
+                    TRAIN_ENV_STEPS_PER_SECOND.set(steps / env_time)
+                if train_time > 0 and updates > 0:
+                    TRAIN_UPDATES_PER_SECOND.set(updates / train_time)
+                env_time = train_time = 0.0
+                steps = updates = 0
+
+                if started < num_episodes:
+                    states[i] = envs[i].reset()
+                    returns[i] = 0.0
+                    episode_starts[i] = now
+                    started += 1
+                else:
+                    active.remove(i)
+
+                if len(episode_rewards) % 10 == 0:
+                    avg_reward = np.mean(episode_rewards[-10:])
+                    print(f"Episode {len(episode_rewards)}/{num_episodes}, Avg Reward: {avg_reward:.4f}, "
+                          f"Epsilon: {agent.epsilon:.4f}")
+
+        return episode_rewards
+
+    @traced()
     def optimize_weights(self, lookback_data, lookback_returns):
         """
         Ottimizzazione QP per trovare pesi ottimali basati su look-back performance
@@ -124,6 +270,7 @@ class ReWTSEnsembleController:
             Optimal weights array
         """
 
+        optimize_start = time.perf_counter()
         num_models = len(self.chunk_models)
         lookback_len = len(lookback_data) - self.forecast_horizon
 
@@ -179,7 +326,9 @@ class ReWTSEnsembleController:
 
             # Solve QP
             solvers.options['show_progress'] = False
+            solve_start = time.perf_counter()
             sol = solvers.qp(P, q, G, h, A, b)
+            QP_SOLVE_SECONDS.observe(time.perf_counter() - solve_start, status=sol['status'])
 
             if sol['status'] == 'optimal':
                 weights = np.array(sol['x']).flatten()
@@ -191,8 +340,11 @@ class ReWTSEnsembleController:
             print(f"Warning: QP optimization failed with error {e}, using uniform weights")
             weights = np.ones(num_models) / num_models
 
+        OPTIMIZE_WEIGHTS_SECONDS.observe(time.perf_counter() - optimize_start)
+
         return weights
 
+    @traced()
     def predict_ensemble(self, state, weights=None):
         """
         Weighted ensemble prediction
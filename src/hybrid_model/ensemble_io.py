@@ -0,0 +1,309 @@
+"""
+Ensemble I/O
+Formato di export inference-only del ReWTSEnsembleController
+
+Il pickle dell'ensemble contiene ogni DDQNAgent con target net, stato dell'optimizer
+e replay buffer (fino a 50k transizioni): per backtest e API serve solo la policy_net.
+Il bundle salva invece:
+    manifest.json          config, pesi correnti, metadati dei chunk, architettura
+    weights.safetensors    policy_net impilate (K, out, in) per layer
+    (oppure weights.pt     torch.save dei soli tensori, se safetensors non è installato)
+
+Il loader fa memory-map dei pesi: le policy_net dei chunk sono view sui tensori
+impilati, senza copie né stato di training.
+"""
+
+import os
+import json
+import hashlib
+import pickle
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from src.rl_agents.ddqn_agent import DQN
+from src.hybrid_model.ensemble_controller import ReWTSEnsembleController
+from src.hybrid_model.stacked_policy import StackedPolicy
+
+try:
+    from safetensors.torch import save_file as _safetensors_save, load_file as _safetensors_load
+    HAS_SAFETENSORS = True
+except ImportError:
+    HAS_SAFETENSORS = False
+
+BUNDLE_FORMAT = 'rewts-inference'
+BUNDLE_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+WEIGHTS_FILES = {
+    'safetensors': 'weights.safetensors',
+    'torch': 'weights.pt'
+}
+
+
+class InferenceChunkModel:
+    """
+    Chunk model inference-only: espone solo policy_net
+
+    Compatibile con i consumer di DDQNAgent che usano model.policy_net
+    (predict_ensemble, optimize_weights, StackedPolicy.from_agents).
+    """
+
+    def __init__(self, policy_net, state_dim, action_dim):
+        self.policy_net = policy_net
+        self.state_dim = state_dim
+        self.action_dim = action_dim
+
+    def select_action(self, state, explore=False):
+        """Azione greedy (nessuna esplorazione in inference)"""
+        with torch.no_grad():
+            state_tensor = torch.FloatTensor(state).unsqueeze(0)
+            return self.policy_net(state_tensor).argmax().item()
+
+
+def _to_builtin(value):
+    """Converte valori numpy/pandas in tipi serializzabili JSON"""
+    if isinstance(value, dict):
+        return {str(k): _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_builtin(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _atomic_path(directory, suffix):
+    fd, path = tempfile.mkstemp(dir=directory, suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def is_inference_bundle(path) -> bool:
+    """True se path è una directory con un manifest di bundle"""
+    return (Path(path) / MANIFEST_FILE).is_file()
+
+
+def export_inference_bundle(ensemble, bundle_dir, metadata=None, weights_format=None):
+    """
+    Esporta un ensemble nel formato inference-only
+
+    Args:
+        ensemble: ReWTSEnsembleController addestrato
+        bundle_dir: Directory di output (creata se non esiste)
+        metadata: Dict opzionale aggiunto al manifest (es. ticker)
+        weights_format: 'safetensors' o 'torch' (default: safetensors se installato)
+
+    Returns:
+        Dict del manifest scritto
+    """
+    if len(ensemble.chunk_models) == 0:
+        raise ValueError("Cannot export an ensemble without chunk models")
+
+    weights_format = weights_format or ('safetensors' if HAS_SAFETENSORS else 'torch')
+    if weights_format not in WEIGHTS_FILES:
+        raise ValueError(f"Unknown weights format: {weights_format}")
+    if weights_format == 'safetensors' and not HAS_SAFETENSORS:
+        raise ImportError("safetensors is not installed: pip install safetensors")
+
+    policy = getattr(ensemble, 'stacked_policy', None) or StackedPolicy.from_agents(ensemble.chunk_models)
+
+    tensors = {}
+    for i, (w, b) in enumerate(zip(policy.weights, policy.biases)):
+        tensors[f'layer_{i}.weight'] = w.contiguous()
+        tensors[f'layer_{i}.bias'] = b.contiguous()
+
+    bundle_dir = Path(bundle_dir)
+    bundle_dir.mkdir(parents=True, exist_ok=True)
+    weights_file = WEIGHTS_FILES[weights_format]
+
+    # Pesi: scrittura su file temporaneo + rename atomico
+    tmp_weights = _atomic_path(bundle_dir, f'.{weights_format}.tmp')
+    if weights_format == 'safetensors':
+        _safetensors_save(tensors, tmp_weights)
+    else:
+        torch.save(tensors, tmp_weights)
+    weights_sha256 = _file_sha256(tmp_weights)
+    os.replace(tmp_weights, bundle_dir / weights_file)
+
+    current_weights = ensemble.current_weights
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'version': BUNDLE_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'weights_file': weights_file,
+        'weights_format': weights_format,
+        'weights_sha256': weights_sha256,
+        'num_chunks': policy.num_models,
+        'num_layers': len(policy.weights),
+        'state_dim': policy.state_dim,
+        'action_dim': policy.action_dim,
+        'hidden_dims': policy.hidden_dims,
+        'config': _to_builtin(ensemble.config),
+        'current_weights': None if current_weights is None else _to_builtin(np.asarray(current_weights)),
+        'chunk_metadata': _to_builtin(getattr(ensemble, 'chunk_metadata', [])),
+        'metadata': _to_builtin(metadata or {})
+    }
+
+    # Manifest per ultimo: un bundle con manifest è sempre completo
+    tmp_manifest = _atomic_path(bundle_dir, '.json.tmp')
+    with open(tmp_manifest, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_manifest, bundle_dir / MANIFEST_FILE)
+
+    return manifest
+
+
+def read_manifest(bundle_dir):
+    """Legge e valida il manifest di un bundle"""
+    with open(Path(bundle_dir) / MANIFEST_FILE) as f:
+        manifest = json.load(f)
+
+    if manifest.get('format') != BUNDLE_FORMAT:
+        raise ValueError(f"Not a ReWTS inference bundle: {bundle_dir}")
+    if manifest.get('version', 0) > BUNDLE_VERSION:
+        raise ValueError(f"Unsupported bundle version {manifest['version']} (max {BUNDLE_VERSION})")
+
+    return manifest
+
+
+def _load_tensors(path, weights_format, mmap=True):
+    if weights_format == 'safetensors':
+        if not HAS_SAFETENSORS:
+            raise ImportError("safetensors is not installed: pip install safetensors")
+        # safetensors legge direttamente dal file memory-mapped
+        return _safetensors_load(str(path))
+
+    return torch.load(str(path), map_location='cpu', mmap=mmap, weights_only=True)
+
+
+def load_inference_bundle(bundle_dir, mmap=True, verify=False):
+    """
+    Carica un bundle inference-only come ReWTSEnsembleController
+
+    Args:
+        bundle_dir: Directory del bundle
+        mmap: Memory-map dei pesi (solo formato torch; safetensors è sempre mmap)
+        verify: Se True verifica lo SHA-256 del file dei pesi
+
+    Returns:
+        ReWTSEnsembleController con chunk_models = [InferenceChunkModel] e
+        l'attributo stacked_policy già costruito
+    """
+    bundle_dir = Path(bundle_dir)
+    manifest = read_manifest(bundle_dir)
+    weights_path = bundle_dir / manifest['weights_file']
+
+    if verify and _file_sha256(weights_path) != manifest['weights_sha256']:
+        raise ValueError(f"Checksum mismatch for {weights_path}")
+
+    tensors = _load_tensors(weights_path, manifest['weights_format'], mmap=mmap)
+
+    num_layers = manifest['num_layers']
+    weights = [tensors[f'layer_{i}.weight'] for i in range(num_layers)]
+    biases = [tensors[f'layer_{i}.bias'] for i in range(num_layers)]
+
+    ensemble = _build_inference_ensemble(
+        StackedPolicy(weights, biases),
+        manifest['config'],
+        manifest['current_weights'],
+        manifest['chunk_metadata']
+    )
+    ensemble.bundle_manifest = manifest
+
+    return ensemble
+
+
+def _build_inference_ensemble(policy, config, current_weights=None, chunk_metadata=None):
+    """Ensemble con chunk model inference-only costruiti come view su policy"""
+    ensemble = ReWTSEnsembleController(config)
+
+    for k in range(policy.num_models):
+        # Parametri come view sui tensori impilati (nessuna copia)
+        state_dict = {}
+        for i in range(len(policy.weights)):
+            # DQN.network alterna Linear e ReLU: il layer i è network[2 * i]
+            state_dict[f'network.{2 * i}.weight'] = policy.weights[i][k]
+            state_dict[f'network.{2 * i}.bias'] = policy.biases[i][k]
+
+        with torch.device('meta'):
+            policy_net = DQN(policy.state_dim, policy.action_dim, policy.hidden_dims)
+        policy_net.load_state_dict(state_dict, assign=True)
+        policy_net.eval()
+        policy_net.requires_grad_(False)
+
+        ensemble.chunk_models.append(InferenceChunkModel(policy_net, policy.state_dim, policy.action_dim))
+
+    if current_weights is not None:
+        ensemble.current_weights = np.asarray(current_weights, dtype=np.float64)
+    ensemble.chunk_metadata = list(chunk_metadata or [])
+    ensemble.stacked_policy = policy
+
+    return ensemble
+
+
+def to_inference_ensemble(ensemble):
+    """
+    Versione inference-only di un ensemble caricato da pickle
+
+    Copia le policy_net in uno StackedPolicy e scarta target net, optimizer e
+    replay buffer: l'ensemble originale può essere rilasciato dal garbage collector.
+    """
+    if getattr(ensemble, 'stacked_policy', None) is not None or len(ensemble.chunk_models) == 0:
+        return ensemble
+
+    return _build_inference_ensemble(
+        StackedPolicy.from_agents(ensemble.chunk_models),
+        ensemble.config,
+        ensemble.current_weights,
+        getattr(ensemble, 'chunk_metadata', [])
+    )
+
+
+def default_bundle_dir(ticker, models_dir='models'):
+    """Directory standard del bundle di un ticker"""
+    return os.path.join(models_dir, f"{ticker}_rewts_inference")
+
+
+def load_ensemble(path, mmap=True, inference_only=False):
+    """
+    Carica un ensemble da bundle inference-only o da pickle
+
+    Args:
+        path: Directory del bundle oppure file .pkl
+        mmap: Memory-map dei pesi del bundle
+        inference_only: Per i pickle, scarta lo stato di training (to_inference_ensemble)
+
+    Returns:
+        ReWTSEnsembleController
+    """
+    if os.path.isdir(path):
+        return load_inference_bundle(path, mmap=mmap)
+
+    with open(path, 'rb') as f:
+        ensemble = pickle.load(f)
+
+    return to_inference_ensemble(ensemble) if inference_only else ensemble
+
+
+def resolve_model_path(ticker, models_dir='models'):
+    """
+    Path del modello di un ticker: bundle inference-only se presente, altrimenti pickle
+    """
+    bundle_dir = default_bundle_dir(ticker, models_dir)
+    if is_inference_bundle(bundle_dir):
+        return bundle_dir
+    return os.path.join(models_dir, f"{ticker}_rewts_ensemble.pkl")
@@ -0,0 +1,135 @@
+"""
+Stacked Policy
+Pesi delle policy_net di tutti i chunk model impilati in tensori (K, out, in)
+per valutare l'intero ensemble con un solo forward batch
+"""
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+
+class StackedPolicy:
+    """
+    Policy network di K chunk model con la stessa architettura, impilate
+
+    Ogni layer lineare l è memorizzato come:
+        weights[l]: (K, out_l, in_l)
+        biases[l]:  (K, out_l)
+
+    Con ReLU fra i layer (stessa struttura di DQN in ddqn_agent.py).
+    """
+
+    def __init__(self, weights, biases):
+        if len(weights) == 0 or len(weights) != len(biases):
+            raise ValueError("StackedPolicy requires one bias per weight matrix")
+
+        self.weights = [torch.as_tensor(w, dtype=torch.float32) for w in weights]
+        self.biases = [torch.as_tensor(b, dtype=torch.float32) for b in biases]
+
+        self.num_models = self.weights[0].shape[0]
+        self.state_dim = self.weights[0].shape[2]
+        self.action_dim = self.weights[-1].shape[1]
+        self.hidden_dims = [w.shape[1] for w in self.weights[:-1]]
+
+        self._numpy_layers = None
+
+    @classmethod
+    def from_policy_nets(cls, policy_nets):
+        """
+        Costruisce lo stack da una lista di DQN (policy_net)
+
+        Args:
+            policy_nets: Lista di nn.Module con la stessa architettura
+
+        Returns:
+            StackedPolicy
+        """
+        if len(policy_nets) == 0:
+            raise ValueError("Cannot stack an empty list of policy networks")
+
+        per_model_layers = []
+        for net in policy_nets:
+            linears = [m for m in net.modules() if isinstance(m, nn.Linear)]
+            per_model_layers.append(linears)
+
+        shapes = [tuple(l.weight.shape for l in layers) for layers in per_model_layers]
+        if any(s != shapes[0] for s in shapes):
+            raise ValueError("All chunk models must share the same architecture to be stacked")
+
+        weights = []
+        biases = []
+        with torch.no_grad():
+            for layer_idx in range(len(per_model_layers[0])):
+                weights.append(torch.stack([layers[layer_idx].weight.detach().float() for layers in per_model_layers]))
+                biases.append(torch.stack([layers[layer_idx].bias.detach().float() for layers in per_model_layers]))
+
+        return cls(weights, biases)
+
+    @classmethod
+    def from_agents(cls, chunk_models):
+        """Costruisce lo stack dai chunk model (DDQNAgent o oggetti con .policy_net)"""
+        return cls.from_policy_nets([model.policy_net for model in chunk_models])
+
+    def forward(self, states):
+        """
+        Forward batch di tutti i modelli
+
+        Args:
+            states: Tensor/array (N, state_dim) oppure (state_dim,)
+
+        Returns:
+            Tensor (K, N, action_dim) di Q-values
+        """
+        x = torch.as_tensor(states, dtype=torch.float32)
+        if x.dim() == 1:
+            x = x.unsqueeze(0)
+
+        # (N, D) -> (K, N, D): stesso input per ogni modello
+        h = x.unsqueeze(0).expand(self.num_models, -1, -1)
+
+        with torch.no_grad():
+            for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+                h = torch.baddbmm(b.unsqueeze(1), h, w.transpose(1, 2))
+                if i < len(self.weights) - 1:
+                    h = torch.relu(h)
+
+        return h
+
+    def q_values(self, states):
+        """Q-values come numpy array (K, N, action_dim)"""
+        return self.forward(states).numpy()
+
+    def weighted_q_values(self, states, weights):
+        """
+        Media pesata dei Q-values dei K modelli
+
+        Args:
+            states: (N, state_dim)
+            weights: (K,) pesi dell'ensemble
+
+        Returns:
+            numpy array (N, action_dim)
+        """
+        q = self.q_values(states).astype(np.float64)
+        return np.tensordot(np.asarray(weights, dtype=np.float64), q, axes=(0, 0))
+
+    def numpy_layers(self):
+        """
+        Layer come array numpy float32, per loop sequenziali senza overhead torch
+
+        Returns:
+            Lista di tuple (weight (K, out, in), bias (K, out))
+        """
+        if self._numpy_layers is None:
+            self._numpy_layers = [
+                (np.ascontiguousarray(w.numpy()), np.ascontiguousarray(b.numpy()))
+                for w, b in zip(self.weights, self.biases)
+            ]
+        return self._numpy_layers
+
+    @property
+    def nbytes(self):
+        """Memoria occupata dai parametri (bytes)"""
+        return sum(w.numel() * w.element_size() + b.numel() * b.element_size()
+                   for w, b in zip(self.weights, self.biases))
@@ -5,5 +5,8 @@ Strategist and Analyst agents for trading strategy generation using DeepSeek API
 
 from .strategist_agent_deepseek import StrategistAgent, TradingStrategy
 from .analyst_agent_deepseek import AnalystAgent, NewsFactor
+from .mock_deepseek_server import MockDeepSeekServer
+from .strategy_store import StrategyStore, StrategyTimeline
 
-__all__ = ['StrategistAgent', 'TradingStrategy', 'AnalystAgent', 'NewsFactor']
+__all__ = ['StrategistAgent', 'TradingStrategy', 'AnalystAgent', 'NewsFactor', 'MockDeepSeekServer',
+           'StrategyStore', 'StrategyTimeline']
@@ -0,0 +1,347 @@
+"""
+Mock DeepSeek Server
+Server locale compatibile OpenAI (POST /chat/completions) per profilare la pipeline LLM offline
+
+Riconosce i prompt di StrategistAgent e AnalystAgent e risponde con JSON nel
+formato atteso, dopo una latenza estratta da una distribuzione configurabile.
+Può iniettare 429 (casuali o oltre un rate limit lato server), 500 e risposte
+con JSON malformato. Usa solo la libreria standard (ThreadingHTTPServer):
+gli agent vi puntano con llm.base_url o DEEPSEEK_BASE_URL.
+"""
+
+import re
+import json
+import math
+import time
+import uuid
+import random
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'normal', 'lognormal', 'exponential')
+
+_TIMESTAMP_RE = re.compile(r'"timestamp":\s*"([^"]*)"')
+
+
+def parse_latency_spec(spec):
+    """
+    Converte una specifica di latenza in un sampler
+
+    Formati (secondi):
+        fixed:0.5
+        uniform:0.2,1.5          (min, max)
+        normal:0.8,0.2           (media, std; troncata a 0)
+        lognormal:0.8,0.5        (mediana, sigma del log)
+        exponential:0.5          (media)
+
+    Args:
+        spec: Stringa 'distribuzione:parametri' (o un numero = fixed)
+
+    Returns:
+        Callable(rng: random.Random) -> secondi
+    """
+    spec = str(spec).strip()
+    if ':' not in spec:
+        spec = f"fixed:{spec}"
+    dist, _, args = spec.partition(':')
+    dist = dist.strip().lower()
+    try:
+        params = [float(x) for x in args.split(',') if x.strip()]
+    except ValueError:
+        raise ValueError(f"Invalid latency spec '{spec}'")
+
+    expected = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2, 'exponential': 1}
+    if dist not in expected:
+        raise ValueError(f"Unknown latency distribution '{dist}' (choose from {', '.join(LATENCY_DISTRIBUTIONS)})")
+    if len(params) != expected[dist]:
+        raise ValueError(f"Latency distribution '{dist}' expects {expected[dist]} parameters, got {len(params)}")
+
+    if dist == 'fixed':
+        return lambda rng: params[0]
+    if dist == 'uniform':
+        return lambda rng: rng.uniform(params[0], params[1])
+    if dist == 'normal':
+        return lambda rng: max(0.0, rng.gauss(params[0], params[1]))
+    if dist == 'lognormal':
+        mu = math.log(params[0]) if params[0] > 0 else 0.0
+        return lambda rng: rng.lognormvariate(mu, params[1])
+    return lambda rng: rng.expovariate(1.0 / params[0]) if params[0] > 0 else 0.0
+
+
+class MockDeepSeekServer:
+    """Server OpenAI-compatibile con latenza e fault injection configurabili"""
+
+    def __init__(self,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 latency: str = 'lognormal:0.8,0.4',
+                 error_429_rate: float = 0.0,
+                 error_500_rate: float = 0.0,
+                 malformed_rate: float = 0.0,
+                 max_requests_per_second: float = None,
+                 seed: int = 0):
+        """
+        Initialize mock server
+
+        Args:
+            host: Interfaccia di ascolto
+            port: Porta (0 = porta libera scelta dal sistema)
+            latency: Specifica di parse_latency_spec
+            error_429_rate: Probabilità di un 429 casuale
+            error_500_rate: Probabilità di un 500
+            malformed_rate: Probabilità di una risposta 200 con JSON troncato
+            max_requests_per_second: Rate limit lato server (finestra di 1s, None = nessuno)
+            seed: Seed per latenze, errori e contenuti
+        """
+        self.latency_spec = latency
+        self._sample_latency = parse_latency_spec(latency)
+        self.error_429_rate = error_429_rate
+        self.error_500_rate = error_500_rate
+        self.malformed_rate = malformed_rate
+        self.max_requests_per_second = max_requests_per_second
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window = deque()
+        self._thread = None
+        self._reset_counters()
+
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _reset_counters(self):
+        self.requests = 0
+        self.status_counts = {}
+        self.malformed = 0
+        self.rate_limited_window = 0
+        self.by_kind = {}
+        self.latency_total = 0.0
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self.start_time = time.time()
+
+    def start(self):
+        """Avvia il server in un thread daemon"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='mock-deepseek', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def reset_stats(self):
+        with self._lock:
+            self._reset_counters()
+            self._window.clear()
+
+    def get_stats(self):
+        """Statistiche delle richieste servite"""
+        with self._lock:
+            ok = self.status_counts.get(200, 0)
+            elapsed = time.time() - self.start_time
+            return {
+                'requests': self.requests,
+                'ok': ok,
+                'rate_limited': self.status_counts.get(429, 0),
+                'rate_limited_by_window': self.rate_limited_window,
+                'server_errors': self.status_counts.get(500, 0),
+                'malformed': self.malformed,
+                'by_kind': dict(self.by_kind),
+                'mean_latency_ms': 1000 * self.latency_total / ok if ok > 0 else 0.0,
+                'max_concurrent': self.max_concurrent,
+                'requests_per_second': self.requests / elapsed if elapsed > 0 else 0.0,
+                'config': {
+                    'latency': self.latency_spec,
+                    'error_429_rate': self.error_429_rate,
+                    'error_500_rate': self.error_500_rate,
+                    'malformed_rate': self.malformed_rate,
+                    'max_requests_per_second': self.max_requests_per_second
+                }
+            }
+
+    # ----- Gestione richieste -----
+
+    def _check_window(self, now):
+        """Secondi di Retry-After se il rate limit lato server è superato, altrimenti None"""
+        if not self.max_requests_per_second:
+            return None
+        while self._window and self._window[0] <= now - 1.0:
+            self._window.popleft()
+        if len(self._window) >= self.max_requests_per_second:
+            return max(0.0, self._window[0] + 1.0 - now)
+        self._window.append(now)
+        return None
+
+    def handle_completion(self, body):
+        """
+        Risposta a una chat completion
+
+        Args:
+            body: Richiesta già decodificata (model, messages, ...)
+
+        Returns:
+            (status, headers dict, payload dict)
+        """
+        messages = body.get('messages') or []
+        prompt = '\n'.join(str(m.get('content', '')) for m in messages)
+        kind = _prompt_kind(prompt)
+
+        with self._lock:
+            self.requests += 1
+            self.by_kind[kind] = self.by_kind.get(kind, 0) + 1
+            retry_after = self._check_window(time.time())
+            roll_429 = self._rng.random()
+            roll_500 = self._rng.random()
+            roll_malformed = self._rng.random()
+            latency = self._sample_latency(self._rng)
+            content_seed = self._rng.getrandbits(32)
+
+        if retry_after is not None or roll_429 < self.error_429_rate:
+            with self._lock:
+                self.status_counts[429] = self.status_counts.get(429, 0) + 1
+                if retry_after is not None:
+                    self.rate_limited_window += 1
+            headers = {'Retry-After': f"{retry_after if retry_after is not None else 1.0:.3f}"}
+            return 429, headers, _error_payload('Rate limit reached for requests', 'rate_limit_error')
+
+        with self._lock:
+            self.concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        try:
+            time.sleep(latency)
+        finally:
+            with self._lock:
+                self.concurrent -= 1
+
+        if roll_500 < self.error_500_rate:
+            with self._lock:
+                self.status_counts[500] = self.status_counts.get(500, 0) + 1
+            return 500, {}, _error_payload('The server had an error while processing your request', 'server_error')
+
+        content = json.dumps(_completion_content(kind, prompt, random.Random(content_seed)))
+        malformed = roll_malformed < self.malformed_rate
+        if malformed:
+            # JSON troncato a metà, come una risposta interrotta
+            content = content[:len(content) // 2]
+
+        with self._lock:
+            self.status_counts[200] = self.status_counts.get(200, 0) + 1
+            self.latency_total += latency
+            if malformed:
+                self.malformed += 1
+
+        prompt_tokens = max(1, len(prompt) // 4)
+        completion_tokens = max(1, len(content) // 4)
+        return 200, {}, {
+            'id': f"chatcmpl-mock-{uuid.uuid4().hex[:12]}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'deepseek-chat'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens
+            }
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _send_json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length > 0 else b''
+                if not self.path.rstrip('/').endswith('/chat/completions'):
+                    self._send_json(404, _error_payload(f"Unknown endpoint {self.path}", 'invalid_request_error'))
+                    return
+                try:
+                    body = json.loads(raw or b'{}')
+                except json.JSONDecodeError:
+                    self._send_json(400, _error_payload('Request body is not valid JSON', 'invalid_request_error'))
+                    return
+                status, headers, payload = server.handle_completion(body)
+                self._send_json(status, payload, headers)
+
+            def do_GET(self):
+                if self.path.rstrip('/') == '/stats':
+                    self._send_json(200, server.get_stats())
+                elif self.path.rstrip('/') in ('', '/health'):
+                    self._send_json(200, {'status': 'ok'})
+                else:
+                    self._send_json(404, _error_payload(f"Unknown endpoint {self.path}", 'invalid_request_error'))
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _error_payload(message, error_type):
+    return {'error': {'message': message, 'type': error_type, 'code': None}}
+
+
+def _prompt_kind(prompt):
+    if '"direction"' in prompt:
+        return 'strategist'
+    if 'top_factors' in prompt:
+        return 'analyst'
+    return 'other'
+
+
+def _completion_content(kind, prompt, rng):
+    """Contenuto JSON nel formato atteso dall'agent che ha generato il prompt"""
+    if kind == 'strategist':
+        match = _TIMESTAMP_RE.search(prompt)
+        direction = rng.randint(0, 1)
+        return {
+            'direction': direction,
+            'confidence': round(rng.uniform(1.0, 3.0), 1),
+            'explanation': f"Mock strategy: {'bullish' if direction == 1 else 'bearish'} momentum and neutral macro.",
+            'key_features': [
+                {'feature': 'RSI', 'impact': 'positive' if direction == 1 else 'negative', 'weight': round(rng.random(), 2)},
+                {'feature': 'MA_50_Slope', 'impact': 'positive' if direction == 1 else 'negative', 'weight': round(rng.random(), 2)}
+            ],
+            'timestamp': match.group(1) if match else ''
+        }
+    if kind == 'analyst':
+        sentiments = [rng.choice((-1, 0, 1)) for _ in range(3)]
+        overall = sum(sentiments)
+        return {
+            'top_factors': [
+                {'factor': f"Mock news factor {i + 1}", 'sentiment': s, 'market_impact': rng.randint(1, 3)}
+                for i, s in enumerate(sentiments)
+            ],
+            'overall_sentiment': 'bullish' if overall > 0 else 'bearish' if overall < 0 else 'neutral',
+            'confidence': round(rng.uniform(0.3, 0.9), 2),
+            'key_topics': ['earnings', 'guidance', 'macro']
+        }
+    return {}
@@ -9,6 +9,11 @@ from typing import Dict, List, Tuple
 import numpy as np
 import json
 import os
+import time
+
+from src.telemetry.instruments import record_llm_call
+
+DEEPSEEK_BASE_URL = "https://api.deepseek.com"
 
 @dataclass
 class TradingStrategy:
@@ -30,12 +35,17 @@ class StrategistAgent:
         if not api_key:
             raise ValueError("DEEPSEEK_API_KEY not found in config or environment")
 
+        # base_url configurabile: endpoint compatibili o mock server locale
+        # (src/llm_agents/mock_deepseek_server.py) per test offline
+        self.base_url = config.get('base_url') or os.getenv('DEEPSEEK_BASE_URL') or DEEPSEEK_BASE_URL
+
         self.client = OpenAI(
             api_key=api_key,
-            base_url="https://api.deepseek.com"
+            base_url=self.base_url,
+            max_retries=config.get('client_max_retries', 2)
         )
 
-        print(f"✓ Strategist Agent configured with DeepSeek ({self.model_name})")
+        print(f"✓ Strategist Agent configured with DeepSeek ({self.model_name}, {self.base_url})")
 
         # Carica prompt template dal paper
         self.prompt_template = self._load_prompt_template()
@@ -244,15 +254,21 @@ IMPORTANT:
         )
 
         # Call DeepSeek API
-        response = self.client.chat.completions.create(
-            model=self.model_name,
-            messages=[
-                {"role": "system", "content": "You are an expert quantitative hedge fund manager generating trading strategies."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=self.temperature,
-            response_format={"type": "json_object"}
-        )
+        call_start = time.perf_counter()
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": "You are an expert quantitative hedge fund manager generating trading strategies."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=self.temperature,
+                response_format={"type": "json_object"}
+            )
+        except Exception:
+            record_llm_call('strategist', self.model_name, call_start, status='error')
+            raise
+        record_llm_call('strategist', self.model_name, call_start, response)
 
         # Parse response
         response_text = response.choices[0].message.content
@@ -0,0 +1,402 @@
+"""
+Strategy Store
+Strategie LLM precalcolate indicizzate per (ticker, data di inizio periodo)
+
+Ogni ticker ha una timeline di strategie ordinate per inizio periodo, salvata
+in {ticker}_strategies.npz: colonne numeriche (inizio periodo, direction,
+confidence, strength) più i campi testuali serializzati in JSON, senza pickle.
+Al caricamento viene costruito un indice giorno di calendario -> periodo, così
+la strategia attiva per un timestamp si trova con un accesso ad array (O(1))
+invece di rigenerarla con l'LLM o scorrere la lista. I vecchi
+{ticker}_strategies.pkl (liste posizionali, una strategia ogni
+strategy_frequency righe di data/processed) vengono convertiti al primo
+caricamento usando le date dei dati di mercato.
+"""
+
+import os
+import json
+import pickle
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.llm_agents.strategist_agent_deepseek import TradingStrategy
+
+STORE_FORMAT_VERSION = 1
+
+
+def _to_day(timestamp) -> pd.Timestamp:
+    """Data (senza ora né timezone) di un timestamp: la strategia è per giorno di calendario"""
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_localize(None)
+    return timestamp.normalize()
+
+
+class StrategyTimeline:
+    """Strategie di un ticker ordinate per inizio periodo, con lookup O(1) per data"""
+
+    def __init__(self, ticker: str, period_starts, strategies: List[TradingStrategy],
+                 extras: Optional[List[Dict]] = None, valid_until=None):
+        """
+        Initialize timeline
+
+        Args:
+            ticker: Ticker symbol
+            period_starts: Date di inizio periodo, strettamente crescenti (una per strategia)
+            strategies: TradingStrategy allineate a period_starts
+            extras: Campi aggiuntivi per periodo (es. prezzo e sentiment delle strategie live)
+            valid_until: Fine (esclusa) dell'ultimo periodo; None = l'ultima strategia resta attiva
+        """
+        period_starts = pd.DatetimeIndex([_to_day(d) for d in period_starts])
+        if len(period_starts) != len(strategies):
+            raise ValueError(f"{len(period_starts)} period starts for {len(strategies)} strategies")
+        if not period_starts.is_monotonic_increasing or period_starts.has_duplicates:
+            raise ValueError("Period starts must be strictly increasing")
+
+        self.ticker = ticker
+        self.period_starts = period_starts
+        self.strategies = list(strategies)
+        self.extras = list(extras) if extras is not None else [{} for _ in strategies]
+        self.valid_until = _to_day(valid_until) if valid_until is not None else None
+        self._build_index()
+
+    def _build_index(self):
+        """Indice giorno di calendario (dal primo inizio periodo) -> periodo attivo"""
+        if not self.strategies:
+            self._origin = None
+            self._day_index = np.zeros(0, dtype=np.int32)
+            self.tau = np.zeros(0)
+            return
+
+        self._origin = self.period_starts[0]
+        offsets = (self.period_starts - self._origin).days.values
+        days = np.arange(offsets[-1] + 1)
+        self._day_index = (np.searchsorted(offsets, days, side='right') - 1).astype(np.int32)
+
+        # Segnale τ = dir(πg) * str(πg) per periodo (come nell'observation di TradingEnv)
+        self.tau = np.array([(2 * s.direction - 1) * s.strength for s in self.strategies], dtype=np.float64)
+
+    # ========== Lookup ==========
+
+    def index_at(self, timestamp) -> Optional[int]:
+        """Periodo attivo a timestamp (ultimo inizio periodo <= data), None fuori dalla timeline"""
+        if self._origin is None:
+            return None
+        day = _to_day(timestamp)
+        if self.valid_until is not None and day >= self.valid_until:
+            return None
+        offset = (day - self._origin).days
+        if offset < 0:
+            return None
+        if offset >= len(self._day_index):
+            return len(self.strategies) - 1
+        return int(self._day_index[offset])
+
+    def get(self, timestamp) -> Optional[TradingStrategy]:
+        """Strategia attiva a timestamp (None fuori dalla timeline)"""
+        idx = self.index_at(timestamp)
+        return self.strategies[idx] if idx is not None else None
+
+    def lookup(self, timestamp) -> Optional[Dict]:
+        """Strategia attiva a timestamp come dict serializzabile (con inizio periodo, τ ed extra)"""
+        idx = self.index_at(timestamp)
+        if idx is None:
+            return None
+        strategy = self.strategies[idx]
+        return {
+            'ticker': self.ticker,
+            'period_start': self.period_starts[idx].strftime('%Y-%m-%d'),
+            'period_index': idx,
+            'direction': int(strategy.direction),
+            'confidence': float(strategy.confidence),
+            'strength': float(strategy.strength),
+            'tau': float(self.tau[idx]),
+            'explanation': strategy.explanation,
+            'timestamp': strategy.timestamp,
+            **self.extras[idx]
+        }
+
+    def tau_for_dates(self, dates) -> np.ndarray:
+        """
+        τ della strategia attiva per ogni data (vettoriale, 0.0 fuori dalla timeline)
+
+        Args:
+            dates: DatetimeIndex (es. indice dei dati di mercato)
+        """
+        dates = pd.DatetimeIndex(dates)
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+        if self._origin is None:
+            return np.zeros(len(dates))
+
+        dates = dates.normalize()
+        offsets = (dates - self._origin).days.values
+        idx = self._day_index[np.clip(offsets, 0, len(self._day_index) - 1)]
+        active = offsets >= 0
+        if self.valid_until is not None:
+            active &= dates < self.valid_until
+        return np.where(active, self.tau[idx], 0.0)
+
+    # ========== Sequenza (compatibile con le liste posizionali) ==========
+
+    def __len__(self):
+        return len(self.strategies)
+
+    def __getitem__(self, item):
+        """Strategia i-esima, o StrategyTimeline dei periodi di una slice (stesse date di inizio)"""
+        if not isinstance(item, slice):
+            return self.strategies[item]
+
+        indices = range(*item.indices(len(self.strategies)))
+        if indices.step != 1:
+            raise ValueError("StrategyTimeline slices must be contiguous")
+        if not indices:
+            return StrategyTimeline(self.ticker, [], [])
+
+        start, stop = indices.start, indices.stop
+        # I periodi tagliati via in coda non restano attivi: la slice finisce dove inizia il successivo
+        valid_until = self.period_starts[stop] if stop < len(self.strategies) else self.valid_until
+        return StrategyTimeline(self.ticker, self.period_starts[start:stop], self.strategies[start:stop],
+                                self.extras[start:stop], valid_until=valid_until)
+
+    def __iter__(self):
+        return iter(self.strategies)
+
+    # ========== Aggiornamento ==========
+
+    def append(self, period_start, strategy: TradingStrategy, extra: Optional[Dict] = None):
+        """Aggiunge (o sostituisce, a parità di data) la strategia dell'ultimo periodo"""
+        period_start = _to_day(period_start)
+        if len(self.period_starts) and period_start < self.period_starts[-1]:
+            raise ValueError(f"Period start {period_start.date()} precedes the last period "
+                             f"({self.period_starts[-1].date()})")
+
+        if len(self.period_starts) and period_start == self.period_starts[-1]:
+            self.strategies[-1] = strategy
+            self.extras[-1] = extra or {}
+        else:
+            self.period_starts = self.period_starts.append(pd.DatetimeIndex([period_start]))
+            self.strategies.append(strategy)
+            self.extras.append(extra or {})
+        self.valid_until = None
+        self._build_index()
+
+    # ========== Persistenza ==========
+
+    def save(self, path: str):
+        """Scrittura atomica in .npz (file temporaneo + rename)"""
+        records = [
+            {
+                'explanation': s.explanation,
+                'features_used': s.features_used,
+                'timestamp': s.timestamp,
+                'extra': extra
+            }
+            for s, extra in zip(self.strategies, self.extras)
+        ]
+        header = {
+            'version': STORE_FORMAT_VERSION,
+            'ticker': self.ticker,
+            'valid_until': self.valid_until.strftime('%Y-%m-%d') if self.valid_until is not None else None,
+            'records': records
+        }
+
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.npz.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(
+                    f,
+                    period_start=self.period_starts.values.astype('datetime64[D]').astype(np.int64),
+                    direction=np.array([s.direction for s in self.strategies], dtype=np.int8),
+                    confidence=np.array([s.confidence for s in self.strategies], dtype=np.float64),
+                    strength=np.array([s.strength for s in self.strategies], dtype=np.float64),
+                    header=np.frombuffer(json.dumps(header, default=str).encode(), dtype=np.uint8)
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> 'StrategyTimeline':
+        with np.load(path, allow_pickle=False) as data:
+            header = json.loads(data['header'].tobytes())
+            if header.get('version') != STORE_FORMAT_VERSION:
+                raise ValueError(f"Unsupported strategy store version: {header.get('version')}")
+            period_starts = pd.to_datetime(data['period_start'].astype('datetime64[D]'))
+            strategies = [
+                TradingStrategy(
+                    direction=int(direction),
+                    confidence=float(confidence),
+                    strength=float(strength),
+                    explanation=record['explanation'],
+                    features_used=record['features_used'],
+                    timestamp=record['timestamp']
+                )
+                for direction, confidence, strength, record in zip(
+                    data['direction'], data['confidence'], data['strength'], header['records'])
+            ]
+        return cls(header['ticker'], period_starts, strategies, [r['extra'] for r in header['records']],
+                   header['valid_until'])
+
+
+class StrategyStore:
+    """Directory di timeline di strategie ({ticker}_strategies.npz), caricate una volta e tenute in memoria"""
+
+    def __init__(self, store_dir: str = "data/llm_strategies", data_dir: str = "data/processed",
+                 strategy_frequency: int = 20):
+        """
+        Initialize strategy store
+
+        Args:
+            store_dir: Directory delle strategie
+            data_dir: Dati di mercato (date dei periodi per convertire i vecchi .pkl)
+            strategy_frequency: Righe di dati per strategia nei vecchi .pkl
+        """
+        self.store_dir = Path(store_dir)
+        self.data_dir = data_dir
+        self.strategy_frequency = strategy_frequency
+
+        self._lock = threading.Lock()
+        self._timelines = {}
+
+        self.loads = 0
+        self.migrations = 0
+        self.lookups = 0
+
+    def path(self, ticker: str) -> Path:
+        return self.store_dir / f"{ticker}_strategies.npz"
+
+    def legacy_path(self, ticker: str) -> Path:
+        return self.store_dir / f"{ticker}_strategies.pkl"
+
+    def tickers(self) -> List[str]:
+        """Ticker con strategie (nuovo formato o .pkl da convertire)"""
+        names = {p.name.rsplit('_strategies', 1)[0]
+                 for pattern in ('*_strategies.npz', '*_strategies.pkl') for p in self.store_dir.glob(pattern)}
+        return sorted(names)
+
+    def load(self, ticker: str) -> StrategyTimeline:
+        """
+        Timeline di un ticker (dalla memoria se il file non è cambiato)
+
+        Un .pkl più recente del .npz (es. scritto da una versione precedente degli script)
+        viene riconvertito.
+
+        Raises:
+            FileNotFoundError: Nessuna strategia per il ticker
+        """
+        path, legacy = self.path(ticker), self.legacy_path(ticker)
+        mtime = path.stat().st_mtime if path.exists() else None
+        legacy_mtime = legacy.stat().st_mtime if legacy.exists() else None
+
+        with self._lock:
+            cached = self._timelines.get(ticker)
+            if cached is not None and cached[0] == (mtime, legacy_mtime):
+                return cached[1]
+
+            if mtime is not None and (legacy_mtime is None or legacy_mtime <= mtime):
+                timeline = StrategyTimeline.load(str(path))
+            elif legacy_mtime is not None:
+                timeline = self._migrate(ticker, legacy)
+                mtime = path.stat().st_mtime
+            else:
+                raise FileNotFoundError(f"No strategies for {ticker} in {self.store_dir}")
+
+            self.loads += 1
+            self._timelines[ticker] = ((mtime, legacy_mtime), timeline)
+            return timeline
+
+    def _migrate(self, ticker: str, legacy: Path) -> StrategyTimeline:
+        """Converte una lista posizionale .pkl usando le date dei dati di mercato"""
+        from src.utils.data_utils import load_market_data
+
+        with open(legacy, 'rb') as f:
+            strategies = pickle.load(f)
+        dates = load_market_data(ticker, self.data_dir).index
+        timeline = self.from_strategies(ticker, strategies, dates, self.strategy_frequency)
+        timeline.save(str(self.path(ticker)))
+        self.migrations += 1
+        print(f"🗂️ Strategie {ticker}: convertite {len(strategies)} strategie da {legacy.name} a {self.path(ticker).name}")
+        return timeline
+
+    @staticmethod
+    def from_strategies(ticker: str, strategies: List[TradingStrategy], dates,
+                        strategy_frequency: int = 20) -> StrategyTimeline:
+        """
+        Timeline da una lista posizionale (strategia i sulle righe [i*freq, (i+1)*freq) di dates)
+
+        Args:
+            ticker: Ticker symbol
+            strategies: Lista di TradingStrategy (come precompute_llm_strategies)
+            dates: Indice dei dati di mercato da cui sono state generate
+            strategy_frequency: Righe per strategia
+        """
+        dates = pd.DatetimeIndex(dates)
+        period_starts = dates[::strategy_frequency]
+        if len(period_starts) < len(strategies):
+            raise ValueError(f"{len(strategies)} strategies but market data covers only "
+                             f"{len(period_starts)} periods for {ticker}")
+        # Le righe dopo l'ultimo periodo non hanno strategia (come step // freq oltre la lista)
+        end_row = len(strategies) * strategy_frequency
+        valid_until = dates[end_row] if end_row < len(dates) else None
+        return StrategyTimeline(ticker, period_starts[:len(strategies)], strategies, valid_until=valid_until)
+
+    def put(self, ticker: str, strategies: List[TradingStrategy], dates,
+            strategy_frequency: Optional[int] = None) -> StrategyTimeline:
+        """Salva una lista posizionale come timeline del ticker (sostituisce quella esistente)"""
+        timeline = self.from_strategies(ticker, strategies, dates, strategy_frequency or self.strategy_frequency)
+        self.save(timeline)
+        return timeline
+
+    def save(self, timeline: StrategyTimeline):
+        path = self.path(timeline.ticker)
+        timeline.save(str(path))
+        legacy = self.legacy_path(timeline.ticker)
+        with self._lock:
+            self._timelines[timeline.ticker] = (
+                (path.stat().st_mtime, legacy.stat().st_mtime if legacy.exists() else None), timeline)
+
+    def record(self, ticker: str, period_start, strategy: TradingStrategy, extra: Optional[Dict] = None):
+        """Aggiunge la strategia di un nuovo periodo (es. generata live) e salva"""
+        try:
+            timeline = self.load(ticker)
+        except FileNotFoundError:
+            timeline = StrategyTimeline(ticker, [], [])
+        timeline.append(period_start, strategy, extra)
+        self.save(timeline)
+        return timeline
+
+    def get(self, ticker: str, timestamp) -> Optional[TradingStrategy]:
+        """Strategia attiva per ticker a timestamp (None se assente o prima del primo periodo)"""
+        self.lookups += 1
+        try:
+            return self.load(ticker).get(timestamp)
+        except FileNotFoundError:
+            return None
+
+    def lookup(self, ticker: str, timestamp) -> Optional[Dict]:
+        """Come get, ma come dict serializzabile (period_start, tau, extra, ...)"""
+        self.lookups += 1
+        try:
+            return self.load(ticker).lookup(timestamp)
+        except FileNotFoundError:
+            return None
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'store_dir': str(self.store_dir),
+                'tickers_loaded': len(self._timelines),
+                'strategies_loaded': sum(len(t) for _, t in self._timelines.values()),
+                'loads': self.loads,
+                'migrations': self.migrations,
+                'lookups': self.lookups
+            }
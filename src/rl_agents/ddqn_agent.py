@@ -10,6 +10,8 @@ import numpy as np
 from collections import deque
 import random
 
+from src.telemetry.tracing import traced
+
 class DQN(nn.Module):
     """Deep Q-Network"""
 
@@ -39,6 +41,7 @@ class ReplayBuffer:
     def push(self, state, action, reward, next_state, done):
         self.buffer.append((state, action, reward, next_state, done))
 
+    @traced()
     def sample(self, batch_size):
         batch = random.sample(self.buffer, batch_size)
         states, actions, rewards, next_states, dones = zip(*batch)
@@ -89,6 +92,7 @@ class DDQNAgent:
         self.steps_done = 0
         self.episode_count = 0
 
+    @traced()
     def select_action(self, state, explore=True):
         """ε-greedy action selection"""
 
@@ -100,6 +104,28 @@ class DDQNAgent:
             q_values = self.policy_net(state_tensor)
             return q_values.argmax().item()
 
+    @traced()
+    def select_actions(self, states, explore=True):
+        """
+        ε-greedy su un batch di stati (una sola forward per tutte le env copies)
+
+        Args:
+            states: Array (n, state_dim)
+
+        Returns:
+            np.ndarray di n azioni
+        """
+        with torch.no_grad():
+            q_values = self.policy_net(torch.as_tensor(np.asarray(states, dtype=np.float32)))
+            actions = q_values.argmax(1).numpy()
+
+        if explore:
+            for i in range(len(actions)):
+                if random.random() < self.epsilon:
+                    actions[i] = random.randint(0, self.action_dim - 1)
+        return actions
+
+    @traced()
     def train_step(self):
         """Single training step usando experience replay"""
 
@@ -8,6 +8,9 @@ from gymnasium import spaces
 import numpy as np
 import pandas as pd
 
+from src.telemetry.tracing import traced
+from src.utils.strategy_signal import strategy_signal
+
 class TradingEnv(gym.Env):
     """
     Custom Trading Environment per DDQN
@@ -23,9 +26,12 @@ class TradingEnv(gym.Env):
         super(TradingEnv, self).__init__()
 
         self.df = df.reset_index(drop=True)
-        self.llm_strategies = llm_strategies  # Pre-computed LLM strategies
+        self.llm_strategies = llm_strategies  # Pre-computed LLM strategies (lista o StrategyTimeline)
         self.config = config
 
+        # Segnale LLM τ precalcolato per step
+        self.llm_signal = self._compute_llm_signal(df.index)
+
         # Parametri (OPTIMIZED - Phase 1)
         self.initial_balance = config.get('initial_balance', 10000)
         self.transaction_cost = config.get('transaction_cost', 0.0015)  # Optimized: 0.15% (was 0.1%)
@@ -53,6 +59,11 @@ class TradingEnv(gym.Env):
         # Tracking
         self.portfolio_history = []
 
+    def _compute_llm_signal(self, dates):
+        """τ = dir(πg) * str(πg) della strategia attiva a ogni step (regola di strategy_signal)"""
+        return strategy_signal(self.llm_strategies, dates)
+
+    @traced()
     def _get_observation(self, step):
         """Costruisce observation vector includendo LLM signal τ"""
 
@@ -70,16 +81,8 @@ class TradingEnv(gym.Env):
         rsi = row.get('RSI', 50)
         macd = row.get('MACD', 0)
 
-        # LLM signal τ = dir(πg) * str(πg)
-        # Ottieni strategia LLM corrente (mensile)
-        month_idx = step // 20  # Strategia mensile (20 trading days)
-        if month_idx < len(self.llm_strategies):
-            strategy = self.llm_strategies[month_idx]
-            direction = 2 * strategy.direction - 1  # {0,1} -> {-1,1}
-            strength = strategy.strength
-            tau = direction * strength
-        else:
-            tau = 0.0
+        # LLM signal τ = dir(πg) * str(πg) della strategia corrente (mensile)
+        tau = self.llm_signal[step]
 
         # Portfolio state
         portfolio_value = self._get_portfolio_value(step)
@@ -109,6 +112,7 @@ class TradingEnv(gym.Env):
         current_price = self.df.iloc[step].get('Close', 0)
         return self.balance + self.shares_held * current_price
 
+    @traced()
     def _calculate_reward(self, old_value, new_value):
         """
         Risk-adjusted reward con penalità per volatilità e drawdown
@@ -180,6 +184,7 @@ class TradingEnv(gym.Env):
 
         return self._get_observation(0)
 
+    @traced()
     def step(self, action):
         """
         Execute action (OPTIMIZED: Risk-adjusted reward - Phase 1)
@@ -0,0 +1,8 @@
+"""
+Serving Module
+Model registry and execution utilities for the backtesting API
+"""
+
+from .model_registry import ModelRegistry
+
+__all__ = ['ModelRegistry']
@@ -0,0 +1,321 @@
+"""
+Backtest Service
+Esecuzione di un backtest ensemble per l'API (lato worker)
+
+Ogni worker mantiene il proprio ModelRegistry e una piccola cache dei dati di
+mercato e delle strategie, inizializzati una volta da init_worker.
+"""
+
+import os
+import json
+import time
+import hashlib
+from pathlib import Path
+from functools import lru_cache
+
+import yaml
+
+import numpy as np
+import pandas as pd
+
+from src.utils.data_utils import load_market_data
+from src.llm_agents.strategy_store import StrategyStore
+from src.backtest_engine.fast_backtest import (
+    run_ensemble_backtest,
+    run_fixed_weight_backtest,
+    compute_market_inputs,
+    slice_market_inputs,
+    ensemble_policy,
+    ensemble_weights,
+    STRATEGY_PERIOD
+)
+from src.serving.model_registry import ModelRegistry
+from src.serving.job_store import write_progress
+
+# Campi della richiesta che determinano il risultato di un backtest
+REQUEST_KEY_FIELDS = ('ticker', 'start_date', 'end_date', 'initial_balance', 'transaction_cost')
+# Cambia quando cambia il calcolo: i risultati già in cache non vengono più trovati
+REQUEST_KEY_VERSION = 2
+
+# Configurazione di training (sezione trading_env) da cui prendere i default dell'ambiente
+TRAINING_CONFIG_PATH = Path(__file__).resolve().parents[2] / 'configs' / 'hybrid' / 'rewts_llm_rl.yaml'
+
+_worker_state = {}
+
+
+def init_worker(models_dir, data_dir='data/processed', strategies_dir='data/llm_strategies',
+                max_memory_mb=None, torch_threads=1):
+    """
+    Initializer dei worker del pool
+
+    Args:
+        models_dir: Directory dei modelli
+        data_dir: Directory dei dati processati ({ticker}_full_data.csv)
+        strategies_dir: Directory delle strategie LLM (StrategyStore: {ticker}_strategies.npz)
+        max_memory_mb: Budget del ModelRegistry del worker
+        torch_threads: Thread torch per worker (il parallelismo è fra richieste)
+    """
+    if _worker_state.get('models_dir') == models_dir:
+        return
+
+    import torch
+    torch.set_num_threads(torch_threads)
+
+    _worker_state.update({
+        'models_dir': models_dir,
+        'data_dir': data_dir,
+        'strategies_dir': strategies_dir,
+        'registry': ModelRegistry(models_dir=models_dir, max_memory_mb=max_memory_mb)
+    })
+
+
+@lru_cache(maxsize=16)
+def _load_ticker_data(ticker, data_dir, strategies_dir):
+    market_df = load_market_data(ticker, data_dir)
+    strategies = StrategyStore(strategies_dir, data_dir).load(ticker)
+    return market_df, strategies
+
+
+def make_request_key(params, model_digest):
+    """
+    Hash di una richiesta di backtest insieme alla versione del modello
+
+    Args:
+        params: Dict della richiesta (REQUEST_KEY_FIELDS)
+        model_digest: ModelRegistry.model_digest del ticker
+
+    Returns:
+        Hash SHA-256 come chiave
+    """
+    key_data = {field: params.get(field) for field in REQUEST_KEY_FIELDS}
+    key_data['ticker'] = str(key_data['ticker']).upper()
+    key_data['initial_balance'] = round(float(key_data['initial_balance']), 2)
+    key_data['transaction_cost'] = round(float(key_data['transaction_cost']), 8)
+    key_data['model_digest'] = model_digest
+    key_data['version'] = REQUEST_KEY_VERSION
+
+    key_str = json.dumps(key_data, sort_keys=True)
+    return hashlib.sha256(key_str.encode()).hexdigest()
+
+
+def date_range_indices(market_df, start_date, end_date):
+    """
+    Indici [start_idx, end_idx) delle righe di market_df nel range [start_date, end_date]
+
+    Il range parte esattamente dalla prima data richiesta: la strategia attiva
+    in ogni riga viene scelta per data (StrategyTimeline.tau_for_dates), non
+    per posizione, quindi non serve allineare l'inizio ai periodi delle strategie.
+    """
+    start_idx = int(market_df.index.searchsorted(pd.Timestamp(start_date), side='left'))
+    end_idx = int(market_df.index.searchsorted(pd.Timestamp(end_date), side='right'))
+
+    if end_idx - start_idx < 2:
+        raise ValueError(f"Not enough market data between {start_date} and {end_date}")
+
+    return start_idx, end_idx
+
+
+def strategy_timeline(strategies, market_df, strategy_frequency=STRATEGY_PERIOD, ticker=''):
+    """
+    Strategie come StrategyTimeline (una lista posizionale viene convertita sulle date di market_df)
+    """
+    if hasattr(strategies, 'tau_for_dates'):
+        return strategies
+    return StrategyStore.from_strategies(ticker, strategies, market_df.index, strategy_frequency)
+
+
+def slice_date_range(market_df, strategies, start_date, end_date, strategy_frequency=STRATEGY_PERIOD):
+    """
+    Righe di market_df nel range [start_date, end_date] e strategie allineate per data
+
+    Args:
+        market_df: Dati di mercato completi del ticker
+        strategies: StrategyTimeline, o lista posizionale allineata a market_df
+        start_date: Prima data (inclusa)
+        end_date: Ultima data (inclusa)
+        strategy_frequency: Righe per strategia (solo per una lista posizionale)
+
+    Returns:
+        Tuple (df, timeline)
+    """
+    start_idx, end_idx = date_range_indices(market_df, start_date, end_date)
+    timeline = strategy_timeline(strategies, market_df, strategy_frequency)
+    return market_df.iloc[start_idx:end_idx], timeline
+
+
+@lru_cache(maxsize=1)
+def _trading_env_defaults():
+    """Sezione trading_env della configurazione di training ({} se non disponibile)"""
+    try:
+        with open(TRAINING_CONFIG_PATH, 'r') as f:
+            return dict((yaml.safe_load(f) or {}).get('trading_env') or {})
+    except (OSError, yaml.YAMLError):
+        return {}
+
+
+def _env_config(params):
+    """Configurazione dell'ambiente: dalla richiesta, poi trading_env, poi default del motore"""
+    config = {
+        'initial_balance': params['initial_balance'],
+        'transaction_cost': params['transaction_cost']
+    }
+    max_position = params.get('max_position', _trading_env_defaults().get('max_position'))
+    if max_position is not None:
+        config['max_position'] = max_position
+    return config
+
+
+def compute_backtest_metrics(portfolio_values, num_trades):
+    """
+    Metriche della risposta API da una curva di portafoglio
+
+    Args:
+        portfolio_values: Valori di portafoglio (il primo è initial_balance)
+        num_trades: Numero di cambi di posizione
+
+    Returns:
+        Dict con sharpe_ratio, max_drawdown, cumulative_return, total_trades,
+        win_rate, profit_factor, final_balance
+    """
+    values = np.asarray(portfolio_values, dtype=np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(values) / values[:-1]
+    returns = returns[np.isfinite(returns)]
+
+    if len(returns) > 1 and returns.std() > 0:
+        sharpe_ratio = float(np.sqrt(252) * returns.mean() / returns.std())
+    else:
+        sharpe_ratio = 0.0
+
+    running_max = np.maximum.accumulate(values)
+    max_drawdown = float(np.max((running_max - values) / running_max)) if len(values) > 0 else 0.0
+
+    gains = returns[returns > 0].sum()
+    losses = -returns[returns < 0].sum()
+    active = returns[returns != 0]
+
+    return {
+        'sharpe_ratio': sharpe_ratio,
+        'max_drawdown': max_drawdown,
+        'cumulative_return': float(values[-1] / values[0] - 1),
+        'total_trades': int(num_trades),
+        'win_rate': float((active > 0).mean()) if len(active) > 0 else 0.0,
+        # Indefinito senza perdite: 0.0 (JSON non ammette inf)
+        'profit_factor': float(gains / losses) if losses > 0 else 0.0,
+        'final_balance': float(values[-1])
+    }
+
+
+def run_backtest_job(params, progress_path=None):
+    """
+    Esegue un backtest (funzione worker, deve essere picklable)
+
+    Args:
+        params: Dict con ticker, start_date, end_date, initial_balance, transaction_cost
+        progress_path: File opzionale in cui scrivere la frazione completata
+
+    Returns:
+        Dict con le metriche di compute_backtest_metrics, num_days, num_chunks
+        ed execution_time_seconds
+    """
+    start_time = time.time()
+
+    ticker = params['ticker']
+    registry = _worker_state['registry']
+    ensemble = registry.get(ticker)
+
+    market_df, strategies = _load_ticker_data(
+        ticker, _worker_state['data_dir'], _worker_state['strategies_dir']
+    )
+    strategy_frequency = params.get('strategy_frequency', STRATEGY_PERIOD)
+    test_df, test_strategies = slice_date_range(
+        market_df, strategies, params['start_date'], params['end_date'], strategy_frequency
+    )
+
+    env_config = _env_config(params)
+
+    # Pesi fissi (current_weights o uniform); accounting identico a TradingEnv.step
+    progress_callback = None
+    if progress_path is not None:
+        progress_callback = lambda step, total: write_progress(progress_path, step / total)
+
+    result = run_ensemble_backtest(ensemble, test_df, test_strategies, env_config,
+                                   progress_callback=progress_callback)
+
+    metrics = compute_backtest_metrics(result['portfolio_values'], result['num_trades'])
+    metrics.update({
+        'num_days': len(test_df),
+        'num_chunks': len(ensemble.chunk_models),
+        'execution_time_seconds': time.time() - start_time
+    })
+
+    return metrics
+
+
+def run_backtest_batch_job(ticker, specs):
+    """
+    Esegue più backtest dello stesso ticker condividendo modello, dati e forward batch
+
+    Il contributo delle feature di mercato al primo layer viene calcolato una sola
+    volta sull'unione dei range; ogni spec ne usa una slice e simula solo la
+    parte dipendente dal portafoglio.
+
+    Args:
+        ticker: Ticker comune a tutte le spec
+        specs: Lista di tuple (index, params) con params come in run_backtest_job
+
+    Returns:
+        Lista di dict {'index', 'status': 'ok'|'error', 'result' | 'error'}
+    """
+    batch_start = time.time()
+
+    registry = _worker_state['registry']
+    ensemble = registry.get(ticker)
+    market_df, strategies = _load_ticker_data(
+        ticker, _worker_state['data_dir'], _worker_state['strategies_dir']
+    )
+
+    policy = ensemble_policy(ensemble)
+    weights = ensemble_weights(ensemble)
+
+    timeline = strategy_timeline(strategies, market_df, ticker=ticker)
+
+    outputs = []
+    ranges = []
+    for index, params in specs:
+        try:
+            start_idx, end_idx = date_range_indices(market_df, params['start_date'], params['end_date'])
+        except ValueError as e:
+            outputs.append({'index': index, 'status': 'error', 'error': str(e)})
+            continue
+        ranges.append((index, params, start_idx, end_idx))
+
+    if not ranges:
+        return outputs
+
+    # Unione dei range: le strategie sono scelte per data, quindi ogni riga ha
+    # gli stessi input di mercato in qualunque slice che la contenga
+    union_start = min(r[2] for r in ranges)
+    union_end = max(r[3] for r in ranges)
+    shared_inputs = compute_market_inputs(policy, market_df.iloc[union_start:union_end], timeline)
+    shared_seconds = (time.time() - batch_start) / len(ranges)
+
+    for index, params, start_idx, end_idx in ranges:
+        spec_start = time.time()
+
+        market_inputs = slice_market_inputs(shared_inputs, start_idx - union_start, end_idx - union_start)
+        result = run_fixed_weight_backtest(
+            policy, weights, market_df.iloc[start_idx:end_idx], timeline, _env_config(params),
+            market_inputs=market_inputs
+        )
+
+        metrics = compute_backtest_metrics(result['portfolio_values'], result['num_trades'])
+        metrics.update({
+            'num_days': end_idx - start_idx,
+            'num_chunks': len(ensemble.chunk_models),
+            'execution_time_seconds': shared_seconds + time.time() - spec_start
+        })
+        outputs.append({'index': index, 'status': 'ok', 'result': metrics})
+
+    return outputs
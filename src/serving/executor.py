@@ -0,0 +1,145 @@
+"""
+Backtest Executor
+Pool limitato di worker per i backtest dell'API, fuori dall'event loop
+
+I backtest sono CPU-bound: eseguiti direttamente in un endpoint async bloccano
+l'event loop di uvicorn per tutti i client. BacktestExecutor li esegue in un
+process pool (o thread pool) e applica admission control: oltre
+max_workers + max_queue richieste in corso, submit solleva ExecutorSaturatedError
+(l'API risponde 429).
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from src.serving.backtest_service import init_worker
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturatedError(Exception):
+    """Coda del pool piena: la richiesta va rifiutata"""
+
+
+class BacktestExecutor:
+    """Pool limitato con admission control per job CPU-bound"""
+
+    def __init__(self, models_dir: str, data_dir: str = "data/processed",
+                 strategies_dir: str = "data/llm_strategies", max_workers: int = 2,
+                 max_queue: int = 8, executor_type: str = "process", worker_memory_mb: float = 1024):
+        """
+        Initialize backtest executor
+
+        Args:
+            models_dir: Directory dei modelli (ogni worker ha il suo ModelRegistry)
+            data_dir: Directory dei dati processati
+            strategies_dir: Directory delle strategie LLM
+            max_workers: Job eseguiti in parallelo
+            max_queue: Job in attesa oltre a quelli in esecuzione
+            executor_type: 'process' (scala con i core) o 'thread'
+            worker_memory_mb: Budget del ModelRegistry di ogni worker
+        """
+        if executor_type not in ('process', 'thread'):
+            raise ValueError(f"Unknown executor type: {executor_type}")
+
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor_type = executor_type
+
+        pool_cls = ProcessPoolExecutor if executor_type == 'process' else ThreadPoolExecutor
+        self._pool = pool_cls(
+            max_workers=max_workers,
+            initializer=init_worker,
+            initargs=(models_dir, data_dir, strategies_dir, worker_memory_mb)
+        )
+
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_exec_time = 0.0
+
+    @property
+    def capacity(self):
+        return self.max_workers + self.max_queue
+
+    def _admit(self):
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise ExecutorSaturatedError(
+                    f"Backtest queue full ({self.in_flight}/{self.capacity} in flight)"
+                )
+            self.in_flight += 1
+            self.submitted += 1
+
+    def _release(self, elapsed, ok):
+        with self._lock:
+            self.in_flight -= 1
+            self.total_exec_time += elapsed
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def submit(self, fn, *args):
+        """
+        Sottomette un job al pool
+
+        Returns:
+            concurrent.futures.Future
+
+        Raises:
+            ExecutorSaturatedError: se la coda è piena
+        """
+        self._admit()
+        start = time.perf_counter()
+
+        try:
+            future = self._pool.submit(fn, *args)
+        except Exception:
+            self._release(0.0, ok=False)
+            raise
+
+        future.add_done_callback(
+            lambda f: self._release(time.perf_counter() - start, ok=f.exception() is None)
+        )
+        return future
+
+    async def run(self, fn, *args):
+        """Esegue un job nel pool e ne attende il risultato senza bloccare l'event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    async def run_when_available(self, fn, *args, retry_interval=0.5):
+        """Come run, ma attende che si liberi posto invece di sollevare ExecutorSaturatedError"""
+        while True:
+            try:
+                future = self.submit(fn, *args)
+            except ExecutorSaturatedError:
+                await asyncio.sleep(retry_interval)
+                continue
+            return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def get_stats(self):
+        """Ritorna statistiche su coda ed esecuzione"""
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                'executor_type': self.executor_type,
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'in_flight': self.in_flight,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'avg_latency_seconds': self.total_exec_time / finished if finished > 0 else 0.0
+            }
@@ -0,0 +1,164 @@
+"""
+Backtest Job Manager
+Job di backtest asincroni: submit -> job id, esecuzione da coda locale, polling
+
+I job vengono accodati in memoria e persistiti nel JobStore; un dispatcher per
+worker del BacktestExecutor li esegue in ordine. Richieste identiche (stessi
+parametri e stessa versione del modello) riusano il job esistente.
+"""
+
+import uuid
+import asyncio
+import logging
+from collections import deque
+
+from src.serving.executor import ExecutorSaturatedError
+from src.serving.backtest_service import run_backtest_job, make_request_key
+
+logger = logging.getLogger(__name__)
+
+
+class BacktestJobManager:
+    """Coda di job di backtest sopra BacktestExecutor e JobStore"""
+
+    def __init__(self, executor, store, registry, max_pending: int = 256, result_cache=None):
+        """
+        Initialize job manager
+
+        Args:
+            executor: BacktestExecutor che esegue i job
+            store: JobStore per stato e risultati
+            registry: ModelRegistry (digest della versione del modello)
+            max_pending: Job in coda oltre i quali submit solleva ExecutorSaturatedError
+            result_cache: BacktestResultCache opzionale dove pubblicare i risultati completati
+        """
+        self.executor = executor
+        self.store = store
+        self.registry = registry
+        self.max_pending = max_pending
+        self.result_cache = result_cache
+
+        self._queue = None
+        self._pending = deque()         # job id in coda, nello stesso ordine di _queue
+        self._dispatchers = []
+        self.deduplicated = 0
+
+    async def start(self):
+        """Avvia i dispatcher e riaccoda i job rimasti in sospeso"""
+        self._queue = asyncio.Queue()
+        self._pending.clear()
+
+        for job in self.store.unfinished_jobs():
+            self._enqueue(job['job_id'])
+        if self._pending:
+            logger.info(f"Re-queued {len(self._pending)} unfinished backtest jobs")
+
+        self._dispatchers = [
+            asyncio.create_task(self._dispatch_loop()) for _ in range(self.executor.max_workers)
+        ]
+
+    async def stop(self):
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+
+    async def submit(self, params):
+        """
+        Crea (o riusa) un job per una richiesta di backtest
+
+        Returns:
+            Tuple (job dict, deduplicated)
+
+        Raises:
+            FileNotFoundError: se il modello del ticker non esiste
+            ExecutorSaturatedError: se la coda dei job è piena
+        """
+        # Il digest può richiedere l'hash dell'intero file del modello
+        model_digest = await asyncio.to_thread(self.registry.model_digest, params['ticker'])
+        if model_digest is None:
+            raise FileNotFoundError(f"Model not found for {params['ticker']}")
+
+        request_key = make_request_key(params, model_digest)
+
+        existing = self.store.find_reusable(request_key)
+        if existing is not None:
+            self.deduplicated += 1
+            return existing, True
+
+        if len(self._pending) >= self.max_pending:
+            raise ExecutorSaturatedError(f"Backtest job queue full ({self.max_pending} pending)")
+
+        job_id = uuid.uuid4().hex
+        self.store.create(job_id, request_key, params, model_digest)
+        self._enqueue(job_id)
+
+        return self.store.get(job_id), False
+
+    def _enqueue(self, job_id):
+        self._pending.append(job_id)
+        self._queue.put_nowait(job_id)
+
+    def get(self, job_id):
+        """Job con progress aggiornato (None se non esiste)"""
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+
+        if job['status'] == 'completed':
+            job['progress'] = 1.0
+        elif job['status'] == 'running':
+            job['progress'] = self.store.read_progress(job_id) or 0.0
+        else:
+            job['progress'] = 0.0
+
+        job['queue_position'] = None
+        if job['status'] == 'queued':
+            try:
+                job['queue_position'] = self._pending.index(job_id)
+            except ValueError:
+                pass
+
+        return job
+
+    async def _dispatch_loop(self):
+        while True:
+            job_id = await self._queue.get()
+            # La coda è FIFO: il job estratto è il primo dei pendenti
+            self._pending.remove(job_id)
+            try:
+                await self._run_job(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job_id):
+        job = self.store.get(job_id)
+        if job is None or job['status'] == 'completed':
+            return
+
+        self.store.mark_running(job_id)
+        progress_path = self.store.progress_path(job_id)
+
+        try:
+            # Se il pool è occupato da richieste sincrone il job attende il suo turno
+            result = await self.executor.run_when_available(run_backtest_job, job['params'], progress_path)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Backtest job {job_id} failed: {e}")
+            self.store.mark_failed(job_id, e)
+            return
+
+        self.store.mark_completed(job_id, result)
+        if self.result_cache is not None:
+            await self.result_cache.put_async(job['request_key'], result, ticker=job['params']['ticker'],
+                                              model_digest=job['model_digest'])
+        logger.info(f"Backtest job {job_id} completed in {result['execution_time_seconds']:.2f}s")
+
+    def get_stats(self):
+        return {
+            'pending': len(self._pending),
+            'max_pending': self.max_pending,
+            'deduplicated': self.deduplicated,
+            'jobs': self.store.get_stats()
+        }
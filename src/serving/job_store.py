@@ -0,0 +1,150 @@
+"""
+Job Store
+Stato e risultati dei job di backtest asincroni in una tabella SQLite locale
+
+I risultati completati sopravvivono al riavvio del server e servono da
+deduplicazione: richieste identiche (stessa request_key) riusano il job esistente.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+JOB_STATUSES = ('queued', 'running', 'completed', 'failed')
+
+
+class JobStore:
+    """Tabella SQLite con un record per job"""
+
+    def __init__(self, db_path: str = "results/api/backtest_jobs.db"):
+        """
+        Initialize job store
+
+        Args:
+            db_path: Path del database SQLite
+        """
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.db_path = db_path
+        self.progress_dir = os.path.join(os.path.dirname(db_path) or '.', 'progress')
+        os.makedirs(self.progress_dir, exist_ok=True)
+
+        # Un'unica connessione condivisa fra i thread dell'event loop, serializzata dal lock
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+
+        with self.lock:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    request_key TEXT,
+                    status TEXT,
+                    params TEXT,
+                    model_digest TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT,
+                    started_at TEXT,
+                    finished_at TEXT
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_request_key ON jobs (request_key)")
+            self.conn.commit()
+
+    def _row_to_job(self, row):
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params']) if job['params'] else None
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def create(self, job_id, request_key, params, model_digest):
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO jobs (job_id, request_key, status, params, model_digest, created_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job_id, request_key, json.dumps(params, sort_keys=True), model_digest, datetime.now().isoformat())
+            )
+            self.conn.commit()
+
+    def get(self, job_id):
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row)
+
+    def find_reusable(self, request_key):
+        """Job completato o ancora in corso per la stessa richiesta (i falliti non si riusano)"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT * FROM jobs WHERE request_key = ? AND status != 'failed' "
+                "ORDER BY (status = 'completed') DESC, created_at DESC LIMIT 1",
+                (request_key,)
+            ).fetchone()
+        return self._row_to_job(row)
+
+    def mark_running(self, job_id):
+        self._update(job_id, status='running', started_at=datetime.now().isoformat())
+
+    def mark_completed(self, job_id, result):
+        self._update(job_id, status='completed', result=json.dumps(result),
+                     finished_at=datetime.now().isoformat())
+        self.clear_progress(job_id)
+
+    def mark_failed(self, job_id, error):
+        self._update(job_id, status='failed', error=str(error), finished_at=datetime.now().isoformat())
+        self.clear_progress(job_id)
+
+    def _update(self, job_id, **fields):
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self.lock:
+            self.conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+            self.conn.commit()
+
+    def unfinished_jobs(self):
+        """Job rimasti queued/running (es. dopo un riavvio), in ordine di creazione"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT * FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    # ----- Progress (scritto dai worker, anche in altri processi) -----
+
+    def progress_path(self, job_id):
+        return os.path.join(self.progress_dir, f"{job_id}.progress")
+
+    def read_progress(self, job_id):
+        """Frazione completata [0, 1] scritta dal worker, o None"""
+        try:
+            with open(self.progress_path(job_id)) as f:
+                return float(f.read().strip() or 0.0)
+        except (OSError, ValueError):
+            return None
+
+    def clear_progress(self, job_id):
+        try:
+            os.remove(self.progress_path(job_id))
+        except OSError:
+            pass
+
+    def get_stats(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({row[0]: row[1] for row in rows})
+        return counts
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def write_progress(path, fraction):
+    """Scrive atomicamente la frazione completata (chiamata dal worker)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(f"{fraction:.4f}")
+    os.replace(tmp_path, path)
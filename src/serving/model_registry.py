@@ -0,0 +1,245 @@
+"""
+Model Registry
+Caricamento lazy degli ensemble per ticker con cache LRU limitata in memoria
+
+Ogni ensemble viene caricato al primo utilizzo (bundle inference-only se presente,
+altrimenti pickle ridotto alla sola policy), condiviso fra le richieste e rimosso
+in ordine LRU quando la memoria stimata supera il budget.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, deque
+
+from src.hybrid_model.ensemble_io import load_ensemble, resolve_model_path, MANIFEST_FILE
+
+logger = logging.getLogger(__name__)
+
+
+def ensemble_nbytes(ensemble):
+    """Memoria stimata dei parametri di un ensemble (bytes)"""
+    policy = getattr(ensemble, 'stacked_policy', None)
+    if policy is not None:
+        return policy.nbytes
+
+    total = 0
+    for model in ensemble.chunk_models:
+        for net_name in ('policy_net', 'target_net'):
+            net = getattr(model, net_name, None)
+            if net is not None:
+                total += sum(p.numel() * p.element_size() for p in net.parameters())
+    return total
+
+
+class ModelRegistry:
+    """Cache LRU thread-safe di ReWTSEnsembleController per ticker"""
+
+    def __init__(self, models_dir: str = "models", max_memory_mb: float = 2048, inference_only: bool = True):
+        """
+        Initialize model registry
+
+        Args:
+            models_dir: Directory dei modelli ({ticker}_rewts_inference/ o {ticker}_rewts_ensemble.pkl)
+            max_memory_mb: Budget di memoria per gli ensemble residenti (None = illimitato)
+            inference_only: Scarta lo stato di training dei pickle al caricamento
+        """
+        self.models_dir = models_dir
+        self.max_memory_bytes = None if max_memory_mb is None else int(max_memory_mb * 1024 * 1024)
+        self.inference_only = inference_only
+
+        self._entries = OrderedDict()   # ticker -> {'ensemble', 'nbytes', 'path', 'version', 'loaded_at'}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._digests = {}              # path -> (mtime_ns, size, digest)
+
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+        self.load_errors = 0
+        self.load_latencies = deque(maxlen=1000)
+
+    def model_path(self, ticker: str) -> str:
+        return resolve_model_path(ticker, self.models_dir)
+
+    def has_model(self, ticker: str) -> bool:
+        return os.path.exists(self.model_path(ticker))
+
+    def _model_version(self, path):
+        """(mtime_ns, size) del file che identifica la versione del modello"""
+        target = os.path.join(path, MANIFEST_FILE) if os.path.isdir(path) else path
+        try:
+            stat = os.stat(target)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _lookup(self, ticker):
+        """Entry residente ancora aggiornata rispetto al disco (lock già acquisito)"""
+        entry = self._entries.get(ticker)
+        if entry is None:
+            return None
+        if self._model_version(entry['path']) != entry['version']:
+            # Modello aggiornato su disco: verrà ricaricato
+            del self._entries[ticker]
+            return None
+        self._entries.move_to_end(ticker)
+        return entry
+
+    def model_digest(self, ticker: str):
+        """
+        Digest della versione del modello su disco (None se il modello non esiste)
+
+        Per i bundle è l'hash del manifest (che contiene lo SHA-256 dei pesi),
+        per i pickle l'hash del file. Ricalcolato solo se mtime o dimensione cambiano.
+        """
+        path = self.model_path(ticker)
+        target = os.path.join(path, MANIFEST_FILE) if os.path.isdir(path) else path
+        if not os.path.exists(target):
+            return None
+
+        stat = os.stat(target)
+        with self._lock:
+            cached = self._digests.get(target)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(target, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        value = digest.hexdigest()
+
+        with self._lock:
+            self._digests[target] = (stat.st_mtime_ns, stat.st_size, value)
+        return value
+
+    def available_tickers(self):
+        """Ticker con un modello su disco"""
+        if not os.path.isdir(self.models_dir):
+            return []
+
+        tickers = set()
+        for name in os.listdir(self.models_dir):
+            for suffix in ('_rewts_inference', '_rewts_ensemble.pkl'):
+                if name.endswith(suffix):
+                    tickers.add(name[:-len(suffix)])
+        return sorted(tickers)
+
+    def get(self, ticker: str):
+        """
+        Ritorna l'ensemble di un ticker, caricandolo se non è residente
+
+        Raises:
+            FileNotFoundError: se il modello del ticker non esiste
+        """
+        with self._lock:
+            entry = self._lookup(ticker)
+            if entry is not None:
+                self.hits += 1
+                return entry['ensemble']
+            load_lock = self._load_locks.setdefault(ticker, threading.Lock())
+
+        # Un solo caricamento per ticker anche con richieste concorrenti
+        with load_lock:
+            with self._lock:
+                entry = self._lookup(ticker)
+                if entry is not None:
+                    self.hits += 1
+                    return entry['ensemble']
+                self.misses += 1
+
+            path = self.model_path(ticker)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Model not found for {ticker}: {path}")
+            version = self._model_version(path)
+
+            start = time.perf_counter()
+            try:
+                ensemble = load_ensemble(path, inference_only=self.inference_only)
+            except Exception:
+                with self._lock:
+                    self.load_errors += 1
+                raise
+            latency = time.perf_counter() - start
+
+            nbytes = ensemble_nbytes(ensemble)
+
+            with self._lock:
+                self.loads += 1
+                self.load_latencies.append(latency)
+                self._entries[ticker] = {
+                    'ensemble': ensemble,
+                    'nbytes': nbytes,
+                    'path': path,
+                    'version': version,
+                    'loaded_at': time.time()
+                }
+                self._evict_if_needed(keep=ticker)
+
+            logger.info(f"Loaded {ticker} model from {path} in {latency * 1000:.1f} ms ({nbytes / 1e6:.1f} MB)")
+            return ensemble
+
+    def _evict_if_needed(self, keep=None):
+        """Rimuove gli ensemble meno usati finché la memoria rientra nel budget (lock già acquisito)"""
+        if self.max_memory_bytes is None:
+            return
+
+        while self._resident_bytes() > self.max_memory_bytes:
+            victim = next((t for t in self._entries if t != keep), None)
+            if victim is None:
+                logger.warning(f"Model {keep} alone exceeds the registry memory budget")
+                return
+            del self._entries[victim]
+            self.evictions += 1
+            logger.info(f"Evicted {victim} model from registry")
+
+    def _resident_bytes(self):
+        return sum(entry['nbytes'] for entry in self._entries.values())
+
+    def evict(self, ticker: str) -> bool:
+        """Rimuove un ticker dalla cache (es. dopo l'aggiornamento del modello)"""
+        with self._lock:
+            return self._entries.pop(ticker, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def resident_tickers(self):
+        with self._lock:
+            return list(self._entries.keys())
+
+    def resident_info(self):
+        """Dettagli degli ensemble residenti, dal meno al più recentemente usato"""
+        with self._lock:
+            return [{
+                'ticker': ticker,
+                'num_chunks': len(entry['ensemble'].chunk_models),
+                'size_mb': entry['nbytes'] / (1024 * 1024),
+                'path': entry['path'],
+                'loaded_at': entry['loaded_at']
+            } for ticker, entry in self._entries.items()]
+
+    def get_stats(self):
+        """Ritorna statistiche su residenza e latenza di caricamento"""
+        with self._lock:
+            latencies = sorted(self.load_latencies)
+            requests = self.hits + self.misses
+            return {
+                'resident_models': len(self._entries),
+                'resident_tickers': list(self._entries.keys()),
+                'resident_mb': self._resident_bytes() / (1024 * 1024),
+                'max_memory_mb': None if self.max_memory_bytes is None else self.max_memory_bytes / (1024 * 1024),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / requests if requests > 0 else 0.0,
+                'loads': self.loads,
+                'load_errors': self.load_errors,
+                'evictions': self.evictions,
+                'load_latency_ms_avg': 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+                'load_latency_ms_max': 1000 * latencies[-1] if latencies else 0.0
+            }
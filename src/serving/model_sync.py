@@ -0,0 +1,255 @@
+"""
+Model Sync
+Sincronizzazione incrementale dei modelli da object storage alla directory locale
+
+Solo i file mancanti o con checksum diverso vengono scaricati, in parallelo;
+ogni download è scritto su un file temporaneo, verificato e poi rinominato.
+I file già aggiornati mantengono il proprio mtime, quindi digest dei modelli
+(ModelRegistry.model_digest) e risultati in cache restano validi fra i riavvii.
+
+Backend disponibili:
+- GCSBackend: bucket Google Cloud Storage (google-cloud-storage importato solo qui)
+- LocalDirectoryBackend: una directory locale (test offline, volumi montati)
+"""
+
+import os
+import json
+import time
+import base64
+import shutil
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+MODEL_EXTENSIONS = ('.pt', '.pkl', '.safetensors', '.json')
+# Cache locale dei checksum (path relativo -> size, mtime_ns, md5)
+CHECKSUM_CACHE_FILE = '.model_sync.json'
+
+_HASH_CHUNK = 1024 * 1024
+
+
+@dataclass
+class RemoteObject:
+    """Oggetto remoto con i checksum esposti dal backend (hex, None se assente)"""
+    name: str
+    size: int
+    md5: Optional[str] = None
+    crc32c: Optional[str] = None
+
+
+def file_md5(path):
+    md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_CHUNK), b''):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def file_crc32c(path):
+    """CRC32C (hex) del file, o None se google-crc32c non è installato"""
+    try:
+        import google_crc32c
+    except ImportError:
+        return None
+
+    checksum = google_crc32c.Checksum()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_CHUNK), b''):
+            checksum.update(block)
+    return checksum.digest().hex()
+
+
+def _b64_to_hex(value):
+    return base64.b64decode(value).hex() if value else None
+
+
+class LocalDirectoryBackend:
+    """Object storage simulato da una directory (chiavi = path relativi con '/')"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def list_objects(self, prefix=''):
+        objects = []
+        base = os.path.join(self.root, prefix)
+        for dirpath, _, filenames in os.walk(base):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                objects.append(RemoteObject(name=name, size=os.path.getsize(path), md5=file_md5(path)))
+        return sorted(objects, key=lambda o: o.name)
+
+    def download(self, name, dest_path):
+        shutil.copyfile(os.path.join(self.root, name), dest_path)
+
+
+class GCSBackend:
+    """Bucket Google Cloud Storage"""
+
+    def __init__(self, bucket_name: str, client=None):
+        if client is None:
+            from google.cloud import storage
+            client = storage.Client()
+        self.bucket = client.bucket(bucket_name)
+
+    def list_objects(self, prefix=''):
+        # md5_hash manca per gli oggetti composti: resta il crc32c
+        return [
+            RemoteObject(name=blob.name, size=blob.size or 0,
+                         md5=_b64_to_hex(blob.md5_hash), crc32c=_b64_to_hex(blob.crc32c))
+            for blob in self.bucket.list_blobs(prefix=prefix)
+        ]
+
+    def download(self, name, dest_path):
+        self.bucket.blob(name).download_to_filename(dest_path)
+
+
+class ModelSync:
+    """Sync incrementale e parallelo prefix remoto -> directory locale"""
+
+    def __init__(self, backend, local_dir: str, prefix: str = 'models/',
+                 extensions=MODEL_EXTENSIONS, max_workers: int = 8):
+        """
+        Initialize model sync
+
+        Args:
+            backend: GCSBackend o LocalDirectoryBackend
+            local_dir: Directory locale dei modelli
+            prefix: Prefisso remoto (rimosso dai path locali)
+            extensions: Estensioni dei file da sincronizzare
+            max_workers: Download concorrenti
+        """
+        self.backend = backend
+        self.local_dir = local_dir
+        self.prefix = prefix
+        self.extensions = tuple(extensions)
+        self.max_workers = max_workers
+
+        self._cache_path = os.path.join(local_dir, CHECKSUM_CACHE_FILE)
+        self._cache_lock = threading.Lock()
+        self._checksums = {}
+
+    def _load_checksum_cache(self):
+        try:
+            with open(self._cache_path) as f:
+                self._checksums = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self._checksums = {}
+
+    def _save_checksum_cache(self):
+        tmp_path = f"{self._cache_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._checksums, f)
+        os.replace(tmp_path, self._cache_path)
+
+    def _local_md5(self, rel_path, path):
+        """md5 del file locale, ricalcolato solo se size o mtime sono cambiati"""
+        stat = os.stat(path)
+        with self._cache_lock:
+            cached = self._checksums.get(rel_path)
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['md5']
+
+        md5 = file_md5(path)
+        with self._cache_lock:
+            self._checksums[rel_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'md5': md5}
+        return md5
+
+    def _local_path(self, obj):
+        return os.path.join(self.local_dir, *obj.name[len(self.prefix):].split('/'))
+
+    def _is_current(self, obj, rel_path, path):
+        """True se il file locale coincide con l'oggetto remoto"""
+        if not os.path.exists(path) or os.path.getsize(path) != obj.size:
+            return False
+        if obj.md5 is not None:
+            return self._local_md5(rel_path, path) == obj.md5
+        if obj.crc32c is not None:
+            return file_crc32c(path) == obj.crc32c
+        # Nessun checksum remoto: basta la dimensione
+        return True
+
+    def _verify(self, obj, path):
+        if obj.md5 is not None and file_md5(path) != obj.md5:
+            raise IOError(f"md5 mismatch for {obj.name}")
+        if obj.md5 is None and obj.crc32c is not None:
+            crc32c = file_crc32c(path)
+            if crc32c is not None and crc32c != obj.crc32c:
+                raise IOError(f"crc32c mismatch for {obj.name}")
+
+    def _download(self, obj, rel_path, path):
+        """Scarica su file temporaneo, verifica e rinomina atomicamente"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            self.backend.download(obj.name, tmp_path)
+            self._verify(obj, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        if obj.md5 is not None:
+            stat = os.stat(path)
+            with self._cache_lock:
+                self._checksums[rel_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'md5': obj.md5}
+        return obj.size
+
+    def sync(self):
+        """
+        Sincronizza i modelli
+
+        Returns:
+            Dict con listed, skipped, downloaded, failed, bytes_downloaded e
+            timings (secondi per fase: list, verify, download, total)
+        """
+        sync_start = time.perf_counter()
+        os.makedirs(self.local_dir, exist_ok=True)
+        self._load_checksum_cache()
+
+        phase_start = time.perf_counter()
+        objects = [o for o in self.backend.list_objects(self.prefix) if o.name.endswith(self.extensions)]
+        list_seconds = time.perf_counter() - phase_start
+
+        # Verifica dei file locali (hash in parallelo: I/O e hashlib rilasciano il GIL)
+        phase_start = time.perf_counter()
+        targets = [(o, o.name[len(self.prefix):], self._local_path(o)) for o in objects]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            current = list(pool.map(lambda t: self._is_current(*t), targets))
+        to_download = [t for t, ok in zip(targets, current) if not ok]
+        verify_seconds = time.perf_counter() - phase_start
+
+        phase_start = time.perf_counter()
+        bytes_downloaded = 0
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self._download, *t): t[0].name for t in to_download}
+            for future in as_completed(futures):
+                try:
+                    bytes_downloaded += future.result()
+                    logger.info(f"Downloaded {futures[future]}")
+                except Exception as e:
+                    logger.error(f"Failed to download {futures[future]}: {e}")
+                    failed.append(futures[future])
+        download_seconds = time.perf_counter() - phase_start
+
+        self._save_checksum_cache()
+
+        return {
+            'listed': len(objects),
+            'skipped': len(objects) - len(to_download),
+            'downloaded': len(to_download) - len(failed),
+            'failed': failed,
+            'bytes_downloaded': bytes_downloaded,
+            'timings': {
+                'list': list_seconds,
+                'verify': verify_seconds,
+                'download': download_seconds,
+                'total': time.perf_counter() - sync_start
+            }
+        }
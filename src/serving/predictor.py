@@ -0,0 +1,215 @@
+"""
+Micro-Batch Predictor
+Azioni dell'ensemble per osservazioni live, con richieste concorrenti coalescate
+
+Le richieste per lo stesso ticker che arrivano entro max_wait_ms vengono
+concatenate e valutate con un solo forward della StackedPolicy (K modelli x
+N osservazioni), poi i risultati vengono ridistribuiti ai chiamanti. Il forward
+gira in un thread dedicato per non bloccare l'event loop.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.backtest_engine.fast_backtest import ensemble_policy, ensemble_weights
+
+logger = logging.getLogger(__name__)
+
+# Azioni di TradingEnv
+ACTION_NAMES = ('SHORT', 'HOLD', 'LONG')
+
+
+class MicroBatchPredictor:
+    """Coalescing per ticker delle richieste di predizione in micro-batch"""
+
+    def __init__(self, registry, max_batch_size: int = 512, max_wait_ms: float = 2.0,
+                 latency_window: int = 10000):
+        """
+        Initialize predictor
+
+        Args:
+            registry: ModelRegistry da cui ottenere gli ensemble
+            max_batch_size: Osservazioni oltre le quali il batch parte subito
+            max_wait_ms: Finestra di attesa per coalescare le richieste
+            latency_window: Latenze recenti usate per p50/p99
+        """
+        self.registry = registry
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._pending = {}          # ticker -> lista di (observations, future)
+        self._pending_rows = {}     # ticker -> osservazioni in attesa
+        self._timers = {}           # ticker -> flush programmato
+        self._tasks = set()
+        # Un solo thread: i forward sono già vettorizzati sul batch
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='predictor')
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)
+        self.requests = 0
+        self.observations = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_batch_rows = 0
+
+    async def predict(self, ticker, observations):
+        """
+        Azioni e Q-values pesati dell'ensemble per una o più osservazioni
+
+        Args:
+            ticker: Ticker del modello
+            observations: Array (state_dim,) oppure (N, state_dim)
+
+        Returns:
+            Dict con actions (N,), q_values (N, action_dim), num_chunks e batch_size
+            (osservazioni valutate insieme nel micro-batch)
+
+        Raises:
+            FileNotFoundError: se il modello del ticker non esiste
+            ValueError: se le osservazioni non hanno la dimensione del modello
+        """
+        start = time.perf_counter()
+
+        observations = np.asarray(observations, dtype=np.float32)
+        if observations.ndim == 1:
+            observations = observations[np.newaxis, :]
+        if observations.ndim != 2 or len(observations) == 0:
+            raise ValueError("Observations must be a non-empty (N, state_dim) array")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        self._pending.setdefault(ticker, []).append((observations, future))
+        self._pending_rows[ticker] = self._pending_rows.get(ticker, 0) + len(observations)
+
+        if self._pending_rows[ticker] >= self.max_batch_size:
+            self._flush(ticker)
+        elif ticker not in self._timers:
+            self._timers[ticker] = loop.call_later(self.max_wait, self._flush, ticker)
+
+        try:
+            result = await future
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+
+        with self._lock:
+            self._latencies.append(time.perf_counter() - start)
+            self.requests += 1
+            self.observations += len(observations)
+        return result
+
+    def _flush(self, ticker):
+        """Chiude il micro-batch del ticker e lo avvia"""
+        timer = self._timers.pop(ticker, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch = self._pending.pop(ticker, [])
+        self._pending_rows.pop(ticker, None)
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run_batch(ticker, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, ticker, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            outputs = await loop.run_in_executor(
+                self._pool, self._evaluate, ticker, [obs for obs, _ in batch]
+            )
+        except Exception as e:
+            outputs = [e] * len(batch)
+
+        for (_, future), output in zip(batch, outputs):
+            if future.done():
+                continue
+            if isinstance(output, Exception):
+                future.set_exception(output)
+            else:
+                future.set_result(output)
+
+    def _evaluate(self, ticker, requests):
+        """
+        Forward unico per tutte le richieste valide del batch (nel thread del pool)
+
+        Returns:
+            Lista allineata a requests di dict risultato o eccezioni
+        """
+        ensemble = self.registry.get(ticker)
+        policy = ensemble_policy(ensemble)
+        weights = ensemble_weights(ensemble)
+        num_chunks = len(ensemble.chunk_models)
+
+        if policy is None:
+            # Ensemble vuoto: HOLD come predict_ensemble
+            q_hold = [0.0, 1.0, 0.0]
+            return [{'actions': [1] * len(obs), 'q_values': [q_hold] * len(obs),
+                     'num_chunks': 0, 'batch_size': len(obs)} for obs in requests]
+        if getattr(ensemble, 'stacked_policy', None) is not policy:
+            ensemble.stacked_policy = policy
+
+        outputs = [None] * len(requests)
+        valid = []
+        for i, obs in enumerate(requests):
+            if obs.shape[1] != policy.state_dim:
+                outputs[i] = ValueError(
+                    f"Observation has {obs.shape[1]} features, model for {ticker} expects {policy.state_dim}"
+                )
+            else:
+                valid.append(i)
+
+        if not valid:
+            return outputs
+
+        states = np.concatenate([requests[i] for i in valid])
+        q_values = policy.weighted_q_values(states, weights)
+        actions = np.argmax(q_values, axis=1)
+
+        with self._lock:
+            self.batches += 1
+            self.max_batch_rows = max(self.max_batch_rows, len(states))
+
+        offset = 0
+        for i in valid:
+            n = len(requests[i])
+            outputs[i] = {
+                'actions': actions[offset:offset + n].tolist(),
+                'q_values': q_values[offset:offset + n].tolist(),
+                'num_chunks': num_chunks,
+                'batch_size': len(states)
+            }
+            offset += n
+
+        return outputs
+
+    def shutdown(self):
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self):
+        """Ritorna latenze (p50/p99) e dimensione media dei micro-batch"""
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000.0
+            return {
+                'requests': self.requests,
+                'observations': self.observations,
+                'batches': self.batches,
+                'errors': self.errors,
+                'avg_batch_rows': self.observations / self.batches if self.batches > 0 else 0.0,
+                'max_batch_rows': self.max_batch_rows,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'latency_p50_ms': float(np.percentile(latencies, 50)) if len(latencies) > 0 else 0.0,
+                'latency_p99_ms': float(np.percentile(latencies, 99)) if len(latencies) > 0 else 0.0
+            }
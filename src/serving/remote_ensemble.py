@@ -0,0 +1,60 @@
+"""
+Remote Ensemble
+Client di POST /predict con la stessa interfaccia di predict_ensemble
+
+Permette al paper trading di usare l'ensemble servito dall'API invece di
+caricare il modello nel processo.
+"""
+
+import numpy as np
+import requests
+
+
+class RemoteEnsemble:
+    """Ensemble servito da un server FastAPI (endpoint /predict)"""
+
+    def __init__(self, api_url: str, ticker: str, timeout: float = 5.0):
+        """
+        Initialize remote ensemble
+
+        Args:
+            api_url: URL base dell'API (es. http://35.123.45.67:8000)
+            ticker: Ticker del modello
+            timeout: Timeout delle richieste in secondi
+        """
+        self.api_url = api_url.rstrip('/')
+        self.ticker = ticker
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.num_chunks = None
+
+    def predict_batch(self, states):
+        """
+        Azioni e Q-values pesati per un batch di osservazioni
+
+        Returns:
+            Tuple (actions (N,), q_values (N, action_dim))
+        """
+        response = self.session.post(
+            f"{self.api_url}/predict",
+            json={'ticker': self.ticker, 'observations': np.asarray(states, dtype=np.float32).tolist()},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        self.num_chunks = data['num_chunks']
+        return np.array(data['actions']), np.array(data['q_values'])
+
+    def predict_ensemble(self, state, weights=None):
+        """
+        Come ReWTSEnsembleController.predict_ensemble (i pesi sono quelli del server)
+
+        Returns:
+            Tuple (action, weighted_q_values)
+        """
+        if weights is not None:
+            raise ValueError("RemoteEnsemble uses the ensemble weights of the server")
+
+        actions, q_values = self.predict_batch(np.asarray(state)[np.newaxis, :])
+        return int(actions[0]), q_values[0]
@@ -0,0 +1,212 @@
+"""
+Backtest Result Cache
+Cache dei risultati di backtest, in memoria (LRU) e su disco (JSON)
+
+La chiave è make_request_key(params, model_digest): quando i file del modello
+cambiano cambia il digest, le vecchie voci non vengono più trovate e sono
+rimosse al primo inserimento per lo stesso ticker. Un indice in memoria delle
+voci su disco (ticker, digest, mtime), costruito una volta all'avvio, evita di
+rileggere la directory a ogni inserimento; get_async/put_async eseguono
+l'I/O su disco fuori dall'event loop.
+"""
+
+import os
+import json
+import asyncio
+import threading
+from pathlib import Path
+from collections import OrderedDict
+
+
+class BacktestResultCache:
+    """Cache a due livelli (memoria + disco) dei risultati di backtest"""
+
+    def __init__(self, cache_dir: str = "results/api/result_cache",
+                 max_memory_entries: int = 256, max_disk_entries: int = 4096):
+        """
+        Initialize result cache
+
+        Args:
+            cache_dir: Directory dei risultati su disco
+            max_memory_entries: Voci LRU tenute in memoria
+            max_disk_entries: Voci massime su disco (le più vecchie vengono rimosse)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._ticker_digests = {}       # ticker -> ultimo model_digest visto
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.saved_seconds = 0.0
+
+        self._index = self._build_index()
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def _build_index(self):
+        """
+        Indice key -> (ticker, model_digest, mtime) delle voci su disco, dalla più vecchia
+
+        Unica lettura di tutti i file: dopo l'avvio l'indice viene aggiornato da
+        put/invalidate_stale/clear (la directory appartiene a questa cache).
+        """
+        entries = []
+        for path in self.cache_dir.glob('*.json'):
+            try:
+                mtime = path.stat().st_mtime
+                with open(path) as f:
+                    entry = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((mtime, path.stem, entry.get('ticker'), entry.get('model_digest')))
+
+        entries.sort()
+        return OrderedDict((key, (ticker, digest, mtime)) for mtime, key, ticker, digest in entries)
+
+    def _remember(self, key, entry):
+        """Inserisce in memoria (lock già acquisito)"""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _get_memory(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            self.saved_seconds += entry['result'].get('execution_time_seconds', 0.0)
+            return entry['result']
+
+    def _get_disk(self, key):
+        with self._lock:
+            on_disk = key in self._index
+        entry = None
+        if on_disk:
+            try:
+                with open(self._path(key)) as f:
+                    entry = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self._remember(key, entry)
+            self.disk_hits += 1
+            self.saved_seconds += entry['result'].get('execution_time_seconds', 0.0)
+        return entry['result']
+
+    def get(self, key):
+        """
+        Risultato memorizzato per la chiave, o None
+
+        Returns:
+            Dict del risultato (con execution_time_seconds del calcolo originale)
+        """
+        result = self._get_memory(key)
+        if result is not None:
+            return result
+        return self._get_disk(key)
+
+    async def get_async(self, key):
+        """Come get, con la lettura da disco in un thread (non blocca l'event loop)"""
+        result = self._get_memory(key)
+        if result is not None:
+            return result
+        return await asyncio.get_running_loop().run_in_executor(None, self._get_disk, key)
+
+    def put(self, key, result, ticker=None, model_digest=None):
+        """Salva un risultato (memoria + disco, scrittura atomica)"""
+        entry = {'result': result, 'ticker': ticker, 'model_digest': model_digest}
+        with self._lock:
+            self._remember(key, entry)
+        self._put_disk(key, entry)
+
+    async def put_async(self, key, result, ticker=None, model_digest=None):
+        """Come put, con scrittura, invalidazione e pulizia del disco in un thread"""
+        entry = {'result': result, 'ticker': ticker, 'model_digest': model_digest}
+        with self._lock:
+            self._remember(key, entry)
+        await asyncio.get_running_loop().run_in_executor(None, self._put_disk, key, entry)
+
+    def _put_disk(self, key, entry):
+        path = self._path(key)
+        # Nome temporaneo per thread: due put della stessa chiave non si sovrascrivono il file
+        tmp_path = path.with_suffix(f'.json.tmp{threading.get_ident()}')
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+        ticker, model_digest = entry['ticker'], entry['model_digest']
+        with self._lock:
+            self._index[key] = (ticker, model_digest, path.stat().st_mtime)
+            self._index.move_to_end(key)
+
+        # Invalidazione delle voci vecchie solo quando la versione del modello cambia
+        if ticker is not None and model_digest is not None:
+            with self._lock:
+                digest_changed = self._ticker_digests.get(ticker) != model_digest
+                self._ticker_digests[ticker] = model_digest
+            if digest_changed:
+                self.invalidate_stale(ticker, model_digest)
+        self._prune_disk()
+
+    def invalidate_stale(self, ticker, model_digest):
+        """Rimuove le voci di un ticker calcolate con un'altra versione del modello"""
+        with self._lock:
+            for key in [k for k, e in self._memory.items()
+                        if e.get('ticker') == ticker and e.get('model_digest') != model_digest]:
+                del self._memory[key]
+            stale = [k for k, (entry_ticker, digest, _) in self._index.items()
+                     if entry_ticker == ticker and digest != model_digest]
+            for key in stale:
+                del self._index[key]
+            self.invalidated += len(stale)
+
+        for key in stale:
+            self._path(key).unlink(missing_ok=True)
+        return len(stale)
+
+    def _prune_disk(self):
+        """Rimuove le voci più vecchie oltre max_disk_entries (dall'indice, senza glob)"""
+        with self._lock:
+            excess = max(0, len(self._index) - self.max_disk_entries)
+            removed = [self._index.popitem(last=False)[0] for _ in range(excess)]
+        for key in removed:
+            self._path(key).unlink(missing_ok=True)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._index.clear()
+        for path in self.cache_dir.glob('*.json'):
+            path.unlink(missing_ok=True)
+
+    def get_stats(self):
+        """Ritorna statistiche su hit ratio e tempo di calcolo risparmiato"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            requests = hits + self.misses
+            return {
+                'memory_entries': len(self._memory),
+                'disk_entries': len(self._index),
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_ratio': hits / requests if requests > 0 else 0.0,
+                'invalidated': self.invalidated,
+                'saved_compute_seconds': self.saved_seconds
+            }
@@ -0,0 +1,38 @@
+"""
+Telemetry Module
+Metriche in formato Prometheus per API, training e agenti LLM, e tracing opt-in degli hot path
+"""
+
+from .metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    REGISTRY,
+    write_textfile,
+    TextfileWriter
+)
+from .tracing import (
+    TRACER,
+    traced,
+    span,
+    enable_tracing,
+    disable_tracing,
+    finish_tracing
+)
+
+__all__ = [
+    'Counter',
+    'Gauge',
+    'Histogram',
+    'MetricsRegistry',
+    'REGISTRY',
+    'write_textfile',
+    'TextfileWriter',
+    'TRACER',
+    'traced',
+    'span',
+    'enable_tracing',
+    'disable_tracing',
+    'finish_tracing'
+]
@@ -0,0 +1,89 @@
+"""
+Instruments
+Metriche del progetto (nomi, label, bucket) definite in un solo punto
+
+I moduli strumentati importano da qui le metriche che aggiornano, così il
+catalogo di ciò che viene esportato da /metrics resta in un unico file.
+"""
+
+import time
+
+from .metrics import REGISTRY
+
+# ----- API -----
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'rewts_http_request_duration_seconds', 'HTTP request latency',
+    labelnames=('method', 'route', 'status')
+)
+
+# ----- LLM (StrategistAgent / AnalystAgent) -----
+
+LLM_CALLS = REGISTRY.counter(
+    'rewts_llm_calls_total', 'LLM API calls',
+    labelnames=('agent', 'model', 'status')
+)
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    'rewts_llm_call_duration_seconds', 'LLM API call latency',
+    labelnames=('agent', 'model')
+)
+LLM_TOKENS = REGISTRY.counter(
+    'rewts_llm_tokens_total', 'LLM tokens used',
+    labelnames=('agent', 'model', 'kind')
+)
+
+# ----- StrategyCache -----
+
+STRATEGY_CACHE_REQUESTS = REGISTRY.counter(
+    'rewts_strategy_cache_requests_total', 'StrategyCache lookups',
+    labelnames=('result',)
+)
+STRATEGY_CACHE_HIT_RATIO = REGISTRY.gauge(
+    'rewts_strategy_cache_hit_ratio', 'StrategyCache hit ratio since process start'
+)
+
+# ----- Training (train_chunk_model) -----
+
+TRAIN_ENV_STEPS = REGISTRY.counter('rewts_train_env_steps_total', 'Environment steps during training')
+TRAIN_UPDATES = REGISTRY.counter(
+    'rewts_train_updates_total', 'DDQN network updates during training (train_step with a full batch)'
+)
+TRAIN_ENV_STEPS_PER_SECOND = REGISTRY.gauge(
+    'rewts_train_env_steps_per_second', 'env.step throughput over the last episode'
+)
+TRAIN_UPDATES_PER_SECOND = REGISTRY.gauge(
+    'rewts_train_updates_per_second', 'train_step throughput over the last episode'
+)
+TRAIN_EPISODE_SECONDS = REGISTRY.histogram(
+    'rewts_train_episode_duration_seconds', 'Wall time of a training episode'
+)
+
+# ----- Ensemble (optimize_weights) -----
+
+QP_SOLVE_SECONDS = REGISTRY.histogram(
+    'rewts_qp_solve_duration_seconds', 'cvxopt QP solve time in optimize_weights',
+    labelnames=('status',)
+)
+OPTIMIZE_WEIGHTS_SECONDS = REGISTRY.histogram(
+    'rewts_optimize_weights_duration_seconds', 'Total optimize_weights time (forecast matrix + QP)'
+)
+
+
+def record_llm_call(agent, model, start_time, response=None, status='ok'):
+    """
+    Registra una chiamata LLM: conteggio, latenza e token (da response.usage)
+
+    Args:
+        agent: 'strategist' o 'analyst'
+        model: Nome del modello
+        start_time: time.perf_counter() all'inizio della chiamata
+        response: Risposta OpenAI-compatibile (None se la chiamata è fallita)
+        status: 'ok' o 'error'
+    """
+    LLM_CALLS.inc(agent=agent, model=model, status=status)
+    LLM_CALL_SECONDS.observe(time.perf_counter() - start_time, agent=agent, model=model)
+
+    usage = getattr(response, 'usage', None)
+    if usage is not None:
+        LLM_TOKENS.inc(getattr(usage, 'prompt_tokens', 0) or 0, agent=agent, model=model, kind='prompt')
+        LLM_TOKENS.inc(getattr(usage, 'completion_tokens', 0) or 0, agent=agent, model=model, kind='completion')
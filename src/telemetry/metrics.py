@@ -0,0 +1,291 @@
+"""
+Metrics
+Counter, Gauge e Histogram in-process esportati nel formato testo di Prometheus
+
+Le metriche sono registrate in un MetricsRegistry (di default REGISTRY, uno
+per processo) e renderizzate da render() per l'endpoint /metrics dell'API, o
+scritte periodicamente su file da TextfileWriter (textfile collector di
+node_exporter) per gli script di training.
+"""
+
+import os
+import math
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Bucket in secondi, da sub-millisecondo (forward) a minuti (chiamate LLM lente)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(value):
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if math.isnan(value):
+        return 'NaN'
+    return repr(float(value))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class _Metric:
+    """Base: valori indicizzati dalla tupla dei valori delle label"""
+
+    metric_type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key, extra=()):
+        return list(zip(self.labelnames, key)) + list(extra)
+
+    def samples(self):
+        """Lista di (suffisso, label, valore)"""
+        with self._lock:
+            return [('', self._labels(key), value) for key, value in sorted(self._values.items())]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Valore monotono crescente"""
+
+    metric_type = 'counter'
+
+    def inc(self, amount=1.0, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    """Valore istantaneo"""
+
+    metric_type = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Histogram(_Metric):
+    """Distribuzione cumulativa a bucket, con somma e conteggio"""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Osserva la durata del blocco in secondi"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def get(self, **labels):
+        """Dict con count e sum (None se mai osservato)"""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return None if state is None else {'count': state['count'], 'sum': state['sum']}
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, state['counts']):
+                    cumulative += count
+                    samples.append(('_bucket', self._labels(key, [('le', _format_value(bound))]), cumulative))
+                samples.append(('_bucket', self._labels(key, [('le', '+Inf')]), state['count']))
+                samples.append(('_sum', self._labels(key), state['sum']))
+                samples.append(('_count', self._labels(key), state['count']))
+        return samples
+
+
+class MetricsRegistry:
+    """Insieme delle metriche di un processo, più collector valutati a ogni render"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector):
+        """
+        Registra una funzione chiamata a ogni render
+
+        Args:
+            collector: Callable che ritorna una lista di tuple
+                (name, type, documentation, [(labels dict, value), ...])
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def unregister_collector(self, collector):
+        with self._lock:
+            if collector in self._collectors:
+                self._collectors.remove(collector)
+
+    def render(self):
+        """Tutte le metriche nel formato testo di Prometheus (version 0.0.4)"""
+        lines = []
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        for metric in metrics:
+            samples = metric.samples()
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            for suffix, labels, value in samples:
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+
+        for collector in collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+                continue
+            for name, metric_type, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}")
+
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            for metric in self._metrics.values():
+                metric.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+
+def write_textfile(path, registry=REGISTRY):
+    """Scrive le metriche su file in modo atomico (textfile collector)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(registry.render())
+    os.replace(tmp_path, path)
+
+
+class TextfileWriter:
+    """Thread che riscrive periodicamente le metriche su file"""
+
+    def __init__(self, path: str, interval: float = 15.0, registry: MetricsRegistry = REGISTRY):
+        """
+        Initialize textfile writer
+
+        Args:
+            path: File .prom di destinazione
+            interval: Secondi fra due scritture
+            registry: Registry da esportare
+        """
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='metrics-textfile', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self):
+        try:
+            write_textfile(self.path, self.registry)
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {self.path}: {e}")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Ferma il thread e scrive un'ultima volta"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.write()
@@ -0,0 +1,227 @@
+"""
+Tracing
+Span opt-in sui percorsi caldi (env, agent, ensemble) con export Chrome trace
+
+Disabilitato di default: @traced e span() controllano un solo flag e chiamano
+direttamente la funzione. Con enable_tracing() ogni span aggiorna le statistiche
+aggregate, l'istogramma rewts_span_duration_seconds{span} del REGISTRY e
+(opzionale) la lista di eventi esportabile in formato Chrome trace
+(chrome://tracing, Perfetto).
+"""
+
+import os
+import json
+import time
+import functools
+import threading
+from contextlib import nullcontext
+
+from .metrics import REGISTRY
+
+# Span da decine di microsecondi (env.step) a secondi (optimize_weights)
+SPAN_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2,
+                2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+SPAN_SECONDS = REGISTRY.histogram(
+    'rewts_span_duration_seconds', 'Duration of traced spans (only while tracing is enabled)',
+    labelnames=('span',), buckets=SPAN_BUCKETS
+)
+
+_NULL_SPAN = nullcontext()
+
+
+class Tracer:
+    """Raccoglie durate degli span (statistiche, istogrammi, eventi Chrome trace)"""
+
+    def __init__(self):
+        self.enabled = False
+        self.record_events = True
+        self.max_events = 1_000_000
+
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+        self._events = []
+        self._stats = {}            # name -> [count, total_ns, min_ns, max_ns]
+        self.dropped_events = 0
+
+    def enable(self, record_events: bool = True, max_events: int = 1_000_000):
+        """
+        Abilita il tracing
+
+        Args:
+            record_events: Conserva i singoli eventi per export_chrome_trace
+            max_events: Eventi massimi in memoria (oltre vengono solo aggregati)
+        """
+        self.record_events = record_events
+        self.max_events = max_events
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._origin_ns = time.perf_counter_ns()
+            self._events = []
+            self._stats = {}
+            self.dropped_events = 0
+
+    def record(self, name, start_ns, end_ns):
+        duration = end_ns - start_ns
+        SPAN_SECONDS.observe(duration / 1e9, span=name)
+
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                self._stats[name] = [1, duration, duration, duration]
+            else:
+                stats[0] += 1
+                stats[1] += duration
+                if duration < stats[2]:
+                    stats[2] = duration
+                if duration > stats[3]:
+                    stats[3] = duration
+
+            if self.record_events:
+                if len(self._events) < self.max_events:
+                    self._events.append((name, start_ns, duration, threading.get_ident()))
+                else:
+                    self.dropped_events += 1
+
+    def summary(self):
+        """
+        Statistiche per span, ordinate per tempo totale
+
+        Returns:
+            Lista di dict con name, count, total_ms, mean_us, min_us, max_us
+        """
+        with self._lock:
+            items = [(name, list(stats)) for name, stats in self._stats.items()]
+
+        rows = [
+            {
+                'name': name,
+                'count': count,
+                'total_ms': total / 1e6,
+                'mean_us': total / count / 1e3,
+                'min_us': min_ns / 1e3,
+                'max_us': max_ns / 1e3
+            }
+            for name, (count, total, min_ns, max_ns) in items
+        ]
+        return sorted(rows, key=lambda r: r['total_ms'], reverse=True)
+
+    def format_summary(self):
+        """Tabella testuale di summary()"""
+        lines = [f"{'Span':<44} {'Count':>10} {'Total ms':>12} {'Mean us':>10} {'Max us':>12}"]
+        lines.append('-' * len(lines[0]))
+        for row in self.summary():
+            lines.append(
+                f"{row['name']:<44} {row['count']:>10} {row['total_ms']:>12.1f} "
+                f"{row['mean_us']:>10.1f} {row['max_us']:>12.1f}"
+            )
+        if self.dropped_events > 0:
+            lines.append(f"({self.dropped_events} events over max_events not in the Chrome trace)")
+        return '\n'.join(lines)
+
+    def export_chrome_trace(self, path):
+        """
+        Scrive gli eventi in formato Chrome trace (JSON, eventi completi 'X')
+
+        Args:
+            path: File .json di destinazione
+        """
+        pid = os.getpid()
+        with self._lock:
+            events = list(self._events)
+            origin = self._origin_ns
+
+        trace_events = [
+            {
+                'name': name,
+                'ph': 'X',
+                'ts': (start - origin) / 1e3,
+                'dur': duration / 1e3,
+                'pid': pid,
+                'tid': tid
+            }
+            for name, start, duration, tid in events
+        ]
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
+        return len(trace_events)
+
+
+TRACER = Tracer()
+
+
+class _Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        TRACER.record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+def span(name):
+    """Context manager che misura il blocco (no-op se il tracing è disabilitato)"""
+    if not TRACER.enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def traced(name=None):
+    """
+    Decorator che misura ogni chiamata della funzione
+
+    Args:
+        name: Nome dello span (default: qualname della funzione)
+    """
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                TRACER.record(span_name, start, time.perf_counter_ns())
+
+        return wrapper
+
+    return decorator
+
+
+def enable_tracing(record_events: bool = True, max_events: int = 1_000_000):
+    TRACER.reset()
+    TRACER.enable(record_events=record_events, max_events=max_events)
+
+
+def disable_tracing():
+    TRACER.disable()
+
+
+def finish_tracing(trace_path=None):
+    """
+    Disabilita il tracing, stampa il summary e scrive il Chrome trace
+
+    Args:
+        trace_path: File .json del Chrome trace (None = solo summary)
+    """
+    TRACER.disable()
+    print(f"\n{TRACER.format_summary()}")
+    if trace_path:
+        num_events = TRACER.export_chrome_trace(trace_path)
+        print(f"\n✓ Chrome trace ({num_events} events) saved to {trace_path} (open in chrome://tracing or ui.perfetto.dev)")
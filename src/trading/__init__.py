@@ -4,5 +4,13 @@ Alpaca Paper Trading integration
 """
 
 from .alpaca_paper_trader import AlpacaPaperTrader, AlpacaPaperTradingBackend
+from .async_backend import AsyncAlpacaTradingBackend
+from .portfolio_state import PortfolioStateCache
+from .history_writer import TradeHistoryWriter, read_history
+from .market_stream import AlpacaBarStream, BarReplayServer, BarWindow
+from .broker_simulator import SimulatedBroker, BrokerSimulatorServer
 
-__all__ = ['AlpacaPaperTrader', 'AlpacaPaperTradingBackend']
+__all__ = [
+    'AlpacaPaperTrader', 'AlpacaPaperTradingBackend', 'AsyncAlpacaTradingBackend', 'PortfolioStateCache',
+    'TradeHistoryWriter', 'read_history', 'AlpacaBarStream', 'BarReplayServer', 'BarWindow', 'SimulatedBroker', 'BrokerSimulatorServer'
+]
@@ -5,11 +5,56 @@ Trading reale con denaro fittizio tramite REST API Alpaca
 
 import requests
 import json
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 import time
 import numpy as np
+from collections import deque
+
+from src.trading.portfolio_state import PortfolioStateCache
+from src.trading.history_writer import TradeHistoryWriter
+from src.utils.fetch_cache import FetchCache
+
+DEFAULT_HISTORY_PATH = 'results/live/alpaca_history.jsonl'
+
+# Metodi ritentati automaticamente: gli ordini (POST) non sono idempotenti
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'DELETE'})
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def make_pooled_session(pool_maxsize: int = 10, max_retries: int = 3, backoff_factor: float = 0.3) -> requests.Session:
+    """
+    Session HTTP con keep-alive, pool di connessioni dimensionato e retry con backoff
+
+    Args:
+        pool_maxsize: Connessioni tenute aperte per host
+        max_retries: Tentativi per errori di connessione e status 429/5xx (solo metodi idempotenti)
+        backoff_factor: Backoff esponenziale fra i tentativi (0.3 -> 0.3s, 0.6s, 1.2s, ...)
+
+    Returns:
+        requests.Session
+    """
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=IDEMPOTENT_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
 
 
 class AlpacaPaperTrader:
@@ -20,7 +65,22 @@ class AlpacaPaperTrader:
     Alpaca offre paper trading GRATUITO con dati di mercato real-time.
     """
 
-    def __init__(self, api_key: str, secret_key: str, base_url: str = None):
+    def __init__(
+        self,
+        api_key: str,
+        secret_key: str,
+        base_url: str = None,
+        data_url: str = None,
+        timeout: tuple = (3.05, 10.0),
+        max_retries: int = 3,
+        backoff_factor: float = 0.3,
+        pool_maxsize: int = 10,
+        session: Optional[requests.Session] = None,
+        state_cache: bool = False,
+        reconcile_interval: float = 60.0,
+        bars_ttl: float = 0.0,
+        fetch_cache: Optional[FetchCache] = None
+    ):
         """
         Inizializza il client Alpaca
 
@@ -28,15 +88,25 @@ class AlpacaPaperTrader:
             api_key: Alpaca API Key (da dashboard.alpaca.markets)
             secret_key: Alpaca Secret Key
             base_url: Base URL (default: paper trading endpoint)
+            data_url: Data API URL (default: data.alpaca.markets; es. uno stub locale nei test)
+            timeout: Timeout (connect, read) in secondi per ogni chiamata
+            max_retries: Retry con backoff per GET/DELETE su errori di rete e 429/5xx
+            backoff_factor: Fattore di backoff esponenziale fra i retry
+            pool_maxsize: Connessioni keep-alive per host (>= numero di thread che usano il trader)
+            session: Session già configurata (default: make_pooled_session)
+            state_cache: Segnali e account summary letti da PortfolioStateCache invece che dal broker
+            reconcile_interval: Secondi fra due riconciliazioni della cache col broker
+            bars_ttl: Secondi per cui i bars scaricati vengono riusati (0 = sempre dal broker)
+            fetch_cache: FetchCache dei bars (default con bars_ttl > 0: solo in memoria)
         """
         self.api_key = api_key
         self.secret_key = secret_key
 
         # Paper Trading endpoint (GRATUITO)
-        self.base_url = base_url or "https://paper-api.alpaca.markets"
+        self.base_url = (base_url or "https://paper-api.alpaca.markets").rstrip('/')
 
         # Data API endpoint
-        self.data_url = "https://data.alpaca.markets"
+        self.data_url = (data_url or "https://data.alpaca.markets").rstrip('/')
 
         self.headers = {
             "APCA-API-KEY-ID": self.api_key,
@@ -44,20 +114,54 @@ class AlpacaPaperTrader:
             "Content-Type": "application/json"
         }
 
+        # Una sola session: connessioni TCP+TLS riusate fra le chiamate
+        self.timeout = timeout
+        self.session = session or make_pooled_session(pool_maxsize, max_retries, backoff_factor)
+        self.session.headers.update(self.headers)
+
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+        self._request_time = 0.0
+
+        # Stato locale di account e posizioni (None = ogni segnale legge dal broker)
+        self.state = PortfolioStateCache(reconcile_interval) if state_cache else None
+
+        # Bars riusati fra i check del loop finché più recenti di bars_ttl
+        self.bars_ttl = bars_ttl
+        self.bars_cache = None
+        if bars_ttl > 0:
+            self.bars_cache = fetch_cache or FetchCache(cache_dir=None)
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Richiesta tramite la session condivisa (timeout di default, statistiche)"""
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            with self._stats_lock:
+                self._requests += 1
+                self._errors += 1
+                self._request_time += time.perf_counter() - start
+            raise
+
+        with self._stats_lock:
+            self._requests += 1
+            self._request_time += time.perf_counter() - start
+            if response.status_code >= 400:
+                self._errors += 1
+        return response
+
     def _make_request(self, method: str, endpoint: str, data: Dict = None) -> Dict:
         """Helper per fare richieste HTTP"""
         url = f"{self.base_url}{endpoint}"
 
         try:
-            if method == "GET":
-                response = requests.get(url, headers=self.headers)
-            elif method == "POST":
-                response = requests.post(url, headers=self.headers, json=data)
-            elif method == "DELETE":
-                response = requests.delete(url, headers=self.headers)
-            else:
+            if method not in ("GET", "POST", "DELETE"):
                 raise ValueError(f"Metodo HTTP non supportato: {method}")
 
+            response = self._request(method, url, json=data if method == "POST" else None)
             response.raise_for_status()
             return response.json() if response.text else {}
 
@@ -67,6 +171,53 @@ class AlpacaPaperTrader:
                 print(f"Dettagli errore: {e.response.text}")
             raise
 
+    def get_stats(self) -> Dict:
+        """
+        Statistiche delle richieste e del riuso delle connessioni
+
+        Returns:
+            Dict con requests (chiamate del client), http_requests (inclusi i retry),
+            connections_opened, connection_reuse_ratio, retries, errors, avg_latency_ms
+        """
+        http_requests = 0
+        connections = 0
+        for adapter in set(self.session.adapters.values()):
+            poolmanager = getattr(adapter, 'poolmanager', None)
+            if poolmanager is None:
+                continue
+            for key in list(poolmanager.pools.keys()):
+                pool = poolmanager.pools.get(key)
+                if pool is not None:
+                    http_requests += pool.num_requests
+                    connections += pool.num_connections
+
+        with self._stats_lock:
+            requests_count = self._requests
+            errors = self._errors
+            request_time = self._request_time
+
+        return {
+            'requests': requests_count,
+            'http_requests': http_requests,
+            'connections_opened': connections,
+            'connection_reuse_ratio': 1 - connections / http_requests if http_requests > 0 else 0.0,
+            'retries': max(0, http_requests - requests_count),
+            'errors': errors,
+            'avg_latency_ms': 1000 * request_time / requests_count if requests_count > 0 else 0.0,
+            'bars_cache': self.bars_cache.get_stats() if self.bars_cache is not None else None
+        }
+
+    def close(self):
+        """Chiude le connessioni del pool"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
     # ========== Account Management ==========
 
     def get_account(self) -> Dict:
@@ -82,8 +233,17 @@ class AlpacaPaperTrader:
         """
         return self._make_request("GET", "/v2/account")
 
-    def get_account_summary(self) -> Dict:
-        """Ottieni un sommario leggibile dell'account"""
+    def get_account_summary(self, use_cache: bool = True) -> Dict:
+        """
+        Ottieni un sommario leggibile dell'account
+
+        Args:
+            use_cache: Con la state cache attiva, legge dalla memoria (riconciliando se scaduta)
+        """
+        if use_cache and self.state is not None:
+            self.state.maybe_reconcile(self)
+            return self.state.account_summary()
+
         account = self.get_account()
 
         return {
@@ -250,7 +410,7 @@ class AlpacaPaperTrader:
             Dict con bid, ask, bid_size, ask_size, timestamp
         """
         url = f"{self.data_url}/v2/stocks/{symbol}/quotes/latest"
-        response = requests.get(url, headers=self.headers)
+        response = self._request("GET", url)
         response.raise_for_status()
         return response.json()
 
@@ -262,7 +422,7 @@ class AlpacaPaperTrader:
             Dict con price, size, timestamp
         """
         url = f"{self.data_url}/v2/stocks/{symbol}/trades/latest"
-        response = requests.get(url, headers=self.headers)
+        response = self._request("GET", url)
         response.raise_for_status()
         return response.json()
 
@@ -287,6 +447,19 @@ class AlpacaPaperTrader:
         Returns:
             DataFrame con OHLCV data
         """
+        if self.bars_cache is not None:
+            return self.bars_cache.fetch(
+                'alpaca_bars', symbol, lambda: self._fetch_bars(symbol, timeframe, start, end, limit),
+                params=self._bars_params(timeframe, start, end, limit), ttl=self.bars_ttl
+            )
+        return self._fetch_bars(symbol, timeframe, start, end, limit)
+
+    @staticmethod
+    def _bars_params(timeframe, start, end, limit) -> Dict:
+        """Chiave dei bars in cache (condivisa fra get_bars e get_multi_bars)"""
+        return {'timeframe': timeframe, 'start': start, 'end': end, 'limit': limit}
+
+    def _fetch_bars(self, symbol, timeframe, start, end, limit) -> pd.DataFrame:
         url = f"{self.data_url}/v2/stocks/{symbol}/bars"
 
         params = {
@@ -298,27 +471,92 @@ class AlpacaPaperTrader:
         if end:
             params["end"] = end
 
-        response = requests.get(url, headers=self.headers, params=params)
+        response = self._request("GET", url, params=params)
         response.raise_for_status()
 
         data = response.json()
 
-        # Check if data contains bars and bars is not None
-        bars = data.get('bars')
-        if bars is not None and len(bars) > 0:
-            df = pd.DataFrame(bars)
-            df['timestamp'] = pd.to_datetime(df['t'])
-            df = df.rename(columns={
-                'o': 'open',
-                'h': 'high',
-                'l': 'low',
-                'c': 'close',
-                'v': 'volume'
-            })
-            df = df.set_index('timestamp')
-            return df[['open', 'high', 'low', 'close', 'volume']]
-        else:
+        return self._bars_to_dataframe(data.get('bars'))
+
+    @staticmethod
+    def _bars_to_dataframe(bars) -> pd.DataFrame:
+        """Bars Alpaca (lista di dict t/o/h/l/c/v) -> DataFrame OHLCV indicizzato per timestamp"""
+        if not bars:
             return pd.DataFrame()
+        df = pd.DataFrame(bars)
+        df['timestamp'] = pd.to_datetime(df['t'])
+        df = df.rename(columns={'o': 'open', 'h': 'high', 'l': 'low', 'c': 'close', 'v': 'volume'})
+        df = df.set_index('timestamp')
+        return df[['open', 'high', 'low', 'close', 'volume']]
+
+    def get_multi_bars(
+        self,
+        symbols: List[str],
+        timeframe: str = "1Day",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: int = 100,
+        page_limit: int = 10000
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Bars di più symbol con l'endpoint multi-symbol (una richiesta per pagina)
+
+        Args:
+            symbols: Ticker
+            timeframe: '1Min', '5Min', '15Min', '1Hour', '1Day'
+            start: Data inizio (ISO format)
+            end: Data fine
+            limit: Ultimi bars tenuti per symbol
+            page_limit: Bars per pagina (il limite dell'endpoint è sul totale, non per symbol)
+
+        Returns:
+            Dict symbol -> DataFrame OHLCV (vuoto se nessun dato)
+        """
+        if self.bars_cache is None:
+            return self._fetch_multi_bars(symbols, timeframe, start, end, limit, page_limit)
+
+        # Dal broker solo i symbol senza bars recenti in cache
+        params = self._bars_params(timeframe, start, end, limit)
+        result = {symbol: self.bars_cache.get('alpaca_bars', symbol, params, ttl=self.bars_ttl)
+                  for symbol in symbols}
+        missing = [symbol for symbol, bars in result.items() if bars is None]
+        if missing:
+            fetch_start = time.perf_counter()
+            fetched = self._fetch_multi_bars(missing, timeframe, start, end, limit, page_limit)
+            elapsed = (time.perf_counter() - fetch_start) / len(missing)
+            for symbol, bars in fetched.items():
+                if not bars.empty:
+                    self.bars_cache.put('alpaca_bars', symbol, bars, params, fetch_seconds=elapsed)
+            result.update(fetched)
+        return result
+
+    def _fetch_multi_bars(self, symbols, timeframe, start, end, limit, page_limit) -> Dict[str, pd.DataFrame]:
+        url = f"{self.data_url}/v2/stocks/bars"
+        params = {
+            "symbols": ",".join(symbols),
+            "timeframe": timeframe,
+            "limit": page_limit
+        }
+        if start:
+            params["start"] = start
+        if end:
+            params["end"] = end
+
+        raw = {symbol: [] for symbol in symbols}
+        while True:
+            response = self._request("GET", url, params=params)
+            response.raise_for_status()
+            data = response.json()
+
+            for symbol, bars in (data.get('bars') or {}).items():
+                raw.setdefault(symbol, []).extend(bars or [])
+
+            page_token = data.get('next_page_token')
+            if not page_token:
+                break
+            params["page_token"] = page_token
+
+        return {symbol: self._bars_to_dataframe(bars[-limit:]) for symbol, bars in raw.items()}
 
     # ========== Portfolio History ==========
 
@@ -351,6 +589,7 @@ class AlpacaPaperTrader:
                 - action: 'LONG', 'SHORT', 'HOLD'
                 - confidence: 0-1
                 - portfolio_allocation: percentuale del portfolio da allocare
+                - price: ultimo prezzo (opzionale, stima dei fill nella state cache)
 
         Returns:
             Dict con risultato dell'esecuzione
@@ -359,12 +598,19 @@ class AlpacaPaperTrader:
         action = signal['action']
         allocation = signal.get('portfolio_allocation', 0.1)  # Default 10%
 
-        # Ottieni info account
-        account = self.get_account()
-        buying_power = float(account['buying_power'])
+        if self.state is not None:
+            # Buying power e posizione dalla memoria
+            self.state.maybe_reconcile(self)
+            self.state.mark_price(symbol, signal.get('price'))
+            buying_power = self.state.buying_power
+            current_position = self.state.get_position(symbol)
+        else:
+            # Ottieni info account
+            account = self.get_account()
+            buying_power = float(account['buying_power'])
 
-        # Ottieni posizione corrente
-        current_position = self.get_position(symbol)
+            # Ottieni posizione corrente
+            current_position = self.get_position(symbol)
 
         result = {
             'symbol': symbol,
@@ -372,20 +618,29 @@ class AlpacaPaperTrader:
             'timestamp': datetime.now().isoformat(),
             'executed': False,
             'order_id': None,
-            'message': ''
+            'message': '',
+            'fills': []
         }
 
         if action == 'LONG':
             # Chiudi posizione short se presente
             if current_position and float(current_position.get('qty', 0)) < 0:
-                self.close_position(symbol)
+                _add_fill(result, self._close_and_track(symbol))
                 result['message'] += f"Chiusa posizione SHORT. "
 
             # Apri posizione LONG
             amount_to_invest = buying_power * allocation
 
             if amount_to_invest >= 1.0:  # Minimo $1
-                order = self.buy_dollars(symbol, amount_to_invest)
+                try:
+                    order = self.buy_dollars(symbol, amount_to_invest)
+                except Exception:
+                    if self.state is not None:
+                        self.state.invalidate()
+                    raise
+                if self.state is not None:
+                    self.state.apply_buy(symbol, amount_to_invest, order)
+                _add_fill(result, order)
                 result['executed'] = True
                 result['order_id'] = order['id']
                 result['message'] += f"Apertura LONG: ${amount_to_invest:.2f}"
@@ -395,7 +650,7 @@ class AlpacaPaperTrader:
         elif action == 'SHORT':
             # Chiudi posizione long se presente
             if current_position and float(current_position.get('qty', 0)) > 0:
-                self.close_position(symbol)
+                _add_fill(result, self._close_and_track(symbol))
                 result['message'] += f"Chiusa posizione LONG. "
 
             result['message'] += "SHORT non implementato in paper trading (richiede margin)"
@@ -405,15 +660,129 @@ class AlpacaPaperTrader:
 
         return result
 
+    def _close_and_track(self, symbol: str) -> Dict:
+        """close_position aggiornando la state cache"""
+        try:
+            order = self.close_position(symbol)
+        except Exception:
+            # Esito incerto: la cache va riallineata col broker
+            if self.state is not None:
+                self.state.invalidate()
+            raise
+        if self.state is not None:
+            self.state.apply_close(symbol, order)
+        return order
+
+
+def _add_fill(result: Dict, order: Optional[Dict]):
+    """Aggiunge a result['fills'] il fill riportato nella risposta di un ordine (se già eseguito)"""
+    if not order or not float(order.get('filled_qty') or 0):
+        return
+    result['fills'].append({
+        'order_id': order.get('id'),
+        'side': order.get('side'),
+        'qty': float(order['filled_qty']),
+        'price': float(order.get('filled_avg_price') or 0)
+    })
+
 
 class AlpacaPaperTradingBackend:
     """
     Backend per integrare Alpaca Paper Trading con ReWTSE-LLM-RL
     """
 
-    def __init__(self, api_key: str, secret_key: str):
-        self.trader = AlpacaPaperTrader(api_key, secret_key)
-        self.portfolio_history = []
+    def __init__(
+        self,
+        api_key: str,
+        secret_key: str,
+        history_path: Optional[str] = DEFAULT_HISTORY_PATH,
+        history_flush_every: int = 50,
+        history_flush_interval: float = 5.0,
+        history_memory: int = 1000,
+        **trader_kwargs
+    ):
+        """
+        Initialize backend
+
+        Args:
+            api_key: Alpaca API Key
+            secret_key: Alpaca Secret Key
+            history_path: Storico durevole (.jsonl o .db/.sqlite); None = solo in memoria
+            history_flush_every: Eventi per batch di scrittura
+            history_flush_interval: Secondi massimi fra due scritture
+            history_memory: Snapshot del portfolio tenuti in memoria (portfolio_history)
+            **trader_kwargs: Argomenti di AlpacaPaperTrader (base_url, timeout, state_cache, ...)
+        """
+        self.trader = AlpacaPaperTrader(api_key, secret_key, **trader_kwargs)
+
+        # Solo gli ultimi snapshot in memoria: lo storico completo è su disco
+        self.portfolio_history = deque(maxlen=history_memory)
+        self.history = None
+        if history_path:
+            self.history = TradeHistoryWriter(history_path, history_flush_every, history_flush_interval)
+            self._recover_history()
+
+    def _recover_history(self):
+        """Segnala gli ordini rimasti senza esito in una sessione precedente (crash fra invio e risposta)"""
+        stats = self.history.get_stats()
+        if stats['recovered_events']:
+            print(f"🗂️ Storico {self.history.path}: {stats['recovered_events']} eventi dalle sessioni precedenti")
+        if stats['truncated_bytes']:
+            print(f"⚠️ Storico: rimossi {stats['truncated_bytes']} byte di una scrittura interrotta")
+        for intent in self.history.pending_intents():
+            print(f"⚠️ Ordine non confermato dalla sessione {intent['session']}: {intent['symbol']} "
+                  f"{intent.get('action')} ({intent['ts']}) - verificare posizioni e ordini sul broker")
+            self.history.resolve_intent(intent, status='unconfirmed_after_restart')
+
+    def _record(self, kind: str, symbol: Optional[str] = None, durable: bool = False, **fields):
+        if self.history is not None:
+            self.history.record(kind, symbol, durable=durable, **fields)
+
+    def _execute_signal(self, signal: Dict) -> Dict:
+        """
+        execute_strategy_signal con storico: intento scritto su disco prima dell'invio, poi esito e fill
+        """
+        if signal['action'] == 'HOLD' or self.history is None:
+            result = self.trader.execute_strategy_signal(signal)
+        else:
+            intent = self.history.record('order_intent', signal['symbol'], durable=True,
+                                         action=signal['action'], allocation=signal.get('portfolio_allocation'),
+                                         price=signal.get('price'))
+            try:
+                result = self.trader.execute_strategy_signal(signal)
+            except Exception as e:
+                self.history.record('order', signal['symbol'], intent=intent, action=signal['action'],
+                                    status='error', executed=False, message=str(e))
+                raise
+            self.history.record('order', signal['symbol'], intent=intent, action=signal['action'],
+                                status='submitted' if result['executed'] else 'skipped',
+                                executed=result['executed'], order_id=result['order_id'], message=result['message'])
+
+        for fill in result.get('fills', []):
+            self._record('fill', signal['symbol'], **fill)
+        return result
+
+    def _record_snapshot(self, symbol: str, action: str, close: Optional[float], executed: bool, account: Dict):
+        """Snapshot del portfolio in memoria (limitata) e nello storico su disco"""
+        snapshot = {
+            'timestamp': datetime.now(),
+            'ticker': symbol,
+            'action': action,
+            'close': close,
+            'executed': executed,
+            'portfolio_value': account['portfolio_value'],
+            'profit_loss': account['profit_loss']
+        }
+        self.portfolio_history.append(snapshot)
+        self._record('portfolio', symbol, action=action, close=close, executed=executed,
+                     cash=account['cash'], portfolio_value=account['portfolio_value'],
+                     profit_loss=account['profit_loss'])
+
+    def close(self):
+        """Scrive lo storico residuo e chiude file e connessioni"""
+        if self.history is not None:
+            self.history.close()
+        self.trader.close()
 
     def run_live_trading(
         self,
@@ -474,16 +843,18 @@ class AlpacaPaperTradingBackend:
                     print(f"📊 Close: ${latest_close:.2f} | Volume: {latest_volume:,.0f}")
                     print(f"🤖 Azione predetta: {action_name}")
                     print(f"Q-values: SHORT={q_values[0]:.3f}, HOLD={q_values[1]:.3f}, LONG={q_values[2]:.3f}")
+                    self._record('decision', ticker, action=action_name, q_values=q_values, close=float(latest_close))
 
                     # 4. Esegui azione su Alpaca
                     signal = {
                         'symbol': ticker,
                         'action': action_name,
                         'confidence': max(q_values),
-                        'portfolio_allocation': 0.2  # 20% del portfolio
+                        'portfolio_allocation': 0.2,  # 20% del portfolio
+                        'price': float(latest_close)
                     }
 
-                    result = self.trader.execute_strategy_signal(signal)
+                    result = self._execute_signal(signal)
 
                     if result['executed']:
                         print(f"✅ {result['message']}")
@@ -498,13 +869,8 @@ class AlpacaPaperTradingBackend:
                     print(f"   Profit/Loss: ${account_summary['profit_loss']:,.2f} ({account_summary['profit_loss_pct']:.2f}%)")
 
                     # Salva storico
-                    self.portfolio_history.append({
-                        'timestamp': datetime.now(),
-                        'ticker': ticker,
-                        'action': action_name,
-                        'portfolio_value': account_summary['portfolio_value'],
-                        'profit_loss': account_summary['profit_loss']
-                    })
+                    self._record_snapshot(ticker, action_name, float(latest_close), result['executed'],
+                                          account_summary)
 
                 except Exception as e:
                     print(f"❌ Errore durante l'iterazione: {e}")
@@ -516,6 +882,21 @@ class AlpacaPaperTradingBackend:
         except KeyboardInterrupt:
             print("\n\n🛑 Trading interrotto dall'utente")
             self._save_history()
+        finally:
+            if self.history is not None:
+                self.history.flush()
+
+        self._print_history_stats()
+
+        if self.trader.state is not None:
+            state_stats = self.trader.state.get_stats()
+            print(f"\n🗂️ State cache: {state_stats['reads']} letture, {state_stats['reconciliations']} "
+                  f"riconciliazioni, {state_stats['drifts']} drift")
+
+        stats = self.trader.get_stats()
+        print(f"\n🔌 HTTP: {stats['requests']} richieste, {stats['connections_opened']} connessioni aperte "
+              f"(riuso {stats['connection_reuse_ratio']:.0%}), {stats['retries']} retry, "
+              f"latenza media {stats['avg_latency_ms']:.0f}ms")
 
     def _prepare_observation(self, bars: pd.DataFrame) -> np.ndarray:
         """Prepara observation vector dai bars"""
@@ -551,6 +932,13 @@ class AlpacaPaperTradingBackend:
 
         return obs
 
+    def _print_history_stats(self):
+        if self.history is None:
+            return
+        stats = self.history.get_stats()
+        print(f"\n🗂️ Storico: {stats['events_written']} eventi in {stats['path']} "
+              f"({stats['flushes']} scritture, {stats['avg_flush_ms']:.1f}ms medi)")
+
     def _save_history(self):
         """Salva storico portfolio"""
         if self.portfolio_history:
@@ -0,0 +1,504 @@
+"""
+Async Trading Backend
+Loop live multi-symbol su asyncio: bars concorrenti, un'inferenza batch per tick, ordini concorrenti
+
+Ogni tick esegue quattro fasi: (1) bars di tutti i symbol (endpoint
+multi-symbol o una richiesta per symbol in parallelo), (2) un forward batch
+per ensemble su tutte le osservazioni, (3) ordini in parallelo (i HOLD non
+fanno chiamate), (4) un solo account summary. Le chiamate REST usano il
+client sincrono con session condivisa in un thread pool dedicato; le latenze
+di ogni fase vengono loggate e confrontate con il budget del tick.
+run_stream() sostituisce il polling con lo stream websocket (market_stream):
+un tick parte solo quando arrivano bars nuovi.
+"""
+
+import time
+import asyncio
+import functools
+from collections import deque
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.trading.alpaca_paper_trader import AlpacaPaperTradingBackend
+from src.trading.market_stream import AlpacaBarStream, BarWindow, DEFAULT_STREAM_URL
+from src.backtest_engine.fast_backtest import ensemble_policy, ensemble_weights
+
+ACTION_NAMES = ('SHORT', 'HOLD', 'LONG')
+TICK_PHASES = ('bars', 'inference', 'orders', 'account', 'total')
+
+
+def predict_batch(ensemble, states):
+    """
+    Azioni e Q-values pesati per un batch di osservazioni con un solo forward
+
+    Args:
+        ensemble: ReWTSEnsembleController (o RemoteEnsemble, che ha predict_batch)
+        states: Array (N, state_dim)
+
+    Returns:
+        Tuple (actions (N,), q_values (N, action_dim))
+    """
+    states = np.asarray(states, dtype=np.float32)
+    if hasattr(ensemble, 'predict_batch'):
+        return ensemble.predict_batch(states)
+
+    policy = ensemble_policy(ensemble)
+    if policy is None:
+        # Ensemble vuoto: HOLD come predict_ensemble
+        q_values = np.tile(np.array([0.0, 1.0, 0.0]), (len(states), 1))
+        return np.ones(len(states), dtype=np.int64), q_values
+    if getattr(ensemble, 'stacked_policy', None) is not policy:
+        ensemble.stacked_policy = policy
+
+    q_values = policy.weighted_q_values(states, ensemble_weights(ensemble))
+    return np.argmax(q_values, axis=1), q_values
+
+
+class AsyncAlpacaTradingBackend(AlpacaPaperTradingBackend):
+    """Backend live per più symbol con fasi concorrenti e budget di latenza per tick"""
+
+    def __init__(
+        self,
+        api_key: str,
+        secret_key: str,
+        max_workers: int = 16,
+        bars_mode: str = 'multi',
+        timeframe: str = '1Day',
+        bars_limit: int = 200,
+        bars_lookback_days: int = 400,
+        min_bars: int = 50,
+        portfolio_allocation: Optional[float] = None,
+        tick_budget_ms: float = 2000.0,
+        **trader_kwargs
+    ):
+        """
+        Initialize async backend
+
+        Args:
+            api_key: Alpaca API Key
+            secret_key: Alpaca Secret Key
+            max_workers: Thread per le chiamate REST concorrenti (e connessioni del pool)
+            bars_mode: 'multi' (endpoint multi-symbol) o 'concurrent' (una richiesta per symbol)
+            timeframe: Timeframe dei bars
+            bars_limit: Bars tenuti per symbol
+            bars_lookback_days: Giorni di calendario richiesti (start dei bars)
+            min_bars: Bars minimi per calcolare gli indicatori
+            portfolio_allocation: Frazione del buying power per ordine (default: min(0.2, 1/N symbol))
+            tick_budget_ms: Budget di latenza del tick (oltre viene loggato un warning)
+            **trader_kwargs: Argomenti di AlpacaPaperTrader (base_url, timeout, ...)
+        """
+        if bars_mode not in ('multi', 'concurrent'):
+            raise ValueError(f"Unknown bars mode: {bars_mode}")
+
+        trader_kwargs.setdefault('pool_maxsize', max_workers)
+        super().__init__(api_key, secret_key, **trader_kwargs)
+
+        self.bars_mode = bars_mode
+        self.timeframe = timeframe
+        self.bars_limit = bars_limit
+        self.bars_lookback_days = bars_lookback_days
+        self.min_bars = min_bars
+        self.portfolio_allocation = portfolio_allocation
+        self.tick_budget_ms = tick_budget_ms
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='alpaca-io')
+        self.tick_timings = deque(maxlen=1000)
+        self.ticks = 0
+        self.budget_overruns = 0
+        self.errors = 0
+        self.stream = None
+        self.windows = None
+
+    async def _call(self, fn, *args, **kwargs):
+        """Esegue una chiamata bloccante nel thread pool del backend"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+
+    def _bars_start(self):
+        return (datetime.now() - timedelta(days=self.bars_lookback_days)).strftime('%Y-%m-%d')
+
+    async def fetch_bars(self, symbols: List[str]) -> Dict:
+        """
+        Bars di tutti i symbol
+
+        Returns:
+            Dict symbol -> DataFrame (o l'eccezione della richiesta in modalità concurrent)
+        """
+        start = self._bars_start()
+        if self.bars_mode == 'multi':
+            return await self._call(self.trader.get_multi_bars, symbols, self.timeframe,
+                                    start=start, limit=self.bars_limit)
+
+        results = await asyncio.gather(
+            *(self._call(self.trader.get_bars, symbol, self.timeframe, start=start, limit=self.bars_limit)
+              for symbol in symbols),
+            return_exceptions=True
+        )
+        return dict(zip(symbols, results))
+
+    def _infer(self, ensembles: Dict, observations: Dict) -> Dict:
+        """Un forward batch per ensemble distinto (symbol che condividono il modello vanno insieme)"""
+        groups = {}
+        for symbol in observations:
+            ensemble = ensembles[symbol]
+            groups.setdefault(id(ensemble), (ensemble, []))[1].append(symbol)
+
+        decisions = {}
+        for ensemble, symbols in groups.values():
+            actions, q_values = predict_batch(ensemble, np.stack([observations[s] for s in symbols]))
+            for i, symbol in enumerate(symbols):
+                decisions[symbol] = (int(actions[i]), np.asarray(q_values[i]))
+        return decisions
+
+    async def submit_orders(self, signals: List[Dict]) -> List[Dict]:
+        """Segnali eseguiti in parallelo; HOLD risolti localmente senza chiamate REST"""
+        async def submit(signal):
+            if signal['action'] == 'HOLD':
+                return {'symbol': signal['symbol'], 'action': 'HOLD', 'executed': False,
+                        'order_id': None, 'message': 'HOLD - nessuna azione'}
+            try:
+                return await self._call(self._execute_signal, signal)
+            except Exception as e:
+                return {'symbol': signal['symbol'], 'action': signal['action'], 'executed': False,
+                        'order_id': None, 'message': f"Errore: {e}", 'error': True}
+
+        return list(await asyncio.gather(*(submit(signal) for signal in signals)))
+
+    def _observe(self, bars_by_symbol: Dict, symbols: List[str]):
+        """Osservazioni e ultimo close dei symbol con abbastanza bars"""
+        observations = {}
+        latest_close = {}
+        for symbol in symbols:
+            bars = bars_by_symbol.get(symbol)
+            if isinstance(bars, Exception):
+                print(f"❌ {symbol}: errore nel download dei bars: {bars}")
+                continue
+            if bars is None or bars.empty or len(bars) < self.min_bars:
+                print(f"⚠️ {symbol}: dati insufficienti ({0 if bars is None else len(bars)} bars)")
+                continue
+            observations[symbol] = self._prepare_observation(bars)
+            latest_close[symbol] = float(bars['close'].iloc[-1])
+            if self.trader.state is not None:
+                self.trader.state.mark_price(symbol, latest_close[symbol])
+        return observations, latest_close
+
+    async def _act(self, ensembles: Dict, observations: Dict, latest_close: Dict,
+                   num_symbols: int, timings: Dict, tick_start: float) -> Dict:
+        """Inferenza batch, ordini concorrenti e account summary; completa i timings del tick"""
+        # Inferenza batch
+        phase_start = time.perf_counter()
+        decisions = await self._call(self._infer, ensembles, observations) if observations else {}
+        timings['inference'] = 1000 * (time.perf_counter() - phase_start)
+
+        # Ordini concorrenti
+        allocation = self.portfolio_allocation or min(0.2, 1.0 / max(num_symbols, 1))
+        signals = [
+            {
+                'symbol': symbol,
+                'action': ACTION_NAMES[action],
+                'confidence': float(np.max(q_values)),
+                'portfolio_allocation': allocation,
+                'price': latest_close[symbol]
+            }
+            for symbol, (action, q_values) in decisions.items()
+        ]
+        for signal, (_, q_values) in zip(signals, decisions.values()):
+            self._record('decision', signal['symbol'], action=signal['action'], q_values=q_values,
+                         close=signal['price'])
+        phase_start = time.perf_counter()
+        results = await self.submit_orders(signals)
+        timings['orders'] = 1000 * (time.perf_counter() - phase_start)
+
+        # Un solo account summary per tick (dalla memoria con la state cache)
+        phase_start = time.perf_counter()
+        account = await self._call(self.trader.get_account_summary)
+        timings['account'] = 1000 * (time.perf_counter() - phase_start)
+
+        timings['total'] = 1000 * (time.perf_counter() - tick_start)
+        self.ticks += 1
+        self.tick_timings.append(timings)
+        if timings['total'] > self.tick_budget_ms:
+            self.budget_overruns += 1
+
+        for result in results:
+            self._record_snapshot(result['symbol'], result['action'], latest_close.get(result['symbol']),
+                                  result['executed'], account)
+
+        return {'decisions': decisions, 'results': results, 'account': account, 'timings': timings}
+
+    async def run_tick(self, ensembles: Dict, symbols: List[str]) -> Dict:
+        """
+        Un tick del loop: bars, inferenza, ordini, account
+
+        Returns:
+            Dict con decisions, results, account e timings (ms per fase)
+        """
+        timings = {}
+        tick_start = time.perf_counter()
+
+        phase_start = time.perf_counter()
+        bars_by_symbol = await self.fetch_bars(symbols)
+        timings['bars'] = 1000 * (time.perf_counter() - phase_start)
+
+        observations, latest_close = self._observe(bars_by_symbol, symbols)
+        return await self._act(ensembles, observations, latest_close, len(symbols), timings, tick_start)
+
+    def _log_tick(self, iteration, tick):
+        for result in tick['results']:
+            action, q_values = tick['decisions'][result['symbol']]
+            icon = '✅' if result['executed'] else ('❌' if result.get('error') else 'ℹ️')
+            print(f"{icon} {result['symbol']:<6} {ACTION_NAMES[action]:<5} "
+                  f"Q=[{', '.join(f'{q:.3f}' for q in q_values)}] {result['message']}")
+
+        account = tick['account']
+        print(f"💰 Portfolio: ${account['portfolio_value']:,.2f} | "
+              f"P/L: ${account['profit_loss']:,.2f} ({account['profit_loss_pct']:.2f}%)")
+
+        timings = tick['timings']
+        over = timings['total'] > self.tick_budget_ms
+        print(f"{'⚠️' if over else '⏱️'} Tick {iteration}: " +
+              ' | '.join(f"{phase} {timings[phase]:.0f}ms" for phase in TICK_PHASES) +
+              f" (budget {self.tick_budget_ms:.0f}ms{', SUPERATO' if over else ''})")
+
+    @staticmethod
+    def _ensemble_map(ensembles, symbols: List[str]) -> Dict:
+        if not isinstance(ensembles, dict):
+            ensembles = {symbol: ensembles for symbol in symbols}
+        missing = [s for s in symbols if s not in ensembles]
+        if missing:
+            raise ValueError(f"No ensemble for symbols: {missing}")
+        return ensembles
+
+    async def run(self, ensembles, symbols: List[str], check_interval: float = 60,
+                  max_iterations: Optional[int] = None):
+        """
+        Loop live asincrono (tick a cadenza fissa, i tick in ritardo non si accumulano)
+
+        Args:
+            ensembles: Ensemble unico per tutti i symbol o dict symbol -> ensemble
+            symbols: Symbol da tradare
+            check_interval: Secondi fra l'inizio di due tick
+            max_iterations: Numero massimo di tick (None = infinito)
+        """
+        ensembles = self._ensemble_map(ensembles, symbols)
+
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        iteration = 0
+
+        while max_iterations is None or iteration < max_iterations:
+            iteration += 1
+            print(f"\n[Tick {iteration}] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {len(symbols)} symbols")
+
+            try:
+                tick = await self.run_tick(ensembles, symbols)
+                self._log_tick(iteration, tick)
+            except Exception as e:
+                self.errors += 1
+                print(f"❌ Errore durante il tick: {e}")
+
+            if max_iterations is not None and iteration >= max_iterations:
+                break
+
+            next_tick += check_interval
+            delay = next_tick - loop.time()
+            if delay < 0:
+                # Tick più lungo dell'intervallo: riparte subito senza recuperare i tick persi
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    def run_live_trading_multi(self, ensembles, symbols: List[str], check_interval: float = 60,
+                               max_iterations: Optional[int] = None):
+        """
+        Versione bloccante di run() (come run_live_trading, ma per più symbol)
+
+        Args:
+            ensembles: Ensemble unico o dict symbol -> ensemble
+            symbols: Symbol da tradare
+            check_interval: Secondi fra due tick
+            max_iterations: Numero massimo di tick (None = infinito)
+        """
+        print(f"🚀 Avvio live trading async per {', '.join(symbols)}")
+        print(f"Check interval: {check_interval}s | Bars: {self.bars_mode} | Budget tick: {self.tick_budget_ms:.0f}ms")
+        print(f"=" * 60)
+
+        try:
+            asyncio.run(self.run(ensembles, symbols, check_interval, max_iterations))
+        except KeyboardInterrupt:
+            print("\n\n🛑 Trading interrotto dall'utente")
+            self._save_history()
+        finally:
+            self._pool.shutdown(wait=False)
+            if self.history is not None:
+                self.history.flush()
+
+        self._print_summary()
+
+    def _print_summary(self):
+        stats = self.get_stats()
+        if stats['ticks'] > 0:
+            print(f"\n⏱️ {stats['ticks']} tick, p50 {stats['p50_ms']['total']:.0f}ms, "
+                  f"p95 {stats['p95_ms']['total']:.0f}ms, budget superato {stats['budget_overruns']} volte")
+        if 'stream' in stats:
+            print(f"📡 Stream: {stats['stream']['bars']} bars, {stats['stream']['trades']} trade, "
+                  f"{stats['stream']['reconnects']} riconnessioni")
+        self._print_history_stats()
+
+    # ========== Streaming ==========
+
+    async def run_stream(self, ensembles, symbols: List[str], stream: Optional[AlpacaBarStream] = None,
+                         batch_window: float = 0.05, max_ticks: Optional[int] = None):
+        """
+        Loop live guidato dallo stream: inferenza solo quando arrivano bars nuovi
+
+        Le finestre vengono inizializzate con una sola richiesta REST (fetch_bars,
+        con il timeframe del backend: '1Min' per i bars dello stream), poi
+        aggiornate dai messaggi. I bars nuovi che arrivano entro batch_window dal
+        primo formano un tick (un forward batch per ensemble). Nei timings la
+        fase 'bars' è l'attesa del batch dopo il primo bar.
+
+        Args:
+            ensembles: Ensemble unico per tutti i symbol o dict symbol -> ensemble
+            symbols: Symbol da tradare
+            stream: AlpacaBarStream (default: feed IEX con le credenziali del trader)
+            batch_window: Secondi di attesa per raggruppare i bars dello stesso minuto
+            max_ticks: Numero massimo di tick (None = finché lo stream è attivo)
+        """
+        ensembles = self._ensemble_map(ensembles, symbols)
+
+        windows = BarWindow(maxlen=self.bars_limit)
+        seed = await self.fetch_bars(symbols)
+        for symbol in symbols:
+            bars = seed.get(symbol)
+            windows.seed(symbol, None if isinstance(bars, Exception) else bars)
+        self.windows = windows
+
+        self.stream = stream or AlpacaBarStream(self.trader.api_key, self.trader.secret_key, symbols)
+        queue = asyncio.Queue()
+
+        async def reader():
+            try:
+                async for message in self.stream.events():
+                    await queue.put(message)
+            finally:
+                await queue.put(None)
+
+        reader_task = asyncio.create_task(reader())
+        loop = asyncio.get_running_loop()
+        iteration = 0
+        ended = False
+
+        try:
+            while not ended and (max_ticks is None or iteration < max_ticks):
+                pending = set()
+                first_arrival = None
+                deadline = None
+
+                while True:
+                    if deadline is None:
+                        message = await queue.get()
+                    else:
+                        remaining = deadline - loop.time()
+                        if remaining <= 0:
+                            break
+                        try:
+                            message = await asyncio.wait_for(queue.get(), remaining)
+                        except asyncio.TimeoutError:
+                            break
+
+                    if message is None:
+                        ended = True
+                        break
+                    if message['T'] == 't':
+                        windows.update_trade(message)
+                        if self.trader.state is not None:
+                            self.trader.state.mark_price(message['S'], message['p'])
+                    elif message['S'] in ensembles and windows.update_bar(message):
+                        pending.add(message['S'])
+                        if first_arrival is None:
+                            first_arrival = time.perf_counter()
+                            deadline = loop.time() + batch_window
+
+                if not pending:
+                    continue
+
+                iteration += 1
+                print(f"\n[Tick {iteration}] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - "
+                      f"{len(pending)} bars nuovi")
+                timings = {'bars': 1000 * (time.perf_counter() - first_arrival)}
+                updated = sorted(pending)
+                try:
+                    observations, latest_close = self._observe({s: windows.frame(s) for s in updated}, updated)
+                    tick = await self._act(ensembles, observations, latest_close, len(symbols),
+                                           timings, first_arrival)
+                    self._log_tick(iteration, tick)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"❌ Errore durante il tick: {e}")
+        finally:
+            await self.stream.stop()
+            reader_task.cancel()
+            try:
+                await reader_task
+            except asyncio.CancelledError:
+                pass
+
+    def run_live_streaming(self, ensembles, symbols: List[str], stream_url: Optional[str] = None,
+                           batch_window: float = 0.05, max_ticks: Optional[int] = None):
+        """
+        Versione bloccante di run_stream()
+
+        Args:
+            ensembles: Ensemble unico o dict symbol -> ensemble
+            symbols: Symbol da tradare
+            stream_url: URL websocket (default: feed IEX di Alpaca; es. un BarReplayServer)
+            batch_window: Secondi di attesa per raggruppare i bars dello stesso minuto
+            max_ticks: Numero massimo di tick (None = infinito)
+        """
+        stream = AlpacaBarStream(self.trader.api_key, self.trader.secret_key, symbols,
+                                 url=stream_url or DEFAULT_STREAM_URL)
+
+        print(f"🚀 Avvio live trading in streaming per {', '.join(symbols)}")
+        print(f"Stream: {stream.url} | Timeframe seed: {self.timeframe} | Budget tick: {self.tick_budget_ms:.0f}ms")
+        print(f"=" * 60)
+
+        try:
+            asyncio.run(self.run_stream(ensembles, symbols, stream, batch_window, max_ticks))
+        except KeyboardInterrupt:
+            print("\n\n🛑 Trading interrotto dall'utente")
+            self._save_history()
+        finally:
+            self._pool.shutdown(wait=False)
+            if self.history is not None:
+                self.history.flush()
+
+        self._print_summary()
+
+    def get_stats(self) -> Dict:
+        """Latenze per fase (p50/p95 sugli ultimi tick), overrun del budget e statistiche HTTP"""
+        timings = list(self.tick_timings)
+        stats = {
+            'ticks': self.ticks,
+            'errors': self.errors,
+            'budget_overruns': self.budget_overruns,
+            'tick_budget_ms': self.tick_budget_ms,
+            'p50_ms': {},
+            'p95_ms': {},
+            'http': self.trader.get_stats()
+        }
+        if self.trader.state is not None:
+            stats['state_cache'] = self.trader.state.get_stats()
+        if self.stream is not None:
+            stats['stream'] = self.stream.get_stats()
+        if self.history is not None:
+            stats['history'] = self.history.get_stats()
+        for phase in TICK_PHASES:
+            values = [t[phase] for t in timings if phase in t]
+            if values:
+                stats['p50_ms'][phase] = float(np.percentile(values, 50))
+                stats['p95_ms'][phase] = float(np.percentile(values, 95))
+        return stats
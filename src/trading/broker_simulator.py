@@ -0,0 +1,600 @@
+"""
+Broker Simulator
+Simulatore locale del sottoinsieme della REST API Alpaca usato da AlpacaPaperTrader
+
+Rimanda lo storico di data/processed (o qualsiasi DataFrame OHLCV) con un
+orologio simulato e riempie gli ordini a mercato al close del bar corrente
+con slippage. L'orologio è deterministico (avanza di un bar quando un symbol
+già servito viene richiesto di nuovo, cioè una volta per tick del loop live,
+oppure con advance()) o in tempo reale accelerato (speedup). Serve per load
+test e regressioni del path live senza broker: il loop gira a migliaia di
+giorni simulati al minuto.
+
+Endpoint: /v2/account, /v2/positions, /v2/orders, /v2/clock,
+/v2/stocks/{symbol}/bars, /v2/stocks/bars, /v2/stocks/{symbol}/quotes/latest,
+/v2/stocks/{symbol}/trades/latest, più /sim/advance, /sim/stats, /sim/reset.
+"""
+
+import json
+import time
+import socket
+import uuid
+import random
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pandas as pd
+
+from src.trading.market_stream import ohlcv_frame
+from src.llm_agents.mock_deepseek_server import parse_latency_spec
+
+BAR_SECONDS = {'1Min': 60, '5Min': 300, '15Min': 900, '1Hour': 3600, '1Day': 86400}
+
+
+class SimulatedBroker:
+    """Stato del broker simulato: orologio sui bars, account cash, posizioni e ordini"""
+
+    def __init__(
+        self,
+        bars: Dict[str, pd.DataFrame],
+        initial_cash: float = 100000.0,
+        start_index: int = 200,
+        slippage_bps: float = 5.0,
+        slippage_std_bps: float = 0.0,
+        spread_bps: float = 2.0,
+        speedup: Optional[float] = None,
+        timeframe: str = '1Day',
+        seed: int = 0
+    ):
+        """
+        Initialize simulated broker
+
+        Args:
+            bars: Dict symbol -> DataFrame OHLCV (colonne minuscole o Open/High/... di data/processed)
+            initial_cash: Cash iniziale
+            start_index: Primo bar "corrente" (i precedenti sono lo storico visibile)
+            slippage_bps: Slippage fisso contro chi fa l'ordine (basis point sul close)
+            slippage_std_bps: Deviazione standard dello slippage casuale aggiuntivo (|N(0, std)|)
+            spread_bps: Spread bid/ask delle quotazioni
+            speedup: Secondi simulati per secondo reale (None = orologio deterministico per tick)
+            timeframe: Durata di un bar per lo speedup
+            seed: Seed dello slippage casuale (un generatore per symbol)
+        """
+        self.frames = {}
+        for symbol, df in bars.items():
+            df = ohlcv_frame(df)
+            if isinstance(df.index, pd.DatetimeIndex) and df.index.tz is not None:
+                df = df.tz_convert(None)
+            self.frames[symbol] = df
+        if not self.frames:
+            raise ValueError("No bars to replay")
+
+        # Timeline comune: unione dei timestamp, ogni symbol allineato con forward fill
+        timeline = sorted(set().union(*(df.index for df in self.frames.values())))
+        self.timeline = pd.DatetimeIndex(timeline)
+        self._close = {
+            symbol: df['close'].reindex(self.timeline).ffill().to_numpy(dtype=float)
+            for symbol, df in self.frames.items()
+        }
+
+        # Bars già serializzati: le richieste fanno solo uno slice
+        self._bar_payloads = {
+            symbol: [
+                {'t': ts.isoformat() + 'Z', 'o': float(row.open), 'h': float(row.high),
+                 'l': float(row.low), 'c': float(row.close), 'v': float(row.volume)}
+                for ts, row in zip(df.index, df.itertuples(index=False))
+            ]
+            for symbol, df in self.frames.items()
+        }
+
+        if not 0 <= start_index < len(self.timeline):
+            raise ValueError(f"start_index must be in [0, {len(self.timeline)})")
+
+        self.initial_cash = initial_cash
+        self.start_index = start_index
+        self.slippage_bps = slippage_bps
+        self.slippage_std_bps = slippage_std_bps
+        self.spread_bps = spread_bps
+        self.speedup = speedup
+        self.bar_seconds = BAR_SECONDS.get(timeframe, 86400)
+        self.seed = seed
+
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        """Riporta cash, posizioni, ordini e orologio allo stato iniziale"""
+        with self._lock:
+            # Un generatore per symbol: slippage indipendente dall'ordine di arrivo di ordini concorrenti
+            self._rngs = {symbol: random.Random(f"{self.seed}-{symbol}") for symbol in self.frames}
+            self.index = self.start_index
+            self.cash = self.initial_cash
+            self.positions = {}
+            self.orders = []
+            self._orders_by_id = {}
+            self._served = set()
+            self._last_equity = self.initial_cash
+            self._started = time.monotonic()
+            self.fills = 0
+            self.slippage_cost = 0.0
+            self.bars_advanced = 0
+
+    # ========== Orologio ==========
+
+    @property
+    def exhausted(self) -> bool:
+        return self.index >= len(self.timeline) - 1
+
+    def _sync_clock(self):
+        """Con speedup, allinea l'orologio al tempo reale trascorso"""
+        if self.speedup is None:
+            return
+        elapsed_bars = int((time.monotonic() - self._started) * self.speedup / self.bar_seconds)
+        target = min(self.start_index + elapsed_bars, len(self.timeline) - 1)
+        while self.index < target:
+            self._advance_one()
+
+    def _advance_one(self):
+        self._last_equity = self._equity()
+        self.index += 1
+        self.bars_advanced += 1
+        self._served.clear()
+
+    def advance(self, bars: int = 1) -> int:
+        """Avanza l'orologio di N bars (fermo all'ultimo); ritorna l'indice corrente"""
+        with self._lock:
+            for _ in range(bars):
+                if self.exhausted:
+                    break
+                self._advance_one()
+            return self.index
+
+    def _touch(self, symbols: List[str]):
+        """Orologio deterministico: un symbol già servito al bar corrente fa avanzare di un bar"""
+        if self.speedup is not None:
+            self._sync_clock()
+            return
+        if any(symbol in self._served for symbol in symbols) and not self.exhausted:
+            self._advance_one()
+        self._served.update(symbols)
+
+    @property
+    def now(self) -> pd.Timestamp:
+        return self.timeline[self.index]
+
+    def price(self, symbol: str) -> float:
+        if symbol not in self._close:
+            raise KeyError(symbol)
+        return float(self._close[symbol][self.index])
+
+    # ========== Market data ==========
+
+    def bars(self, symbols: List[str], limit: int = 100, touch: bool = True) -> Dict[str, List[Dict]]:
+        """
+        Ultimi `limit` bars di ogni symbol fino al bar corrente (incluso)
+
+        Le date start/end delle richieste vengono ignorate: l'orologio simulato
+        sostituisce il tempo reale.
+
+        Args:
+            symbols: Symbol richiesti (quelli senza dati vengono omessi)
+            limit: Bars per symbol
+            touch: Conta la richiesta per l'orologio deterministico (False per le pagine successive)
+        """
+        with self._lock:
+            if touch:
+                self._touch(symbols)
+            result = {}
+            for symbol in symbols:
+                if symbol not in self.frames:
+                    continue
+                end = int(self.frames[symbol].index.searchsorted(self.now, side='right'))
+                result[symbol] = self._bar_payloads[symbol][max(0, end - limit):end]
+            return result
+
+    def latest_quote(self, symbol: str) -> Dict:
+        with self._lock:
+            self._sync_clock()
+            price = self.price(symbol)
+            half_spread = price * self.spread_bps / 2e4
+            return {'symbol': symbol, 'quote': {
+                'ap': price + half_spread, 'as': 1, 'bp': price - half_spread, 'bs': 1,
+                't': self.now.isoformat() + 'Z'
+            }}
+
+    def latest_trade(self, symbol: str) -> Dict:
+        with self._lock:
+            self._sync_clock()
+            return {'symbol': symbol, 'trade': {'p': self.price(symbol), 's': 100, 't': self.now.isoformat() + 'Z'}}
+
+    # ========== Account e posizioni ==========
+
+    def _equity(self) -> float:
+        return self.cash + sum(p['qty'] * self.price(symbol) for symbol, p in self.positions.items())
+
+    def account(self) -> Dict:
+        with self._lock:
+            self._sync_clock()
+            equity = self._equity()
+            # Alpaca restituisce i valori numerici come stringhe
+            return {
+                'id': 'sim-account',
+                'status': 'ACTIVE',
+                'currency': 'USD',
+                'cash': str(self.cash),
+                'buying_power': str(max(self.cash, 0.0)),
+                'portfolio_value': str(equity),
+                'equity': str(equity),
+                'last_equity': str(self._last_equity)
+            }
+
+    def _position_payload(self, symbol: str) -> Dict:
+        position = self.positions[symbol]
+        price = self.price(symbol)
+        qty = position['qty']
+        cost = qty * position['avg_entry_price']
+        market_value = qty * price
+        return {
+            'symbol': symbol,
+            'qty': str(qty),
+            'side': 'long' if qty >= 0 else 'short',
+            'avg_entry_price': str(position['avg_entry_price']),
+            'current_price': str(price),
+            'market_value': str(market_value),
+            'cost_basis': str(cost),
+            'unrealized_pl': str(market_value - cost),
+            'unrealized_plpc': str((market_value - cost) / abs(cost) if cost else 0.0)
+        }
+
+    def list_positions(self) -> List[Dict]:
+        with self._lock:
+            self._sync_clock()
+            return [self._position_payload(symbol) for symbol in sorted(self.positions)]
+
+    def get_position(self, symbol: str) -> Optional[Dict]:
+        with self._lock:
+            self._sync_clock()
+            return self._position_payload(symbol) if symbol in self.positions else None
+
+    # ========== Ordini ==========
+
+    def _fill_price(self, symbol: str, side: str) -> float:
+        """Close del bar corrente più slippage contro chi fa l'ordine"""
+        bps = self.slippage_bps
+        if self.slippage_std_bps > 0:
+            bps += abs(self._rngs[symbol].gauss(0.0, self.slippage_std_bps))
+        sign = 1 if side == 'buy' else -1
+        return self.price(symbol) * (1 + sign * bps / 1e4)
+
+    def submit_order(self, order: Dict) -> Dict:
+        """
+        Ordine a mercato eseguito subito (limit/stop non supportati)
+
+        Raises:
+            ValueError: Ordine non valido o buying power insufficiente (422 via HTTP)
+        """
+        with self._lock:
+            self._sync_clock()
+            symbol = order.get('symbol')
+            side = order.get('side')
+            if symbol not in self.frames:
+                raise ValueError(f"asset {symbol} not found")
+            if side not in ('buy', 'sell'):
+                raise ValueError("side must be buy or sell")
+            if order.get('type', 'market') != 'market':
+                raise ValueError("only market orders are supported by the simulator")
+
+            fill_price = self._fill_price(symbol, side)
+            if order.get('qty') is not None:
+                qty = float(order['qty'])
+            elif order.get('notional') is not None:
+                qty = float(order['notional']) / fill_price
+            else:
+                raise ValueError("qty or notional is required")
+            if qty <= 0:
+                raise ValueError("qty must be > 0")
+
+            signed_qty = qty if side == 'buy' else -qty
+            if side == 'buy' and qty * fill_price > self.cash + 1e-6:
+                raise ValueError("insufficient buying power")
+
+            self._apply_fill(symbol, signed_qty, fill_price)
+            return self._record_order(order, symbol, side, qty, fill_price)
+
+    def _apply_fill(self, symbol: str, signed_qty: float, fill_price: float):
+        position = self.positions.get(symbol, {'qty': 0.0, 'avg_entry_price': 0.0})
+        new_qty = position['qty'] + signed_qty
+        if abs(new_qty) < 1e-9:
+            self.positions.pop(symbol, None)
+        else:
+            if position['qty'] == 0 or (position['qty'] > 0) == (signed_qty > 0):
+                # Aumento della posizione: prezzo medio pesato
+                position['avg_entry_price'] = (
+                    position['qty'] * position['avg_entry_price'] + signed_qty * fill_price
+                ) / new_qty
+            elif (position['qty'] > 0) != (new_qty > 0):
+                # Inversione: la parte residua ha il prezzo del fill
+                position['avg_entry_price'] = fill_price
+            position['qty'] = new_qty
+            self.positions[symbol] = position
+
+        self.cash -= signed_qty * fill_price
+        self.fills += 1
+        self.slippage_cost += abs(signed_qty) * abs(fill_price - self.price(symbol))
+
+    def _record_order(self, request: Dict, symbol: str, side: str, qty: float, fill_price: float) -> Dict:
+        timestamp = self.now.isoformat() + 'Z'
+        order = {
+            'id': str(uuid.uuid4()),
+            'client_order_id': request.get('client_order_id') or f"sim-{len(self.orders)}",
+            'symbol': symbol,
+            'side': side,
+            'type': 'market',
+            'time_in_force': request.get('time_in_force', 'day'),
+            'qty': str(qty) if request.get('qty') is not None else None,
+            'notional': str(request['notional']) if request.get('notional') is not None else None,
+            'filled_qty': str(qty),
+            'filled_avg_price': str(fill_price),
+            'status': 'filled',
+            'submitted_at': timestamp,
+            'filled_at': timestamp
+        }
+        self.orders.append(order)
+        self._orders_by_id[order['id']] = order
+        return order
+
+    def close_position(self, symbol: str) -> Dict:
+        """
+        Chiude tutta la posizione con un ordine a mercato
+
+        Raises:
+            KeyError: Nessuna posizione sul symbol (404 via HTTP)
+        """
+        with self._lock:
+            self._sync_clock()
+            position = self.positions.get(symbol)
+            if position is None:
+                raise KeyError(symbol)
+            qty = abs(position['qty'])
+            side = 'sell' if position['qty'] > 0 else 'buy'
+            fill_price = self._fill_price(symbol, side)
+            self._apply_fill(symbol, -position['qty'], fill_price)
+            return self._record_order({'qty': qty}, symbol, side, qty, fill_price)
+
+    def close_all_positions(self) -> List[Dict]:
+        with self._lock:
+            return [{'symbol': symbol, 'status': 200, 'body': self.close_position(symbol)}
+                    for symbol in sorted(self.positions)]
+
+    def list_orders(self, status: str = 'open', limit: int = 100) -> List[Dict]:
+        with self._lock:
+            # Gli ordini a mercato sono eseguiti subito: nessun ordine aperto
+            orders = [] if status == 'open' else self.orders
+            return list(reversed(orders[-limit:]))
+
+    def get_order(self, order_id: str) -> Dict:
+        with self._lock:
+            return self._orders_by_id[order_id]
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            equity = self._equity()
+            return {
+                'now': self.now.isoformat(),
+                'index': self.index,
+                'bars_advanced': self.bars_advanced,
+                'exhausted': self.exhausted,
+                'orders': len(self.orders),
+                'fills': self.fills,
+                'slippage_cost': self.slippage_cost,
+                'cash': self.cash,
+                'equity': equity,
+                'return_pct': (equity / self.initial_cash - 1) * 100,
+                'positions': {s: p['qty'] for s, p in self.positions.items()}
+            }
+
+
+class BrokerSimulatorServer:
+    """Server HTTP compatibile con la REST API Alpaca (trading e market data) sopra un SimulatedBroker"""
+
+    def __init__(self, broker: SimulatedBroker, host: str = '127.0.0.1', port: int = 0,
+                 latency: str = 'fixed:0'):
+        """
+        Initialize simulator server
+
+        Args:
+            broker: SimulatedBroker
+            host: Interfaccia di ascolto
+            port: Porta (0 = porta libera scelta dal sistema)
+            latency: Latenza di ogni risposta (specifica di parse_latency_spec)
+        """
+        self.broker = broker
+        self.latency_spec = latency
+        self._sample_latency = parse_latency_spec(latency)
+        self._rng = random.Random(broker.seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.by_endpoint = {}
+        self._thread = None
+
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Avvia il server in un thread daemon"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='broker-sim', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def get_stats(self):
+        with self._lock:
+            return {'requests': self.requests, 'by_endpoint': dict(self.by_endpoint),
+                    'broker': self.broker.get_stats()}
+
+    def handle(self, method: str, path: str, query: Dict, body: Optional[Dict]):
+        """
+        Instrada una richiesta
+
+        Returns:
+            (status, payload)
+        """
+        broker = self.broker
+        parts = [p for p in path.split('/') if p]
+        endpoint = _endpoint_label(parts)
+        with self._lock:
+            self.requests += 1
+            self.by_endpoint[f"{method} {endpoint}"] = self.by_endpoint.get(f"{method} {endpoint}", 0) + 1
+            latency = self._sample_latency(self._rng)
+        if latency > 0:
+            time.sleep(latency)
+
+        try:
+            if parts[:1] == ['sim']:
+                if parts[1:] == ['advance'] and method == 'POST':
+                    broker.advance(int(query.get('bars', 1)))
+                    return 200, broker.get_stats()
+                if parts[1:] == ['reset'] and method == 'POST':
+                    broker.reset()
+                    return 200, broker.get_stats()
+                if parts[1:] == ['stats']:
+                    return 200, self.get_stats()
+
+            elif parts[:1] == ['v2']:
+                rest = parts[1:]
+                if rest == ['account'] and method == 'GET':
+                    return 200, broker.account()
+                if rest == ['clock'] and method == 'GET':
+                    return 200, {'timestamp': broker.now.isoformat() + 'Z', 'is_open': not broker.exhausted}
+
+                if rest[:1] == ['positions']:
+                    if len(rest) == 1:
+                        return 200, broker.list_positions() if method == 'GET' else broker.close_all_positions()
+                    if method == 'GET':
+                        position = broker.get_position(rest[1])
+                        return (200, position) if position else (404, _error('position does not exist'))
+                    return 200, broker.close_position(rest[1])
+
+                if rest[:1] == ['orders']:
+                    if method == 'POST':
+                        return 200, broker.submit_order(body or {})
+                    if len(rest) == 1:
+                        if method == 'DELETE':
+                            return 207, []
+                        return 200, broker.list_orders(query.get('status', 'open'), int(query.get('limit', 100)))
+                    if method == 'DELETE':
+                        return 422, _error('order is already filled')
+                    return 200, broker.get_order(rest[1])
+
+                if rest[:1] == ['stocks'] and method == 'GET':
+                    limit = int(query.get('limit', 1000))
+                    if rest[1:] == ['bars']:
+                        return 200, self._multi_bars(query, limit)
+                    symbol = rest[1]
+                    if rest[2:] == ['bars']:
+                        bars = broker.bars([symbol], limit).get(symbol)
+                        if bars is None:
+                            return 404, _error(f"symbol {symbol} not found")
+                        return 200, {'symbol': symbol, 'bars': bars, 'next_page_token': None}
+                    if rest[2:] == ['quotes', 'latest']:
+                        return 200, broker.latest_quote(symbol)
+                    if rest[2:] == ['trades', 'latest']:
+                        return 200, broker.latest_trade(symbol)
+
+        except KeyError as e:
+            return 404, _error(f"{e.args[0]} not found")
+        except ValueError as e:
+            return 422, _error(str(e))
+
+        return 404, _error(f"Unknown endpoint {method} {path}")
+
+    def _multi_bars(self, query: Dict, limit: int) -> Dict:
+        """Endpoint multi-symbol: `limit` è sul totale dei bars, con paginazione via page_token"""
+        symbols = [s for s in query.get('symbols', '').split(',') if s]
+        offset = int(query.get('page_token') or 0)
+        all_bars = self.broker.bars(symbols, 10000, touch=offset == 0)
+        flat = [(symbol, bar) for symbol in symbols for bar in all_bars.get(symbol, [])]
+
+        page = flat[offset:offset + limit]
+        bars = {}
+        for symbol, bar in page:
+            bars.setdefault(symbol, []).append(bar)
+        next_offset = offset + limit
+        return {'bars': bars, 'next_page_token': str(next_offset) if next_offset < len(flat) else None}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                # Header e body sono scritti separatamente: senza TCP_NODELAY il delayed ACK
+                # del client aggiunge ~40ms a ogni risposta keep-alive
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def _dispatch(self, method):
+                url = urlparse(self.path)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length > 0 else b''
+
+                if not url.path.startswith('/sim') and not self.headers.get('APCA-API-KEY-ID'):
+                    status, payload = 401, _error('request is not authorized')
+                else:
+                    try:
+                        body = json.loads(raw) if raw else None
+                    except json.JSONDecodeError:
+                        body = None
+                    status, payload = server.handle(method, url.path, query, body)
+
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def do_DELETE(self):
+                self._dispatch('DELETE')
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _endpoint_label(parts):
+    """Path con symbol e id sostituiti da segnaposto (statistiche per endpoint)"""
+    label = list(parts)
+    if len(label) > 2 and label[:2] in (['v2', 'positions'], ['v2', 'orders']):
+        label[2] = '{id}' if label[1] == 'orders' else '{symbol}'
+    if len(label) > 2 and label[:2] == ['v2', 'stocks'] and label[2] != 'bars':
+        label[2] = '{symbol}'
+    return '/' + '/'.join(label)
+
+
+def _error(message):
+    return {'code': 40010001, 'message': message}
@@ -0,0 +1,337 @@
+"""
+Trade History Writer
+Storico append-only a batch (JSONL o SQLite) di decisioni, ordini, fill e snapshot del portfolio
+
+Gli eventi vengono accumulati in un buffer e scritti ogni flush_every eventi o
+flush_interval secondi (thread di flush in background), quindi la memoria resta
+limitata anche con il loop attivo per settimane. Gli intenti d'ordine vengono
+scritti subito (durable=True) prima dell'invio al broker: alla riapertura del
+file, gli intenti senza esito sono ordini da verificare col broker. Una riga
+JSONL troncata da un crash viene rimossa al riavvio (le righe corrotte in mezzo
+al file vengono solo saltate) e la numerazione (seq) riprende dall'ultimo
+evento salvato.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+EVENT_KINDS = ('decision', 'order_intent', 'order', 'fill', 'portfolio')
+
+
+def _history_format(path: str) -> str:
+    return 'sqlite' if os.path.splitext(path)[1].lower() in ('.db', '.sqlite', '.sqlite3') else 'jsonl'
+
+
+class TradeHistoryWriter:
+    """Writer append-only a batch con recovery al riavvio"""
+
+    def __init__(
+        self,
+        path: str,
+        flush_every: int = 50,
+        flush_interval: float = 5.0,
+        fsync: bool = True,
+        recent_size: int = 1000,
+        session: Optional[str] = None
+    ):
+        """
+        Initialize history writer
+
+        Args:
+            path: File di storico (.jsonl, oppure .db/.sqlite per SQLite)
+            flush_every: Eventi nel buffer che forzano una scrittura
+            flush_interval: Secondi massimi fra due scritture (0 = nessun thread di flush)
+            fsync: os.fsync dopo ogni batch JSONL (synchronous=FULL per SQLite)
+            recent_size: Eventi recenti tenuti in memoria (recent())
+            session: Identificativo della sessione (default: timestamp di avvio)
+        """
+        self.path = path
+        self.format = _history_format(path)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.session = session or datetime.now().strftime('%Y%m%d_%H%M%S')
+
+        self._lock = threading.RLock()
+        self._buffer = []
+        self._recent = deque(maxlen=recent_size)
+        self._closed = False
+
+        self.events_written = 0
+        self.flushes = 0
+        self.flush_time = 0.0
+        self.truncated_bytes = 0
+        self.corrupt_lines = 0
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if self.format == 'sqlite':
+            self._open_sqlite()
+        else:
+            self._open_jsonl()
+
+        self._stop = threading.Event()
+        self._thread = None
+        if flush_interval > 0:
+            self._thread = threading.Thread(target=self._flush_loop, name='history-writer', daemon=True)
+            self._thread.start()
+
+    # ========== Apertura e recovery ==========
+
+    def _open_jsonl(self):
+        """
+        Rimuove un'eventuale riga finale incompleta e riprende seq dall'ultimo evento
+
+        Solo l'ultima riga senza newline è l'artefatto atteso di un crash e viene
+        troncata; le righe corrotte in mezzo al file vengono segnalate e saltate,
+        senza toccare gli eventi validi che le seguono.
+        """
+        self.last_seq = 0
+        self.recovered_events = 0
+        self._pending_intents = {}
+
+        if os.path.exists(self.path):
+            offset = 0
+            with open(self.path, 'rb') as f:
+                for line_number, line in enumerate(f, start=1):
+                    if not line.endswith(b'\n'):
+                        # Scrittura interrotta da un crash: la coda non è un evento valido
+                        self.truncated_bytes = len(line)
+                        break
+                    offset += len(line)
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        self.corrupt_lines += 1
+                        print(f"⚠️ Storico {self.path}: riga {line_number} non valida, ignorata")
+                        continue
+                    self._recover_event(event)
+
+            if self.truncated_bytes:
+                with open(self.path, 'r+b') as f:
+                    f.truncate(offset)
+
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _open_sqlite(self):
+        self.last_seq = 0
+        self.recovered_events = 0
+        self._pending_intents = {}
+
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(f"PRAGMA synchronous={'FULL' if self.fsync else 'NORMAL'}")
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS events ('
+            'seq INTEGER PRIMARY KEY, ts TEXT NOT NULL, session TEXT, kind TEXT NOT NULL, '
+            'symbol TEXT, data TEXT NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS events_kind ON events (kind)')
+        self._db.commit()
+
+        for (data,) in self._db.execute(
+                "SELECT data FROM events WHERE kind IN ('order_intent', 'order') ORDER BY seq"):
+            self._recover_event(json.loads(data))
+        row = self._db.execute('SELECT COUNT(*), COALESCE(MAX(seq), 0) FROM events').fetchone()
+        self.recovered_events, self.last_seq = row[0], row[1]
+
+    def _recover_event(self, event: Dict):
+        self.recovered_events += 1
+        self.last_seq = max(self.last_seq, event.get('seq', 0))
+        self._track_intent(event)
+
+    def _track_intent(self, event: Dict):
+        if event['kind'] == 'order_intent':
+            self._pending_intents[event['seq']] = event
+        elif event['kind'] == 'order' and event.get('intent') is not None:
+            self._pending_intents.pop(event['intent'], None)
+
+    def resolve_intent(self, intent: Dict, status: str, **fields) -> int:
+        """Chiude un intento pendente con un evento 'order' (es. dopo la verifica col broker)"""
+        return self.record('order', intent.get('symbol'), intent=intent['seq'], action=intent.get('action'),
+                           status=status, executed=None, **fields)
+
+    def pending_intents(self) -> List[Dict]:
+        """Intenti d'ordine senza esito registrato (es. crash fra invio e risposta): da verificare col broker"""
+        with self._lock:
+            return list(self._pending_intents.values())
+
+    # ========== Scrittura ==========
+
+    def record(self, kind: str, symbol: Optional[str] = None, durable: bool = False, **fields) -> int:
+        """
+        Aggiunge un evento al buffer
+
+        Args:
+            kind: Uno di EVENT_KINDS
+            symbol: Ticker (None per eventi di portfolio)
+            durable: Scrive subito su disco (per gli intenti d'ordine, prima dell'invio)
+            **fields: Campi dell'evento (serializzabili in JSON)
+
+        Returns:
+            seq dell'evento
+        """
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Unknown event kind: {kind}")
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("History writer is closed")
+            self.last_seq += 1
+            event = {
+                'seq': self.last_seq,
+                'ts': datetime.now().isoformat(),
+                'session': self.session,
+                'kind': kind,
+                'symbol': symbol,
+                **fields
+            }
+            self._buffer.append(event)
+            self._recent.append(event)
+            self._track_intent(event)
+
+            if durable or len(self._buffer) >= self.flush_every:
+                self._flush_locked()
+            return event['seq']
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        start = time.perf_counter()
+        batch, self._buffer = self._buffer, []
+
+        try:
+            if self.format == 'sqlite':
+                with self._db:
+                    self._db.executemany(
+                        'INSERT INTO events (seq, ts, session, kind, symbol, data) VALUES (?, ?, ?, ?, ?, ?)',
+                        [(e['seq'], e['ts'], e['session'], e['kind'], e['symbol'],
+                          json.dumps(e, default=_json_default)) for e in batch]
+                    )
+            else:
+                self._file.write(''.join(json.dumps(e, default=_json_default) + '\n' for e in batch))
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+        except Exception:
+            # Il batch resta nel buffer per il prossimo tentativo
+            self._buffer = batch + self._buffer
+            raise
+
+        self.events_written += len(batch)
+        self.flushes += 1
+        self.flush_time += time.perf_counter() - start
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ History writer: flush fallito: {e}")
+
+    def close(self):
+        """Scrive il buffer residuo e chiude il file"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            self._closed = True
+            if self.format == 'sqlite':
+                self._db.close()
+            else:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    # ========== Lettura ==========
+
+    def recent(self, kind: Optional[str] = None) -> List[Dict]:
+        """Ultimi eventi in memoria (al massimo recent_size)"""
+        with self._lock:
+            return [e for e in self._recent if kind is None or e['kind'] == kind]
+
+    def read(self, kinds: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Tutti gli eventi su disco (dopo un flush), in ordine di seq"""
+        self.flush()
+        yield from read_history(self.path, kinds)
+
+    def to_dataframe(self, kind: str) -> pd.DataFrame:
+        return pd.DataFrame(list(self.read([kind])))
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'path': self.path,
+                'format': self.format,
+                'events_written': self.events_written,
+                'buffered': len(self._buffer),
+                'flushes': self.flushes,
+                'avg_flush_ms': 1000 * self.flush_time / self.flushes if self.flushes else 0.0,
+                'recovered_events': self.recovered_events,
+                'truncated_bytes': self.truncated_bytes,
+                'corrupt_lines': self.corrupt_lines,
+                'pending_intents': len(self._pending_intents)
+            }
+
+
+def read_history(path: str, kinds: Optional[List[str]] = None) -> Iterator[Dict]:
+    """
+    Legge uno storico JSONL o SQLite senza aprirlo in scrittura
+
+    Args:
+        path: File di storico
+        kinds: Tipi di evento da tenere (None = tutti)
+    """
+    if _history_format(path) == 'sqlite':
+        db = sqlite3.connect(path)
+        try:
+            query = 'SELECT data FROM events'
+            params = ()
+            if kinds:
+                query += f" WHERE kind IN ({', '.join('?' for _ in kinds)})"
+                params = tuple(kinds)
+            for (data,) in db.execute(query + ' ORDER BY seq', params):
+                yield json.loads(data)
+        finally:
+            db.close()
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            try:
+                event = json.loads(line)
+            except ValueError:
+                # Riga corrotta (segnalata alla riapertura del writer)
+                continue
+            if not kinds or event['kind'] in kinds:
+                yield event
+
+
+def _json_default(value):
+    """numpy e timestamp nei campi degli eventi"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
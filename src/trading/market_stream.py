@@ -0,0 +1,363 @@
+"""
+Market Stream
+Bars e trade in streaming (websocket Alpaca) con finestra mobile in memoria e replay server locale
+
+Invece di riscaricare ogni check_interval gli ultimi 200 bars via REST, la
+finestra di ogni symbol viene inizializzata una sola volta e poi aggiornata
+dai messaggi del websocket: l'inferenza parte solo quando arriva un bar nuovo.
+BarReplayServer parla lo stesso protocollo (connected, auth, subscribe, bars
+"b", trade "t") e rimanda bars registrati a cadenza configurabile, per test e
+misure di latenza offline.
+
+Richiede il pacchetto opzionale websockets (>= 13): pip install websockets
+"""
+
+import json
+import asyncio
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+try:
+    from websockets.asyncio.client import connect as _ws_connect
+    from websockets.asyncio.server import serve as _ws_serve
+    from websockets.exceptions import ConnectionClosed
+    HAS_WEBSOCKETS = True
+except ImportError:
+    HAS_WEBSOCKETS = False
+
+# Feed IEX (gratuito); 'sip' richiede l'abbonamento
+DEFAULT_STREAM_URL = 'wss://stream.data.alpaca.markets/v2/iex'
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def _require_websockets():
+    if not HAS_WEBSOCKETS:
+        raise ImportError("websockets is not installed: pip install 'websockets>=13'")
+
+
+def ohlcv_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """OHLCV con colonne minuscole (accetta anche Open/High/... di data/processed)"""
+    df = df.rename(columns={c.capitalize(): c for c in OHLCV_COLUMNS})
+    return df[OHLCV_COLUMNS]
+
+
+def bar_messages(symbol: str, df: pd.DataFrame) -> List[Dict]:
+    """DataFrame OHLCV -> messaggi bar nel formato dello stream Alpaca"""
+    df = ohlcv_frame(df)
+    return [
+        {
+            'T': 'b', 'S': symbol, 't': pd.Timestamp(ts).isoformat(),
+            'o': float(row.open), 'h': float(row.high), 'l': float(row.low),
+            'c': float(row.close), 'v': float(row.volume)
+        }
+        for ts, row in zip(df.index, df.itertuples(index=False))
+    ]
+
+
+def _utc_naive(ts) -> pd.Timestamp:
+    """Timestamp confrontabili fra storico REST (tz-aware) e CSV locali (naive)"""
+    ts = pd.Timestamp(ts)
+    return ts.tz_convert('UTC').tz_localize(None) if ts.tzinfo is not None else ts
+
+
+class BarWindow:
+    """Ultimi maxlen bars per symbol, aggiornati dai messaggi dello stream"""
+
+    def __init__(self, maxlen: int = 200):
+        self.maxlen = maxlen
+        self._bars = {}
+        self.last_trade = {}
+
+    def seed(self, symbol: str, df: pd.DataFrame):
+        """Inizializza la finestra con lo storico (una sola richiesta REST all'avvio)"""
+        window = deque(maxlen=self.maxlen)
+        if df is not None and not df.empty:
+            df = ohlcv_frame(df)
+            for ts, row in zip(df.index, df.itertuples(index=False)):
+                window.append((_utc_naive(ts), row.open, row.high, row.low, row.close, row.volume))
+        self._bars[symbol] = window
+
+    def update_bar(self, message: Dict) -> bool:
+        """
+        Applica un messaggio bar ('b') o bar aggiornato ('u')
+
+        Returns:
+            True se è un bar nuovo (timestamp successivo all'ultimo), False se
+            corregge l'ultimo bar o è fuori ordine
+        """
+        window = self._bars.setdefault(message['S'], deque(maxlen=self.maxlen))
+        bar = (_utc_naive(message['t']), message['o'], message['h'], message['l'], message['c'], message['v'])
+        if window and bar[0] <= window[-1][0]:
+            if bar[0] == window[-1][0]:
+                window[-1] = bar
+            return False
+        window.append(bar)
+        return True
+
+    def update_trade(self, message: Dict):
+        self.last_trade[message['S']] = float(message['p'])
+
+    def __len__(self):
+        return len(self._bars)
+
+    def size(self, symbol: str) -> int:
+        return len(self._bars.get(symbol, ()))
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """Finestra come DataFrame OHLCV indicizzato per timestamp (come get_bars)"""
+        window = self._bars.get(symbol)
+        if not window:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        df = pd.DataFrame(list(window), columns=['timestamp'] + OHLCV_COLUMNS)
+        return df.set_index('timestamp')
+
+
+class AlpacaBarStream:
+    """Client dello stream dati Alpaca (bars e trade) con riconnessione automatica"""
+
+    def __init__(
+        self,
+        api_key: str,
+        secret_key: str,
+        symbols: List[str],
+        url: str = DEFAULT_STREAM_URL,
+        trades: bool = True,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0
+    ):
+        """
+        Initialize stream
+
+        Args:
+            api_key: Alpaca API Key
+            secret_key: Alpaca Secret Key
+            symbols: Symbol sottoscritti
+            url: URL websocket (default: feed IEX; es. un BarReplayServer locale nei test)
+            trades: Sottoscrive anche i trade (ultimo prezzo fra un bar e l'altro)
+            reconnect_delay: Attesa iniziale prima di riconnettersi (raddoppia a ogni tentativo)
+            max_reconnect_delay: Attesa massima fra due tentativi
+        """
+        _require_websockets()
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.symbols = list(symbols)
+        self.url = url
+        self.trades = trades
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self._ws = None
+        self._stopped = False
+        self.messages = 0
+        self.bars = 0
+        self.trade_updates = 0
+        self.reconnects = 0
+
+    async def _handshake(self, ws):
+        """connected -> auth -> subscribe; errori di autenticazione non vengono ritentati"""
+        await self._expect(ws, 'connected')
+        await ws.send(json.dumps({'action': 'auth', 'key': self.api_key, 'secret': self.secret_key}))
+        await self._expect(ws, 'authenticated')
+        subscription = {'action': 'subscribe', 'bars': self.symbols, 'updatedBars': self.symbols}
+        if self.trades:
+            subscription['trades'] = self.symbols
+        await ws.send(json.dumps(subscription))
+
+    @staticmethod
+    async def _expect(ws, msg):
+        for message in json.loads(await ws.recv()):
+            if message.get('T') == 'error':
+                raise RuntimeError(f"Stream error {message.get('code')}: {message.get('msg')}")
+            if message.get('T') == 'success' and message.get('msg') == msg:
+                return
+        raise RuntimeError(f"Unexpected stream handshake (expected '{msg}')")
+
+    async def events(self):
+        """
+        Messaggi bar ('b', 'u') e trade ('t'), uno alla volta
+
+        Si riconnette con backoff se la connessione cade; termina con stop().
+        """
+        delay = self.reconnect_delay
+        while not self._stopped:
+            try:
+                async with _ws_connect(self.url, max_queue=None) as ws:
+                    self._ws = ws
+                    await self._handshake(ws)
+                    delay = self.reconnect_delay
+                    async for raw in ws:
+                        for message in json.loads(raw):
+                            kind = message.get('T')
+                            if kind in ('b', 'u'):
+                                self.messages += 1
+                                self.bars += 1
+                                yield message
+                            elif kind == 't':
+                                self.messages += 1
+                                self.trade_updates += 1
+                                yield message
+                            elif kind == 'error':
+                                raise RuntimeError(f"Stream error {message.get('code')}: {message.get('msg')}")
+                    if self._stopped:
+                        return
+            except (ConnectionClosed, OSError) as e:
+                if self._stopped:
+                    return
+                print(f"⚠️ Stream disconnesso ({e}), riconnessione tra {delay:.1f}s")
+            finally:
+                self._ws = None
+
+            if self._stopped:
+                return
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def stop(self):
+        self._stopped = True
+        if self._ws is not None:
+            await self._ws.close()
+
+    def get_stats(self) -> Dict:
+        return {
+            'messages': self.messages,
+            'bars': self.bars,
+            'trades': self.trade_updates,
+            'reconnects': self.reconnects
+        }
+
+
+class BarReplayServer:
+    """Server websocket locale che rimanda bars registrati col protocollo dello stream Alpaca"""
+
+    def __init__(
+        self,
+        bars: Dict[str, pd.DataFrame],
+        host: str = '127.0.0.1',
+        port: int = 0,
+        interval: float = 1.0,
+        start_index: int = 0,
+        trades_per_bar: int = 0,
+        rebase_to_now: bool = False,
+        api_key: Optional[str] = None,
+        secret_key: Optional[str] = None
+    ):
+        """
+        Initialize replay server
+
+        Args:
+            bars: Dict symbol -> DataFrame OHLCV (colonne minuscole o Open/High/...)
+            host: Interfaccia di ascolto
+            port: Porta (0 = porta libera scelta dal sistema)
+            interval: Secondi fra due timestamp rimandati (0 = più veloce possibile)
+            start_index: Primo bar rimandato (i precedenti servono a inizializzare le finestre)
+            trades_per_bar: Trade sintetici (al close) inviati prima di ogni bar
+            rebase_to_now: Timestamp riscritti come minute bars a partire dalla connessione
+                (per client inizializzati con storico recente, es. i bars REST reali)
+            api_key: Key attesa nell'auth (None = qualsiasi)
+            secret_key: Secret attesa nell'auth (None = qualsiasi)
+        """
+        _require_websockets()
+        self.interval = interval
+        self.trades_per_bar = trades_per_bar
+        self.rebase_to_now = rebase_to_now
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.host = host
+        self.port = port
+
+        # Messaggi raggruppati per timestamp: tutti i symbol dello stesso bar in un solo frame
+        by_time = {}
+        for symbol, df in bars.items():
+            for message in bar_messages(symbol, df.iloc[start_index:]):
+                by_time.setdefault(message['t'], []).append(message)
+        self.frames = [by_time[t] for t in sorted(by_time, key=pd.Timestamp)]
+
+        self.connections = 0
+        self.messages_sent = 0
+        self._loop = None
+        self._thread = None
+        self._stop_event = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def _handler(self, ws):
+        self.connections += 1
+        await ws.send(json.dumps([{'T': 'success', 'msg': 'connected'}]))
+
+        auth = json.loads(await ws.recv())
+        if ((self.api_key is not None and auth.get('key') != self.api_key) or
+                (self.secret_key is not None and auth.get('secret') != self.secret_key)):
+            await ws.send(json.dumps([{'T': 'error', 'code': 402, 'msg': 'auth failed'}]))
+            return
+        await ws.send(json.dumps([{'T': 'success', 'msg': 'authenticated'}]))
+
+        subscription = json.loads(await ws.recv())
+        bar_symbols = set(subscription.get('bars') or [])
+        trade_symbols = set(subscription.get('trades') or [])
+        await ws.send(json.dumps([{
+            'T': 'subscription', 'bars': sorted(bar_symbols), 'trades': sorted(trade_symbols), 'quotes': []
+        }]))
+
+        base = pd.Timestamp.now(tz='UTC').floor('min')
+        try:
+            for k, frame in enumerate(self.frames):
+                if self.rebase_to_now:
+                    t = (base + pd.Timedelta(minutes=k + 1)).isoformat()
+                    frame = [dict(m, t=t) for m in frame]
+                trades = [
+                    {'T': 't', 'S': m['S'], 'p': m['c'], 's': 100, 't': m['t']}
+                    for m in frame if m['S'] in trade_symbols
+                ] * self.trades_per_bar
+                messages = trades + [m for m in frame if m['S'] in bar_symbols]
+                if messages:
+                    await ws.send(json.dumps(messages))
+                    self.messages_sent += len(messages)
+                if self.interval > 0:
+                    await asyncio.sleep(self.interval)
+        except ConnectionClosed:
+            # Il client si è disconnesso prima della fine del replay
+            return
+
+        # Fine del replay: il client vede la chiusura della connessione
+        await ws.close()
+
+    async def _serve(self):
+        self._stop_event = asyncio.Event()
+        async with _ws_serve(self._handler, self.host, self.port) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await self._stop_event.wait()
+
+    def start(self):
+        """Avvia il server in un thread daemon con un proprio event loop"""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_until_complete, args=(self._serve(),), name='bar-replay', daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def serve_forever(self):
+        asyncio.run(self._serve())
+
+    def stop(self):
+        if self._loop is not None and self._stop_event is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+            self._thread.join()
+            self._loop.close()
+
+    def get_stats(self) -> Dict:
+        return {
+            'frames': len(self.frames),
+            'connections': self.connections,
+            'messages_sent': self.messages_sent
+        }
@@ -0,0 +1,302 @@
+"""
+Portfolio State Cache
+Stato locale di account e posizioni aggiornato dagli ordini e riconciliato periodicamente col broker
+
+Il path dei segnali legge buying power e posizioni dalla memoria invece di
+chiamare GET /v2/account e GET /v2/positions/{symbol} a ogni segnale. Gli
+ordini aggiornano cash e posizioni in modo ottimistico (fill reale se presente
+nella risposta, altrimenti stimato dall'ultimo prezzo noto); il buying power
+non viene stimato localmente (su un conto margin dipende dal moltiplicatore e
+dalle regole del broker): dopo ogni ordine viene riletto dal broker alla
+lettura successiva (solo GET /v2/account). Ogni reconcile_interval secondi lo stato viene confrontato
+con quello del broker (due chiamate per tutti i symbol), le differenze oltre la
+tolleranza vengono loggate come drift e lo stato locale viene sostituito da
+quello del broker.
+"""
+
+import time
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class PortfolioStateCache:
+    """Account e posizioni in memoria con riconciliazione e drift detection"""
+
+    def __init__(self, reconcile_interval: float = 60.0, drift_tolerance: float = 0.01,
+                 cash_tolerance: float = 1.0, verbose: bool = True):
+        """
+        Initialize state cache
+
+        Args:
+            reconcile_interval: Secondi fra due riconciliazioni col broker (0 = a ogni lettura)
+            drift_tolerance: Differenza relativa di qty/cash oltre cui si logga un drift
+            cash_tolerance: Differenza assoluta minima ($) per un drift sul cash
+            verbose: Stampa i drift rilevati
+        """
+        self.reconcile_interval = reconcile_interval
+        self.drift_tolerance = drift_tolerance
+        self.cash_tolerance = cash_tolerance
+        self.verbose = verbose
+
+        self._lock = threading.RLock()
+        self._reconcile_lock = threading.Lock()
+        self.account = None
+        self.positions = {}
+        self.prices = {}
+        self._last_reconcile = None
+        self._stale = True
+        self._account_stale = False
+
+        self.reconciliations = 0
+        self.account_refreshes = 0
+        self.reads = 0
+        self.orders_applied = 0
+        self.drift_events = deque(maxlen=1000)
+        self.drift_count = 0
+
+    # ========== Riconciliazione ==========
+
+    def needs_reconcile(self) -> bool:
+        with self._lock:
+            if self._stale or self._last_reconcile is None:
+                return True
+            return time.monotonic() - self._last_reconcile >= self.reconcile_interval
+
+    def maybe_reconcile(self, trader) -> List[Dict]:
+        """
+        Riconcilia se lo stato è scaduto (o invalidato), altrimenti rilegge solo
+        l'account se un ordine ha cambiato il buying power; ritorna i drift rilevati
+        """
+        with self._reconcile_lock:
+            # Controlli sotto lock: un altro thread può aver appena riconciliato
+            if self.needs_reconcile():
+                return self._reconcile(trader)
+            if self._account_stale:
+                return self._refresh_account(trader)
+            return []
+
+    def reconcile(self, trader) -> List[Dict]:
+        """
+        Allinea lo stato locale a quello del broker
+
+        Args:
+            trader: AlpacaPaperTrader (usa get_account e get_positions)
+
+        Returns:
+            Lista dei drift rilevati (field, symbol, local, broker)
+        """
+        with self._reconcile_lock:
+            return self._reconcile(trader)
+
+    def _reconcile(self, trader) -> List[Dict]:
+        """Riconciliazione completa (_reconcile_lock già acquisito: una sola alla volta)"""
+        with self._lock:
+            orders_before = self.orders_applied
+
+        account = trader.get_account()
+        positions = trader.get_positions() or []
+
+        broker_account = _parse_account(account)
+        broker_positions = {p['symbol']: _parse_position(p) for p in positions}
+
+        with self._lock:
+            drifts = []
+            if self.account is not None:
+                drifts = self._account_drift(broker_account) + self._position_drift(broker_positions)
+
+            self.account = broker_account
+            self.positions = broker_positions
+            for symbol, position in broker_positions.items():
+                if position['current_price'] > 0:
+                    self.prices[symbol] = position['current_price']
+            self._last_reconcile = time.monotonic()
+            # Un ordine applicato durante le chiamate al broker potrebbe non essere
+            # ancora nello stato letto: in quel caso si riconcilia di nuovo
+            self._stale = self._account_stale = self.orders_applied != orders_before
+            self.reconciliations += 1
+            self._record_drifts(drifts)
+
+        return drifts
+
+    def _refresh_account(self, trader) -> List[Dict]:
+        """Rilegge solo l'account (buying power dopo un ordine); _reconcile_lock già acquisito"""
+        with self._lock:
+            orders_before = self.orders_applied
+
+        broker_account = _parse_account(trader.get_account())
+
+        with self._lock:
+            drifts = self._account_drift(broker_account)
+            self.account = broker_account
+            self._account_stale = self.orders_applied != orders_before
+            self.account_refreshes += 1
+            self._record_drifts(drifts)
+
+        return drifts
+
+    def _record_drifts(self, drifts: List[Dict]):
+        """Conta e stampa i drift (lock già acquisito)"""
+        self.drift_count += len(drifts)
+        self.drift_events.extend(drifts)
+        if self.verbose:
+            for drift in drifts:
+                where = f" {drift['symbol']}" if drift['symbol'] else ''
+                print(f"⚠️ Drift{where} {drift['field']}: locale {drift['local']:.4f}, broker {drift['broker']:.4f}")
+
+    def _account_drift(self, broker_account: Dict) -> List[Dict]:
+        local, broker = self.account['cash'], broker_account['cash']
+        if abs(local - broker) > max(self.cash_tolerance, self.drift_tolerance * abs(broker)):
+            return [{'timestamp': datetime.now().isoformat(), 'field': 'cash', 'symbol': None,
+                     'local': local, 'broker': broker}]
+        return []
+
+    def _position_drift(self, broker_positions: Dict) -> List[Dict]:
+        now = datetime.now().isoformat()
+        drifts = []
+        for symbol in set(self.positions) | set(broker_positions):
+            local = self.positions.get(symbol, {}).get('qty', 0.0)
+            broker = broker_positions.get(symbol, {}).get('qty', 0.0)
+            if abs(local - broker) > max(1e-6, self.drift_tolerance * abs(broker)):
+                drifts.append({'timestamp': now, 'field': 'qty', 'symbol': symbol, 'local': local, 'broker': broker})
+        return drifts
+
+    def invalidate(self):
+        """Forza la riconciliazione alla prossima lettura"""
+        with self._lock:
+            self._stale = True
+
+    # ========== Letture ==========
+
+    @property
+    def buying_power(self) -> float:
+        """Buying power dell'ultima riconciliazione (mai stimato localmente)"""
+        with self._lock:
+            self.reads += 1
+            return self.account['buying_power']
+
+    def get_position(self, symbol: str) -> Optional[Dict]:
+        """Posizione in memoria (stesso formato di AlpacaPaperTrader.get_position), None se assente"""
+        with self._lock:
+            self.reads += 1
+            position = self.positions.get(symbol)
+            return dict(position) if position is not None and position['qty'] != 0 else None
+
+    def account_summary(self) -> Dict:
+        """Come AlpacaPaperTrader.get_account_summary, con le posizioni valutate all'ultimo prezzo noto"""
+        with self._lock:
+            self.reads += 1
+            market_value = sum(
+                p['qty'] * self.prices.get(symbol, p['current_price'])
+                for symbol, p in self.positions.items()
+            )
+            equity = self.account['cash'] + market_value
+            last_equity = self.account['last_equity']
+            return {
+                'cash': self.account['cash'],
+                'portfolio_value': equity,
+                'buying_power': self.account['buying_power'],
+                'equity': equity,
+                'last_equity': last_equity,
+                'profit_loss': equity - last_equity,
+                'profit_loss_pct': (equity - last_equity) / last_equity * 100 if last_equity > 0 else 0
+            }
+
+    # ========== Aggiornamenti da ordini e prezzi ==========
+
+    def mark_price(self, symbol: str, price: float):
+        """Ultimo prezzo noto (es. close dell'ultimo bar)"""
+        if price and price > 0:
+            with self._lock:
+                self.prices[symbol] = float(price)
+
+    def apply_buy(self, symbol: str, notional: float, order: Optional[Dict] = None):
+        """
+        Acquisto per un valore in dollari
+
+        Usa filled_qty/filled_avg_price della risposta se l'ordine è già eseguito,
+        altrimenti stima la qty dall'ultimo prezzo noto; senza prezzo tutto lo
+        stato viene riconciliato alla prossima lettura. Il buying power non viene
+        toccato: maybe_reconcile lo rilegge dal broker prima del segnale successivo.
+        """
+        filled_qty, filled_price = _order_fill(order)
+        with self._lock:
+            self.orders_applied += 1
+            self._account_stale = True
+            price = filled_price or self.prices.get(symbol)
+            cost = filled_qty * filled_price if filled_qty else notional
+            self.account['cash'] -= cost
+
+            if not price:
+                self._stale = True
+                return
+
+            qty = filled_qty or notional / price
+            position = self.positions.setdefault(symbol, _empty_position(symbol))
+            total_qty = position['qty'] + qty
+            if total_qty != 0:
+                position['avg_entry_price'] = (position['qty'] * position['avg_entry_price'] + qty * price) / total_qty
+            position['qty'] = total_qty
+            position['current_price'] = price
+
+    def apply_close(self, symbol: str, order: Optional[Dict] = None):
+        """Chiusura completa di una posizione (ricavo stimato all'ultimo prezzo noto)"""
+        filled_qty, filled_price = _order_fill(order)
+        with self._lock:
+            self.orders_applied += 1
+            self._account_stale = True
+            position = self.positions.pop(symbol, None)
+            if position is None:
+                return
+            price = filled_price or self.prices.get(symbol) or position['current_price']
+            if not price:
+                self._stale = True
+                return
+            self.account['cash'] += position['qty'] * price
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'reconciliations': self.reconciliations,
+                'account_refreshes': self.account_refreshes,
+                'reads': self.reads,
+                'orders_applied': self.orders_applied,
+                'drifts': self.drift_count,
+                'positions': len([p for p in self.positions.values() if p['qty'] != 0]),
+                'seconds_since_reconcile': (time.monotonic() - self._last_reconcile
+                                            if self._last_reconcile is not None else None)
+            }
+
+
+def _parse_account(account: Dict) -> Dict:
+    return {
+        'cash': float(account['cash']),
+        'buying_power': float(account['buying_power']),
+        'equity': float(account['equity']),
+        'last_equity': float(account['last_equity'])
+    }
+
+
+def _parse_position(position: Dict) -> Dict:
+    return {
+        'symbol': position['symbol'],
+        'qty': float(position.get('qty', 0)),
+        'avg_entry_price': float(position.get('avg_entry_price') or 0),
+        'current_price': float(position.get('current_price') or 0)
+    }
+
+
+def _empty_position(symbol: str) -> Dict:
+    return {'symbol': symbol, 'qty': 0.0, 'avg_entry_price': 0.0, 'current_price': 0.0}
+
+
+def _order_fill(order: Optional[Dict]):
+    """(filled_qty, filled_avg_price) della risposta di un ordine, (0, None) se non ancora eseguito"""
+    if not order:
+        return 0.0, None
+    filled_qty = float(order.get('filled_qty') or 0)
+    filled_price = float(order.get('filled_avg_price') or 0)
+    if filled_qty > 0 and filled_price > 0:
+        return filled_qty, filled_price
+    return 0.0, None
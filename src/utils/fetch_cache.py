@@ -0,0 +1,273 @@
+"""
+Fetch Cache
+Cache con TTL dei dati esterni (prezzi, fondamentali, news, bars), in memoria (LRU) e su disco (pickle)
+
+Ogni voce è identificata da (endpoint, symbol, params) e porta il momento del
+download: la freschezza viene decisa alla lettura, quindi lo stesso dato può
+essere letto con TTL diversi. ttl='day' tiene valida una voce fino alla fine
+della giornata di borsa (data nel fuso del mercato) in cui è stata scaricata:
+le invocazioni successive nello stesso giorno non fanno richieste esterne.
+Le fetch concorrenti della stessa chiave vengono accorpate in una sola
+richiesta; gli errori non vengono messi in cache.
+"""
+
+import os
+import copy
+import json
+import time
+import pickle
+import hashlib
+import threading
+from pathlib import Path
+from datetime import datetime
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Union
+from zoneinfo import ZoneInfo
+
+MARKET_TIMEZONE = 'America/New_York'
+DEFAULT_TTL = 'day'
+
+Ttl = Union[float, str, None]
+
+
+class FetchCache:
+    """Cache a due livelli (memoria + disco) con TTL per endpoint"""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = "data/cache/fetch",
+        ttl: Optional[Dict[str, Ttl]] = None,
+        default_ttl: Ttl = DEFAULT_TTL,
+        max_memory_entries: int = 512,
+        timezone: str = MARKET_TIMEZONE
+    ):
+        """
+        Initialize fetch cache
+
+        Args:
+            cache_dir: Directory delle voci su disco (None = solo memoria)
+            ttl: TTL per endpoint (es. {'news': 3600}); gli altri usano default_ttl
+            default_ttl: Secondi di validità, 'day' (fino a fine giornata di borsa) o 0 (sempre scaduto)
+            max_memory_entries: Voci LRU tenute in memoria
+            timezone: Fuso del mercato per ttl='day'
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = dict(ttl or {})
+        self.default_ttl = default_ttl
+        self.max_memory_entries = max_memory_entries
+        self.timezone = ZoneInfo(timezone)
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.fetches = 0
+        self.fetch_errors = 0
+        self.fetch_time = 0.0
+        self.saved_seconds = 0.0
+
+    # ========== Chiavi e freschezza ==========
+
+    @staticmethod
+    def _key(endpoint: str, symbol: str, params: Optional[Dict]) -> str:
+        """'endpoint/SYMBOL' o 'endpoint/SYMBOL@hash(params)' (anche nome del file su disco)"""
+        symbol = str(symbol).replace('/', '_')
+        if not params:
+            return f"{endpoint}/{symbol}"
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:12]
+        return f"{endpoint}/{symbol}@{digest}"
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pkl"
+
+    def ttl_for(self, endpoint: str) -> Ttl:
+        return self.ttl.get(endpoint, self.default_ttl)
+
+    def is_fresh(self, fetched_at: float, ttl: Ttl, now: Optional[float] = None) -> bool:
+        """True se un dato scaricato a fetched_at (epoch) è ancora valido con il TTL dato"""
+        now = time.time() if now is None else now
+        if ttl == 'day':
+            return (datetime.fromtimestamp(fetched_at, self.timezone).date()
+                    == datetime.fromtimestamp(now, self.timezone).date())
+        if not ttl:
+            return False
+        return now - fetched_at < float(ttl)
+
+    # ========== Lettura e scrittura ==========
+
+    def _remember(self, key, entry):
+        """Inserisce in memoria (lock già acquisito)"""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, endpoint: str, symbol: str, params: Optional[Dict] = None, ttl: Ttl = None) -> Any:
+        """
+        Valore in cache se ancora fresco, altrimenti None
+
+        Args:
+            endpoint: Sorgente del dato (es. 'history', 'info', 'news', 'alpaca_bars')
+            symbol: Ticker
+            params: Parametri della richiesta che cambiano il risultato
+            ttl: TTL per questa lettura (default: quello dell'endpoint)
+
+        Returns:
+            Copia del valore (i DataFrame possono essere modificati dal chiamante), o None
+        """
+        ttl = self.ttl_for(endpoint) if ttl is None else ttl
+        key = self._key(endpoint, symbol, params)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self.is_fresh(entry['fetched_at'], ttl, now):
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self.saved_seconds += entry['fetch_seconds']
+                return copy.deepcopy(entry['value'])
+
+        entry = self._load(key, ttl, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self._remember(key, entry)
+            self.disk_hits += 1
+            self.saved_seconds += entry['fetch_seconds']
+        return copy.deepcopy(entry['value'])
+
+    def _load(self, key: str, ttl: Ttl, now: float) -> Optional[Dict]:
+        if self.cache_dir is None:
+            return None
+        path = self._path(key)
+        try:
+            # mtime >= fetched_at: un file già scaduto non viene neppure letto
+            if not self.is_fresh(path.stat().st_mtime, ttl, now):
+                with self._lock:
+                    self.expired += 1
+                return None
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if not self.is_fresh(entry['fetched_at'], ttl, now):
+            with self._lock:
+                self.expired += 1
+            return None
+        return entry
+
+    def put(self, endpoint: str, symbol: str, value: Any, params: Optional[Dict] = None,
+            fetch_seconds: float = 0.0, fetched_at: Optional[float] = None):
+        """Salva un valore (memoria + disco, scrittura atomica)"""
+        key = self._key(endpoint, symbol, params)
+        entry = {
+            'fetched_at': time.time() if fetched_at is None else fetched_at,
+            'fetch_seconds': fetch_seconds,
+            'value': copy.deepcopy(value)
+        }
+
+        if self.cache_dir is not None:
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f'.pkl.tmp{threading.get_ident()}')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            self._remember(key, entry)
+
+    def fetch(self, endpoint: str, symbol: str, fetch_fn: Callable[[], Any],
+              params: Optional[Dict] = None, ttl: Ttl = None) -> Any:
+        """
+        Valore dalla cache, oppure fetch_fn() salvato in cache
+
+        Le chiamate concorrenti con la stessa chiave attendono la prima fetch
+        invece di ripeterla. Le eccezioni di fetch_fn vengono propagate e i
+        risultati vuoti (None, DataFrame/liste/dict vuoti) non vengono salvati.
+        """
+        key = self._key(endpoint, symbol, params)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            value = self.get(endpoint, symbol, params, ttl)
+            if value is not None:
+                return value
+
+            start = time.perf_counter()
+            try:
+                value = fetch_fn()
+            except Exception:
+                with self._lock:
+                    self.fetch_errors += 1
+                raise
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.fetches += 1
+                self.fetch_time += elapsed
+
+            # Risultati vuoti (spesso errori transitori della sorgente) non restano in cache
+            if not _is_empty(value):
+                self.put(endpoint, symbol, value, params, fetch_seconds=elapsed)
+            return value
+
+    def invalidate(self, endpoint: Optional[str] = None, symbol: Optional[str] = None) -> int:
+        """Rimuove le voci di un endpoint e/o symbol (entrambi None = tutte)"""
+        def matches(key):
+            key_endpoint, name = key.split('/', 1)
+            return ((endpoint is None or key_endpoint == endpoint)
+                    and (symbol is None or name.split('@', 1)[0] == str(symbol).replace('/', '_')))
+
+        removed = 0
+        with self._lock:
+            for key in [k for k in self._memory if matches(k)]:
+                del self._memory[key]
+                removed += 1
+
+        if self.cache_dir is not None:
+            for path in self.cache_dir.glob('*/*.pkl'):
+                key = f"{path.parent.name}/{path.stem}"
+                if matches(key):
+                    path.unlink(missing_ok=True)
+                    removed += 1
+        return removed
+
+    def clear(self):
+        self.invalidate()
+
+    def get_stats(self) -> Dict:
+        """Ritorna statistiche su hit ratio e tempo di download risparmiato"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            requests = hits + self.misses
+            return {
+                'memory_entries': len(self._memory),
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'hit_ratio': hits / requests if requests > 0 else 0.0,
+                'fetches': self.fetches,
+                'fetch_errors': self.fetch_errors,
+                'avg_fetch_ms': 1000 * self.fetch_time / self.fetches if self.fetches else 0.0,
+                'saved_fetch_seconds': self.saved_seconds
+            }
+
+
+def _is_empty(value) -> bool:
+    if value is None:
+        return True
+    if hasattr(value, 'empty'):
+        return bool(value.empty)
+    try:
+        return len(value) == 0
+    except TypeError:
+        return False
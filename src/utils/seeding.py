@@ -0,0 +1,19 @@
+"""
+Seeding utilities per run riproducibili
+"""
+
+import random
+import numpy as np
+import torch
+
+
+def set_global_seed(seed):
+    """
+    Imposta il seed di random, numpy e torch
+
+    Args:
+        seed: Seed intero
+    """
+    random.seed(seed)
+    np.random.seed(seed % (2 ** 32))
+    torch.manual_seed(seed)
@@ -9,6 +9,8 @@ from typing import Dict, Any, Optional
 from pathlib import Path
 from dataclasses import asdict, is_dataclass
 
+from src.telemetry.instruments import STRATEGY_CACHE_REQUESTS, STRATEGY_CACHE_HIT_RATIO
+
 
 class StrategyCache:
     """Cache per strategie LLM generate"""
@@ -25,6 +27,9 @@ class StrategyCache:
         self.cache_file = self.cache_dir / "strategy_cache.json"
         self.cache_data = self._load_cache()
 
+        self.hits = 0
+        self.misses = 0
+
     def _load_cache(self) -> Dict[str, Any]:
         """Carica cache da file"""
         if self.cache_file.exists():
@@ -111,7 +116,19 @@ class StrategyCache:
             macro_data, news_signals, model_name, temperature
         )
 
-        return self.cache_data.get(key)
+        strategy = self.cache_data.get(key)
+
+        if strategy is not None:
+            self.hits += 1
+            STRATEGY_CACHE_REQUESTS.inc(result='hit')
+        else:
+            self.misses += 1
+            STRATEGY_CACHE_REQUESTS.inc(result='miss')
+
+        total_hits = STRATEGY_CACHE_REQUESTS.get(result='hit')
+        STRATEGY_CACHE_HIT_RATIO.set(total_hits / (total_hits + STRATEGY_CACHE_REQUESTS.get(result='miss')))
+
+        return strategy
 
     def set(self,
             ticker: str,
@@ -148,9 +165,13 @@ class StrategyCache:
         self.cache_data = {}
         self._save_cache()
 
-    def get_stats(self) -> Dict[str, int]:
+    def get_stats(self) -> Dict[str, Any]:
         """Ritorna statistiche sulla cache"""
+        lookups = self.hits + self.misses
         return {
             'total_entries': len(self.cache_data),
-            'cache_file_size_kb': self.cache_file.stat().st_size // 1024 if self.cache_file.exists() else 0
+            'cache_file_size_kb': self.cache_file.stat().st_size // 1024 if self.cache_file.exists() else 0,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups > 0 else 0.0
         }
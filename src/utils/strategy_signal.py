@@ -0,0 +1,32 @@
+"""
+Strategy Signal
+Segnale LLM τ per riga dei dati di mercato: unica regola di allineamento strategia -> step
+
+Usata da TradingEnv e dal fast backtest, così i due motori (e le slice delle
+strategie) scelgono sempre la stessa strategia per la stessa riga. Con uno
+StrategyTimeline e un DatetimeIndex conta la data (periodo che la contiene);
+con una lista posizionale conta la riga (riga // strategy_frequency).
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def strategy_signal(strategies, dates, strategy_frequency: int = 20) -> np.ndarray:
+    """
+    τ = dir(πg) * str(πg) della strategia attiva per ogni riga
+
+    Args:
+        strategies: StrategyTimeline (con tau_for_dates) o lista di TradingStrategy
+        dates: Indice dei dati di mercato (DatetimeIndex; per le liste conta solo la lunghezza)
+        strategy_frequency: Righe per strategia nell'allineamento posizionale
+
+    Returns:
+        Array float64 (len(dates),); 0.0 dove nessuna strategia è attiva
+    """
+    if hasattr(strategies, 'tau_for_dates') and isinstance(dates, pd.DatetimeIndex):
+        return strategies.tau_for_dates(dates)
+
+    tau = np.array([(2 * s.direction - 1) * s.strength for s in strategies] + [0.0], dtype=np.float64)
+    strategy_idx = np.minimum(np.arange(len(dates)) // strategy_frequency, len(strategies))
+    return tau[strategy_idx]
@@ -0,0 +1,172 @@
+"""
+Synthetic market data utilities
+Dati OHLCV e strategie LLM sintetiche per benchmark e run offline (nessuna API, nessun download)
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def make_synthetic_market_data(num_days=1000, start_price=100.0, seed=0, start_date='2012-01-03'):
+    """
+    Genera un DataFrame OHLCV con gli stessi indicatori di data/processed
+
+    Args:
+        num_days: Numero di giorni di trading
+        start_price: Prezzo iniziale
+        seed: Seed per riproducibilità
+        start_date: Primo giorno (business days)
+
+    Returns:
+        DataFrame con Close, Volume, HV_Close, SMA_*, RSI, MACD, ... indicizzato per data
+    """
+    rng = np.random.default_rng(seed)
+
+    # Geometric random walk con drift leggero
+    log_returns = rng.normal(0.0003, 0.015, num_days)
+    close = start_price * np.exp(np.cumsum(log_returns))
+
+    open_ = close * (1 + rng.normal(0, 0.003, num_days))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.005, num_days)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.005, num_days)))
+    volume = rng.integers(5_000_000, 50_000_000, num_days).astype(float)
+
+    index = pd.bdate_range(start=start_date, periods=num_days)
+    df = pd.DataFrame({
+        'Open': open_,
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'Volume': volume
+    }, index=index)
+
+    add_technical_indicators(df)
+
+    return df
+
+
+def add_technical_indicators(df):
+    """
+    Aggiunge (in-place) gli indicatori usati da TradingEnv e dal prompt dello Strategist
+
+    Args:
+        df: DataFrame con almeno Close (e opzionalmente High/Low)
+
+    Returns:
+        Lo stesso DataFrame
+    """
+    close = df['Close']
+    returns = close.pct_change()
+
+    df['HV_Close'] = returns.rolling(20).std() * np.sqrt(252)
+
+    for window in (20, 50, 200):
+        df[f'SMA_{window}'] = close.rolling(window, min_periods=1).mean()
+        df[f'SMA_{window}_Slope'] = df[f'SMA_{window}'].diff()
+
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(14).mean()
+    loss = -delta.where(delta < 0, 0).rolling(14).mean()
+    rs = gain / loss
+    df['RSI'] = 100 - (100 / (1 + rs))
+
+    ema_12 = close.ewm(span=12, adjust=False).mean()
+    ema_26 = close.ewm(span=26, adjust=False).mean()
+    df['MACD'] = ema_12 - ema_26
+    df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
+    df['MACD_Hist'] = df['MACD'] - df['MACD_Signal']
+
+    if 'High' in df.columns and 'Low' in df.columns:
+        true_range = pd.concat([
+            df['High'] - df['Low'],
+            (df['High'] - close.shift()).abs(),
+            (df['Low'] - close.shift()).abs()
+        ], axis=1).max(axis=1)
+        df['ATR'] = true_range.rolling(14).mean()
+
+    return df
+
+
+def make_synthetic_strategies(num_strategies, seed=0):
+    """
+    Genera una lista di TradingStrategy sintetiche (stesso formato di data/llm_strategies)
+
+    Args:
+        num_strategies: Numero di strategie (una ogni strategy_frequency giorni)
+        seed: Seed per riproducibilità
+
+    Returns:
+        Lista di TradingStrategy
+    """
+    from src.llm_agents.strategist_agent_deepseek import TradingStrategy
+
+    rng = np.random.default_rng(seed)
+    strategies = []
+
+    for i in range(num_strategies):
+        direction = int(rng.integers(0, 2))
+        confidence = float(np.round(rng.uniform(1.0, 3.0), 1))
+        strategies.append(TradingStrategy(
+            direction=direction,
+            confidence=confidence,
+            strength=(2 * direction - 1) * confidence,
+            explanation='Synthetic strategy',
+            features_used=[],
+            timestamp=f'synthetic-{i}'
+        ))
+
+    return strategies
+
+
+def make_synthetic_ensemble(num_chunks, config=None, state_dim=11, action_dim=3, seed=0):
+    """
+    Crea un ReWTSEnsembleController con chunk model inizializzati random (non addestrati)
+
+    Args:
+        num_chunks: Numero di chunk model
+        config: Configurazione rewts (hidden_dims, ...)
+        state_dim: Dimensione observation (11 per TradingEnv)
+        action_dim: Numero di azioni
+        seed: Seed per l'inizializzazione dei pesi
+
+    Returns:
+        ReWTSEnsembleController
+    """
+    import torch
+    from src.hybrid_model.ensemble_controller import ReWTSEnsembleController, DDQNAgent
+
+    config = dict(config or {})
+    # Nessun transition viene salvato: evita di riservare il buffer di default
+    config.setdefault('buffer_size', 1)
+
+    torch.manual_seed(seed)
+    ensemble = ReWTSEnsembleController(config)
+    for _ in range(num_chunks):
+        ensemble.chunk_models.append(DDQNAgent(state_dim, action_dim, config))
+
+    return ensemble
+
+
+def make_synthetic_news(index, articles_per_week=2, seed=0):
+    """
+    Genera news sintetiche (stesso formato di data/processed/{ticker}_news.csv)
+
+    Args:
+        index: DatetimeIndex dei giorni di trading
+        articles_per_week: Articoli medi per settimana
+        seed: Seed per riproducibilità
+
+    Returns:
+        DataFrame con headline, summary, source indicizzato per timestamp
+    """
+    rng = np.random.default_rng(seed)
+    mask = rng.random(len(index)) < articles_per_week / 5
+    dates = index[mask]
+    topics = ('earnings beat', 'guidance cut', 'new product launch', 'analyst upgrade', 'regulatory probe')
+
+    picks = rng.integers(0, len(topics), len(dates))
+    return pd.DataFrame({
+        'headline': [f"Synthetic headline: {topics[p]}" for p in picks],
+        'summary': [f"Synthetic summary about {topics[p]}." for p in picks],
+        'source': 'Synthetic'
+    }, index=pd.DatetimeIndex(dates, name='timestamp'))
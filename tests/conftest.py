@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Import come src.xxx anche lanciando `pytest` senza `python -m`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,30 @@
+"""
+Test del range di date del backtest API: inizio esatto e strategia scelta per data
+"""
+
+import numpy as np
+
+from src.utils.synthetic_data import make_synthetic_market_data, make_synthetic_strategies
+from src.llm_agents.strategy_store import StrategyStore
+from src.backtest_engine.fast_backtest import compute_market_features
+from src.serving.backtest_service import date_range_indices, slice_date_range, _env_config
+
+
+def test_range_starts_at_requested_date_with_date_aligned_strategies():
+    df = make_synthetic_market_data(300, seed=1)
+    strategies = make_synthetic_strategies(15, seed=1)
+    timeline = StrategyStore.from_strategies('TEST', strategies, df.index, 20)
+
+    start_date, end_date = df.index[37], df.index[250]
+    assert date_range_indices(df, start_date, end_date) == (37, 251)
+
+    test_df, test_strategies = slice_date_range(df, strategies, start_date, end_date)
+    assert test_df.index[0] == start_date
+    expected = compute_market_features(df, timeline)[37:251, 8]
+    np.testing.assert_allclose(compute_market_features(test_df, test_strategies)[:, 8], expected)
+
+
+def test_env_config_uses_trading_env_max_position():
+    config = _env_config({'initial_balance': 10000, 'transaction_cost': 0.001})
+    assert config['max_position'] == 0.95
+    assert _env_config({'initial_balance': 1, 'transaction_cost': 0, 'max_position': 0.5})['max_position'] == 0.5
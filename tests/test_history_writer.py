@@ -0,0 +1,58 @@
+"""
+Test TradeHistoryWriter: recovery di uno storico JSONL con righe corrotte o troncate
+"""
+
+import json
+
+from src.trading.history_writer import TradeHistoryWriter, read_history
+
+
+def _write_history(path, count):
+    with TradeHistoryWriter(str(path), flush_interval=0) as writer:
+        for i in range(count):
+            writer.record('decision', 'AAPL', action='HOLD', step=i)
+        intent = writer.record('order_intent', 'AAPL', durable=True, action='LONG')
+    return intent
+
+
+def test_corrupt_line_in_the_middle_keeps_later_events(tmp_path):
+    path = tmp_path / 'history.jsonl'
+    intent = _write_history(path, 4)
+
+    lines = path.read_text().splitlines(keepends=True)
+    lines.insert(2, '{"seq": 99, "kind": "decis\n')
+    path.write_text(''.join(lines))
+    size = path.stat().st_size
+
+    writer = TradeHistoryWriter(str(path), flush_interval=0)
+    stats = writer.get_stats()
+    assert stats['corrupt_lines'] == 1
+    assert stats['truncated_bytes'] == 0
+    assert stats['recovered_events'] == 5
+    assert path.stat().st_size == size
+
+    # Gli eventi dopo la riga corrotta (incluso l'intento pendente) restano
+    assert [e['seq'] for e in writer.pending_intents()] == [intent]
+    assert writer.record('decision', 'AAPL', action='LONG') == intent + 1
+    writer.close()
+
+    events = list(read_history(str(path)))
+    assert [e['seq'] for e in events] == list(range(1, intent + 2))
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    path = tmp_path / 'history.jsonl'
+    intent = _write_history(path, 2)
+    valid_size = path.stat().st_size
+
+    with open(path, 'a') as f:
+        f.write(json.dumps({'seq': intent + 1, 'kind': 'order'})[:10])
+
+    writer = TradeHistoryWriter(str(path), flush_interval=0)
+    assert writer.get_stats()['truncated_bytes'] == 10
+    assert writer.get_stats()['corrupt_lines'] == 0
+    assert path.stat().st_size == valid_size
+    assert writer.record('decision', 'AAPL') == intent + 1
+    writer.close()
+
+    assert len(list(read_history(str(path)))) == intent + 1
@@ -0,0 +1,55 @@
+"""
+Test BacktestJobManager: posizione in coda tracciata dal manager
+"""
+
+import asyncio
+
+from src.serving.job_store import JobStore
+from src.serving.job_manager import BacktestJobManager
+
+
+class _BlockingExecutor:
+    """Un solo worker che completa i job quando viene rilasciato"""
+
+    max_workers = 1
+
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def run_when_available(self, fn, params, progress_path=None):
+        await self.release.wait()
+        return {'execution_time_seconds': 0.0}
+
+
+class _Registry:
+    def model_digest(self, ticker):
+        return 'v1'
+
+
+def _params(day):
+    return {'ticker': 'AAPL', 'start_date': f'2020-01-{day:02d}', 'end_date': '2020-06-30',
+            'initial_balance': 10000, 'transaction_cost': 0.001}
+
+
+def test_queue_position_follows_dispatch(tmp_path):
+    async def scenario():
+        executor = _BlockingExecutor()
+        manager = BacktestJobManager(executor, JobStore(str(tmp_path / 'jobs.db')), _Registry())
+        await manager.start()
+
+        job_ids = [(await manager.submit(_params(day)))[0]['job_id'] for day in (1, 2, 3)]
+        await asyncio.sleep(0)
+
+        # Il primo job è in esecuzione, gli altri in coda nell'ordine di submit
+        assert manager.get(job_ids[0])['status'] == 'running'
+        assert [manager.get(job_id)['queue_position'] for job_id in job_ids[1:]] == [0, 1]
+        assert manager.get_stats()['pending'] == 2
+
+        executor.release.set()
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert manager.get_stats()['pending'] == 0
+        assert all(manager.get(job_id)['status'] == 'completed' for job_id in job_ids)
+        await manager.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,69 @@
+"""
+Test PortfolioStateCache: buying power solo dal broker e riconciliazioni serializzate
+"""
+
+import time
+import threading
+
+from src.trading.portfolio_state import PortfolioStateCache
+
+
+class _MarginTrader:
+    """Broker con moltiplicatore 2x: il buying power non scende 1:1 col costo"""
+
+    def __init__(self):
+        self.cash = 10000.0
+        self.positions = []
+        self.account_calls = 0
+        self.position_calls = 0
+        self._active = 0
+        self.max_concurrent = 0
+        self._lock = threading.Lock()
+
+    def get_account(self):
+        with self._lock:
+            self.account_calls += 1
+            self._active += 1
+            self.max_concurrent = max(self.max_concurrent, self._active)
+        time.sleep(0.01)
+        with self._lock:
+            self._active -= 1
+        return {'cash': self.cash, 'buying_power': 2 * self.cash, 'equity': 10000, 'last_equity': 10000}
+
+    def get_positions(self):
+        self.position_calls += 1
+        return self.positions
+
+
+def test_buy_refreshes_buying_power_from_broker():
+    trader = _MarginTrader()
+    state = PortfolioStateCache(reconcile_interval=3600, verbose=False)
+    state.maybe_reconcile(trader)
+    assert state.buying_power == 20000
+
+    order = {'filled_qty': '10', 'filled_avg_price': '100'}
+    state.apply_buy('AAPL', 1000, order)
+    assert state.buying_power == 20000          # nessuna stima locale
+    assert state.get_position('AAPL')['qty'] == 10
+
+    trader.cash = 9000.0
+    trader.positions = [{'symbol': 'AAPL', 'qty': '10', 'avg_entry_price': '100', 'current_price': '100'}]
+    assert state.maybe_reconcile(trader) == []
+    assert state.buying_power == 18000
+    assert (trader.account_calls, trader.position_calls) == (2, 1)
+    assert state.maybe_reconcile(trader) == []
+    assert trader.account_calls == 2
+
+
+def test_concurrent_reconcile_is_serialized():
+    trader = _MarginTrader()
+    state = PortfolioStateCache(reconcile_interval=3600, verbose=False)
+
+    threads = [threading.Thread(target=state.maybe_reconcile, args=(trader,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert trader.max_concurrent == 1
+    assert state.get_stats()['reconciliations'] == 1
@@ -0,0 +1,49 @@
+"""
+Test BacktestResultCache: indice su disco, invalidazione per versione del modello e pulizia
+"""
+
+import asyncio
+
+from src.serving.result_cache import BacktestResultCache
+
+
+def _result(seconds=1.0):
+    return {'sharpe_ratio': 1.0, 'execution_time_seconds': seconds}
+
+
+def test_index_survives_restart_and_drives_invalidation(tmp_path):
+    cache = BacktestResultCache(str(tmp_path), max_memory_entries=1)
+    cache.put('a1', _result(), ticker='AAPL', model_digest='v1')
+    cache.put('a2', _result(), ticker='AAPL', model_digest='v1')
+    cache.put('m1', _result(), ticker='MSFT', model_digest='v1')
+
+    restarted = BacktestResultCache(str(tmp_path))
+    assert restarted.get_stats()['disk_entries'] == 3
+    assert restarted.get('a1') == _result()
+    assert restarted.get('missing') is None
+
+    restarted.put('a3', _result(), ticker='AAPL', model_digest='v2')
+    assert sorted(p.stem for p in tmp_path.glob('*.json')) == ['a3', 'm1']
+    assert restarted.get_stats()['invalidated'] == 2
+    assert restarted.get('a2') is None
+
+
+def test_prune_removes_oldest_entries(tmp_path):
+    cache = BacktestResultCache(str(tmp_path), max_memory_entries=1, max_disk_entries=2)
+    for key in ('k1', 'k2', 'k3'):
+        cache.put(key, _result())
+    assert sorted(p.stem for p in tmp_path.glob('*.json')) == ['k2', 'k3']
+    assert cache.get('k1') is None
+
+
+def test_async_get_and_put(tmp_path):
+    cache = BacktestResultCache(str(tmp_path), max_memory_entries=1)
+
+    async def roundtrip():
+        await cache.put_async('k1', _result(2.0), ticker='AAPL', model_digest='v1')
+        await cache.put_async('k2', _result(), ticker='AAPL', model_digest='v1')
+        return await cache.get_async('k1')
+
+    assert asyncio.run(roundtrip()) == _result(2.0)
+    assert cache.get_stats()['disk_hits'] == 1
+    assert not list(tmp_path.glob('*.tmp*'))
@@ -0,0 +1,39 @@
+"""
+Test dell'allineamento strategia -> step: TradingEnv e fast backtest, timeline intere e slice
+"""
+
+import numpy as np
+import pytest
+
+from src.utils.synthetic_data import make_synthetic_market_data, make_synthetic_strategies
+from src.llm_agents.strategy_store import StrategyStore, StrategyTimeline
+from src.rl_agents.trading_env import TradingEnv
+from src.backtest_engine.fast_backtest import compute_market_features
+
+ENV_CONFIG = {'initial_balance': 10000, 'transaction_cost': 0.0015, 'max_position': 0.95}
+
+
+@pytest.fixture(scope='module')
+def market():
+    df = make_synthetic_market_data(500, seed=0)
+    strategies = make_synthetic_strategies(25, seed=0)
+    return df, strategies, StrategyStore.from_strategies('TEST', strategies, df.index, 20)
+
+
+@pytest.mark.parametrize('start, end', [(0, 500), (120, 400), (137, 333)])
+def test_env_and_fast_backtest_agree_on_sliced_timelines(market, start, end):
+    df, _, timeline = market
+    test_df = df.iloc[start:end]
+    sliced = timeline[start // 20:]
+
+    assert isinstance(sliced, StrategyTimeline)
+    env_tau = TradingEnv(test_df, sliced, ENV_CONFIG).llm_signal
+    np.testing.assert_allclose(env_tau, TradingEnv(test_df, timeline, ENV_CONFIG).llm_signal)
+    np.testing.assert_allclose(compute_market_features(test_df, sliced)[:, 8], env_tau, atol=1e-6)
+
+
+def test_aligned_slice_matches_positional_list(market):
+    df, strategies, timeline = market
+    test_df = df.iloc[100:300]
+    np.testing.assert_allclose(TradingEnv(test_df, timeline[5:10], ENV_CONFIG).llm_signal,
+                               TradingEnv(test_df, strategies[5:10], ENV_CONFIG).llm_signal)
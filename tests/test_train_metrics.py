@@ -0,0 +1,28 @@
+"""
+Test delle metriche di training: TRAIN_UPDATES conta solo i train_step che aggiornano la rete
+"""
+
+import pytest
+
+from src.rl_agents.trading_env import TradingEnv
+from src.rl_agents.ddqn_agent import DDQNAgent
+from src.hybrid_model.ensemble_controller import ReWTSEnsembleController
+from src.telemetry.instruments import TRAIN_ENV_STEPS, TRAIN_UPDATES
+from src.utils.synthetic_data import make_synthetic_market_data, make_synthetic_strategies
+
+ENV_CONFIG = {'initial_balance': 10000, 'transaction_cost': 0.0015, 'max_position': 0.95}
+
+
+# Step senza update: le transizioni raccolte prima che il buffer abbia batch_size (32)
+# elementi (con 2 env le transizioni arrivano a coppie: 15 step x 2)
+@pytest.mark.parametrize('num_envs, warm_up', [(None, 31), (2, 30)])
+def test_warm_up_steps_are_not_counted_as_updates(num_envs, warm_up):
+    env = TradingEnv(make_synthetic_market_data(60, seed=0), make_synthetic_strategies(4, seed=0), ENV_CONFIG)
+    controller = ReWTSEnsembleController({'batch_size': 32, 'buffer_size': 1000})
+    agent = DDQNAgent(11, 3, controller.config)
+
+    steps_before, updates_before = TRAIN_ENV_STEPS.get(), TRAIN_UPDATES.get()
+    controller.train_agent(agent, env, 2, num_envs=num_envs, updates_per_step=1.0 if num_envs else None)
+    steps = TRAIN_ENV_STEPS.get() - steps_before
+
+    assert TRAIN_UPDATES.get() - updates_before == steps - warm_up